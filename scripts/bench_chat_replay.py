@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""chat 파이프라인 end-to-end 부하 벤치마크 (재생 프로바이더 사용)
+
+실제 핸들러의 CLI 경로를 scripts/replay_cli.py로 바꿔, 네트워크 없이 chat 액션 전체
+(세션/히스토리/프롬프트 구성 → 스케줄러 → 프로바이더 프로세스 → 스트림 병합 → chat_complete)를
+여러 사용자가 동시에 호출했을 때의 TTFT/완료 지연/처리량을 측정합니다.
+
+사용:
+  python scripts/bench_chat_replay.py --provider claude --users 8 --turns 3 \
+      --first-token-ms 300 --token-ms 20
+  python scripts/bench_chat_replay.py --transcripts recordings/ --speed 4 --fail-rate 0.1
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+# 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import jwt  # noqa: E402
+
+from server.core.app_context import AppContext  # noqa: E402
+from server.core.scheduler import scheduler_from_env  # noqa: E402
+from server.handlers.claude_handler import ClaudeCodeHandler  # noqa: E402
+from server.handlers.context_handler import ContextHandler  # noqa: E402
+from server.handlers.droid_handler import DroidHandler  # noqa: E402
+from server.handlers.gemini_handler import GeminiHandler  # noqa: E402
+from server.handlers.token_usage_handler import TokenUsageHandler  # noqa: E402
+from server.ws.actions import chat as chat_actions  # noqa: E402
+from server.ws.stream_coalescer import StreamStats  # noqa: E402
+
+REPLAY_CLI = str(Path(__file__).parent / "replay_cli.py")
+JWT_SECRET = "bench-secret"
+
+
+class BenchWS:
+    """chat 응답 프레임을 받아 첫 텍스트/완료 시각을 기록하는 가짜 웹소켓"""
+
+    remote_address = ("bench", 0)
+
+    def __init__(self):
+        self.started = 0.0
+        self.first_text: float | None = None
+        self.completed: float | None = None
+        self.success = False
+        self.frames = 0
+
+    async def send(self, message: str):
+        self.frames += 1
+        payload = json.loads(message)
+        action, data = payload.get("action"), payload.get("data") or {}
+        if action == "chat_stream" and self.first_text is None:
+            if data.get("type") in ("text_delta", "content_block_delta", "assistant"):
+                self.first_text = time.perf_counter()
+        elif action == "chat_complete":
+            self.completed = time.perf_counter()
+            self.success = bool(data.get("success"))
+
+
+def make_ctx(project_root: Path) -> AppContext:
+    ctx = AppContext(
+        project_root=project_root,
+        bind_host="127.0.0.1",
+        login_required=False,
+        jwt_secret=JWT_SECRET,
+        jwt_algorithm="HS256",
+        access_ttl_seconds=3600,
+        refresh_ttl_seconds=3600,
+        login_username="",
+        login_rate_limit_max_attempts=5,
+        login_rate_limit_window_seconds=900,
+        token_expired_grace_seconds=60,
+    )
+    ctx.claude_handler = ClaudeCodeHandler(claude_path=REPLAY_CLI)
+    ctx.gemini_handler = GeminiHandler(gemini_path=REPLAY_CLI)
+    ctx.droid_handler = DroidHandler(droid_path=REPLAY_CLI)
+    ctx.context_handler = ContextHandler()
+    ctx.token_usage_handler = TokenUsageHandler()
+    ctx.scheduler = scheduler_from_env()
+    ctx.stream_stats = StreamStats()
+    return ctx
+
+
+async def run_user(ctx: AppContext, user_id: int, provider: str, turns: int, samples: dict):
+    token = jwt.encode({"user_id": user_id, "typ": "access"}, JWT_SECRET, algorithm="HS256")
+    for turn in range(turns):
+        ws = BenchWS()
+        ws.started = time.perf_counter()
+        prompt = f"user{user_id} turn{turn}: 오늘 있었던 일을 이야기해줘"
+        await chat_actions.chat(ctx, ws, {"prompt": prompt, "provider": provider, "token": token})
+        if not ws.success:
+            samples["failed"] += 1
+            continue
+        if ws.first_text is not None:
+            samples["ttft"].append((ws.first_text - ws.started) * 1000)
+        if ws.completed is not None:
+            samples["total"].append((ws.completed - ws.started) * 1000)
+        samples["frames"].append(ws.frames)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def summarize(label: str, values: list[float]):
+    if not values:
+        print(f"{label}: no samples")
+        return
+    print(
+        f"{label}: p50={percentile(values, 0.5):.1f}ms p95={percentile(values, 0.95):.1f}ms "
+        f"mean={statistics.mean(values):.1f}ms (n={len(values)})"
+    )
+
+
+async def main():
+    parser = ArgumentParser(description="chat pipeline end-to-end benchmark (replay provider)")
+    parser.add_argument("--provider", choices=["claude", "gemini", "droid"], default="claude")
+    parser.add_argument("--users", type=int, default=8, help="동시 사용자 수")
+    parser.add_argument("--turns", type=int, default=3, help="사용자당 연속 턴 수")
+    parser.add_argument("--transcripts", default="", help="녹화 transcript 파일/디렉토리")
+    parser.add_argument("--first-token-ms", type=float, default=None)
+    parser.add_argument("--token-ms", type=float, default=None)
+    parser.add_argument("--speed", type=float, default=1.0, help="녹화 타이밍 배속")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--fail-mode", choices=["exit", "hang", "truncate"], default="exit")
+    args = parser.parse_args()
+
+    # 재생 CLI는 환경변수로 설정을 받음 (핸들러 생성 전에 지정)
+    os.environ["REPLAY_PROVIDER"] = args.provider
+    os.environ["REPLAY_TRANSCRIPTS"] = args.transcripts
+    os.environ["REPLAY_SPEED"] = str(args.speed)
+    os.environ["REPLAY_FAIL_RATE"] = str(args.fail_rate)
+    os.environ["REPLAY_FAIL_MODE"] = args.fail_mode
+    for name, value in (
+        ("REPLAY_FIRST_TOKEN_MS", args.first_token_ms),
+        ("REPLAY_TOKEN_MS", args.token_ms),
+    ):
+        if value is not None:
+            os.environ[name] = str(value)
+
+    samples: dict = {"ttft": [], "total": [], "frames": [], "failed": 0}
+    with tempfile.TemporaryDirectory() as tmp:
+        ctx = make_ctx(Path(tmp))
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                run_user(ctx, user_id, args.provider, args.turns, samples)
+                for user_id in range(1, args.users + 1)
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    total_turns = args.users * args.turns
+    print(f"provider={args.provider} users={args.users} turns/user={args.turns}")
+    summarize("TTFT", samples["ttft"])
+    summarize("complete", samples["total"])
+    if samples["frames"]:
+        print(f"frames/turn: mean={statistics.mean(samples['frames']):.1f}")
+    print(f"failed: {samples['failed']}/{total_turns}")
+    print(f"throughput: {total_turns / elapsed:.2f} turns/s over {elapsed:.2f}s")
+    print(f"stream stats: {ctx.stream_stats.snapshot()}")
+    if ctx.scheduler is not None:
+        print(f"scheduler: {ctx.scheduler.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
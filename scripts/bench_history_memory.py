@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""메모리 히스토리 저장 방식별 메모리 사용량 벤치마크
+
+방 N개 × 메시지 M건을 HistoryHandler에 채우고 tracemalloc으로 증가량을 잽니다.
+비교 대상(legacy)은 이전 저장 방식을 그대로 흉내 낸 것입니다:
+메시지마다 {"role", "content"} dict를 전체 기록 list와 윈도우 deque에 이중 보관하고,
+"역할: 내용" 줄/서사 조각 문자열과 토큰 수 list[int]를 따로 둡니다.
+메시지 내용 문자열은 두 방식 모두 메시지마다 새로 만듭니다 (DB/JSON에서 읽은 것과 같은 조건).
+
+사용:
+  python scripts/bench_history_memory.py --rooms 10000 --messages 100
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from collections import deque
+from pathlib import Path
+
+# 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from server.core.tokens import estimate_message_tokens  # noqa: E402
+from server.handlers.history_handler import HistoryHandler  # noqa: E402
+
+
+class LegacyHistory:
+    """이전 저장 방식 (dict 레코드 이중 보관 + 렌더링 문자열 캐시)"""
+
+    def __init__(self, max_turns=30):
+        self.full_history: list[dict] = []
+        self.history: deque = deque(maxlen=max_turns)
+        self._token_counts: list[int] = []
+        self._token_prefix: list[int] = [0]
+        self._lines: list[str] = []
+        self._line_offsets: list[int] = [0]
+        self._narrative_parts: list[str] = []
+
+    def _append(self, role: str, content: str):
+        message = {"role": role, "content": content}
+        self.full_history.append(message)
+        self.history.append(message)
+        tokens = estimate_message_tokens(content)
+        self._token_counts.append(tokens)
+        self._token_prefix.append(self._token_prefix[-1] + tokens)
+        index = len(self.full_history)
+        if role == "user":
+            line = f"사용자: {content}\n"
+            part = f"## {index}. 사용자\n\n{content}\n\n"
+        else:
+            line = f"AI: {content}\n"
+            part = f"## {index}. AI 응답\n\n{content}\n\n---\n\n"
+        self._lines.append(line)
+        self._line_offsets.append(self._line_offsets[-1] + len(line))
+        self._narrative_parts.append(part)
+
+    def add_user_message(self, content):
+        self._append("user", content)
+
+    def add_assistant_message(self, content):
+        self._append("assistant", content)
+
+
+def fill(factory, rooms: int, messages: int) -> tuple[list, int]:
+    """방을 채우고 (보관 객체, 증가한 bytes) 반환"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = []
+    for r in range(rooms):
+        history = factory()
+        for i in range(messages):
+            if i % 2 == 0:
+                history.add_user_message(f"{r}번 방 {i}번째 행동: 부두로 달려가 배를 살핀다.")
+            else:
+                history.add_assistant_message(f"[Narrator]: {r}-{i} 안개가 짙어지고 종이 울린다.")
+        kept.append(history)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return kept, used
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=100)
+    args = parser.parse_args()
+
+    total = args.rooms * args.messages
+    results = {}
+    for name, factory in (
+        ("legacy", lambda: LegacyHistory(max_turns=30)),
+        ("compact", lambda: HistoryHandler(max_turns=30)),
+    ):
+        kept, used = fill(factory, args.rooms, args.messages)
+        results[name] = used
+        print(f"{name:8}: {used / 1024 / 1024:8.1f} MiB ({used / total:6.1f} B/message)")
+        del kept
+    print(f"reduction: {1 - results['compact'] / results['legacy']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
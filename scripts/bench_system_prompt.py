@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""시스템 프롬프트 조립 비용 마이크로 벤치마크
+
+실제 방 하나 분량의 컨텍스트(세계관/캐릭터/진행자 설정)와 최근 히스토리로
+ContextHandler.build_system_prompt를 반복 호출해, 컴파일 캐시 OFF(매 턴 조립)와
+ON(컨텍스트 해시 적중 시 히스토리만 덧붙임)의 턴당 비용을 비교합니다.
+--rooms를 2 이상 주면 --switch-every 턴마다 다른 방 컨텍스트를 로드합니다 (방 전환 시에는
+컨텍스트 해시를 한 번 다시 계산하므로 그 비용도 턴당 비용에 포함됩니다).
+
+사용:
+  python scripts/bench_system_prompt.py --turns 20000 --characters 6
+  python scripts/bench_system_prompt.py --rooms 4 --switch-every 10
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+# 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from server.handlers.context_handler import ContextHandler  # noqa: E402
+from server.handlers.history_handler import HistoryHandler  # noqa: E402
+
+
+def make_context(room: int, characters: int) -> dict:
+    return {
+        "world": f"방 {room}의 세계관: 마법과 증기기관이 공존하는 항구 도시. " * 8,
+        "situation": "축제 전날 밤, 항구에 정체불명의 배가 들어온다. " * 3,
+        "user_character": "견습 연금술사. 호기심이 많고 말이 빠르다.",
+        "characters": [
+            {"name": f"캐릭터{i}", "description": f"캐릭터{i}의 성격과 말투 설명. " * 6}
+            for i in range(characters)
+        ],
+        "narrator_enabled": True,
+        "narrator_mode": "active",
+        "narrator_drive": "guide",
+        "choice_policy": "require",
+        "output_level": "more",
+        "pace": "slow",
+    }
+
+
+def make_history(turns: int = 15) -> str:
+    history = HistoryHandler(max_turns=turns)
+    for i in range(turns):
+        history.add_user_message(f"{i}번째 행동: 부두로 달려가 배를 살핀다.")
+        history.add_assistant_message(f"[Narrator]: {i}번째 묘사. 안개가 짙어진다.")
+    return history.get_history_text()
+
+
+def run(
+    handler: ContextHandler,
+    contexts: list[dict],
+    turns: int,
+    switch_every: int,
+    history_text: str,
+) -> float:
+    """턴당 평균 조립 시간(μs). switch_every 턴마다 다음 방 컨텍스트를 로드 (로드 시간은 제외)"""
+    elapsed = 0.0
+    for turn in range(turns):
+        if turn % switch_every == 0:
+            handler.load_from_dict(contexts[(turn // switch_every) % len(contexts)])
+        started = time.perf_counter()
+        handler.build_system_prompt(history_text)
+        elapsed += time.perf_counter() - started
+    return elapsed / turns * 1e6
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=20000)
+    parser.add_argument("--characters", type=int, default=6)
+    parser.add_argument("--rooms", type=int, default=1, help="번갈아 사용할 방 수")
+    parser.add_argument("--switch-every", type=int, default=10, help="방 전환 간격(턴)")
+    parser.add_argument("--cache-size", type=int, default=64)
+    args = parser.parse_args()
+
+    contexts = [make_context(r, args.characters) for r in range(args.rooms)]
+    history_text = make_history()
+
+    cold = ContextHandler(prompt_cache_size=0)
+    warm = ContextHandler(prompt_cache_size=args.cache_size)
+    prompt_len = len(cold.build_system_prompt(history_text))
+    switch_every = max(1, args.switch_every)
+    cold_us = run(cold, contexts, args.turns, switch_every, history_text)
+    warm_us = run(warm, contexts, args.turns, switch_every, history_text)
+
+    print(f"prompt size: {prompt_len} chars, rooms: {args.rooms}, turns: {args.turns}")
+    print(f"cache off: {cold_us:.1f}μs/turn")
+    print(f"cache on : {warm_us:.1f}μs/turn ({warm.prompt_cache_stats()})")
+    print(f"speedup  : {cold_us / warm_us:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""예열(warm-spare) 프로세스 풀 첫 토큰 지연(TTFT) 벤치마크
+
+부팅에 시간이 걸리는 스텁 CLI(Gemini stream-json 형식)를 임시 디렉토리에 만들고,
+GeminiHandler로 같은 요청을 여러 번 보내 예열 풀 ON/OFF의 TTFT를 비교합니다.
+네트워크나 실제 CLI 없이 실행됩니다.
+
+사용:
+  python scripts/bench_warm_pool.py --boot-ms 800 --turns 5 --pool-size 1
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import stat
+import statistics
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+# 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from server.handlers.gemini_handler import GeminiHandler  # noqa: E402
+
+STUB_CLI = """#!{python}
+import json, sys, time
+time.sleep({boot_s})  # CLI 부팅 시간 흉내
+prompt = sys.stdin.read()
+print(json.dumps({{"type": "init", "session_id": "bench"}}), flush=True)
+for tok in ["안녕", "하세요", "."]:
+    print(json.dumps({{"type": "message", "role": "assistant", "content": tok, "delta": True}}), flush=True)
+"""
+
+
+def write_stub(directory: str, boot_ms: int) -> str:
+    path = os.path.join(directory, "stub_cli.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(STUB_CLI.format(python=sys.executable, boot_s=boot_ms / 1000))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    return path
+
+
+async def measure(stub: str, pool_size: int, turns: int, gap_s: float) -> list[float]:
+    os.environ["GEMINI_WARM_POOL_SIZE"] = str(pool_size)
+    handler = GeminiHandler(gemini_path=stub)
+    samples: list[float] = []
+    try:
+        for _ in range(turns):
+            started = time.perf_counter()
+            first: list[float] = []
+
+            async def cb(event, started=started, first=first):
+                if event.get("type") == "content_block_delta" and not first:
+                    first.append(time.perf_counter() - started)
+
+            await handler.send_message("ping", callback=cb)
+            if first:
+                samples.append(first[0] * 1000)
+            # 사용자의 다음 입력까지의 간격(이 사이에 예열본이 채워짐)
+            await asyncio.sleep(gap_s)
+        print(f"  pool stats: {handler.warm_pool.stats()}")
+    finally:
+        await handler.warm_pool.close()
+    return samples
+
+
+def summarize(label: str, samples: list[float]):
+    if not samples:
+        print(f"{label}: no samples")
+        return
+    print(
+        f"{label}: TTFT mean={statistics.mean(samples):.1f}ms "
+        f"min={min(samples):.1f}ms max={max(samples):.1f}ms (n={len(samples)})"
+    )
+
+
+async def main():
+    parser = ArgumentParser(description="warm-spare pool TTFT benchmark")
+    parser.add_argument("--boot-ms", type=int, default=800, help="스텁 CLI 부팅 시간(ms)")
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--pool-size", type=int, default=1)
+    args = parser.parse_args()
+
+    gap_s = args.boot_ms / 1000 * 1.5
+    with tempfile.TemporaryDirectory() as tmp:
+        stub = write_stub(tmp, args.boot_ms)
+        print("cold (pool disabled)")
+        cold = await measure(stub, 0, args.turns, gap_s)
+        print(f"warm (pool size {args.pool_size})")
+        warm = await measure(stub, args.pool_size, args.turns, gap_s)
+
+    summarize("cold", cold)
+    summarize("warm", warm)
+    if cold and warm:
+        print(f"improvement: {statistics.mean(cold) - statistics.mean(warm):.1f}ms per turn")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
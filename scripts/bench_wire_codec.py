@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""WebSocket 프레임 인코딩별 크기/시간 비교
+
+한글 채팅 스트림 델타, room_load 히스토리, 서사(narrative) 프레임을 만들어
+이전 인코딩(json.dumps 기본값: \\uXXXX 이스케이프 + 공백 구분자), compact UTF-8 JSON(wire.dumps),
+msgpack(설치된 경우)의 프레임당 바이트와 인코딩 시간을 비교합니다.
+
+사용:
+  python scripts/bench_wire_codec.py --messages 50 --repeat 2000
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+# 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from server.core import wire  # noqa: E402
+
+
+def make_frames(messages: int) -> dict[str, dict]:
+    history = [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": (
+                f"{i}번째 행동: 부두로 달려가 배를 살핀다."
+                if i % 2 == 0
+                else f"[Narrator]: {i}번째 묘사. 안개가 짙어지고 멀리서 종이 울린다."
+            ),
+        }
+        for i in range(messages)
+    ]
+    return {
+        "chat_stream": {
+            "action": "chat_stream",
+            "data": {"type": "text_delta", "text": "[민수]: 그 배는 어젯밤부터 저기 있었어요."},
+        },
+        "room_load": {
+            "action": "room_load",
+            "data": {"success": True, "room_id": "r1", "messages": history, "has_more": True},
+        },
+        "narrative": {
+            "action": "get_narrative",
+            "data": {
+                "success": True,
+                "markdown": "".join(
+                    f"## {i}. AI 응답\n\n{m['content']}\n\n" for i, m in enumerate(history)
+                ),
+            },
+        },
+    }
+
+
+def measure(encode, obj, repeat: int) -> tuple[int, float]:
+    size = len(encode(obj))
+    started = time.perf_counter()
+    for _ in range(repeat):
+        encode(obj)
+    return size, (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    encoders = {
+        "legacy": lambda o: json.dumps(o).encode(),
+        "compact": lambda o: wire.dumps(o).encode(),
+    }
+    if wire.msgpack is not None:
+        encoders["msgpack"] = lambda o: wire.msgpack.packb(o, use_bin_type=True)
+    else:
+        print("msgpack 미설치: legacy/compact만 비교합니다")
+
+    for name, frame in make_frames(args.messages).items():
+        results = {codec: measure(enc, frame, args.repeat) for codec, enc in encoders.items()}
+        base = results["legacy"][0]
+        row = ", ".join(
+            f"{codec} {size}B ({size / base:.0%}) {us:.1f}μs"
+            for codec, (size, us) in results.items()
+        )
+        print(f"{name:12}: {row}")
+
+
+if __name__ == "__main__":
+    main()
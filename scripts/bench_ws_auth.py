@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""WebSocket 액션당 인증 비용 마이크로 벤치마크
+
+session_manager.get_user_id_from_token을 반복 호출해 세 가지 경로의 액션당 비용을 비교합니다.
+    - per-message : 메시지마다 token 필드를 jwt.decode로 검증 (이전 방식)
+    - token cache : 검증된 토큰 LRU(TokenCache) 적중 (HTTP/토큰을 싣는 메시지)
+    - connection  : auth 핸드셰이크로 연결에 묶인 인증 (token 필드 없음)
+
+사용:
+  python scripts/bench_ws_auth.py --actions 50000
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+# 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import jwt  # noqa: E402
+
+from server.core import session_manager as sm  # noqa: E402
+from server.core.app_context import AppContext  # noqa: E402
+from server.core.auth import bind_connection, current_connection  # noqa: E402
+from server.core.token_cache import TokenCache  # noqa: E402
+
+
+def make_ctx() -> AppContext:
+    return AppContext(
+        project_root=Path("."),
+        bind_host="127.0.0.1",
+        login_required=True,
+        jwt_secret="bench-secret-" + "x" * 32,
+        jwt_algorithm="HS256",
+        access_ttl_seconds=3600,
+        refresh_ttl_seconds=7200,
+        login_username="",
+        login_rate_limit_max_attempts=5,
+        login_rate_limit_window_seconds=900,
+        token_expired_grace_seconds=60,
+    )
+
+
+def run(ctx: AppContext, message: dict, actions: int) -> float:
+    """액션당 평균 인증 시간(μs)"""
+    started = time.perf_counter()
+    for _ in range(actions):
+        if sm.get_user_id_from_token(ctx, dict(message)) != 7:
+            raise SystemExit("authentication failed")
+    return (time.perf_counter() - started) / actions * 1e6
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actions", type=int, default=50000)
+    args = parser.parse_args()
+
+    ctx = make_ctx()
+    token = jwt.encode(
+        {"user_id": 7, "typ": "access", "exp": int(time.time()) + 3600},
+        ctx.jwt_secret,
+        algorithm=ctx.jwt_algorithm,
+    )
+    message = {"action": "room_list", "token": token}
+
+    plain_us = run(ctx, message, args.actions)
+
+    ctx.token_cache = TokenCache(max_size=1024)
+    cached_us = run(ctx, message, args.actions)
+
+    bind_connection(ctx, "ws", token)
+    current_connection.set(ctx.connection_auth["ws"])
+    conn_us = run(ctx, {"action": "room_list"}, args.actions)
+
+    print(f"actions: {args.actions}")
+    print(f"per-message : {plain_us:6.2f}μs/action")
+    print(f"token cache : {cached_us:6.2f}μs/action ({plain_us / cached_us:.1f}x)")
+    print(f"connection  : {conn_us:6.2f}μs/action ({plain_us / conn_us:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
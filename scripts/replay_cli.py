@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""재생(replay) 프로바이더 CLI
+
+녹화된 stream-json transcript(없으면 합성 응답)를 실제 CLI처럼 stdout으로 재생합니다.
+CLAUDE_PATH / GEMINI_PATH / DROID_PATH에 이 파일 경로를 지정하면 네트워크 없이
+chat 파이프라인 전체를 돌릴 수 있습니다. 옵션은 server/core/replay.py 참고.
+
+사용:
+  PROVIDER_RECORD_DIR=recordings ...           # 실제 CLI로 녹화
+  GEMINI_PATH=scripts/replay_cli.py REPLAY_TRANSCRIPTS=recordings REPLAY_SPEED=2 ...
+"""
+
+import sys
+from pathlib import Path
+
+# 프로젝트 루트를 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from server.core.replay import run_cli  # noqa: E402
+
+if __name__ == "__main__":
+    sys.exit(run_cli())
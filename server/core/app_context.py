@@ -33,7 +33,10 @@ class AppContext:
     login_attempts: dict = field(default_factory=dict)
     websocket_to_session: dict = field(default_factory=dict)
     sessions: dict = field(default_factory=dict)
-    cancel_flags: dict = field(default_factory=dict)  # websocket -> bool (스트림 취소 플래그)
+    # websocket -> {room_id: StreamHandle} (진행 중인 채팅 스트림, 하드 취소용)
+    active_streams: dict = field(default_factory=dict)
+    # websocket -> ConnectionAuth (auth 핸드셰이크로 연결에 묶인 인증)
+    connection_auth: dict = field(default_factory=dict)
 
     # 핸들러/서비스
     file_handler: Any | None = None
@@ -46,3 +49,12 @@ class AppContext:
     mode_handler: Any | None = None
     token_usage_handler: Any | None = None
     db_handler: Any | None = None
+    scheduler: Any | None = None  # 프로바이더 호출 공정 스케줄러 (None이면 입장 제어 없음)
+    stream_stats: Any | None = None  # chat_stream 병합 지표 (StreamStats)
+    health: Any | None = None  # 프로바이더 회로 차단기 (HealthRegistry, None이면 비활성)
+    summarizer: Any | None = None  # 오래된 대화 누적 요약 (Summarizer, None이면 비활성)
+    room_contexts: Any | None = None  # 방별 컨텍스트 LRU (RoomContextCache, None이면 전역 컨텍스트)
+    room_evictor: Any | None = None  # 유휴 방 히스토리 정리 (RoomEvictor, None이면 비활성)
+    chat_dedup: Any | None = None  # chat 멱등성 키 표 (ChatDedup, None이면 비활성)
+    wire_stats: Any | None = None  # 코덱별 WebSocket 송신 바이트 지표 (WireStats)
+    token_cache: Any | None = None  # 검증된 JWT LRU (TokenCache, None이면 매번 서명 검증)
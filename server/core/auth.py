@@ -1,33 +1,88 @@
-"""인증/JWT 유틸리티 (검증/요구 메시지)"""
+"""인증/JWT 유틸리티 (검증/요구 메시지/연결 단위 인증)"""
 
 from __future__ import annotations
 
-import json
+import time
+from contextvars import ContextVar
 
 import jwt
 
 from .app_context import AppContext
+from .wire import dumps
 
 
 def verify_token(ctx: AppContext, token: str | None, expected_type: str = "access"):
-    """JWT 검증: (payload, error_code) 반환."""
+    """JWT 검증: (payload, error_code) 반환.
+
+    ctx.token_cache가 있으면 만료 전까지 검증에 성공한 토큰은 서명 검증을 생략합니다.
+    """
     if not ctx.jwt_secret:
         return None, "jwt_disabled"
     if not token:
         return None, "missing_token"
-    try:
-        payload = jwt.decode(token, ctx.jwt_secret, algorithms=[ctx.jwt_algorithm])
-        typ = payload.get("typ", "access")
-        if expected_type and typ != expected_type:
-            return None, "invalid_token_type"
-        return payload, None
-    except jwt.ExpiredSignatureError:
-        return None, "token_expired"
-    except jwt.InvalidTokenError:
-        return None, "invalid_token"
+    cache = getattr(ctx, "token_cache", None)
+    payload = cache.get(token) if cache is not None else None
+    if payload is None:
+        try:
+            payload = jwt.decode(token, ctx.jwt_secret, algorithms=[ctx.jwt_algorithm])
+        except jwt.ExpiredSignatureError:
+            return None, "token_expired"
+        except jwt.InvalidTokenError:
+            return None, "invalid_token"
+        if cache is not None:
+            cache.put(token, payload)
+    typ = payload.get("typ", "access")
+    if expected_type and typ != expected_type:
+        return None, "invalid_token_type"
+    return payload, None
 
 
 async def send_auth_required(ctx: AppContext, websocket, reason: str = "missing_token"):
     await websocket.send(
-        json.dumps({"action": "auth_required", "data": {"required": True, "reason": reason}})
+        dumps({"action": "auth_required", "data": {"required": True, "reason": reason}})
     )
+
+
+# ===== 연결 단위 인증 =====
+# auth 핸드셰이크(또는 token_refresh)에 성공한 연결은 토큰 만료 전까지 메시지마다 JWT를
+# 다시 검증하지 않습니다. handle_message가 현재 연결의 인증 정보를 contextvar에 올려 두면
+# session_manager.get_user_id_from_token이 먼저 확인합니다.
+
+
+class ConnectionAuth:
+    """WebSocket 연결 1개에 묶인 인증 정보"""
+
+    __slots__ = ("user_id", "token", "exp")
+
+    def __init__(self, user_id: int, token: str, exp: float):
+        self.user_id = user_id
+        self.token = token
+        self.exp = exp
+
+    def valid(self, now: float | None = None) -> bool:
+        return (time.time() if now is None else now) < self.exp
+
+
+current_connection: ContextVar[ConnectionAuth | None] = ContextVar(
+    "current_connection", default=None
+)
+
+# 연결 인증 지표 (메시지 인증 중 JWT 검증을 생략한 비율 확인용)
+connection_auth_stats = {"connection_hits": 0, "token_checks": 0, "handshakes": 0}
+
+
+def bind_connection(ctx: AppContext, websocket, token: str | None):
+    """토큰을 검증해 연결에 묶음: (ConnectionAuth, error_code) 반환 (실패 시 기존 인증 해제)"""
+    payload, error = verify_token(ctx, token, expected_type="access")
+    user_id = payload.get("user_id") if payload else None
+    if error or not isinstance(user_id, int) or not isinstance(payload.get("exp"), int | float):
+        ctx.connection_auth.pop(websocket, None)
+        return None, error or "user_id_missing_in_token"
+    auth = ConnectionAuth(user_id, token, float(payload["exp"]))
+    ctx.connection_auth[websocket] = auth
+    connection_auth_stats["handshakes"] += 1
+    return auth, None
+
+
+def unbind_connection(ctx: AppContext, websocket):
+    ctx.connection_auth.pop(websocket, None)
@@ -0,0 +1,261 @@
+"""프로바이더 상태 추적과 회로 차단기 (circuit breaker)
+
+CLI가 연속으로 실패하면(인증 만료, 쿼터, 크래시 반복) 요청마다 프로세스를 띄우고
+타임아웃까지 기다리는 대신 회로를 열어 즉시 거절하거나 대체 프로바이더로 우회합니다.
+
+상태 전이:
+    closed   → open       연속 실패 N회 또는 최근 구간 오류율 초과
+    open     → half_open  open_seconds 경과 (실패가 반복될수록 두 배씩, 최대 max_open_seconds)
+    half_open→ closed     탐색(probe) 요청 성공
+    half_open→ open       탐색 요청 실패
+
+환경변수:
+    CIRCUIT_FAILURE_THRESHOLD  연속 실패 횟수 (0이면 비활성, 기본 5)
+    CIRCUIT_ERROR_RATE         최근 구간 오류율 임계값 (기본 0.5)
+    CIRCUIT_MIN_CALLS          오류율 판단 최소 호출 수 (기본 10)
+    CIRCUIT_WINDOW_SECONDS     오류율/지연 집계 구간 (기본 60)
+    CIRCUIT_OPEN_SECONDS       회로 개방 유지 시간 (기본 30)
+    CIRCUIT_MAX_OPEN_SECONDS   개방 시간 상한 (기본 300)
+    CIRCUIT_HALF_OPEN_PROBES   half-open에서 동시에 허용할 탐색 요청 수 (기본 1)
+    CIRCUIT_FAILOVER           대체 프로바이더 (예: "droid:claude,gemini:claude")
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from collections import deque
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderHealth:
+    """프로바이더 1개의 최근 호출 결과와 회로 상태"""
+
+    def __init__(self, name: str, registry: HealthRegistry):
+        self.name = name
+        self._registry = registry
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self.open_seconds = registry.open_seconds
+        self.probes_in_flight = 0
+        self.last_error: str | None = None
+        self.opened_total = 0
+        self.rejected_total = 0
+        # (시각, 성공 여부, 지연 초)
+        self._recent: deque[tuple[float, bool, float]] = deque()
+
+    def _prune(self, now: float):
+        horizon = now - self._registry.window_seconds
+        while self._recent and self._recent[0][0] < horizon:
+            self._recent.popleft()
+
+    def _open(self, now: float, reason: str):
+        if self.state == HALF_OPEN:
+            # 탐색 실패: 개방 시간을 늘려 재시도 간격을 벌림
+            self.open_seconds = min(self.open_seconds * 2, self._registry.max_open_seconds)
+        self.state = OPEN
+        self.opened_at = now
+        self.opened_total += 1
+        logger.warning(f"Circuit opened for {self.name} ({reason}); retry in {self.open_seconds}s")
+
+    def _close(self):
+        self.state = CLOSED
+        self.opened_at = None
+        self.open_seconds = self._registry.open_seconds
+        self.consecutive_failures = 0
+        logger.info(f"Circuit closed for {self.name}")
+
+    def retry_after(self, now: float | None = None) -> float:
+        if self.state != OPEN or self.opened_at is None:
+            return 0.0
+        now = self._registry.clock() if now is None else now
+        return max(0.0, self.opened_at + self.open_seconds - now)
+
+    def allow(self) -> bool:
+        """요청 허용 여부 (half-open이면 탐색 슬롯을 점유)"""
+        now = self._registry.clock()
+        if self.state == OPEN and self.retry_after(now) <= 0:
+            self.state = HALF_OPEN
+            self.probes_in_flight = 0
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and self.probes_in_flight < self._registry.half_open_probes:
+            self.probes_in_flight += 1
+            return True
+        self.rejected_total += 1
+        return False
+
+    def record(self, ok: bool | None, latency: float = 0.0, error: str | None = None):
+        """호출 결과 기록 (ok=None은 판정 없이 탐색 슬롯만 반환: 사용자 취소 등)"""
+        now = self._registry.clock()
+        was_probe = self.state == HALF_OPEN and self.probes_in_flight > 0
+        if was_probe:
+            self.probes_in_flight -= 1
+        if ok is None:
+            return
+        self._recent.append((now, ok, latency))
+        self._prune(now)
+        if ok:
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self._close()
+            return
+
+        self.consecutive_failures += 1
+        self.last_error = error
+        if self.state == HALF_OPEN:
+            self._open(now, "probe failed")
+        elif self.state == CLOSED:
+            calls = len(self._recent)
+            if self.consecutive_failures >= self._registry.failure_threshold:
+                self._open(now, f"{self.consecutive_failures} consecutive failures")
+            elif (
+                calls >= self._registry.min_calls
+                and self.error_rate() >= self._registry.error_rate_threshold
+            ):
+                self._open(now, f"error rate {self.error_rate():.0%}")
+
+    def error_rate(self) -> float:
+        if not self._recent:
+            return 0.0
+        return sum(1 for _, ok, _ in self._recent if not ok) / len(self._recent)
+
+    def stats(self) -> dict:
+        now = self._registry.clock()
+        self._prune(now)
+        latencies = sorted(lat for _, ok, lat in self._recent if ok)
+        p50 = latencies[len(latencies) // 2] if latencies else 0.0
+        error_rate = self.error_rate()
+        return {
+            "state": self.state,
+            # 0~1: 최근 성공률 (회로가 열려 있으면 0)
+            "health_score": 0.0 if self.state == OPEN else round(1.0 - error_rate, 3),
+            "recent_calls": len(self._recent),
+            "error_rate": round(error_rate, 3),
+            "latency_p50_ms": round(p50 * 1000, 1),
+            "consecutive_failures": self.consecutive_failures,
+            "retry_after_s": round(self.retry_after(now), 1),
+            "opened_total": self.opened_total,
+            "rejected_total": self.rejected_total,
+            "last_error": self.last_error,
+        }
+
+
+class RouteSlot:
+    """route()가 허용한 슬롯 1개 (half-open이면 탐색 슬롯)
+
+    프로바이더 호출을 시작하기 전에 빠져나가면(조기 반환/예외/취소) release()가 판정 없이
+    슬롯을 반환합니다. 호출을 시작한 뒤의 결과는 호출 측 record()가 기록합니다.
+    """
+
+    def __init__(self, registry: HealthRegistry, provider: str):
+        self._registry = registry
+        self.provider = provider
+        self.started = False
+
+    def start(self):
+        self.started = True
+
+    def release(self):
+        if not self.started:
+            self.started = True
+            self._registry.record(self.provider, None)
+
+
+class HealthRegistry:
+    """Claude/Gemini/Droid가 공유하는 프로바이더 상태 레지스트리"""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        error_rate_threshold: float = 0.5,
+        min_calls: int = 10,
+        window_seconds: float = 60.0,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 300.0,
+        half_open_probes: int = 1,
+        failover: dict[str, str] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.error_rate_threshold = error_rate_threshold
+        self.min_calls = max(1, int(min_calls))
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max(open_seconds, max_open_seconds)
+        self.half_open_probes = max(1, int(half_open_probes))
+        self.failover = dict(failover or {})
+        self.clock = clock
+        self._providers: dict[str, ProviderHealth] = {}
+        self.failovers_total = 0
+
+    def get(self, provider: str) -> ProviderHealth:
+        health = self._providers.get(provider)
+        if health is None:
+            health = self._providers[provider] = ProviderHealth(provider, self)
+        return health
+
+    def route(
+        self, provider: str, available: Callable[[str], bool] = lambda _p: True
+    ) -> tuple[str | None, str | None]:
+        """(실제로 호출할 프로바이더, 우회 전 프로바이더) 결정
+
+        회로가 닫혀 있거나 탐색이 허용되면 그대로, 열려 있으면 대체 프로바이더로 우회하고,
+        대체도 불가하면 (None, None)을 반환합니다.
+        """
+        if self.get(provider).allow():
+            return provider, None
+        alternate = self.failover.get(provider)
+        if alternate and alternate != provider and available(alternate):
+            if self.get(alternate).allow():
+                self.failovers_total += 1
+                logger.warning(f"Failing over {provider} → {alternate} (circuit open)")
+                return alternate, provider
+        return None, None
+
+    def record(self, provider: str, ok: bool | None, latency: float = 0.0, error=None):
+        self.get(provider).record(ok, latency, None if error is None else str(error)[:200])
+
+    def stats(self) -> dict:
+        return {
+            "failover": dict(self.failover),
+            "failovers_total": self.failovers_total,
+            "providers": {name: h.stats() for name, h in self._providers.items()},
+        }
+
+
+def _parse_failover(spec: str) -> dict[str, str]:
+    """'droid:claude,gemini:claude' → {'droid': 'claude', 'gemini': 'claude'}"""
+    mapping: dict[str, str] = {}
+    for item in spec.split(","):
+        if ":" not in item:
+            continue
+        src, dst = (part.strip().lower() for part in item.split(":", 1))
+        if src and dst:
+            mapping[src] = dst
+    return mapping
+
+
+def health_from_env() -> HealthRegistry | None:
+    """환경변수로 레지스트리 생성 (CIRCUIT_FAILURE_THRESHOLD=0이면 None)"""
+    threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    if threshold <= 0:
+        return None
+    return HealthRegistry(
+        failure_threshold=threshold,
+        error_rate_threshold=float(os.getenv("CIRCUIT_ERROR_RATE", "0.5")),
+        min_calls=int(os.getenv("CIRCUIT_MIN_CALLS", "10")),
+        window_seconds=float(os.getenv("CIRCUIT_WINDOW_SECONDS", "60")),
+        open_seconds=float(os.getenv("CIRCUIT_OPEN_SECONDS", "30")),
+        max_open_seconds=float(os.getenv("CIRCUIT_MAX_OPEN_SECONDS", "300")),
+        half_open_probes=int(os.getenv("CIRCUIT_HALF_OPEN_PROBES", "1")),
+        failover=_parse_failover(os.getenv("CIRCUIT_FAILOVER", "")),
+    )
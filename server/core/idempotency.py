@@ -0,0 +1,225 @@
+"""chat 요청 멱등성 (재전송 중복 제거)
+
+클라이언트는 재연결 후 마지막 chat을 다시 보냅니다(RETRY_ACTIONS). 같은 요청이 두 번 처리되면
+프로바이더 호출 비용을 두 번 내고 사용자 메시지도 DB에 두 번 저장됩니다.
+클라이언트가 chat마다 idempotency_key를 붙이면 ChatDedup이 (user_id, key)별로
+    - 진행 중인 요청: 새 연결을 구독자로 붙여 남은 스트림과 chat_complete를 함께 받게 하고
+    - 끝난 요청: 저장해 둔 chat_complete를 다시 보냅니다 (deduplicated: true)
+CLI는 다시 호출하지 않습니다. 끝난 키는 TTL이 지나면 만료됩니다.
+
+키가 붙은 스트림은 연결이 끊겨도 취소하지 않고 끝까지 진행합니다(재연결 후 이어 받기 위해).
+프레임에는 seq가 붙어 ReplayBuffer(core/stream_replay.py)에 보관되며, 재연결한 클라이언트는
+resume_stream {idempotency_key, last_seq}로 놓친 프레임부터 이어 받습니다.
+
+환경변수:
+    CHAT_IDEMPOTENCY_TTL_SECONDS  끝난 요청 결과 보관 시간 (0이면 비활성, 기본 600)
+    CHAT_IDEMPOTENCY_MAX_KEYS     보관할 최대 키 수 (넘으면 오래된 완료 키부터 제거, 기본 4096)
+    STREAM_REPLAY_MAX_FRAMES      스트림 1건의 재전송용 보관 프레임 수 (넘으면 스냅샷으로 대체, 기본 1024)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from .stream_replay import ReplayBuffer
+from .wire import dumps, frame_prefix
+
+logger = logging.getLogger(__name__)
+
+_COMPLETE_PREFIX = frame_prefix("chat_complete")
+
+
+class ChatEntry:
+    """idempotency_key 1개의 진행 상태와 결과 (구독 중인 연결 모두에 프레임 전송)"""
+
+    def __init__(self, key: str, websocket, max_frames: int = 1024):
+        self.key = key
+        self.replay = ReplayBuffer(max_frames)
+        self.subscribers = [websocket]
+        # 중복 요청으로 나중에 붙은 연결 (종료 시 active_streams 정리용)
+        self.attached: list = []
+        self.done = False
+        self.result_frame: str | None = None
+        self.handle = None
+        # 연결 종료와 무관하게 끝까지 실행되는 chat 태스크 (참조 유지용)
+        self.task = None
+        self.room_id: str | None = None
+        self.expires_at = 0.0
+
+    def bind(self, handle, room_id: str):
+        """진행 중인 스트림 핸들 연결 (나중에 붙은 연결도 취소할 수 있도록)"""
+        self.handle = handle
+        self.room_id = room_id
+
+    def snapshot(self) -> str:
+        """지금까지의 응답 텍스트 (재전송 버퍼로 이어 줄 수 없을 때 사용)"""
+        if self.result_frame is not None:
+            data = json.loads(self.result_frame).get("data") or {}
+            return data.get("message") or data.get("partial_message") or ""
+        return self.handle.partial_text if self.handle is not None else ""
+
+    @property
+    def congested(self) -> bool:
+        """구독 중인 연결 중 송신 큐가 밀린 것이 있는지 (스트림 병합기 flush 보류 기준)"""
+        return any(getattr(ws, "congested", False) for ws in self.subscribers)
+
+    async def send(self, frame: str):
+        complete = frame.startswith(_COMPLETE_PREFIX)
+        frame = self.replay.append(frame)
+        if complete:
+            self.result_frame = frame
+        for ws in list(self.subscribers):
+            try:
+                await ws.send(frame)
+            except Exception as exc:
+                # 끊긴 연결은 구독에서 제외하고 나머지에는 계속 전송
+                logger.debug(f"chat subscriber dropped: {exc}")
+                if ws in self.subscribers:
+                    self.subscribers.remove(ws)
+
+
+class ChatDedup:
+    """(user_id, idempotency_key) → ChatEntry 표"""
+
+    def __init__(self, ttl_seconds: float = 600.0, max_keys: int = 4096, max_frames: int = 1024):
+        self.ttl_seconds = max(1.0, float(ttl_seconds))
+        self.max_keys = max(1, int(max_keys))
+        self.max_frames = max(1, int(max_frames))
+        self._entries: OrderedDict[tuple, ChatEntry] = OrderedDict()
+        self.started_total = 0
+        self.attached_total = 0
+        self.replayed_total = 0
+        self.resumed_total = 0
+        self.resume_snapshots_total = 0
+        self.replayed_frames_total = 0
+
+    def _purge(self, now: float):
+        for k in [k for k, e in self._entries.items() if e.done and e.expires_at <= now]:
+            self._entries.pop(k, None)
+        if len(self._entries) > self.max_keys:
+            for k in [k for k, e in self._entries.items() if e.done]:
+                self._entries.pop(k, None)
+                if len(self._entries) <= self.max_keys:
+                    break
+
+    def begin(self, user_id, key: str, websocket) -> tuple[ChatEntry, bool]:
+        """키 등록 (이미 있으면 기존 항목과 False 반환)"""
+        self._purge(time.monotonic())
+        entry = self._entries.get((user_id, key))
+        if entry is not None:
+            return entry, False
+        entry = ChatEntry(key, websocket, self.max_frames)
+        self._entries[(user_id, key)] = entry
+        self.started_total += 1
+        return entry, True
+
+    def lookup(self, user_id, key: str) -> ChatEntry | None:
+        self._purge(time.monotonic())
+        return self._entries.get((user_id, key))
+
+    async def _send_snapshot(self, entry: ChatEntry, websocket) -> int:
+        """chat_resume 스냅샷 전송 (클라이언트는 누적 텍스트를 교체). 스냅샷 기준 seq 반환"""
+        seq = entry.replay.last_seq
+        if entry.result_frame is not None:
+            seq -= 1  # 완료 프레임은 스냅샷 뒤에 이어서 보냄
+        await websocket.send(
+            dumps(
+                {
+                    "action": "chat_resume",
+                    "data": {
+                        "idempotency_key": entry.key,
+                        "room_id": entry.room_id,
+                        "partial_message": entry.snapshot(),
+                        "seq": seq,
+                    },
+                }
+            )
+        )
+        return seq
+
+    async def attach(self, ctx, entry: ChatEntry, websocket, last_seq: int | None = None):
+        """중복 요청/재연결 처리: 놓친 프레임을 보낸 뒤 진행 중이면 구독자로 추가
+
+        last_seq가 없으면(같은 키의 chat 재전송) 끝난 요청은 결과만 다시 보내고,
+        진행 중인 요청은 스냅샷부터 이어 줍니다.
+        """
+        if last_seq is None and entry.done:
+            self.replayed_total += 1
+            payload = json.loads(entry.result_frame)
+            payload.setdefault("data", {})["deduplicated"] = True
+            await websocket.send(dumps(payload))
+            return
+        if last_seq is None:
+            self.attached_total += 1
+            sent = await self._send_snapshot(entry, websocket)
+        else:
+            self.resumed_total += 1
+            sent = max(0, int(last_seq))
+
+        # 재전송 중에도 새 프레임이 쌓이므로 따라잡을 때까지 반복한 뒤 (await 없이) 구독 등록
+        while True:
+            backlog = entry.replay.since(sent)
+            if backlog is None:
+                self.resume_snapshots_total += 1
+                sent = await self._send_snapshot(entry, websocket)
+                continue
+            if not backlog:
+                break
+            for seq, frame in backlog:
+                await websocket.send(frame)
+                sent = seq
+            self.replayed_frames_total += len(backlog)
+
+        if entry.done:
+            return
+        if websocket not in entry.subscribers:
+            entry.subscribers.append(websocket)
+            entry.attached.append(websocket)
+        if entry.handle is not None:
+            ctx.active_streams.setdefault(websocket, {})[entry.room_id] = entry.handle
+
+    def finish(self, ctx, user_id, entry: ChatEntry):
+        """요청 종료: 결과가 있으면 TTL 동안 보관, 없으면(동의 필요 등) 바로 제거"""
+        entry.done = True
+        entry.expires_at = time.monotonic() + self.ttl_seconds
+        for ws in entry.attached:
+            room_streams = ctx.active_streams.get(ws, {})
+            if room_streams.get(entry.room_id) is entry.handle:
+                room_streams.pop(entry.room_id, None)
+            if not room_streams:
+                ctx.active_streams.pop(ws, None)
+        entry.subscribers = []
+        entry.attached = []
+        entry.task = None
+        # 끝난 스트림은 완료 프레임만 남김 (놓친 앞부분은 스냅샷으로 대체)
+        entry.replay.release(keep_last=1)
+        if entry.result_frame is None:
+            self._entries.pop((user_id, entry.key), None)
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._entries),
+            "in_flight": sum(1 for e in self._entries.values() if not e.done),
+            "started_total": self.started_total,
+            "dedup_attached_total": self.attached_total,
+            "dedup_replayed_total": self.replayed_total,
+            "resumed_total": self.resumed_total,
+            "resume_snapshots_total": self.resume_snapshots_total,
+            "replayed_frames_total": self.replayed_frames_total,
+        }
+
+
+def chat_dedup_from_env() -> ChatDedup | None:
+    """환경변수로 ChatDedup 생성 (CHAT_IDEMPOTENCY_TTL_SECONDS=0이면 None)"""
+    ttl = float(os.getenv("CHAT_IDEMPOTENCY_TTL_SECONDS", "600"))
+    if ttl <= 0:
+        return None
+    return ChatDedup(
+        ttl_seconds=ttl,
+        max_keys=int(os.getenv("CHAT_IDEMPOTENCY_MAX_KEYS", "4096")),
+        max_frames=int(os.getenv("STREAM_REPLAY_MAX_FRAMES", "1024")),
+    )
@@ -0,0 +1,248 @@
+"""지연 시간 표본 집계와 적응형 타임아웃
+
+- RollingPercentile: 최근 N개 표본의 백분위수/히스토그램
+- LatencyTracker: (프로바이더, 모델)별 첫 토큰 지연(TTFT)과 토큰 간 간격을 모아
+  첫 토큰 타임아웃/유휴 타임아웃을 유도합니다. 표본이 충분하면
+  백분위수 × 배수를 [하한, 상한]으로 제한하고, 부족하면 상한을 그대로 씁니다.
+- StreamTiming: 요청 1건의 readline 타임아웃 계산 및 표본 기록
+
+환경변수 (프로바이더별로 CLAUDE_/GEMINI_/DROID_ 접두사로 덮어쓸 수 있음):
+    LATENCY_FIRST_TOKEN_FLOOR / LATENCY_FIRST_TOKEN_CEILING   첫 토큰 타임아웃 하한/상한(초)
+    LATENCY_IDLE_FLOOR / LATENCY_IDLE_CEILING                 토큰 간 유휴 타임아웃 하한/상한(초)
+    LATENCY_TIMEOUT_PERCENTILE                                기준 백분위수 (기본 99)
+    LATENCY_TIMEOUT_MULTIPLIER                                백분위수에 곱할 여유 배수 (기본 3)
+    LATENCY_MIN_SAMPLES                                       적응 시작 최소 표본 수 (기본 20)
+    LATENCY_WINDOW                                            모델별 유지 표본 수 (기본 500)
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections import deque
+
+# 모니터링용 히스토그램 버킷 상한(ms)
+HISTOGRAM_BOUNDS_MS = (100, 250, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+
+class RollingPercentile:
+    """최근 window개 표본의 백분위수"""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=max(1, int(window)))
+
+    def add(self, value: float) -> None:
+        self._samples.append(float(value))
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> float | None:
+        """nearest-rank 백분위수 (표본이 없으면 None)"""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, -(-len(ordered) * pct // 100))  # ceil
+        return ordered[min(len(ordered), int(rank)) - 1]
+
+    def histogram(self, bounds_ms=HISTOGRAM_BOUNDS_MS) -> dict[str, int]:
+        """초 단위 표본을 ms 버킷별 개수로 ("le_<ms>", 마지막은 "inf")"""
+        counts = {f"le_{b}": 0 for b in bounds_ms}
+        counts["inf"] = 0
+        for value in self._samples:
+            ms = value * 1000
+            for b in bounds_ms:
+                if ms <= b:
+                    counts[f"le_{b}"] += 1
+                    break
+            else:
+                counts["inf"] += 1
+        return counts
+
+
+class _ModelLatency:
+    def __init__(self, window: int):
+        self.ttft = RollingPercentile(window)
+        self.gaps = RollingPercentile(window)
+        self.timeouts = {"first_token": 0, "idle": 0}
+
+
+def _env_float(provider: str, name: str, default: float) -> float:
+    value = os.getenv(f"{provider.upper()}_{name}") or os.getenv(name)
+    try:
+        return float(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+class LatencyTracker:
+    """(프로바이더, 모델)별 지연 분포와 적응형 타임아웃"""
+
+    def __init__(
+        self,
+        provider: str,
+        first_token_floor: float = 20.0,
+        first_token_ceiling: float = 120.0,
+        idle_floor: float = 15.0,
+        idle_ceiling: float = 120.0,
+        percentile: float = 99.0,
+        multiplier: float = 3.0,
+        min_samples: int = 20,
+        window: int = 500,
+    ):
+        self.provider = provider
+        self.first_token_floor = min(first_token_floor, first_token_ceiling)
+        self.first_token_ceiling = first_token_ceiling
+        self.idle_floor = min(idle_floor, idle_ceiling)
+        self.idle_ceiling = idle_ceiling
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_samples = max(1, int(min_samples))
+        self.window = window
+        self._models: dict[str, _ModelLatency] = {}
+
+    @classmethod
+    def from_env(
+        cls,
+        provider: str,
+        first_token_ceiling: float | None = None,
+        idle_ceiling: float | None = None,
+    ) -> LatencyTracker:
+        """환경변수로 생성 (상한 인자는 기존 프로바이더 전용 타임아웃 설정을 넘길 때 사용)"""
+        return cls(
+            provider,
+            first_token_floor=_env_float(provider, "LATENCY_FIRST_TOKEN_FLOOR", 20.0),
+            first_token_ceiling=(
+                first_token_ceiling
+                if first_token_ceiling is not None
+                else _env_float(provider, "LATENCY_FIRST_TOKEN_CEILING", 120.0)
+            ),
+            idle_floor=_env_float(provider, "LATENCY_IDLE_FLOOR", 15.0),
+            idle_ceiling=(
+                idle_ceiling
+                if idle_ceiling is not None
+                else _env_float(provider, "LATENCY_IDLE_CEILING", 120.0)
+            ),
+            percentile=_env_float(provider, "LATENCY_TIMEOUT_PERCENTILE", 99.0),
+            multiplier=_env_float(provider, "LATENCY_TIMEOUT_MULTIPLIER", 3.0),
+            min_samples=int(_env_float(provider, "LATENCY_MIN_SAMPLES", 20)),
+            window=int(_env_float(provider, "LATENCY_WINDOW", 500)),
+        )
+
+    def _model(self, model: str | None) -> _ModelLatency:
+        key = model or "default"
+        entry = self._models.get(key)
+        if entry is None:
+            entry = self._models[key] = _ModelLatency(self.window)
+        return entry
+
+    def record_ttft(self, model: str | None, seconds: float) -> None:
+        self._model(model).ttft.add(seconds)
+
+    def record_gap(self, model: str | None, seconds: float) -> None:
+        self._model(model).gaps.add(seconds)
+
+    def record_timeout(self, model: str | None, stage: str) -> None:
+        timeouts = self._model(model).timeouts
+        timeouts[stage] = timeouts.get(stage, 0) + 1
+
+    def models(self) -> list[str]:
+        return list(self._models)
+
+    def ttft_percentile(self, model: str | None, pct: float) -> float | None:
+        entry = self._models.get(model or "default")
+        return entry.ttft.percentile(pct) if entry else None
+
+    def ttft_samples(self, model: str | None) -> int:
+        entry = self._models.get(model or "default")
+        return len(entry.ttft) if entry else 0
+
+    def _derive(self, samples: RollingPercentile, floor: float, ceiling: float) -> float:
+        if len(samples) < self.min_samples:
+            return ceiling
+        base = samples.percentile(self.percentile) or ceiling
+        return max(floor, min(base * self.multiplier, ceiling))
+
+    def first_token_timeout(self, model: str | None) -> float:
+        entry = self._models.get(model or "default")
+        if entry is None:
+            return self.first_token_ceiling
+        return self._derive(entry.ttft, self.first_token_floor, self.first_token_ceiling)
+
+    def idle_timeout(self, model: str | None) -> float:
+        entry = self._models.get(model or "default")
+        if entry is None:
+            return self.idle_ceiling
+        return self._derive(entry.gaps, self.idle_floor, self.idle_ceiling)
+
+    def timing(self, model: str | None) -> StreamTiming:
+        return StreamTiming(self, model)
+
+    def stats(self) -> dict:
+        """모델별 TTFT/토큰 간격 분포와 현재 타임아웃"""
+
+        def summary(samples: RollingPercentile) -> dict:
+            return {
+                "samples": len(samples),
+                "p50_ms": round((samples.percentile(50) or 0) * 1000, 1),
+                "p95_ms": round((samples.percentile(95) or 0) * 1000, 1),
+                "p99_ms": round((samples.percentile(99) or 0) * 1000, 1),
+                "histogram_ms": samples.histogram(),
+            }
+
+        return {
+            "first_token_bounds_s": [self.first_token_floor, self.first_token_ceiling],
+            "idle_bounds_s": [self.idle_floor, self.idle_ceiling],
+            "models": {
+                model: {
+                    "ttft": summary(entry.ttft),
+                    "inter_token": summary(entry.gaps),
+                    "first_token_timeout_s": round(self.first_token_timeout(model), 2),
+                    "idle_timeout_s": round(self.idle_timeout(model), 2),
+                    "timeouts": dict(entry.timeouts),
+                }
+                for model, entry in self._models.items()
+            },
+        }
+
+
+class StreamTiming:
+    """요청 1건의 타이밍: 첫 토큰 전에는 남은 첫 토큰 시간, 이후에는 유휴 타임아웃"""
+
+    def __init__(self, tracker: LatencyTracker, model: str | None):
+        self.tracker = tracker
+        self.model = model
+        self.first_token_timeout = tracker.first_token_timeout(model)
+        self.idle_timeout = tracker.idle_timeout(model)
+        self.started = time.monotonic()
+        self.first_token_at: float | None = None
+        self._last_token_at: float | None = None
+
+    @property
+    def streaming(self) -> bool:
+        return self.first_token_at is not None
+
+    def next_timeout(self) -> float:
+        """다음 readline에 줄 타임아웃(초)"""
+        if self.first_token_at is None:
+            remaining = self.started + self.first_token_timeout - time.monotonic()
+            return max(remaining, 0.001)
+        return self.idle_timeout
+
+    def token(self) -> bool:
+        """텍스트 토큰 도착 기록 (첫 토큰이면 True)"""
+        now = time.monotonic()
+        first = self.first_token_at is None
+        if first:
+            self.first_token_at = now
+            self.tracker.record_ttft(self.model, now - self.started)
+        elif self._last_token_at is not None:
+            self.tracker.record_gap(self.model, now - self._last_token_at)
+        self._last_token_at = now
+        return first
+
+    def timed_out(self) -> str:
+        """타임아웃 발생 기록, 단계(first_token|idle) 반환"""
+        stage = "idle" if self.streaming else "first_token"
+        self.tracker.record_timeout(self.model, stage)
+        return stage
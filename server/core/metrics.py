@@ -0,0 +1,75 @@
+"""런타임 지표 수집 (관리자 모니터링용)
+
+AppContext에 주입된 핸들러/서비스에서 지표를 모아 하나의 dict로 반환합니다.
+HTTP 관리자 API(/api/admin/runtime-stats)에서 이벤트 루프 위로 호출합니다.
+"""
+
+from __future__ import annotations
+
+from .app_context import AppContext
+from .auth import connection_auth_stats
+
+PROVIDERS = ("claude", "gemini", "droid")
+
+
+async def collect_runtime_stats(ctx: AppContext) -> dict:
+    """프로바이더 슬롯/예열 풀/지연 분포/헤징/스케줄러 등 런타임 지표 스냅샷"""
+    providers: dict[str, dict] = {}
+    for name in PROVIDERS:
+        handler = getattr(ctx, f"{name}_handler", None)
+        entry: dict = {}
+        pool = getattr(handler, "pool", None)
+        if pool is not None:
+            entry["pool"] = pool.stats()
+        warm_pool = getattr(handler, "warm_pool", None)
+        if warm_pool is not None:
+            entry["warm_pool"] = warm_pool.stats()
+        latency = getattr(handler, "latency", None)
+        if latency is not None:
+            entry["latency"] = latency.stats()
+        hedge_stats = getattr(handler, "hedge_stats", None)
+        if callable(hedge_stats):
+            entry["hedge"] = hedge_stats()
+        providers[name] = entry
+
+    stats: dict = {"providers": providers}
+    scheduler = getattr(ctx, "scheduler", None)
+    if scheduler is not None:
+        stats["scheduler"] = scheduler.stats()
+    health = getattr(ctx, "health", None)
+    if health is not None:
+        stats["health"] = health.stats()
+    prompt_cache_stats = getattr(getattr(ctx, "context_handler", None), "prompt_cache_stats", None)
+    if callable(prompt_cache_stats):
+        stats["system_prompt_cache"] = prompt_cache_stats()
+    token_usage = getattr(ctx, "token_usage_handler", None)
+    cache_stats = getattr(token_usage, "cache_stats", None)
+    if callable(cache_stats):
+        stats["prompt_cache"] = cache_stats()
+    summarizer = getattr(ctx, "summarizer", None)
+    if summarizer is not None:
+        stats["summary"] = summarizer.stats()
+    room_contexts = getattr(ctx, "room_contexts", None)
+    if room_contexts is not None:
+        stats["room_contexts"] = room_contexts.stats()
+    room_evictor = getattr(ctx, "room_evictor", None)
+    if room_evictor is not None:
+        stats["rooms"] = room_evictor.stats()
+    chat_dedup = getattr(ctx, "chat_dedup", None)
+    if chat_dedup is not None:
+        stats["chat_dedup"] = chat_dedup.stats()
+    auth_stats: dict = {
+        "connections": len(getattr(ctx, "connection_auth", {})),
+        **connection_auth_stats,
+    }
+    token_cache = getattr(ctx, "token_cache", None)
+    if token_cache is not None:
+        auth_stats["token_cache"] = token_cache.stats()
+    stats["auth"] = auth_stats
+    wire_stats = getattr(ctx, "wire_stats", None)
+    if wire_stats is not None:
+        stats["wire"] = wire_stats.snapshot()
+    stream_stats = getattr(ctx, "stream_stats", None)
+    if stream_stats is not None:
+        stats["stream"] = stream_stats.snapshot()
+    return stats
@@ -0,0 +1,171 @@
+"""프로바이더 프로세스 슬롯 풀
+
+프로바이더 CLI 호출 1건당 하나의 슬롯을 배정해 동시 실행 수를 제한합니다.
+슬롯이 모두 사용 중이면 요청은 FIFO 대기열에서 차례를 기다립니다.
+대기열 길이/슬롯 사용률 지표는 stats()로 조회합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessSlot:
+    """요청 1건에 배정된 실행 슬롯 (해당 요청의 서브프로세스를 보관)"""
+
+    def __init__(self, slot_id: int, wait_seconds: float):
+        self.slot_id = slot_id
+        self.wait_seconds = wait_seconds
+        self.acquired_at = time.monotonic()
+        self.process = None
+
+
+class ProcessPool:
+    """프로바이더별 동시 실행 슬롯 풀 (FIFO 대기열 포함)"""
+
+    def __init__(self, name: str, max_concurrency: int):
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self._ids = itertools.count(1)
+        self._active: dict[int, ProcessSlot] = {}
+        self._waiters: deque[asyncio.Future] = deque()
+        # 깨웠지만 아직 슬롯을 가져가지 않은 대기자 수 (새 요청의 새치기 방지)
+        self._reserved = 0
+        # 지표
+        self._created_at = time.monotonic()
+        self._busy_slot_seconds = 0.0
+        self._last_change = self._created_at
+        self.acquired_total = 0
+        self.queued_total = 0
+        self.wait_seconds_total = 0.0
+        self.peak_in_use = 0
+        self.peak_waiting = 0
+
+    @property
+    def in_use(self) -> int:
+        return len(self._active)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _account(self):
+        """슬롯 점유 시간(slot-seconds) 누적 (사용률 계산용)"""
+        now = time.monotonic()
+        self._busy_slot_seconds += self.in_use * (now - self._last_change)
+        self._last_change = now
+
+    def _grant(self, wait_seconds: float) -> ProcessSlot:
+        self._account()
+        slot = ProcessSlot(next(self._ids), wait_seconds)
+        self._active[slot.slot_id] = slot
+        self.acquired_total += 1
+        self.wait_seconds_total += wait_seconds
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+        return slot
+
+    async def acquire(self) -> ProcessSlot:
+        """슬롯 획득 (여유가 없으면 FIFO 순서로 대기)"""
+        if self.in_use + self._reserved < self.max_concurrency and not self._waiters:
+            return self._grant(0.0)
+
+        started = time.monotonic()
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self.queued_total += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        logger.debug(f"{self.name} pool full; queued (waiting={self.waiting})")
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut in self._waiters:
+                self._waiters.remove(fut)
+            elif fut.done() and not fut.cancelled():
+                # 슬롯 양도 직후 취소된 경우: 예약을 풀고 다음 대기자에게 넘김
+                self._reserved -= 1
+                self._wake_next()
+            raise
+        self._reserved -= 1
+        return self._grant(time.monotonic() - started)
+
+    def _wake_next(self):
+        while self._waiters and self.in_use + self._reserved < self.max_concurrency:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self._reserved += 1
+                fut.set_result(None)
+
+    def release(self, slot: ProcessSlot):
+        """슬롯 반환 및 다음 대기자 깨우기"""
+        if self._active.pop(slot.slot_id, None) is None:
+            return
+        self._account()
+        slot.process = None
+        self._wake_next()
+
+    @asynccontextmanager
+    async def slot(self):
+        """`async with pool.slot() as slot:` 형태의 슬롯 사용"""
+        slot = await self.acquire()
+        try:
+            yield slot
+        finally:
+            self.release(slot)
+
+    def active_processes(self) -> list:
+        """현재 슬롯에서 실행 중인 서브프로세스 목록"""
+        return [s.process for s in self._active.values() if s.process is not None]
+
+    def stats(self) -> dict:
+        """대기열 길이/슬롯 사용률 지표"""
+        self._account()
+        elapsed = max(self._last_change - self._created_at, 1e-9)
+        return {
+            "name": self.name,
+            "max_concurrency": self.max_concurrency,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "peak_in_use": self.peak_in_use,
+            "peak_waiting": self.peak_waiting,
+            "acquired_total": self.acquired_total,
+            "queued_total": self.queued_total,
+            "avg_wait_ms": round(
+                (
+                    (self.wait_seconds_total / self.acquired_total * 1000)
+                    if self.acquired_total
+                    else 0.0
+                ),
+                2,
+            ),
+            "utilization": round(self.in_use / self.max_concurrency, 4),
+            "avg_utilization": round(self._busy_slot_seconds / (self.max_concurrency * elapsed), 4),
+        }
+
+
+async def terminate_process(process, timeout: float = 5.0):
+    """서브프로세스 종료 (terminate 후 timeout 내 미종료 시 kill)"""
+    # 종료 수단이 없는 프로세스 유사 객체는 무시
+    if process is None or not hasattr(process, "terminate"):
+        return
+    try:
+        if getattr(process, "returncode", None) is None:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), timeout=timeout)
+    except TimeoutError:
+        try:
+            process.kill()
+            await process.wait()
+            logger.warning("Process killed (terminate timeout)")
+        except ProcessLookupError:
+            pass
+    except ProcessLookupError:
+        pass
@@ -0,0 +1,265 @@
+"""프로바이더 stream-json 녹화/재생 (부하 테스트용 결정적 가짜 CLI)
+
+녹화: PROVIDER_RECORD_DIR이 설정되면 핸들러가 띄운 CLI의 stdout 라인을 타임스탬프와 함께
+      transcript(jsonl)로 저장합니다.
+재생: scripts/replay_cli.py를 CLAUDE_PATH/GEMINI_PATH/DROID_PATH로 지정하면, 저장된
+      transcript(없으면 프로바이더 형식의 합성 응답)를 실제 CLI처럼 stdout으로 흘려보냅니다.
+
+transcript 형식 (jsonl):
+    {"provider": "claude", "label": "...", "args": [...], "recorded_at": "..."}   # 헤더
+    {"t": 812.4, "line": "<stdout 한 줄>"}                                         # 경과 ms
+
+재생 환경변수:
+    REPLAY_TRANSCRIPTS     transcript 파일 또는 디렉토리 (프롬프트 해시로 결정적 선택)
+    REPLAY_PROVIDER        claude | gemini | droid (미지정 시 실행 인자로 추정)
+    REPLAY_FIRST_TOKEN_MS  첫 출력 전 지연 (미지정 시 녹화 타이밍 사용)
+    REPLAY_TOKEN_MS        라인 간 지연 (미지정 시 녹화 타이밍 사용)
+    REPLAY_SPEED           녹화 타이밍 배속 (기본 1.0)
+    REPLAY_FAIL_RATE       실패 주입 확률 0~1
+    REPLAY_FAIL_MODE       exit(즉시 비정상 종료) | hang(첫 토큰 전 멈춤) | truncate(중간 끊김)
+    REPLAY_SEED            실패 주입 시드 (같은 시드+프롬프트면 같은 결과)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("claude", "gemini", "droid")
+
+
+# ===== 녹화 =====
+class _RecordingReader:
+    """stdout StreamReader를 감싸 읽은 라인을 transcript에 기록"""
+
+    def __init__(self, inner, path: Path, header: dict):
+        self._inner = inner
+        self._path = path
+        self._file = path.open("w", encoding="utf-8")
+        self._file.write(json.dumps(header, ensure_ascii=False) + "\n")
+        self._started = time.monotonic()
+
+    async def readline(self) -> bytes:
+        line = await self._inner.readline()
+        if self._file is None:
+            return line
+        if line:
+            elapsed_ms = round((time.monotonic() - self._started) * 1000, 1)
+            text = line.decode("utf-8", errors="replace").rstrip("\n")
+            self._file.write(json.dumps({"t": elapsed_ms, "line": text}, ensure_ascii=False) + "\n")
+        else:
+            self._file.close()
+            self._file = None
+            logger.info(f"Transcript recorded: {self._path}")
+        return line
+
+    def __getattr__(self, name):
+        return getattr(self._inner, name)
+
+
+class TranscriptRecorder:
+    """핸들러 프로세스의 stdout을 transcript 파일로 녹화"""
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._seq = itertools.count(1)
+        self.recorded = 0
+
+    def wrap(self, process, provider: str, args: list, label: str | None = None):
+        """프로세스 stdout을 녹화 리더로 교체 (프로세스 객체를 그대로 반환)"""
+        stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S")
+        path = self.directory / f"{provider}-{stamp}-{os.getpid()}-{next(self._seq)}.jsonl"
+        header = {
+            "provider": provider,
+            "label": label or "",
+            "args": [str(a) for a in args],
+            "recorded_at": datetime.now(UTC).isoformat(),
+        }
+        try:
+            process.stdout = _RecordingReader(process.stdout, path, header)
+            self.recorded += 1
+        except Exception as e:
+            logger.warning(f"Transcript recording disabled for this call: {e}")
+        return process
+
+
+def recorder_from_env() -> TranscriptRecorder | None:
+    """PROVIDER_RECORD_DIR이 있으면 녹화기 생성"""
+    directory = os.getenv("PROVIDER_RECORD_DIR", "").strip()
+    return TranscriptRecorder(directory) if directory else None
+
+
+# ===== transcript 로드/합성 =====
+def load_transcript(path: str | Path) -> tuple[dict, list[tuple[float, str]]]:
+    """transcript 파일 → (헤더, [(경과 ms, 라인)])"""
+    header: dict = {}
+    lines: list[tuple[float, str]] = []
+    with Path(path).open(encoding="utf-8") as f:
+        for idx, raw in enumerate(f):
+            raw = raw.strip()
+            if not raw:
+                continue
+            entry = json.loads(raw)
+            if idx == 0 and "line" not in entry:
+                header = entry
+                continue
+            lines.append((float(entry.get("t", 0.0)), str(entry.get("line", ""))))
+    return header, lines
+
+
+def find_transcripts(location: str | Path, provider: str | None = None) -> list[Path]:
+    path = Path(location)
+    if path.is_file():
+        return [path]
+    if not path.is_dir():
+        return []
+    files = sorted(path.glob("*.jsonl"))
+    if provider:
+        matched = [p for p in files if p.name.startswith(f"{provider}-")]
+        files = matched or files
+    return files
+
+
+def detect_provider(argv: list[str]) -> str:
+    """실행 인자로 프로바이더 형식 추정 (REPLAY_PROVIDER 우선)"""
+    configured = os.getenv("REPLAY_PROVIDER", "").lower()
+    if configured in PROVIDERS:
+        return configured
+    if "--print" in argv:
+        return "claude"
+    if "exec" in argv:
+        return "droid"
+    return "gemini"
+
+
+SYNTHETIC_REPLY = (
+    "[진행자]: 비가 그친 골목에 가로등이 하나둘 켜진다. "
+    "[하나]: 오늘은 여기까지 걸어온 것만으로도 충분해. 잠깐 쉬었다 가자. "
+    "[유리]: 좋아, 대신 따뜻한 차 한 잔은 네가 사는 거다?"
+)
+
+
+def synthesize_lines(provider: str, prompt: str, reply: str = SYNTHETIC_REPLY) -> list[str]:
+    """녹화본이 없을 때 프로바이더 stream-json 형식의 합성 응답 생성"""
+    session_id = "replay-" + hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12]
+    tokens = [tok + " " for tok in reply.split(" ")]
+    lines: list[str] = []
+    if provider == "claude":
+        lines.append(json.dumps({"type": "system", "subtype": "init", "session_id": session_id}))
+        text = ""
+        usage = {"input_tokens": len(prompt) // 2, "output_tokens": 1}
+        for tok in tokens:
+            text += tok
+            lines.append(
+                json.dumps(
+                    {
+                        "type": "assistant",
+                        "message": {"content": [{"type": "text", "text": text}], "usage": usage},
+                        "session_id": session_id,
+                    },
+                    ensure_ascii=False,
+                )
+            )
+        lines.append(
+            json.dumps(
+                {
+                    "type": "result",
+                    "subtype": "success",
+                    "result": text,
+                    "session_id": session_id,
+                    "usage": {"input_tokens": len(prompt) // 2, "output_tokens": len(tokens)},
+                },
+                ensure_ascii=False,
+            )
+        )
+    elif provider == "droid":
+        lines.append(json.dumps({"type": "system", "subtype": "init", "session_id": session_id}))
+        lines += [json.dumps({"delta": tok}, ensure_ascii=False) for tok in tokens]
+    else:
+        lines.append(json.dumps({"type": "init", "session_id": session_id}))
+        lines += [
+            json.dumps(
+                {"type": "message", "role": "assistant", "content": tok, "delta": True},
+                ensure_ascii=False,
+            )
+            for tok in tokens
+        ]
+    return lines
+
+
+def _env_ms(name: str) -> float | None:
+    value = os.getenv(name, "").strip()
+    return float(value) if value else None
+
+
+def plan_replay(provider: str, prompt: str) -> list[tuple[float, str]]:
+    """재생할 (지연 초, 라인) 목록 계산"""
+    location = os.getenv("REPLAY_TRANSCRIPTS", "").strip()
+    files = find_transcripts(location, provider) if location else []
+    if files:
+        digest = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest(), 16)
+        _, recorded = load_transcript(files[digest % len(files)])
+    else:
+        recorded = [(0.0, line) for line in synthesize_lines(provider, prompt)]
+
+    first_ms = _env_ms("REPLAY_FIRST_TOKEN_MS")
+    token_ms = _env_ms("REPLAY_TOKEN_MS")
+    speed = float(os.getenv("REPLAY_SPEED", "1.0") or 1.0)
+    synthetic = not files
+    if synthetic:
+        first_ms = 300.0 if first_ms is None else first_ms
+        token_ms = 20.0 if token_ms is None else token_ms
+
+    plan: list[tuple[float, str]] = []
+    prev_t = 0.0
+    for idx, (t, line) in enumerate(recorded):
+        gap_ms = (t - prev_t) / max(speed, 1e-6)
+        prev_t = t
+        if idx == 0 and first_ms is not None:
+            gap_ms = first_ms
+        elif idx > 0 and token_ms is not None:
+            gap_ms = token_ms
+        plan.append((max(gap_ms, 0.0) / 1000, line))
+    return plan
+
+
+def run_cli(argv: list[str] | None = None) -> int:
+    """가짜 CLI 진입점: stdin으로 프롬프트를 받고 transcript를 stdout으로 재생"""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    provider = detect_provider(argv)
+    prompt = sys.stdin.read()
+
+    fail_rate = float(os.getenv("REPLAY_FAIL_RATE", "0") or 0)
+    fail_mode = os.getenv("REPLAY_FAIL_MODE", "exit").lower()
+    rng = random.Random(f"{os.getenv('REPLAY_SEED', '0')}:{prompt}")
+    fail = fail_rate > 0 and rng.random() < fail_rate
+
+    if fail and fail_mode == "exit":
+        print("replay: injected failure (rate limit 429)", file=sys.stderr, flush=True)
+        return 1
+    if fail and fail_mode == "hang":
+        time.sleep(3600)
+        return 1
+
+    plan = plan_replay(provider, prompt)
+    cut = len(plan) // 2 if fail and fail_mode == "truncate" else len(plan)
+    for delay, line in plan[:cut]:
+        if delay:
+            time.sleep(delay)
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+    if cut < len(plan):
+        print("replay: injected failure (stream truncated)", file=sys.stderr, flush=True)
+        return 1
+    return 0
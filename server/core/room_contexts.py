@@ -0,0 +1,172 @@
+"""채팅방별 컨텍스트(세계관/캐릭터/설정) 캐시
+
+전역 ContextHandler 하나를 모든 사용자가 공유하면 동시에 다른 방을 쓰는 사용자끼리
+설정을 덮어쓰고, 방을 옮길 때마다 rooms.context JSON을 다시 파싱해야 합니다.
+RoomContextCache는 (user_id, room_id)별 ContextHandler를 LRU로 보관하고,
+변경 시 버전을 비교해 바뀐 경우에만 rooms.context에 바로 기록(write-through)합니다.
+
+전역 ctx.context_handler는 room_id 없이 들어오는 레거시 요청용으로 유지됩니다.
+
+환경변수:
+    ROOM_CONTEXT_CACHE_SIZE  보관할 최대 방 수 (0이면 비활성 → 전역 컨텍스트 사용, 기본 256)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def _new_handler():
+    from server.handlers.context_handler import ContextHandler
+
+    # 방마다 자기 컨텍스트의 컴파일된 프롬프트 1개만 보관 (방 간 LRU는 이 캐시가 담당)
+    return ContextHandler(prompt_cache_size=1)
+
+
+class RoomContextCache:
+    """(user_id, room_id) → ContextHandler LRU"""
+
+    def __init__(self, max_rooms: int = 256, factory=_new_handler):
+        self.max_rooms = max(1, int(max_rooms))
+        self._factory = factory
+        self._entries: OrderedDict[tuple, object] = OrderedDict()
+        # 키별 마지막으로 DB와 일치했던 컨텍스트 버전
+        self._persisted: dict[tuple, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+        self.skipped_writes = 0
+
+    def peek(self, user_id, room_id: str):
+        return self._entries.get((user_id, room_id))
+
+    def _insert(self, key: tuple, handler, persisted: bool):
+        self._entries[key] = handler
+        self._entries.move_to_end(key)
+        if persisted:
+            self._persisted[key] = handler.current_context.version
+        else:
+            self._persisted.pop(key, None)
+        while len(self._entries) > self.max_rooms:
+            old_key, _ = self._entries.popitem(last=False)
+            self._persisted.pop(old_key, None)
+            self.evictions += 1
+
+    async def get(self, ctx, user_id, room_id: str, row: dict | None = None):
+        """방 컨텍스트 조회 (미스 시 DB rooms.context에서 1회 로드)
+
+        Args:
+            row: 호출자가 이미 조회한 rooms 행 (있으면 DB를 다시 읽지 않음)
+        """
+        key = (user_id, room_id)
+        handler = self._entries.get(key)
+        if handler is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return handler
+
+        self.misses += 1
+        db = getattr(ctx, "db_handler", None)
+        if row is None and db is not None:
+            row = await db.get_room(room_id, user_id)
+        # DB 조회 중 다른 요청이 먼저 채웠으면 그 인스턴스를 사용 (변경 유실 방지)
+        handler = self._entries.get(key)
+        if handler is not None:
+            self._entries.move_to_end(key)
+            return handler
+
+        handler = self._factory()
+        context = None
+        if row and row.get("context"):
+            try:
+                context = json.loads(row["context"])
+            except (json.JSONDecodeError, TypeError) as exc:
+                logger.debug(f"room context JSON 파싱 실패: {room_id}", exc_info=exc)
+        if isinstance(context, dict):
+            handler.load_from_dict(context)
+        elif ctx.context_handler is not None:
+            # DB에 컨텍스트가 없는 새 방: 전역(레거시) 컨텍스트를 시작값으로 복사
+            handler.load_from_dict(ctx.context_handler.get_context())
+        self._insert(key, handler, persisted=isinstance(context, dict))
+        return handler
+
+    def put(self, user_id, room_id: str, context: dict):
+        """DB에 방금 기록한 컨텍스트로 캐시 항목 교체 (room_save/import 등)"""
+        handler = self._factory()
+        handler.load_from_dict(context if isinstance(context, dict) else {})
+        self._insert((user_id, room_id), handler, persisted=True)
+        return handler
+
+    def invalidate(self, user_id, room_id: str):
+        key = (user_id, room_id)
+        self._entries.pop(key, None)
+        self._persisted.pop(key, None)
+
+    def is_dirty(self, user_id, room_id: str) -> bool:
+        key = (user_id, room_id)
+        handler = self._entries.get(key)
+        return handler is not None and self._persisted.get(key) != handler.current_context.version
+
+    async def save(self, ctx, user_id, room_id: str) -> bool:
+        """바뀐 방 컨텍스트를 rooms.context에 기록 (버전이 같으면 생략), 기록 여부 반환"""
+        key = (user_id, room_id)
+        handler = self._entries.get(key)
+        if handler is None or ctx.db_handler is None:
+            return False
+        if not self.is_dirty(user_id, room_id):
+            self.skipped_writes += 1
+            return False
+        version = handler.current_context.version
+        existing = await ctx.db_handler.get_room(room_id, user_id)
+        title = existing["title"] if existing else room_id
+        context_json = json.dumps(handler.get_context(), ensure_ascii=False)
+        await ctx.db_handler.upsert_room(room_id, user_id, title, context_json)
+        self._persisted[key] = version
+        self.writes += 1
+        return True
+
+    def stats(self) -> dict:
+        prompt_hits = prompt_misses = 0
+        for handler in self._entries.values():
+            prompt_stats = getattr(handler, "prompt_cache_stats", None)
+            if callable(prompt_stats):
+                s = prompt_stats()
+                prompt_hits += s["hits"]
+                prompt_misses += s["misses"]
+        return {
+            "rooms": len(self._entries),
+            "max_rooms": self.max_rooms,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "writes": self.writes,
+            "skipped_writes": self.skipped_writes,
+            "prompt_hits": prompt_hits,
+            "prompt_misses": prompt_misses,
+        }
+
+
+async def context_for(ctx, user_id, room_id: str | None):
+    """요청에 쓸 ContextHandler (room_id와 캐시가 있으면 방별, 아니면 전역)"""
+    cache = getattr(ctx, "room_contexts", None)
+    if cache is None or not user_id or not room_id:
+        return ctx.context_handler
+    try:
+        return await cache.get(ctx, user_id, room_id)
+    except Exception as exc:
+        logger.error(f"Room context load failed, using global context: {exc}")
+        return ctx.context_handler
+
+
+def room_contexts_from_env() -> RoomContextCache | None:
+    """환경변수로 캐시 생성 (ROOM_CONTEXT_CACHE_SIZE=0이면 None)"""
+    size = int(os.getenv("ROOM_CONTEXT_CACHE_SIZE", "256"))
+    if size <= 0:
+        return None
+    return RoomContextCache(max_rooms=size)
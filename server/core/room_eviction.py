@@ -0,0 +1,146 @@
+"""유휴 채팅방 히스토리 정리 (메모리 상한)
+
+ctx.sessions의 방마다 HistoryHandler가 대화 전체를 메모리에 들고 있어 오래 켜 둔 서버에서는
+SQLite messages와 같은 내용이 계속 쌓입니다. RoomEvictor는 주기적으로
+    1) 마지막 접근 후 ROOM_IDLE_TTL_SECONDS가 지난 방
+    2) 전체 추정 메모리가 ROOM_MEMORY_CAP_MB를 넘으면 가장 오래 쓰지 않은 방부터(LRU)
+히스토리를 내려놓고 설정(max_turns, provider_sessions)만 남깁니다. 다음 접근 때
+session_manager.get_room_hydrated가 DB에서 최근 윈도우와 누적 요약을 다시 채웁니다.
+
+스트리밍 중인 방, 복원 중인 방은 건너뛰며, DB가 없으면 복원할 수 없으므로 정리하지 않습니다.
+
+환경변수:
+    ROOM_IDLE_TTL_SECONDS        유휴 방 정리 기준 (0이면 TTL 정리 안 함, 기본 1800)
+    ROOM_MEMORY_CAP_MB           방 히스토리 전체 메모리 상한 (0이면 상한 없음, 기본 256)
+    ROOM_SWEEP_INTERVAL_SECONDS  정리 주기 (기본 60)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RoomEvictor:
+    """유휴 TTL + 메모리 상한(LRU) 기반 방 히스토리 정리"""
+
+    def __init__(
+        self,
+        idle_ttl_seconds: float = 1800.0,
+        max_bytes: int = 256 * 1024 * 1024,
+        sweep_interval_seconds: float = 60.0,
+    ):
+        self.idle_ttl_seconds = max(0.0, float(idle_ttl_seconds))
+        self.max_bytes = max(0, int(max_bytes))
+        self.sweep_interval_seconds = max(1.0, float(sweep_interval_seconds))
+        self.resident_rooms = 0
+        self.resident_bytes = 0
+        self.evicted_total = 0
+        self.rehydrated_total = 0
+        self.sweeps_total = 0
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def _busy_rooms(ctx) -> set[tuple]:
+        """스트리밍 중인 (user_id, room_id)
+
+        연결이 끊겨도 계속 도는 스트림(keep_on_disconnect)은 websocket_to_session 매핑이
+        사라지므로 핸들에 기록된 user_id를 우선 사용
+        """
+        busy = set()
+        owners = getattr(ctx, "websocket_to_session", None) or {}
+        for ws, room_streams in (getattr(ctx, "active_streams", None) or {}).items():
+            for rid, handle in room_streams.items():
+                user_id = getattr(handle, "user_id", None)
+                busy.add((owners.get(ws) if user_id is None else user_id, rid))
+        return busy
+
+    @staticmethod
+    def evict(room: dict):
+        """방 히스토리를 내려놓고 복원에 필요한 설정만 남김"""
+        history = room.pop("history")
+        room["evicted"] = {
+            "max_turns": history.max_turns,
+            "max_turns_explicit": history.max_turns_explicit,
+        }
+
+    def sweep(self, ctx, now: float | None = None) -> int:
+        """유휴/초과 방 정리, 정리한 방 수 반환 (게이지도 함께 갱신)"""
+        now = time.monotonic() if now is None else now
+        can_evict = getattr(ctx, "db_handler", None) is not None
+        busy = self._busy_rooms(ctx)
+        resident = []  # (last_access, bytes, room, 정리 제외 여부)
+        for user_id, sess in (getattr(ctx, "sessions", None) or {}).items():
+            for rid, room in sess.get("rooms", {}).items():
+                history = room.get("history")
+                if history is None:
+                    continue
+                pinned = (user_id, rid) in busy or "rehydrate" in room
+                resident.append(
+                    (room.get("last_access", now), history.memory_bytes(), room, pinned)
+                )
+
+        evicted = 0
+        total = sum(item[1] for item in resident)
+        # 오래 쓰지 않은 방부터: TTL이 지난 방, 그다음 상한을 넘는 동안 LRU 순서로
+        resident.sort(key=lambda item: item[0])
+        for last_access, size, room, pinned in resident:
+            if not can_evict or pinned:
+                continue
+            idle = self.idle_ttl_seconds and now - last_access >= self.idle_ttl_seconds
+            over = self.max_bytes and total > self.max_bytes
+            if not (idle or over):
+                continue
+            self.evict(room)
+            total -= size
+            evicted += 1
+
+        self.resident_rooms = len(resident) - evicted
+        self.resident_bytes = total
+        self.evicted_total += evicted
+        self.sweeps_total += 1
+        if evicted:
+            logger.info(f"Evicted {evicted} idle room histories (resident={total} bytes)")
+        return evicted
+
+    async def _run(self, ctx):
+        while True:
+            await asyncio.sleep(self.sweep_interval_seconds)
+            try:
+                self.sweep(ctx)
+            except Exception as exc:
+                logger.error(f"Room eviction sweep failed: {exc}")
+
+    def start(self, ctx) -> asyncio.Task:
+        """주기적 정리 태스크 시작 (이미 실행 중이면 그대로 반환)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(ctx))
+        return self._task
+
+    def stats(self) -> dict:
+        return {
+            "resident_rooms": self.resident_rooms,
+            "resident_bytes": self.resident_bytes,
+            "evicted_total": self.evicted_total,
+            "rehydrated_total": self.rehydrated_total,
+            "sweeps_total": self.sweeps_total,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "max_bytes": self.max_bytes,
+        }
+
+
+def room_evictor_from_env() -> RoomEvictor | None:
+    """환경변수로 RoomEvictor 생성 (TTL과 상한이 모두 0이면 None)"""
+    ttl = float(os.getenv("ROOM_IDLE_TTL_SECONDS", "1800"))
+    cap_mb = float(os.getenv("ROOM_MEMORY_CAP_MB", "256"))
+    if ttl <= 0 and cap_mb <= 0:
+        return None
+    return RoomEvictor(
+        idle_ttl_seconds=ttl,
+        max_bytes=int(cap_mb * 1024 * 1024),
+        sweep_interval_seconds=float(os.getenv("ROOM_SWEEP_INTERVAL_SECONDS", "60")),
+    )
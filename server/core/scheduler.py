@@ -0,0 +1,234 @@
+"""사용자 간 가중 공정 스케줄러 (프로바이더 호출 입장 제어)
+
+채팅 요청을 사용자별 대기열에 넣고, 전역/사용자별 동시 실행 한도 안에서
+가중 공정 큐잉(WFQ, start-time fair queueing)으로 다음 요청을 고릅니다.
+
+- 요청마다 가상 종료 태그 F = max(V, 해당 사용자의 직전 F) + 1/weight 를 부여하고,
+  실행 가능한(사용자 한도 미만) 대기열 머리 중 F가 가장 작은 요청부터 입장시킵니다.
+- V(가상 시간)는 마지막으로 입장한 요청의 시작 태그입니다. 한동안 쉬던 사용자는
+  V부터 다시 시작하므로 밀린 몫을 몰아 쓰지 못합니다.
+- 한 사용자가 요청을 많이 쌓아도 다른 사용자는 가중치 비율만큼 차례를 얻습니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerTicket:
+    """입장 대기/실행 중인 요청 1건"""
+
+    def __init__(self, user_id, weight: float, start_tag: float, finish_tag: float):
+        self.user_id = user_id
+        self.weight = weight
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.enqueued_at = time.monotonic()
+        self.wait_seconds = 0.0
+
+    @property
+    def wait_ms(self) -> float:
+        return round(self.wait_seconds * 1000, 2)
+
+
+class FairScheduler:
+    """사용자별 대기열 + 전역/사용자별 동시 실행 한도 + 가중 공정 큐잉"""
+
+    def __init__(
+        self,
+        global_limit: int = 8,
+        per_user_limit: int = 2,
+        weights: dict | None = None,
+        default_weight: float = 1.0,
+    ):
+        if global_limit <= 0 or per_user_limit <= 0:
+            raise ValueError("limits must be positive")
+        if default_weight <= 0:
+            raise ValueError("default_weight must be positive")
+        self.global_limit = global_limit
+        self.per_user_limit = per_user_limit
+        self.weights = {str(k): float(v) for k, v in (weights or {}).items() if float(v) > 0}
+        self.default_weight = default_weight
+        self._queues: dict = {}  # user_id -> deque[(ticket, future)]
+        self._running: dict = {}  # user_id -> 실행 중 건수
+        self._last_finish: dict = {}  # user_id -> 직전 종료 태그
+        self._virtual_time = 0.0
+        self._running_total = 0
+        # 지표
+        self.admitted_total = 0
+        self.queued_total = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+        self.peak_queued = 0
+
+    @property
+    def running(self) -> int:
+        return self._running_total
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def weight_for(self, user_id) -> float:
+        return self.weights.get(str(user_id), self.default_weight)
+
+    def _eligible(self, user_id) -> bool:
+        return self._running.get(user_id, 0) < self.per_user_limit
+
+    def _dispatch(self):
+        """한도 안에서 종료 태그가 가장 작은 대기 요청부터 입장"""
+        while self._running_total < self.global_limit:
+            best = None
+            for user_id, queue in self._queues.items():
+                if queue and self._eligible(user_id):
+                    ticket = queue[0][0]
+                    if best is None or ticket.finish_tag < best[1].finish_tag:
+                        best = (user_id, ticket)
+            if best is None:
+                return
+            user_id, _ = best
+            ticket, fut = self._queues[user_id].popleft()
+            if not self._queues[user_id]:
+                del self._queues[user_id]
+            if fut.done():  # 대기 중 취소됨
+                continue
+            self._running[user_id] = self._running.get(user_id, 0) + 1
+            self._running_total += 1
+            self._virtual_time = max(self._virtual_time, ticket.start_tag)
+            ticket.wait_seconds = time.monotonic() - ticket.enqueued_at
+            fut.set_result(ticket)
+
+    async def acquire(self, user_id) -> SchedulerTicket:
+        """입장 (차례가 올 때까지 대기)"""
+        weight = self.weight_for(user_id)
+        start = max(self._virtual_time, self._last_finish.get(user_id, 0.0))
+        ticket = SchedulerTicket(user_id, weight, start, start + 1.0 / weight)
+        self._last_finish[user_id] = ticket.finish_tag
+
+        fut = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(user_id, deque()).append((ticket, fut))
+        self._dispatch()
+        if fut.done():  # 바로 입장
+            ticket.wait_seconds = 0.0
+        else:
+            self.queued_total += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+            logger.debug(f"scheduler: user={user_id} queued (queued={self.queued})")
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # 입장 직후 취소된 경우: 자리를 돌려줌
+                self.release(ticket)
+            else:
+                self._remove_waiter(user_id, fut)
+            raise
+
+        self.admitted_total += 1
+        self.wait_seconds_total += ticket.wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, ticket.wait_seconds)
+        return ticket
+
+    def _remove_waiter(self, user_id, fut):
+        queue = self._queues.get(user_id)
+        if not queue:
+            return
+        for item in list(queue):
+            if item[1] is fut:
+                queue.remove(item)
+                break
+        if not queue:
+            del self._queues[user_id]
+
+    def release(self, ticket: SchedulerTicket):
+        """실행 종료 후 자리 반환 및 다음 요청 입장"""
+        user_id = ticket.user_id
+        count = self._running.get(user_id, 0)
+        if count <= 0:
+            return
+        if count == 1:
+            del self._running[user_id]
+        else:
+            self._running[user_id] = count - 1
+        self._running_total -= 1
+        # 쉬는 사용자의 태그는 V 이하가 되면 의미가 없으므로 정리
+        if (
+            user_id not in self._running
+            and user_id not in self._queues
+            and self._last_finish.get(user_id, 0.0) <= self._virtual_time
+        ):
+            self._last_finish.pop(user_id, None)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def admit(self, user_id):
+        """`async with scheduler.admit(user_id) as ticket:` 형태의 입장"""
+        ticket = await self.acquire(user_id)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> dict:
+        """대기열/실행 현황 및 대기 시간 지표"""
+        users = set(self._queues) | set(self._running)
+        return {
+            "global_limit": self.global_limit,
+            "per_user_limit": self.per_user_limit,
+            "running": self.running,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "admitted_total": self.admitted_total,
+            "queued_total": self.queued_total,
+            "avg_wait_ms": round(
+                (
+                    (self.wait_seconds_total / self.admitted_total * 1000)
+                    if self.admitted_total
+                    else 0.0
+                ),
+                2,
+            ),
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+            "users": [
+                {
+                    "user_id": u,
+                    "weight": self.weight_for(u),
+                    "running": self._running.get(u, 0),
+                    "queued": len(self._queues.get(u, ())),
+                }
+                for u in sorted(users, key=str)
+            ],
+        }
+
+
+def _parse_weights(raw: str) -> dict:
+    """사용자 가중치 파싱 (형식: "user_id:weight,..." 예: "1:2,7:0.5")"""
+    weights: dict = {}
+    for part in raw.split(","):
+        if ":" not in part:
+            continue
+        key, _, value = part.partition(":")
+        try:
+            weights[key.strip()] = float(value)
+        except ValueError:
+            logger.warning(f"Invalid scheduler weight ignored: {part!r}")
+    return weights
+
+
+def scheduler_from_env() -> FairScheduler | None:
+    """환경변수로 스케줄러 생성 (SCHED_GLOBAL_CONCURRENCY=0이면 비활성)"""
+    global_limit = int(os.getenv("SCHED_GLOBAL_CONCURRENCY", "8"))
+    if global_limit <= 0:
+        return None
+    return FairScheduler(
+        global_limit=global_limit,
+        per_user_limit=int(os.getenv("SCHED_PER_USER_CONCURRENCY", "2")),
+        weights=_parse_weights(os.getenv("SCHED_USER_WEIGHTS", "")),
+    )
@@ -5,17 +5,26 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import sqlite3
+import time
 
 from .app_context import AppContext
+from .auth import connection_auth_stats, current_connection
+from .auth import verify_token as auth_verify_token
 
 logger = logging.getLogger(__name__)
 
+# 복원 시 max_turns가 무제한(None)인 방에서 읽어 올 최근 메시지 수
+REHYDRATE_MESSAGE_LIMIT = 50
+
 
 def get_user_id_from_token(ctx: AppContext, data: dict | None) -> int | None:
     """JWT 토큰에서 user_id 추출
 
     WebSocket 액션에서는 JWT만 검증하고 DB 조회는 생략합니다.
+    연결이 auth 핸드셰이크로 인증돼 있으면(만료 전) 토큰이 없거나 같은 토큰일 때 검증을 생략합니다.
 
     Args:
         ctx: 애플리케이션 컨텍스트
@@ -28,12 +37,15 @@ def get_user_id_from_token(ctx: AppContext, data: dict | None) -> int | None:
         return None
 
     token = data.get("token")
+    conn = current_connection.get()
+    if conn is not None and (not token or token == conn.token) and conn.valid():
+        connection_auth_stats["connection_hits"] += 1
+        return conn.user_id
     if not token:
         return None
 
     try:
-        from server.core.auth import verify_token as auth_verify_token
-
+        connection_auth_stats["token_checks"] += 1
         payload, error = auth_verify_token(ctx, token, expected_type="access")
         if error or not payload:
             return None
@@ -41,6 +53,9 @@ def get_user_id_from_token(ctx: AppContext, data: dict | None) -> int | None:
         user_id = payload.get("user_id")
         if not isinstance(user_id, int):
             return None
+        if conn is not None and isinstance(payload.get("exp"), int | float):
+            # 새 토큰(갱신/계정 전환)으로 연결 인증 갱신
+            conn.user_id, conn.token, conn.exp = user_id, token, float(payload["exp"])
         return user_id
     except Exception as e:
         logger.warning("Failed to extract user_id from token: %s", e)
@@ -72,7 +87,12 @@ def get_or_create_session(ctx: AppContext, websocket, user_id: int):
 
 
 def get_room(ctx: AppContext, session: dict, room_id: str | None):
-    """세션 내 채팅방 객체 반환(없으면 생성)."""
+    """세션 내 채팅방 객체 반환(없으면 생성).
+
+    유휴 정리(RoomEvictor)로 히스토리가 내려간 방은 설정만 남은 상태이므로 빈 히스토리를
+    다시 만들고 "rehydrate" 표시를 남깁니다. DB에서 최근 윈도우를 채우려면
+    get_room_hydrated를 사용하세요.
+    """
     rid = room_id or "default"
     rooms = session.setdefault("rooms", {})
     room = rooms.get(rid)
@@ -81,6 +101,55 @@ def get_room(ctx: AppContext, session: dict, room_id: str | None):
 
         room = {"history": HistoryHandler(max_turns=30), "provider_sessions": {}}
         rooms[rid] = room
+    elif "history" not in room:
+        from server.handlers.history_handler import HistoryHandler
+
+        evicted = room.pop("evicted", None) or {}
+        history = HistoryHandler(max_turns=evicted.get("max_turns", 30))
+        history.max_turns_explicit = bool(evicted.get("max_turns_explicit"))
+        room["history"] = history
+        room["rehydrate"] = True
+    room["last_access"] = time.monotonic()
+    return rid, room
+
+
+async def rehydrate_room(ctx: AppContext, user_id, rid: str, room: dict):
+    """정리됐던 방의 최근 메시지/누적 요약을 DB에서 복원 (필요한 경우에만, 1회)"""
+    pending = room.get("rehydrate")
+    if not pending:
+        return
+    if isinstance(pending, asyncio.Future):
+        # 다른 요청이 복원 중이면 끝날 때까지 대기 (순서 뒤섞임 방지)
+        await pending
+        return
+    done = asyncio.get_running_loop().create_future()
+    room["rehydrate"] = done
+    history = room["history"]
+    try:
+        if ctx.db_handler:
+            limit = history.max_turns or REHYDRATE_MESSAGE_LIMIT
+            rows = await ctx.db_handler.list_messages(rid, user_id, limit=limit)
+            for m in rows:
+                if m.get("role") == "user":
+                    history.add_user_message(m.get("content") or "")
+                else:
+                    history.add_assistant_message(m.get("content") or "")
+            summary_row = await ctx.db_handler.get_room_summary(rid, user_id)
+            history.set_summary((summary_row or {}).get("summary"))
+            evictor = getattr(ctx, "room_evictor", None)
+            if evictor is not None:
+                evictor.rehydrated_total += 1
+    except (sqlite3.Error, AttributeError) as exc:
+        logger.debug(f"rehydrate_room - 복원 실패: {rid}", exc_info=exc)
+    finally:
+        room.pop("rehydrate", None)
+        done.set_result(None)
+
+
+async def get_room_hydrated(ctx: AppContext, session: dict, user_id, room_id: str | None):
+    """get_room + 정리됐던 방이면 DB에서 최근 윈도우 복원"""
+    rid, room = get_room(ctx, session, room_id)
+    await rehydrate_room(ctx, user_id, rid, room)
     return rid, room
 
 
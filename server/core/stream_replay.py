@@ -0,0 +1,57 @@
+"""스트림 재연결용 재전송 버퍼
+
+모바일 등에서 스트리밍 도중 연결이 끊기면 그 사이 프레임은 사라지고, 사용자는 같은 질문을
+다시 보내 생성 비용을 한 번 더 냅니다. ReplayBuffer는 스트림 1건의 프레임에 순번(seq)을 붙여
+소켓과 별개로 보관하고, 재연결한 클라이언트가 resume_stream으로 마지막 seq를 보내면
+그 뒤 프레임만 돌려줍니다. 보관 한도를 넘어 앞부분이 밀려나면 스냅샷으로 대신합니다.
+
+프레임은 wire.dumps 결과(객체)이므로 문자열 앞에 "seq" 필드를 끼워 넣어 다시 직렬화하지 않습니다.
+바로 전송할 프레임에는 seq를 붙인 원본 객체도 실어 바이너리 코덱이 다시 파싱하지 않게 합니다
+(보관본은 문자열만 유지).
+"""
+
+from __future__ import annotations
+
+from collections import deque
+
+from .wire import with_obj
+
+
+class ReplayBuffer:
+    """seq가 붙은 최근 프레임 보관 (seq는 1부터 증가)"""
+
+    def __init__(self, max_frames: int = 1024):
+        self.max_frames = max(1, int(max_frames))
+        self._frames: deque[tuple[int, str]] = deque(maxlen=self.max_frames)
+        self.last_seq = 0
+
+    @property
+    def first_seq(self) -> int:
+        """보관 중인 가장 오래된 seq (비었으면 다음에 붙을 seq)"""
+        return self._frames[0][0] if self._frames else self.last_seq + 1
+
+    def append(self, frame: str) -> str:
+        """seq를 붙여 보관하고 전송할 프레임 반환"""
+        self.last_seq += 1
+        tagged = f'{{"seq":{self.last_seq},{frame[1:]}' if frame[1:2] == '"' else frame
+        self._frames.append((self.last_seq, tagged))
+        obj = getattr(frame, "obj", None)
+        if tagged is not frame and isinstance(obj, dict):
+            return with_obj(tagged, {"seq": self.last_seq, **obj})
+        return tagged
+
+    def since(self, seq: int) -> list[tuple[int, str]] | None:
+        """seq 이후 프레임 목록 (앞부분이 밀려나 이어 줄 수 없으면 None)"""
+        if seq >= self.last_seq:
+            return []
+        if seq + 1 < self.first_seq:
+            return None
+        return [item for item in self._frames if item[0] > seq]
+
+    def release(self, keep_last: int = 1):
+        """스트림 종료 후 최근 keep_last개만 남기고 비움 (완료 프레임 재전송용)"""
+        while len(self._frames) > keep_last:
+            self._frames.popleft()
+
+    def __len__(self) -> int:
+        return len(self._frames)
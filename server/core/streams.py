@@ -0,0 +1,159 @@
+"""진행 중인 채팅 스트림 관리 (하드 취소)
+
+채팅 요청 1건마다 StreamHandle을 만들어 contextvar(current_stream)에 올려 둡니다.
+프로바이더 핸들러는 띄운 서브프로세스를 attach_process()로 등록하고, 취소 요청이 오면
+cancel()이 등록된 프로세스를 즉시 종료(SIGTERM → 유예 후 SIGKILL)하고
+프로바이더 호출 태스크도 취소해 슬롯/대기열 자리를 바로 돌려줍니다.
+
+취소 시점까지 스트리밍된 텍스트와 토큰 사용량(Claude assistant 이벤트의 usage)은
+observe()로 추적해 두었다가 부분 결과로 기록합니다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from contextvars import ContextVar
+
+from .process_pool import terminate_process
+
+logger = logging.getLogger(__name__)
+
+current_stream: ContextVar[StreamHandle | None] = ContextVar("current_stream", default=None)
+
+
+class StreamHandle:
+    """채팅 스트림 1건 (프로바이더 프로세스/태스크 및 부분 결과 보관)"""
+
+    def __init__(
+        self,
+        room_id: str | None = None,
+        kill_grace_seconds: float | None = None,
+        user_id=None,
+    ):
+        self.room_id = room_id
+        # 방 소유자 (연결이 끊긴 뒤에도 방 정리에서 스트리밍 중인 방을 제외하기 위해 보관)
+        self.user_id = user_id
+        if kill_grace_seconds is None:
+            kill_grace_seconds = float(os.getenv("CANCEL_KILL_GRACE_SECONDS", "2"))
+        self.kill_grace_seconds = kill_grace_seconds
+        self.cancelled = False
+        # 멱등성 키가 붙은 chat: 연결이 끊겨도 끝까지 생성 (재연결 후 이어 받기)
+        self.keep_on_disconnect = False
+        self.processes: set = set()
+        self.partial_text = ""
+        self.partial_usage: dict | None = None
+        self._task: asyncio.Task | None = None
+        self._reaper: asyncio.Future | None = None
+
+    # ===== 프로세스 등록 =====
+    def attach(self, process):
+        """프로세스 등록 (이미 취소된 스트림이면 즉시 종료)"""
+        if self.cancelled:
+            self._reaper = asyncio.ensure_future(
+                terminate_process(process, timeout=self.kill_grace_seconds)
+            )
+            return
+        self.processes.add(process)
+
+    def detach(self, process):
+        self.processes.discard(process)
+
+    # ===== 부분 결과 추적 =====
+    def observe(self, event: dict):
+        """스트림 이벤트에서 누적 텍스트/토큰 사용량 갱신"""
+        if not isinstance(event, dict):
+            return
+        etype = event.get("type")
+        if etype == "content_block_delta":
+            text = (event.get("delta") or {}).get("text")
+            if isinstance(text, str):
+                self.partial_text += text
+        elif etype == "assistant":
+            message = event.get("message") or {}
+            # Claude는 assistant 이벤트마다 전체 텍스트를 보냄
+            texts = [
+                item.get("text", "")
+                for item in message.get("content", [])
+                if isinstance(item, dict) and item.get("type") == "text"
+            ]
+            if texts:
+                self.partial_text = "".join(texts)
+            if isinstance(message.get("usage"), dict):
+                self.partial_usage = message["usage"]
+
+    def partial_token_info(self) -> dict | None:
+        """취소 시점까지의 토큰 사용량 (token_info 형식)"""
+        usage = self.partial_usage
+        if not usage:
+            return None
+        input_tokens = usage.get("input_tokens", 0) or 0
+        cache_read = usage.get("cache_read_input_tokens", 0) or 0
+        cache_creation = usage.get("cache_creation_input_tokens", 0) or 0
+        output_tokens = usage.get("output_tokens", 0) or 0
+        total_tokens = input_tokens + cache_read + cache_creation + output_tokens
+        return {
+            "input_tokens": input_tokens,
+            "cache_read_tokens": cache_read,
+            "cache_creation_tokens": cache_creation,
+            "output_tokens": output_tokens,
+            "total_tokens": total_tokens,
+            "context_window": 200000,
+            "tokens_remaining": 200000 - total_tokens,
+            "partial": True,
+        }
+
+    # ===== 실행/취소 =====
+    async def run(self, coro):
+        """프로바이더 호출을 태스크로 실행 (취소되면 None 반환)"""
+        token = current_stream.set(self)
+        try:
+            self._task = asyncio.ensure_future(coro)
+        finally:
+            current_stream.reset(token)
+        try:
+            result = await self._task
+            return None if self.cancelled else result
+        except asyncio.CancelledError:
+            # 바깥 태스크 자체가 취소된 경우(연결 종료 등)는 그대로 전파
+            outer = asyncio.current_task()
+            if self.cancelled and not (outer and outer.cancelling()):
+                return None
+            raise
+        finally:
+            self._task = None
+
+    async def cancel(self) -> int:
+        """프로세스 즉시 종료 + 호출 태스크 취소. 종료한 프로세스 수 반환"""
+        if self.cancelled:
+            return 0
+        self.cancelled = True
+        processes = list(self.processes)
+        self.processes.clear()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        await asyncio.gather(
+            *(terminate_process(p, timeout=self.kill_grace_seconds) for p in processes),
+            return_exceptions=True,
+        )
+        logger.info(f"Stream cancelled (room={self.room_id}, processes={len(processes)})")
+        return len(processes)
+
+
+def attach_process(process):
+    """현재 스트림에 프로바이더 프로세스 등록 (스트림 밖이면 무시)"""
+    handle = current_stream.get()
+    if handle is not None:
+        handle.attach(process)
+
+
+def detach_process(process):
+    handle = current_stream.get()
+    if handle is not None:
+        handle.detach(process)
+
+
+def is_cancelled() -> bool:
+    handle = current_stream.get()
+    return bool(handle and handle.cancelled)
@@ -0,0 +1,224 @@
+"""히스토리 윈도우 밖으로 밀려난 대화의 증분 누적 요약
+
+턴 수/토큰 예산 윈도우를 넘은 오래된 메시지는 프롬프트에서 빠지기 때문에 긴 캠페인에서
+캐릭터가 앞선 사건을 "잊는" 문제가 생깁니다. Summarizer는 chat_complete 이후 백그라운드로
+새로 밀려난 메시지만 기존 요약에 접어 넣고(전체 재계산 없음), 방별 요약과 마지막으로 반영한
+message_id를 DB(room_summaries)에 저장합니다. 프롬프트에는 요약 + 최근 윈도우가 들어가므로
+대화가 길어져도 프롬프트 크기는 윈도우 + SUMMARY_MAX_TOKENS 이내로 유지됩니다.
+
+요약 방식:
+    extractive  메시지별 첫 문장을 발췌해 한 줄씩 추가 (CLI 호출 없음, 기본값)
+    claude|gemini|droid  해당 프로바이더 CLI로 "기존 요약 + 새 메시지 → 갱신된 요약" 생성
+                         (실패하면 extractive로 대체)
+
+환경변수:
+    SUMMARY_MODE        off | extractive | claude | gemini | droid (기본 extractive)
+    SUMMARY_MODEL       프로바이더 요약에 사용할 모델 (비우면 CLI 기본값)
+    SUMMARY_MAX_TOKENS  요약 최대 추정 토큰 수 (넘으면 가장 오래된 줄부터 제거, 기본 800)
+    SUMMARY_MIN_BATCH   한 번에 접을 최소 메시지 수 (기본 4)
+    SUMMARY_BATCH_LIMIT 한 번에 접을 최대 메시지 수 (기본 40)
+    SUMMARY_LINE_CHARS  extractive 모드의 메시지당 최대 글자 수 (기본 160)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+
+from .tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_MODES = ("claude", "gemini", "droid")
+
+FOLD_SYSTEM_PROMPT = (
+    "You maintain a running summary of a long role-play conversation. "
+    "Merge the new messages into the existing summary. Keep names, relationships, "
+    "promises, items, locations and unresolved plot threads. Drop small talk. "
+    "Output only the updated summary as short bullet lines, in Korean (한국어)."
+)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?。…])\s|\n")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _role_label(role: str | None) -> str:
+    return "사용자" if role == "user" else "AI"
+
+
+class Summarizer:
+    """방별 누적 요약을 백그라운드에서 증분 갱신"""
+
+    def __init__(
+        self,
+        mode: str = "extractive",
+        model: str | None = None,
+        max_tokens: int = 800,
+        min_batch: int = 4,
+        batch_limit: int = 40,
+        line_chars: int = 160,
+    ):
+        self.mode = mode
+        self.model = model or None
+        self.max_tokens = max(1, int(max_tokens))
+        self.min_batch = max(1, int(min_batch))
+        self.batch_limit = max(self.min_batch, int(batch_limit))
+        self.line_chars = max(20, int(line_chars))
+        # (user_id, room_id) → 진행 중인 요약 작업
+        self._tasks: dict[tuple, asyncio.Task] = {}
+        # 작업 중 새 턴이 끝나 한 번 더 돌아야 하는 방
+        self._dirty: set[tuple] = set()
+        self.folds_total = 0
+        self.messages_folded_total = 0
+        self.provider_fallbacks_total = 0
+        self.errors_total = 0
+
+    # ===== 요약 =====
+    def _extract_line(self, message: dict) -> str:
+        text = _WHITESPACE.sub(" ", (message.get("content") or "").strip())
+        first = _SENTENCE_END.split(text, maxsplit=1)[0].strip() if text else ""
+        if len(first) > self.line_chars:
+            first = first[: self.line_chars - 1].rstrip() + "…"
+        return f"- {_role_label(message.get('role'))}: {first}" if first else ""
+
+    def clip(self, summary: str) -> str:
+        """요약을 SUMMARY_MAX_TOKENS 이내로 (오래된 줄부터 제거, 최신 1줄은 유지)"""
+        lines = [line for line in summary.strip().splitlines() if line.strip()]
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.max_tokens:
+            lines.pop(0)
+        return "\n".join(lines)
+
+    def fold_extractive(self, summary: str, messages: list[dict]) -> str:
+        lines = [self._extract_line(m) for m in messages]
+        added = "\n".join(line for line in lines if line)
+        return self.clip(f"{summary}\n{added}" if summary else added)
+
+    async def _fold_with_provider(self, ctx, summary: str, messages: list[dict]) -> str:
+        handler = getattr(ctx, f"{self.mode}_handler", None)
+        if handler is None:
+            raise RuntimeError(f"{self.mode} handler 없음")
+        transcript = "\n".join(
+            f"{_role_label(m.get('role'))}: {m.get('content')}" for m in messages
+        )
+        prompt = (
+            f"[기존 요약]\n{summary or '(없음)'}\n\n[새로 밀려난 대화]\n{transcript}\n\n"
+            f"위 내용을 반영한 갱신된 요약을 약 {self.max_tokens}토큰 이내로 작성하세요."
+        )
+        result = await handler.send_message(
+            prompt,
+            system_prompt=FOLD_SYSTEM_PROMPT,
+            callback=None,
+            session_id=None,
+            model=self.model,
+        )
+        if not isinstance(result, dict) or not result.get("success") or not result.get("message"):
+            error = result.get("error") if isinstance(result, dict) else None
+            raise RuntimeError(error or "요약 실패")
+        return self.clip(result["message"])
+
+    async def fold(self, ctx, summary: str, messages: list[dict]) -> str:
+        """기존 요약에 새 메시지를 접어 넣은 요약 반환"""
+        if self.mode in PROVIDER_MODES:
+            try:
+                return await self._fold_with_provider(ctx, summary, messages)
+            except Exception as exc:
+                self.provider_fallbacks_total += 1
+                logger.warning(f"Provider summary failed ({self.mode}), using extractive: {exc}")
+        return self.fold_extractive(summary, messages)
+
+    async def update_room(self, ctx, user_id, room_id: str, history) -> int:
+        """DB에서 아직 요약되지 않은 윈도우 밖 메시지를 접고 저장, 접은 메시지 수 반환
+
+        마지막 프롬프트 윈도우 크기만큼의 최신 메시지는 남겨 둡니다. 직후 추가된 응답 1건
+        때문에 다음 프롬프트와 최대 1건 겹칠 수 있지만 빠지는 메시지는 없습니다.
+        """
+        db = ctx.db_handler
+        row = await db.get_room_summary(room_id, user_id) or {}
+        summary = row.get("summary") or ""
+        upto = int(row.get("summarized_upto_id") or 0)
+        keep = history.last_window_count or len(history)
+        folded = 0
+        while True:
+            rows = await db.list_messages_after(
+                room_id, user_id, upto, limit=self.batch_limit + keep
+            )
+            evicted = rows[: max(0, len(rows) - keep)]
+            if len(evicted) < self.min_batch:
+                break
+            evicted = evicted[: self.batch_limit]
+            summary = await self.fold(ctx, summary, evicted)
+            upto = evicted[-1]["message_id"]
+            await db.save_room_summary(room_id, user_id, summary, upto)
+            folded += len(evicted)
+            self.folds_total += 1
+            self.messages_folded_total += len(evicted)
+        history.set_summary(summary)
+        return folded
+
+    # ===== 백그라운드 실행 =====
+    def schedule(self, ctx, user_id, room_id: str, history) -> asyncio.Task | None:
+        """chat_complete 이후 호출: 윈도우 밖 메시지가 있으면 방별 요약 작업 예약"""
+        if getattr(ctx, "db_handler", None) is None or history.evicted_count() == 0:
+            return None
+        key = (user_id, room_id)
+        task = self._tasks.get(key)
+        if task is not None and not task.done():
+            self._dirty.add(key)
+            return task
+        task = asyncio.create_task(self._run(ctx, key, history))
+        self._tasks[key] = task
+        task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        return task
+
+    def _forget(self, key: tuple, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            self._tasks.pop(key, None)
+
+    async def _run(self, ctx, key: tuple, history):
+        user_id, room_id = key
+        while True:
+            self._dirty.discard(key)
+            try:
+                await self.update_room(ctx, user_id, room_id, history)
+            except Exception as exc:
+                self.errors_total += 1
+                logger.error(f"Room summary update failed for {room_id}: {exc}")
+                return
+            if key not in self._dirty:
+                return
+
+    async def drain(self):
+        """진행 중인 요약 작업이 모두 끝날 때까지 대기 (종료/테스트용)"""
+        tasks = [t for t in self._tasks.values() if not t.done()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "running": sum(1 for t in self._tasks.values() if not t.done()),
+            "folds_total": self.folds_total,
+            "messages_folded_total": self.messages_folded_total,
+            "provider_fallbacks_total": self.provider_fallbacks_total,
+            "errors_total": self.errors_total,
+        }
+
+
+def summarizer_from_env() -> Summarizer | None:
+    """환경변수로 Summarizer 생성 (SUMMARY_MODE=off면 None)"""
+    mode = (os.getenv("SUMMARY_MODE", "extractive") or "off").strip().lower()
+    if mode in ("off", "none", "0", "false"):
+        return None
+    if mode != "extractive" and mode not in PROVIDER_MODES:
+        logger.warning(f"Unknown SUMMARY_MODE={mode}, using extractive")
+        mode = "extractive"
+    return Summarizer(
+        mode=mode,
+        model=os.getenv("SUMMARY_MODEL") or None,
+        max_tokens=int(os.getenv("SUMMARY_MAX_TOKENS", "800")),
+        min_batch=int(os.getenv("SUMMARY_MIN_BATCH", "4")),
+        batch_limit=int(os.getenv("SUMMARY_BATCH_LIMIT", "40")),
+        line_chars=int(os.getenv("SUMMARY_LINE_CHARS", "160")),
+    )
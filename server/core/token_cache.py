@@ -0,0 +1,83 @@
+"""검증된 JWT 캐시 (서명 재검증 생략)
+
+HTTP API는 요청마다, WebSocket은 메시지마다 같은 액세스 토큰을 jwt.decode(HMAC 검증 +
+base64/JSON 파싱)로 다시 검증합니다. TokenCache는 검증에 성공한 토큰의 다이제스트(SHA-256)를
+키로 payload를 보관하고, 만료(exp) 전까지는 캐시에서 바로 돌려줍니다.
+원문 토큰은 보관하지 않으며, 실패한 검증은 캐시하지 않습니다.
+
+환경변수:
+    AUTH_TOKEN_CACHE_SIZE  보관할 최대 토큰 수 (LRU, 0이면 비활성, 기본 1024)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+
+class TokenCache:
+    """토큰 다이제스트 → (payload, exp) LRU"""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max(1, int(max_size))
+        self._entries: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str, now: float | None = None) -> dict | None:
+        """만료 전의 검증된 payload (없거나 만료됐으면 None)"""
+        key = self.digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        payload, exp = entry
+        if (time.time() if now is None else now) >= exp:
+            # 만료 판정/오류 코드는 jwt.decode에 맡김
+            del self._entries[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, token: str, payload: dict):
+        """검증에 성공한 토큰 등록 (exp가 없는 토큰은 캐시하지 않음)"""
+        exp = payload.get("exp")
+        if not isinstance(exp, int | float):
+            return
+        key = self.digest(token)
+        self._entries[key] = (payload, float(exp))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def token_cache_from_env() -> TokenCache | None:
+    """환경변수로 TokenCache 생성 (AUTH_TOKEN_CACHE_SIZE=0이면 None)"""
+    size = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024"))
+    if size <= 0:
+        return None
+    return TokenCache(max_size=size)
@@ -0,0 +1,83 @@
+"""로컬 토큰 수 추정과 히스토리 토큰 예산
+
+실제 토크나이저 없이 빠르게 프롬프트 크기를 가늠하기 위한 추정기입니다.
+한국어(한글 음절)는 Claude/Gemini 토크나이저에서 대략 음절당 0.9토큰, 영문/숫자는
+4자당 1토큰, 기타 기호는 2개당 1토큰 수준으로 계산합니다. 오차는 ±15% 정도로,
+히스토리 윈도우 크기 결정과 지표 보고 용도로만 씁니다.
+
+히스토리 예산 환경변수:
+    HISTORY_TOKEN_BUDGET   기본 예산 (0이면 비활성 → 기존 턴 수 기준)
+    HISTORY_TOKEN_BUDGETS  프로바이더/모델별 예산 (예: "claude=16000,droid=6000,gemini:gemini-2.5-pro=30000")
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+
+HANGUL_TOKENS_PER_CHAR = 0.9
+CJK_TOKENS_PER_CHAR = 1.0
+LATIN_CHARS_PER_TOKEN = 4
+SYMBOL_TOKENS_PER_CHAR = 0.5
+# 메시지 1건당 역할 접두사/개행 비용
+MESSAGE_OVERHEAD_TOKENS = 3
+
+_HANGUL = re.compile(r"[가-힣ㄱ-ㆎ]")
+_CJK = re.compile(r"[぀-ヿ一-鿿]")
+_LATIN = re.compile(r"[A-Za-z0-9]+")
+_SYMBOL = re.compile(r"[^\sA-Za-z0-9가-힣ㄱ-ㆎ぀-ヿ一-鿿]")
+
+
+def estimate_tokens(text: str | None) -> int:
+    """텍스트의 토큰 수 추정 (한국어 보정)"""
+    if not text:
+        return 0
+    hangul = len(_HANGUL.findall(text))
+    cjk = len(_CJK.findall(text))
+    latin = sum(math.ceil(len(word) / LATIN_CHARS_PER_TOKEN) for word in _LATIN.findall(text))
+    symbols = len(_SYMBOL.findall(text))
+    return math.ceil(
+        hangul * HANGUL_TOKENS_PER_CHAR
+        + cjk * CJK_TOKENS_PER_CHAR
+        + latin
+        + symbols * SYMBOL_TOKENS_PER_CHAR
+    )
+
+
+def estimate_message_tokens(content: str | None) -> int:
+    """히스토리 메시지 1건의 토큰 수 추정 (역할 접두사 포함)"""
+    return estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _parse_budgets(spec: str) -> dict[str, int]:
+    budgets: dict[str, int] = {}
+    for item in spec.split(","):
+        key, sep, value = item.partition("=")
+        if not sep:
+            continue
+        try:
+            budgets[key.strip().lower()] = int(value.strip())
+        except ValueError:
+            continue
+    return budgets
+
+
+def history_token_budget(provider: str | None, model: str | None = None) -> int | None:
+    """프로바이더/모델별 히스토리 토큰 예산 (None이면 턴 수 기준 윈도우 사용)
+
+    우선순위: provider:model > provider > HISTORY_TOKEN_BUDGET
+    """
+    budgets = _parse_budgets(os.getenv("HISTORY_TOKEN_BUDGETS", ""))
+    provider = (provider or "").lower()
+    budget = None
+    if model:
+        budget = budgets.get(f"{provider}:{str(model).lower()}")
+    if budget is None:
+        budget = budgets.get(provider)
+    if budget is None:
+        try:
+            budget = int(os.getenv("HISTORY_TOKEN_BUDGET", "0") or 0)
+        except ValueError:
+            budget = 0
+    return budget if budget > 0 else None
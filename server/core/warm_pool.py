@@ -0,0 +1,183 @@
+"""프로바이더 CLI 예열(warm-spare) 프로세스 풀
+
+CLI(Node.js) 부팅 시간을 첫 토큰 지연에서 숨기기 위해, 같은 실행 인자(argv)+cwd로
+미리 띄워 둔 유휴 프로세스를 다음 요청에 넘겨주고 백그라운드에서 다시 채웁니다.
+
+- 키는 (argv, cwd)입니다. 새 세션 요청의 argv는 (프로바이더, 모델, cwd)로 결정되므로
+  사실상 요청서의 (provider, model, cwd) 키와 같습니다.
+- 세션 이어가기(--resume 등) 요청은 시작 시점의 세션 상태를 읽으므로 예열하지 않습니다.
+- 실제로 요청된 키만 예열하며(수요 기반), 키 수는 LRU로 제한합니다.
+- Gemini/Droid만 사용합니다. Claude는 매 턴 달라지는 system prompt(히스토리 포함)를
+  argv로 넘기므로 키가 반복되지 않아 예열본을 쓸 수 없습니다 (CLAUDE_WARM_POOL_SIZE 없음).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+
+class WarmProcessPool:
+    """(argv, cwd) 키별로 유휴 프로세스 N개를 유지하는 예열 풀"""
+
+    def __init__(
+        self,
+        name: str,
+        size: int = 0,
+        max_idle_seconds: float = 120.0,
+        max_keys: int = 8,
+    ):
+        self.name = name
+        self.size = max(0, int(size))
+        self.max_idle_seconds = max_idle_seconds
+        self.max_keys = max(1, int(max_keys))
+        # key -> deque[(spawned_at, process)]
+        self._idle: OrderedDict[tuple, deque] = OrderedDict()
+        self._labels: dict[tuple, str] = {}
+        self._refills: dict[tuple, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.spawned = 0
+        self.expired = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    async def _spawn(self, args: list[str], cwd: str):
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+        )
+        self.spawned += 1
+        return process
+
+    def _is_fresh(self, spawned_at: float, process) -> bool:
+        if getattr(process, "returncode", None) is not None:
+            return False
+        return time.monotonic() - spawned_at <= self.max_idle_seconds
+
+    def _take_idle(self, key: tuple):
+        idle = self._idle.get(key)
+        while idle:
+            spawned_at, process = idle.popleft()
+            if self._is_fresh(spawned_at, process):
+                return process
+            self.expired += 1
+            self._discard(process)
+        return None
+
+    def _discard(self, process):
+        try:
+            if getattr(process, "returncode", None) is None:
+                process.kill()
+        except ProcessLookupError:
+            pass
+
+    def _touch_key(self, key: tuple, label: str | None):
+        """수요 키 등록(LRU). 한도를 넘으면 가장 오래된 키의 유휴 프로세스 정리"""
+        if key in self._idle:
+            self._idle.move_to_end(key)
+        else:
+            self._idle[key] = deque()
+        if label:
+            self._labels[key] = label
+        while len(self._idle) > self.max_keys:
+            old_key, old_idle = self._idle.popitem(last=False)
+            self._labels.pop(old_key, None)
+            task = self._refills.pop(old_key, None)
+            if task:
+                task.cancel()
+            for _, process in old_idle:
+                self._discard(process)
+
+    async def acquire(
+        self, args: list[str], cwd: str, label: str | None = None, reusable: bool = True
+    ):
+        """요청용 프로세스 반환 (예열본이 있으면 즉시, 없으면 새로 기동)"""
+        if not self.enabled or not reusable:
+            if self.enabled:
+                self.bypassed += 1
+            return await self._spawn(args, cwd)
+
+        key = (tuple(str(a) for a in args), str(cwd))
+        self._touch_key(key, label)
+        process = self._take_idle(key)
+        if process is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            process = await self._spawn(args, cwd)
+        self._schedule_refill(key, list(args), cwd)
+        return process
+
+    def _schedule_refill(self, key: tuple, args: list[str], cwd: str):
+        task = self._refills.get(key)
+        if task and not task.done():
+            return
+        self._refills[key] = asyncio.create_task(self._refill(key, args, cwd))
+
+    async def _refill(self, key: tuple, args: list[str], cwd: str):
+        try:
+            while key in self._idle and len(self._idle[key]) < self.size:
+                process = await self._spawn(args, cwd)
+                idle = self._idle.get(key)
+                if idle is None:  # 대기 중 키가 밀려난 경우
+                    self._discard(process)
+                    return
+                idle.append((time.monotonic(), process))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"{self.name} warm pool refill failed: {e}")
+        finally:
+            self._refills.pop(key, None)
+
+    async def close(self):
+        """예열 작업 중단 및 유휴 프로세스 정리"""
+        for task in list(self._refills.values()):
+            task.cancel()
+        self._refills.clear()
+        for idle in self._idle.values():
+            for _, process in idle:
+                self._discard(process)
+                try:
+                    await asyncio.wait_for(process.wait(), timeout=1.0)
+                except Exception:
+                    pass
+        self._idle.clear()
+        self._labels.clear()
+
+    def stats(self) -> dict:
+        """풀 크기/적중률 지표"""
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": self.size,
+            "idle": sum(len(v) for v in self._idle.values()),
+            "keys": [
+                {"label": self._labels.get(k, ""), "idle": len(v)} for k, v in self._idle.items()
+            ],
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "spawned": self.spawned,
+            "expired": self.expired,
+        }
+
+
+def warm_pool_from_env(name: str) -> WarmProcessPool:
+    """환경변수로 예열 풀 생성 (<PROVIDER>_WARM_POOL_SIZE > CLI_WARM_POOL_SIZE, 기본 0=비활성)"""
+    size = os.getenv(f"{name.upper()}_WARM_POOL_SIZE") or os.getenv("CLI_WARM_POOL_SIZE", "0")
+    max_idle = float(os.getenv("CLI_WARM_MAX_IDLE_SECONDS", "120"))
+    return WarmProcessPool(name, size=int(size), max_idle_seconds=max_idle)
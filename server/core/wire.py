@@ -0,0 +1,263 @@
+"""WebSocket 송신 인코딩 (compact UTF-8 JSON + 선택적 바이너리 코덱)
+
+json.dumps 기본값(ensure_ascii=True, ", "/": " 구분자)은 한글 1자를 6바이트 \\uXXXX로 내보내고
+구분자마다 공백을 붙입니다. 모든 액션은 dumps()로 프레임을 만들어 UTF-8 그대로(한글 3바이트),
+공백 없는 JSON을 보냅니다.
+
+연결마다 WireSocket이 실제 소켓을 감싸 송신 바이트를 집계하고, 클라이언트가 set_codec으로
+바이너리 코덱(msgpack 설치 시)을 고르면 JSON 프레임을 해당 코덱으로 바꿔 보냅니다.
+dumps()가 돌려주는 WireFrame은 원본 객체를 함께 들고 있어, 바이너리 코덱은 JSON을 다시
+파싱하지 않고 원본 객체를 바로 인코딩합니다. 수신(클라이언트 → 서버)은 계속 JSON 텍스트입니다.
+
+송신 큐: send()는 프레임을 연결별 큐에 넣고 바로 돌아오며, 전용 writer 태스크가 실제 소켓으로
+내보냅니다. 느린 클라이언트(3G 등) 때문에 프로바이더 출력을 읽는 쪽이 막히지 않습니다.
+    - 큐가 예산(WS_SEND_BUDGET_BYTES)을 넘으면 congested: 스트림 병합기가 flush를 미루고
+      델타를 더 크게 합쳐 보냄 (막지 않고 병합)
+    - 상한(WS_SEND_MAX_BYTES)을 넘거나 맨 앞 프레임이 WS_SLOW_CLIENT_SECONDS 넘게 밀려 있으면
+      가망 없는 클라이언트로 보고 연결을 끊음 (키가 붙은 chat은 재연결 후 resume_stream으로 이어 받음)
+      대기 시간은 writer가 전송 중인 프레임에도 적용되므로 추가 송신이 없어도 끊깁니다.
+
+환경변수:
+    WS_SEND_BUDGET_BYTES    연결별 송신 큐 예산 (넘으면 병합 모드, 기본 262144)
+    WS_SEND_MAX_BYTES       연결별 송신 큐 상한 (넘으면 연결 종료, 0이면 없음, 기본 4194304)
+    WS_SLOW_CLIENT_SECONDS  큐 맨 앞 프레임의 최대 대기 시간 (넘으면 연결 종료, 0이면 없음, 기본 30)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+import weakref
+from collections import deque
+
+try:  # 선택 의존성: 없으면 JSON만 지원
+    import msgpack
+except ImportError:  # pragma: no cover - 설치 환경에 따라 다름
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+_SEPARATORS = (",", ":")
+
+
+class WireFrame(str):
+    """dumps() 결과: 그대로 JSON 텍스트 프레임이며, 바이너리 코덱용으로 원본 객체(obj)를 보관"""
+
+    __slots__ = ("obj",)
+
+
+def with_obj(text: str, obj) -> WireFrame:
+    frame = WireFrame(text)
+    frame.obj = obj
+    return frame
+
+
+def dumps(obj) -> WireFrame:
+    """송신용 compact UTF-8 JSON (보낸 뒤에는 obj를 수정하지 않아야 함)"""
+    return with_obj(json.dumps(obj, ensure_ascii=False, separators=_SEPARATORS), obj)
+
+
+def frame_prefix(action: str) -> str:
+    """dumps({"action": action, ...}) 결과의 앞부분 (문자열 그대로 프레임 종류 판별용)"""
+    return dumps({"action": action})[:-1]
+
+
+def available_codecs() -> list[str]:
+    return ["json", "msgpack"] if msgpack is not None else ["json"]
+
+
+class WireStats:
+    """코덱별 송신 프레임/바이트 + 연결별 송신 큐 게이지 (서버 전체)"""
+
+    def __init__(self):
+        self.frames: dict[str, int] = {}
+        self.bytes: dict[str, int] = {}
+        self.slow_disconnects = 0
+        self.sockets: weakref.WeakSet[WireSocket] = weakref.WeakSet()
+
+    def record(self, codec: str, size: int):
+        self.frames[codec] = self.frames.get(codec, 0) + 1
+        self.bytes[codec] = self.bytes.get(codec, 0) + size
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        sockets = list(self.sockets)
+        return {
+            "codecs": {
+                codec: {
+                    "frames": frames,
+                    "bytes": self.bytes.get(codec, 0),
+                    "bytes_per_frame": round(self.bytes.get(codec, 0) / frames, 1),
+                }
+                for codec, frames in self.frames.items()
+            },
+            "queues": {
+                "connections": len(sockets),
+                "queued_bytes_total": sum(ws.queued_bytes for ws in sockets),
+                "queued_bytes_max": max((ws.queued_bytes for ws in sockets), default=0),
+                "queued_frames_max": max((len(ws) for ws in sockets), default=0),
+                "congested": sum(1 for ws in sockets if ws.congested),
+                "max_lag_ms": round(max((ws.lag(now) for ws in sockets), default=0.0) * 1000, 1),
+            },
+            "slow_disconnects": self.slow_disconnects,
+        }
+
+
+class SlowClientError(ConnectionError):
+    """송신 큐 상한/대기 시간을 넘어 연결을 끊은 클라이언트"""
+
+
+class WireSocket:
+    """연결 1개의 송신 계층 (코덱 적용 + 바이트 집계 + 송신 큐). 그 밖의 속성은 원래 소켓에 위임"""
+
+    def __init__(
+        self,
+        websocket,
+        stats: WireStats | None = None,
+        budget_bytes: int | None = None,
+        max_bytes: int | None = None,
+        slow_seconds: float | None = None,
+    ):
+        self._ws = websocket
+        self.stats = stats
+        self.codec = "json"
+        if budget_bytes is None:
+            budget_bytes = int(os.getenv("WS_SEND_BUDGET_BYTES", "262144"))
+        if max_bytes is None:
+            max_bytes = int(os.getenv("WS_SEND_MAX_BYTES", "4194304"))
+        if slow_seconds is None:
+            slow_seconds = float(os.getenv("WS_SLOW_CLIENT_SECONDS", "30"))
+        self.budget_bytes = max(1, budget_bytes)
+        self.max_bytes = max(0, max_bytes)
+        self.slow_seconds = max(0.0, slow_seconds)
+        self._queue: deque[tuple[str | bytes, int, float]] = deque()
+        self.queued_bytes = 0
+        self._wakeup = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._writer: asyncio.Task | None = None
+        self._error: BaseException | None = None
+        self._closer: asyncio.Task | None = None
+        if stats is not None:
+            stats.sockets.add(self)
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    @property
+    def congested(self) -> bool:
+        """송신 큐가 예산을 넘었는지 (스트림 병합기가 flush를 미루는 기준)"""
+        return self.queued_bytes > self.budget_bytes
+
+    def lag(self, now: float | None = None) -> float:
+        """큐 맨 앞 프레임이 기다린 시간(초)"""
+        if not self._queue:
+            return 0.0
+        return (time.monotonic() if now is None else now) - self._queue[0][2]
+
+    def set_codec(self, codec: str) -> bool:
+        if codec not in available_codecs():
+            return False
+        self.codec = codec
+        return True
+
+    async def send(self, frame):
+        """프레임을 송신 큐에 넣음 (실제 전송은 writer 태스크)"""
+        if self._error is not None:
+            raise self._error
+        if self.codec == "msgpack" and isinstance(frame, str):
+            # dumps()로 만든 프레임은 원본 객체를 바로 인코딩 (그 밖의 문자열만 파싱)
+            obj = getattr(frame, "obj", None)
+            frame = msgpack.packb(json.loads(frame) if obj is None else obj, use_bin_type=True)
+        size = len(frame) if isinstance(frame, bytes) else len(frame.encode())
+        if self.stats is not None:
+            self.stats.record(self.codec, size)
+        self._queue.append((frame, size, time.monotonic()))
+        self.queued_bytes += size
+        self._drained.clear()
+        if (self.max_bytes and self.queued_bytes > self.max_bytes) or (
+            self.slow_seconds and self.lag() > self.slow_seconds
+        ):
+            await self._drop_slow_client()
+            raise self._error
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop())
+        self._wakeup.set()
+
+    async def _write_loop(self):
+        try:
+            while True:
+                while self._queue:
+                    frame, size, enqueued_at = self._queue[0]
+                    if self.slow_seconds:
+                        # 전송이 멈춘 클라이언트는 추가 송신이 없어도 대기 한도에서 끊음
+                        timeout = enqueued_at + self.slow_seconds - time.monotonic()
+                        try:
+                            await asyncio.wait_for(self._ws.send(frame), max(0.0, timeout))
+                        except TimeoutError:
+                            await self._drop_slow_client(stop_writer=False)
+                            return
+                    else:
+                        await self._ws.send(frame)
+                    self._queue.popleft()
+                    self.queued_bytes -= size
+                self._drained.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # 연결이 끊김: 이후 send()는 같은 예외로 실패 (구독 해제 등은 호출 측에서 처리)
+            self._error = exc
+            self._clear()
+
+    def _clear(self):
+        self._queue.clear()
+        self.queued_bytes = 0
+        self._drained.set()
+
+    async def _drop_slow_client(self, stop_writer: bool = True):
+        lag = self.lag()
+        self._error = SlowClientError(f"slow client: queued={self.queued_bytes}B, lag={lag:.1f}s")
+        logger.warning(f"Disconnecting slow client ({self._error})")
+        if self.stats is not None:
+            self.stats.slow_disconnects += 1
+        self._clear()
+        if stop_writer:
+            await self._stop_writer()
+        # 닫기 핸드셰이크도 막힐 수 있으므로 송신 측을 붙잡지 않도록 백그라운드로 닫음
+        self._closer = asyncio.create_task(self._close_slow())
+
+    async def _close_slow(self):
+        try:
+            await self._ws.close(code=1013, reason="slow client")
+        except Exception as exc:
+            logger.debug(f"slow client close failed: {exc}")
+
+    async def _stop_writer(self):
+        writer, self._writer = self._writer, None
+        if writer is not None and not writer.done():
+            writer.cancel()
+            try:
+                await writer
+            except asyncio.CancelledError:
+                pass
+
+    async def drain(self):
+        """큐가 빌 때까지 대기 (연결이 끊겨 큐를 비운 경우 포함)"""
+        await self._drained.wait()
+
+    async def aclose(self):
+        """연결 종료 시 writer 정리"""
+        if self._error is None:
+            self._error = ConnectionError("connection closed")
+        self._clear()
+        await self._stop_writer()
+        if self.stats is not None:
+            self.stats.sockets.discard(self)
+
+    def __getattr__(self, name):
+        return getattr(self._ws, name)
@@ -4,6 +4,11 @@ import logging
 import os
 from pathlib import Path
 
+from server.core import streams
+from server.core.latency import LatencyTracker
+from server.core.process_pool import ProcessPool, terminate_process
+from server.core.replay import recorder_from_env
+
 logger = logging.getLogger(__name__)
 
 
@@ -13,7 +18,15 @@ class ClaudeCodeHandler:
     def __init__(self, claude_path=None):
         # 환경 변수 또는 기본값 사용
         self.claude_path = claude_path or os.getenv("CLAUDE_PATH", "claude")
-        self.process = None
+        # 요청마다 독립 프로세스를 띄우고, 동시 실행 수는 슬롯 풀로 제한
+        self.max_concurrency = int(os.getenv("CLAUDE_MAX_CONCURRENCY", "8"))
+        self.pool = ProcessPool("claude", self.max_concurrency)
+        # 모델별 첫 토큰/토큰 간 지연 분포 → 적응형 readline 타임아웃
+        self.latency = LatencyTracker.from_env("claude")
+        # stdout 녹화 (PROVIDER_RECORD_DIR 설정 시 재생용 transcript 저장)
+        self.recorder = recorder_from_env()
+        # 실행 중인 프로세스 (stop()에서 일괄 종료)
+        self._processes: set = set()
         # 챗봇 전용 작업 디렉토리 (chatbot_workspace/CLAUDE.md 읽기 위해)
         self.chatbot_workspace = Path(__file__).parent.parent.parent / "chatbot_workspace"
         self.chatbot_workspace.mkdir(exist_ok=True)
@@ -21,11 +34,7 @@ class ClaudeCodeHandler:
         self.session_cumulative_tokens = {}
 
     async def start(self, system_prompt=None, resume_session_id=None, model: str | None = None):
-        """Claude Code 프로세스 시작"""
-        if self.process is not None:
-            logger.warning("Claude Code process already running")
-            return
-
+        """Claude Code 프로세스 시작 (요청 1건 전용 프로세스를 반환)"""
         try:
             args = [
                 self.claude_path,
@@ -46,35 +55,32 @@ class ClaudeCodeHandler:
             if system_prompt:
                 args.extend(["--system-prompt", system_prompt])
 
-            self.process = await asyncio.create_subprocess_exec(
+            # 챗봇 전용 디렉토리에서 실행 (CLAUDE.md 읽기 위해)
+            # 예열 풀은 쓰지 않음: system prompt(히스토리 포함)가 argv에 들어가 매 턴 달라짐
+            process = await asyncio.create_subprocess_exec(
                 *args,
                 stdin=asyncio.subprocess.PIPE,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
-                cwd=str(
-                    self.chatbot_workspace
-                ),  # 챗봇 전용 디렉토리에서 실행 (CLAUDE.md 읽기 위해)
+                cwd=str(self.chatbot_workspace),
             )
+            self._processes.add(process)
+            if self.recorder:
+                self.recorder.wrap(process, "claude", args, label=model or "default")
             logger.info(f"Claude Code process started (cwd: {self.chatbot_workspace})")
+            return process
         except Exception as e:
             logger.error(f"Failed to start Claude Code: {e}")
             raise
 
     async def stop(self):
-        """Claude Code 프로세스 종료"""
-        if self.process is None:
-            return
-
-        try:
-            self.process.terminate()
-            await asyncio.wait_for(self.process.wait(), timeout=5.0)
-            logger.info("Claude Code process stopped")
-        except TimeoutError:
-            self.process.kill()
-            await self.process.wait()
-            logger.warning("Claude Code process killed (timeout)")
-        finally:
-            self.process = None
+        """실행 중인 모든 Claude Code 프로세스 종료"""
+        processes = list(self._processes)
+        self._processes.clear()
+        for process in processes:
+            await terminate_process(process)
+        if processes:
+            logger.info(f"Claude Code processes stopped ({len(processes)})")
 
     async def send_message(
         self, prompt, system_prompt=None, callback=None, session_id=None, model: str | None = None
@@ -91,15 +97,29 @@ class ClaudeCodeHandler:
         Returns:
             최종 결과 딕셔너리
         """
-        if self.process is None:
-            await self.start(system_prompt, resume_session_id=session_id, model=model)
+        # 슬롯이 빌 때까지 대기 후, 이 요청 전용 프로세스를 띄움
+        async with self.pool.slot() as slot:
+            process = await self.start(system_prompt, resume_session_id=session_id, model=model)
+            slot.process = process
+            streams.attach_process(process)
+            try:
+                return await self._communicate(process, prompt, callback, session_id, model)
+            except asyncio.CancelledError:
+                # 호출이 취소되면(연결 종료 등) 프로세스도 함께 정리
+                await terminate_process(process)
+                raise
+            finally:
+                streams.detach_process(process)
+                self._processes.discard(process)
 
+    async def _communicate(self, process, prompt, callback, session_id, model=None):
+        """프로세스에 프롬프트를 보내고 stream-json 응답을 수집"""
         try:
             # 프롬프트 전송
             prompt_with_newline = prompt + "\n"
-            self.process.stdin.write(prompt_with_newline.encode("utf-8"))
-            await self.process.stdin.drain()
-            self.process.stdin.close()  # stdin 닫기 (중요!)
+            process.stdin.write(prompt_with_newline.encode("utf-8"))
+            await process.stdin.drain()
+            process.stdin.close()  # stdin 닫기 (중요!)
 
             # 응답 수신 (스트리밍)
             result = None
@@ -109,19 +129,21 @@ class ClaudeCodeHandler:
             # stderr를 비동기로 읽어서 버퍼 막힘 방지
             async def read_stderr():
                 while True:
-                    line = await self.process.stderr.readline()
+                    line = await process.stderr.readline()
                     if not line:
                         break
                     logger.debug(f"Claude stderr: {line.decode('utf-8').strip()}")
 
             stderr_task = asyncio.create_task(read_stderr())
+            timing = self.latency.timing(model)
+            timeout_stage = None
 
             try:
-                # stdout 읽기 (타임아웃 추가)
+                # stdout 읽기 (첫 토큰/유휴 타임아웃은 관측 지연에서 유도)
                 while True:
                     try:
                         line = await asyncio.wait_for(
-                            self.process.stdout.readline(), timeout=120.0  # 2분 타임아웃
+                            process.stdout.readline(), timeout=timing.next_timeout()
                         )
 
                         if not line:
@@ -145,7 +167,10 @@ class ClaudeCodeHandler:
                                 content = message.get("content", [])
                                 for item in content:
                                     if item.get("type") == "text":
-                                        assistant_message = item.get("text", "")
+                                        text = item.get("text", "")
+                                        if text != assistant_message:
+                                            timing.token()
+                                        assistant_message = text
 
                             # 최종 결과
                             if data.get("type") == "result":
@@ -157,15 +182,26 @@ class ClaudeCodeHandler:
                             continue
 
                     except TimeoutError:
-                        logger.error("Timeout waiting for Claude response")
+                        timeout_stage = timing.timed_out()
+                        logger.error(f"Timeout waiting for Claude response ({timeout_stage})")
                         break
 
             finally:
                 stderr_task.cancel()
 
+            if timeout_stage:
+                # 멈춘 CLI가 슬롯을 계속 점유하지 않도록 즉시 종료
+                await terminate_process(process)
+                return {
+                    "success": False,
+                    "error": f"Claude 응답 시간 초과 ({timeout_stage})",
+                    "timeout": timeout_stage,
+                    "message": assistant_message,
+                    "session_id": current_session_id,
+                }
+
             # 프로세스 종료 대기
-            await self.process.wait()
-            self.process = None
+            await process.wait()
 
             # 토큰 사용량 계산 (세션 모드에서 중복 누적 방지)
             token_info = None
@@ -198,6 +234,8 @@ class ClaudeCodeHandler:
                         "cache_creation_tokens": 0,
                         "output_tokens": 0,
                         "total_tokens": delta_tokens,
+                        # 누적값 델타라 캐시 내역을 알 수 없음 → 캐시 적중률 집계 제외
+                        "cache_tracked": False,
                         "context_window": 200000,
                         "tokens_remaining": 200000 - total_tokens,
                     }
@@ -227,7 +265,7 @@ class ClaudeCodeHandler:
 
         except Exception as e:
             logger.error(f"Error sending message: {e}")
-            await self.stop()
+            await terminate_process(process)
             error_msg = str(e).lower()
             session_error = any(
                 kw in error_msg for kw in ("session", "expired", "invalid", "resume")
@@ -1,31 +1,63 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+# 프롬프트에 영향을 주지 않는 컨텍스트 필드 (캐시 키에서 제외)
+_NON_PROMPT_FIELDS = frozenset({"ai_provider", "session_retention"})
+
+
+class _ContextDict(dict):
+    """값이 실제로 바뀔 때마다 version을 올리는 컨텍스트 dict (프롬프트 캐시 키 무효화용)"""
+
+    version = 0
+
+    def __setitem__(self, key, value):
+        if key not in self or self[key] != value:
+            self.version += 1
+        super().__setitem__(key, value)
+
+
 class ContextHandler:
     """대화 컨텍스트 관리 (세계관, 캐릭터, 상황)"""
 
-    def __init__(self):
-        self.current_context = {
-            "world": "",
-            "situation": "",
-            "user_character": "",
-            "characters": [],
-            "narrator_enabled": False,
-            "narrator_mode": "moderate",  # active, moderate, passive
-            "narrator_description": "",
-            "user_is_narrator": False,  # 사용자가 진행자인 경우
-            "adult_level": "explicit",  # 성인 콘텐츠 수위: explicit, enhanced, extreme
-            "narrative_separation": False,  # 대화/서술/효과음 분리
-            "ai_provider": "claude",  # AI 제공자: claude, droid
-            # 대화 모드: trpg_multi | chat_plain | one_to_one_chat | one_to_one_drama
-            "conversation_mode": "trpg_multi",
-            # 출력량/주도권 제어(프롬프트 가이드용)
-            "output_level": "normal",  # less | normal | more
-            # 전개 속도(사건 밀도) 제어
-            # slow | normal | fast
-            "pace": "normal",
-            "narrator_drive": "guide",  # describe | guide | direct
-            "choice_policy": "off",  # off | require
-            "choice_count": 3,
-            "session_retention": False,  # 세션 유지: True면 provider 세션 ID 유지
-        }
+    def __init__(self, prompt_cache_size: int | None = None):
+        self.current_context = _ContextDict(
+            {
+                "world": "",
+                "situation": "",
+                "user_character": "",
+                "characters": [],
+                "narrator_enabled": False,
+                "narrator_mode": "moderate",  # active, moderate, passive
+                "narrator_description": "",
+                "user_is_narrator": False,  # 사용자가 진행자인 경우
+                "adult_level": "explicit",  # 성인 콘텐츠 수위: explicit, enhanced, extreme
+                "narrative_separation": False,  # 대화/서술/효과음 분리
+                "ai_provider": "claude",  # AI 제공자: claude, droid
+                # 대화 모드: trpg_multi | chat_plain | one_to_one_chat | one_to_one_drama
+                "conversation_mode": "trpg_multi",
+                # 출력량/주도권 제어(프롬프트 가이드용)
+                "output_level": "normal",  # less | normal | more
+                # 전개 속도(사건 밀도) 제어
+                # slow | normal | fast
+                "pace": "normal",
+                "narrator_drive": "guide",  # describe | guide | direct
+                "choice_policy": "off",  # off | require
+                "choice_count": 3,
+                "session_retention": False,  # 세션 유지: True면 provider 세션 ID 유지
+            }
+        )
+        # 컴파일된 정적 프롬프트 캐시 (컨텍스트 해시 → 프롬프트, 방 사이 LRU)
+        if prompt_cache_size is None:
+            prompt_cache_size = int(os.getenv("PROMPT_CACHE_SIZE", "64"))
+        self.prompt_cache_size = max(0, prompt_cache_size)
+        self._prompt_cache: OrderedDict[str, str] = OrderedDict()
+        self.prompt_cache_hits = 0
+        self.prompt_cache_misses = 0
+        self.prompt_cache_evictions = 0
+        # (컨텍스트 version, 캐시 키): 컨텍스트가 바뀌지 않은 턴에는 해시를 다시 계산하지 않음
+        self._prompt_key: tuple[int, str] | None = None
 
     def set_world(self, world_description):
         """세계관 설정"""
@@ -161,9 +193,63 @@ class ContextHandler:
         """
         System prompt 생성
 
+        고정 규칙/세계관/캐릭터로 이루어진 정적 접두부 뒤에 매 턴 바뀌는 히스토리를 붙입니다.
+        접두부가 턴마다 바이트 단위로 같아야 프로바이더 프롬프트 캐시(cache_read)가 재사용됩니다.
+
         Args:
             history_text: 대화 히스토리 텍스트 (옵션)
         """
+        prompt = self.build_static_prompt()
+        if history_text:
+            prompt += "\n" + history_text
+        return prompt
+
+    def prompt_cache_key(self):
+        """프롬프트에 영향을 주는 컨텍스트 필드의 안정적인 해시"""
+        version = self.current_context.version
+        if self._prompt_key is not None and self._prompt_key[0] == version:
+            return self._prompt_key[1]
+        fields = {k: v for k, v in self.current_context.items() if k not in _NON_PROMPT_FIELDS}
+        raw = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+        key = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+        self._prompt_key = (version, key)
+        return key
+
+    def build_static_prompt(self):
+        """히스토리를 제외한 System prompt (컨텍스트가 같으면 항상 같은 문자열)
+
+        컨텍스트 해시로 컴파일 결과를 캐시해, 설정이 바뀌지 않은 턴에는 다시 조립하지 않습니다.
+        """
+        if not self.prompt_cache_size:
+            return self._compile_static_prompt()
+        key = self.prompt_cache_key()
+        prompt = self._prompt_cache.get(key)
+        if prompt is not None:
+            self._prompt_cache.move_to_end(key)
+            self.prompt_cache_hits += 1
+            return prompt
+        self.prompt_cache_misses += 1
+        prompt = self._compile_static_prompt()
+        self._prompt_cache[key] = prompt
+        if len(self._prompt_cache) > self.prompt_cache_size:
+            self._prompt_cache.popitem(last=False)
+            self.prompt_cache_evictions += 1
+        return prompt
+
+    def prompt_cache_stats(self):
+        """컴파일된 프롬프트 캐시 지표"""
+        lookups = self.prompt_cache_hits + self.prompt_cache_misses
+        return {
+            "size": len(self._prompt_cache),
+            "max_size": self.prompt_cache_size,
+            "hits": self.prompt_cache_hits,
+            "misses": self.prompt_cache_misses,
+            "evictions": self.prompt_cache_evictions,
+            "hit_ratio": round(self.prompt_cache_hits / lookups, 4) if lookups else None,
+        }
+
+    def _compile_static_prompt(self):
+        """정적 프롬프트 조립 (build_static_prompt의 캐시 미스 경로)"""
         mode = self.current_context.get("conversation_mode", "trpg_multi")
         narrator_enabled = self.current_context.get("narrator_enabled", False)
         user_is_narrator = self.current_context.get("user_is_narrator", False)
@@ -367,10 +453,6 @@ class ContextHandler:
             for char in self.current_context["characters"]:
                 prompt += f"[{char['name']}]\n{char['description']}\n\n"
 
-        # 대화 히스토리
-        if history_text:
-            prompt += history_text
-
         # 대화 규칙
         prompt += """=== Dialogue Rules ===
 1. Read user's message and respond naturally with appropriate characters
@@ -45,8 +45,8 @@ class DBHandler:
         row = await cur.fetchone()
         current_version = row[0] if row else 0
 
-        # 최신 버전: v6 (provider_sessions 컬럼 추가)
-        TARGET_VERSION = 6
+        # 최신 버전: v7 (room_summaries 테이블 추가)
+        TARGET_VERSION = 7
 
         # user_version == 0이지만 테이블이 존재하면 스키마 검사
         if current_version == 0:
@@ -129,10 +129,21 @@ class DBHandler:
                 );
                 CREATE INDEX IF NOT EXISTS idx_tok_user ON token_usage(user_id);
                 CREATE INDEX IF NOT EXISTS idx_tok_room ON token_usage(room_id);
+
+                -- room_summaries 테이블 (윈도우 밖으로 밀려난 대화의 누적 요약)
+                CREATE TABLE IF NOT EXISTS room_summaries (
+                    user_id INTEGER NOT NULL,
+                    room_id TEXT NOT NULL,
+                    summary TEXT NOT NULL DEFAULT '',
+                    summarized_upto_id INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (user_id, room_id),
+                    FOREIGN KEY (user_id, room_id) REFERENCES rooms(user_id, room_id) ON DELETE CASCADE
+                );
                 """
             )
             await self._conn.commit()
-            current_version = 6
+            current_version = 7
         elif current_version < 4:
             # 구버전 DB: v4로 마이그레이션 (기존 데이터 버림)
             await self._maybe_backup_legacy_db()
@@ -149,6 +160,11 @@ class DBHandler:
             await self._migrate_to_v6()
             current_version = 6
 
+        # v6 → v7: room_summaries 테이블 추가
+        if current_version == 6:
+            await self._migrate_to_v7()
+            current_version = 7
+
         # 버전 업데이트
         if current_version == TARGET_VERSION:
             await self._conn.execute(f"PRAGMA user_version = {TARGET_VERSION}")
@@ -504,6 +520,29 @@ class DBHandler:
             await self._conn.commit()
             logger.info("Migrated to v6: added provider_sessions column to rooms table")
 
+    async def _migrate_to_v7(self) -> None:
+        """v6 → v7: room_summaries 테이블 추가.
+
+        히스토리 윈도우 밖으로 밀려난 메시지를 방별 누적 요약으로 접어 저장하고,
+        어디까지 요약했는지(summarized_upto_id)를 함께 기록해 증분 갱신에 사용함.
+        """
+        assert self._conn is not None
+        await self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS room_summaries (
+                user_id INTEGER NOT NULL,
+                room_id TEXT NOT NULL,
+                summary TEXT NOT NULL DEFAULT '',
+                summarized_upto_id INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id, room_id),
+                FOREIGN KEY (user_id, room_id) REFERENCES rooms(user_id, room_id) ON DELETE CASCADE
+            )
+            """
+        )
+        await self._conn.commit()
+        logger.info("Migrated to v7: added room_summaries table")
+
     # ===== Rooms =====
     async def upsert_room(
         self,
@@ -608,6 +647,44 @@ class DBHandler:
             )
             await self._conn.commit()
 
+    # ===== Room summaries =====
+    async def get_room_summary(self, room_id: str, user_id: int) -> dict[str, Any] | None:
+        """방 누적 요약 조회 (summary, summarized_upto_id, updated_at)"""
+        assert self._conn is not None
+        cur = await self._conn.execute(
+            "SELECT summary, summarized_upto_id, updated_at FROM room_summaries "
+            "WHERE room_id = ? AND user_id = ?",
+            (room_id, user_id),
+        )
+        row = await cur.fetchone()
+        return dict(row) if row else None
+
+    async def save_room_summary(
+        self, room_id: str, user_id: int, summary: str, summarized_upto_id: int
+    ) -> None:
+        """방 누적 요약 저장
+
+        Args:
+            room_id: 방 ID
+            user_id: 사용자 ID
+            summary: 갱신된 요약 텍스트
+            summarized_upto_id: 요약에 반영된 마지막 message_id
+        """
+        assert self._conn is not None
+        async with self._lock:
+            await self._conn.execute(
+                """
+                INSERT INTO room_summaries(user_id, room_id, summary, summarized_upto_id)
+                VALUES(?, ?, ?, ?)
+                ON CONFLICT(user_id, room_id) DO UPDATE SET
+                  summary=excluded.summary,
+                  summarized_upto_id=excluded.summarized_upto_id,
+                  updated_at=CURRENT_TIMESTAMP
+                """,
+                (user_id, room_id, summary, summarized_upto_id),
+            )
+            await self._conn.commit()
+
     # ===== Messages =====
     async def save_message(self, room_id: str, role: str, content: str, user_id: int) -> None:
         """메시지 저장 (user_id 기반)
@@ -684,6 +761,24 @@ class DBHandler:
         rows = await cur.fetchall()
         return [dict(r) for r in rows]
 
+    async def list_messages_after(
+        self, room_id: str, user_id: int, after_id: int, limit: int = 200
+    ) -> list[dict[str, Any]]:
+        """after_id 이후 메시지를 오래된 순으로 최대 limit개 조회 (증분 요약용)"""
+        assert self._conn is not None
+        cur = await self._conn.execute(
+            """
+            SELECT message_id, role, content, timestamp
+            FROM messages
+            WHERE room_id=? AND user_id=? AND message_id > ?
+            ORDER BY message_id ASC
+            LIMIT ?
+            """,
+            (room_id, user_id, after_id, limit),
+        )
+        rows = await cur.fetchall()
+        return [dict(r) for r in rows]
+
     async def count_messages(self, room_id: str, user_id: int, before_id: int | None = None) -> int:
         """메시지 개수 조회 (user_id 기반)
 
@@ -4,9 +4,51 @@ import logging
 import os
 from pathlib import Path
 
+from server.core import streams
+from server.core.latency import LatencyTracker
+from server.core.process_pool import ProcessPool, terminate_process
+from server.core.replay import recorder_from_env
+from server.core.warm_pool import warm_pool_from_env
+
 logger = logging.getLogger(__name__)
 
 
+class _HedgeAttempt:
+    """헤징 경주에 참가한 시도 1건
+
+    첫 토큰을 먼저 낸 시도가 승자가 되며, 그 전까지의 이벤트(init 등)는 버퍼에 두었다가
+    승자로 확정될 때 한꺼번에 전달합니다. 패자의 이벤트는 버립니다.
+    """
+
+    def __init__(self, model: str, callback, race: dict):
+        self.model = model
+        self.callback = callback
+        self.race = race
+        self.session_id: str | None = None
+        self.first_token = asyncio.Event()
+        self._buffer: list[dict] = []
+
+    async def mark_first_token(self):
+        if self.first_token.is_set():
+            return
+        self.first_token.set()
+        if self.race.get("winner") is None:
+            self.race["winner"] = self
+            self.race["decided"].set()
+            buffered, self._buffer = self._buffer, []
+            if self.callback:
+                for event in buffered:
+                    await self.callback(event)
+
+    async def emit(self, event: dict):
+        winner = self.race.get("winner")
+        if winner is self:
+            if self.callback:
+                await self.callback(event)
+        elif winner is None:
+            self._buffer.append(event)
+
+
 class DroidHandler:
     """Droid (Z.ai) CLI 프로세스 관리 및 통신
 
@@ -31,11 +73,33 @@ class DroidHandler:
         # Factory 공식 권장은 headless `droid exec` 경로
         self.exec_style = os.getenv("DROID_EXEC_STYLE", "exec").lower()
         self.extra_args = [a for a in os.getenv("DROID_EXTRA_ARGS", "").split() if a]
-        # 읽기 타임아웃(초) 및 첫 토큰 타임아웃(초)
+        # 읽기 타임아웃(초) 및 첫 토큰 타임아웃(초): 적응형 타임아웃의 상한으로 사용
         self.read_timeout = float(os.getenv("DROID_READ_TIMEOUT", "120"))
         self.first_token_timeout = float(os.getenv("DROID_FIRST_TOKEN_TIMEOUT", "60"))
-
-        self.process = None
+        # 모델별 첫 토큰/토큰 간 지연 분포 → 적응형 타임아웃 및 헤징 기준
+        self.latency = LatencyTracker.from_env(
+            "droid",
+            first_token_ceiling=self.first_token_timeout,
+            idle_ceiling=self.read_timeout,
+        )
+        # 헤징: 기본 모델의 첫 토큰이 관측 p95보다 늦으면 첫 폴백 모델을 병렬로 띄우고
+        # 먼저 토큰을 낸 쪽을 채택 (표본이 모이기 전에는 DROID_HEDGE_DEFAULT_SECONDS 사용)
+        self.hedge_enabled = os.getenv("DROID_HEDGE", "false").lower() in ("1", "true", "yes", "on")
+        self.hedge_percentile = float(os.getenv("DROID_HEDGE_PERCENTILE", "95"))
+        self.hedge_min_delay = float(os.getenv("DROID_HEDGE_MIN_SECONDS", "2"))
+        self.hedge_default_delay = float(os.getenv("DROID_HEDGE_DEFAULT_SECONDS", "10"))
+        self.hedge_min_samples = int(os.getenv("DROID_HEDGE_MIN_SAMPLES", "20"))
+        self.hedge_counters = {"eligible": 0, "fired": 0, "won": 0, "lost": 0, "both_failed": 0}
+
+        # 시도마다 독립 프로세스를 띄우고, 동시 실행 수는 슬롯 풀로 제한
+        self.max_concurrency = int(os.getenv("DROID_MAX_CONCURRENCY", "4"))
+        self.pool = ProcessPool("droid", self.max_concurrency)
+        # 실행 중인 프로세스 (stop()에서 일괄 종료)
+        self._processes: set = set()
+        # 예열 프로세스 풀 (CLI 부팅 지연 숨김, 기본 비활성)
+        self.warm_pool = warm_pool_from_env("droid")
+        # stdout 녹화 (PROVIDER_RECORD_DIR 설정 시 재생용 transcript 저장)
+        self.recorder = recorder_from_env()
         # 챗봇 전용 작업 디렉토리 (chatbot_workspace/CLAUDE.md 읽기 위해)
         self.chatbot_workspace = Path(__file__).parent.parent.parent / "chatbot_workspace"
         self.chatbot_workspace.mkdir(exist_ok=True)
@@ -47,16 +111,12 @@ class DroidHandler:
         style: str | None = None,
         session_id: str | None = None,
     ):
-        """Droid 프로세스 시작
+        """Droid 프로세스 시작 (시도 1건 전용 프로세스를 반환)
 
         Args:
             system_prompt: 시스템 프롬프트(미사용. stdin에 포함)
             model: 사용할 모델명. None이면 기본 모델 사용
         """
-        if self.process is not None:
-            logger.warning("Droid process already running")
-            return
-
         try:
             use_model = model or self.primary_model
             use_style = (style or self.exec_style or "exec").lower()
@@ -89,45 +149,54 @@ class DroidHandler:
             if self.extra_args:
                 args.extend(self.extra_args)
 
-            self.process = await asyncio.create_subprocess_exec(
-                *args,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=str(self.chatbot_workspace),  # 챗봇 전용 디렉토리에서 실행
+            # 챗봇 전용 디렉토리에서 실행 (새 세션이면 예열된 프로세스 사용)
+            process = await self.warm_pool.acquire(
+                args,
+                str(self.chatbot_workspace),
+                label=use_model,
+                reusable=not session_id,
             )
+            self._processes.add(process)
+            if self.recorder:
+                self.recorder.wrap(process, "droid", args, label=use_model)
             logger.info(
                 f"Droid process started (style={use_style}, model={use_model}, cwd={self.chatbot_workspace})"
             )
+            return process
         except Exception as e:
             logger.error(f"Failed to start Droid: {e}")
             raise
 
     async def stop(self):
-        """Droid 프로세스 종료"""
-        if self.process is None:
-            return
-
-        try:
-            # Check if process has already terminated
-            if self.process.returncode is None:
-                self.process.terminate()
-                await asyncio.wait_for(self.process.wait(), timeout=5.0)
-                logger.info("Droid process stopped")
-            else:
-                logger.info("Droid process already stopped")
-        except (TimeoutError, ProcessLookupError) as e:
-            if isinstance(e, asyncio.TimeoutError):
-                try:
-                    self.process.kill()
-                    await self.process.wait()
-                    logger.warning("Droid process killed (timeout)")
-                except ProcessLookupError:
-                    logger.info("Droid process already gone")
-            else:
-                logger.info("Droid process already gone")
-        finally:
-            self.process = None
+        """실행 중인 모든 Droid 프로세스 종료"""
+        processes = list(self._processes)
+        self._processes.clear()
+        for process in processes:
+            await terminate_process(process)
+        if processes:
+            logger.info(f"Droid processes stopped ({len(processes)})")
+        # 예열된 유휴 프로세스도 정리 (종료 시 고아 프로세스 방지)
+        await self.warm_pool.close()
+
+    def hedge_delay(self, model: str) -> float:
+        """헤징 발동 기준(초): 모델별 첫 토큰 p95, [최소값, 첫 토큰 타임아웃]으로 제한"""
+        if self.latency.ttft_samples(model) < self.hedge_min_samples:
+            base = self.hedge_default_delay
+        else:
+            base = self.latency.ttft_percentile(model, self.hedge_percentile)
+        ceiling = self.latency.first_token_timeout(model)
+        return max(self.hedge_min_delay, min(base or self.hedge_default_delay, ceiling))
+
+    def hedge_stats(self) -> dict:
+        """헤징 발동/승리 횟수와 모델별 헤징 기준 (지연 분포는 latency.stats() 참고)"""
+        models = {
+            model: {
+                "samples": self.latency.ttft_samples(model),
+                "hedge_delay_ms": round(self.hedge_delay(model) * 1000, 1),
+            }
+            for model in self.latency.models()
+        }
+        return {"enabled": self.hedge_enabled, **self.hedge_counters, "models": models}
 
     async def send_message(
         self,
@@ -152,12 +221,20 @@ class DroidHandler:
         logger.info(f"Starting Droid send_message with prompt: {prompt[:100]}...")
         latest_session_id: str | None = session_id
 
-        async def _invoke_once(model_for_try: str | None, session_id_for_try: str | None):
+        async def _invoke_once(
+            model_for_try: str | None,
+            session_id_for_try: str | None,
+            attempt: _HedgeAttempt | None = None,
+        ):
             """단일 모델로 한 번 호출 수행.
 
+            attempt가 주어지면(헤징 경주) 이벤트는 attempt를 거쳐 승자만 전달되고,
+            세션 ID도 attempt에 기록됩니다.
+
             Returns: (success: bool, assistant_message: str, error: dict|None)
             """
             nonlocal latest_session_id
+            emit = attempt.emit if attempt is not None else callback
             # 실행 스타일 순서 결정
             styles = ["exec"]
 
@@ -193,9 +270,9 @@ class DroidHandler:
                     return True
                 return any(phrase in stripped for phrase in noise_phrases)
 
-            async def read_stderr():
+            async def read_stderr(process):
                 while True:
-                    line = await self.process.stderr.readline()
+                    line = await process.stderr.readline()
                     if not line:
                         break
                     text = line.decode("utf-8").strip()
@@ -210,220 +287,346 @@ class DroidHandler:
                         logger.debug(f"Droid stderr: {text}")
 
             for style in styles:
-                if self.process is None:
-                    await self.start(
+                # 슬롯이 빌 때까지 대기 후, 이 시도 전용 프로세스를 띄움
+                async with self.pool.slot() as slot:
+                    process = await self.start(
                         model=model_for_try, style=style, session_id=session_id_for_try
                     )
+                    slot.process = process
+                    streams.attach_process(process)
 
-                # System prompt를 프롬프트 앞에 추가
-                full_prompt = prompt
-                if system_prompt:
-                    full_prompt = f"{system_prompt}\n\n=== 사용자 메시지 ===\n{prompt}"
-
-                # 프롬프트 전송
-                prompt_with_newline = full_prompt + "\n"
-                logger.info(f"Sending prompt to Droid (length: {len(prompt_with_newline)})")
-                self.process.stdin.write(prompt_with_newline.encode("utf-8"))
-                await self.process.stdin.drain()
-                self.process.stdin.close()  # stdin 닫기 (중요!)
-                logger.info("Prompt sent to Droid, stdin closed")
-
-                assistant_message = ""
-                stderr_task = asyncio.create_task(read_stderr())
-
-                # stdout 읽기 (타임아웃 포함)
-                response_started = False
-                first_token_deadline = asyncio.get_event_loop().time() + self.first_token_timeout
-                error_payload = None
-
-                try:
-                    # Read all remaining output after stdin is closed
-                    while True:
-                        try:
-                            line = await asyncio.wait_for(
-                                self.process.stdout.readline(), timeout=self.read_timeout
-                            )
+                    # System prompt를 프롬프트 앞에 추가
+                    full_prompt = prompt
+                    if system_prompt:
+                        full_prompt = f"{system_prompt}\n\n=== 사용자 메시지 ===\n{prompt}"
+
+                    # 프롬프트 전송
+                    prompt_with_newline = full_prompt + "\n"
+                    logger.info(f"Sending prompt to Droid (length: {len(prompt_with_newline)})")
+                    try:
+                        process.stdin.write(prompt_with_newline.encode("utf-8"))
+                        await process.stdin.drain()
+                        process.stdin.close()  # stdin 닫기 (중요!)
+                    except Exception:
+                        streams.detach_process(process)
+                        self._processes.discard(process)
+                        await terminate_process(process)
+                        raise
+                    logger.info("Prompt sent to Droid, stdin closed")
+
+                    assistant_message = ""
+                    stderr_task = asyncio.create_task(read_stderr(process))
+
+                    # stdout 읽기 (첫 토큰/유휴 타임아웃은 관측 지연에서 유도)
+                    timing = self.latency.timing(model_for_try or self.primary_model)
+
+                    async def on_token(timing=timing):
+                        if timing.token() and attempt is not None:
+                            await attempt.mark_first_token()
 
-                            if not line:
-                                # No more output, break the loop
-                                break
+                    error_payload = None
 
-                            raw = line.decode("utf-8").strip()
-                            logger.debug(f"Droid raw output: {raw}")
+                    try:
+                        # Read all remaining output after stdin is closed
+                        while True:
                             try:
-                                data = json.loads(raw)
-                            except json.JSONDecodeError:
-                                # JSON이 아닐 경우에도 토큰으로 취급(유연 파싱)
-                                if raw:
-                                    clean_text = remove_ansi_escape(raw)
-                                    if not is_noise_text(clean_text):
-                                        if callback:
-                                            await callback(
-                                                {
-                                                    "type": "content_block_delta",
-                                                    "delta": {"text": clean_text},
-                                                }
-                                            )
-                                        assistant_message += clean_text
-                                logger.debug(f"Droid non-JSON output: {raw}")
-                                continue
-
-                            # 세션 ID 저장 (init 메시지에서)
-                            if data.get("type") == "system" and data.get("subtype") == "init":
-                                new_session = data.get("session_id")
-                                if new_session:
-                                    latest_session_id = new_session
-                                    logger.info(f"Droid Session ID: {new_session}")
-                                if callback:
-                                    await callback(
+                                line = await asyncio.wait_for(
+                                    process.stdout.readline(), timeout=timing.next_timeout()
+                                )
+
+                                if not line:
+                                    # No more output, break the loop
+                                    break
+
+                                raw = line.decode("utf-8").strip()
+                                logger.debug(f"Droid raw output: {raw}")
+                                try:
+                                    data = json.loads(raw)
+                                except json.JSONDecodeError:
+                                    # JSON이 아닐 경우에도 토큰으로 취급(유연 파싱)
+                                    if raw:
+                                        clean_text = remove_ansi_escape(raw)
+                                        if not is_noise_text(clean_text):
+                                            await on_token()
+                                            if emit:
+                                                await emit(
+                                                    {
+                                                        "type": "content_block_delta",
+                                                        "delta": {"text": clean_text},
+                                                    }
+                                                )
+                                            assistant_message += clean_text
+                                    logger.debug(f"Droid non-JSON output: {raw}")
+                                    continue
+
+                                # 세션 ID 저장 (init 메시지에서)
+                                if data.get("type") == "system" and data.get("subtype") == "init":
+                                    new_session = data.get("session_id")
+                                    if new_session:
+                                        if attempt is not None:
+                                            attempt.session_id = new_session
+                                        else:
+                                            latest_session_id = new_session
+                                        logger.info(f"Droid Session ID: {new_session}")
+                                    if emit:
+                                        await emit(
+                                            {
+                                                "type": "system",
+                                                "subtype": "droid_init",
+                                                "session_id": new_session,
+                                            }
+                                        )
+
+                                # 오류 이벤트 캐치 (가능 시)
+                                if data.get("type") == "error":
+                                    error_payload = {
+                                        "type": "error",
+                                        "code": data.get("code"),
+                                        "message": data.get("message") or data.get("error"),
+                                    }
+                                    logger.warning(f"Droid error event: {error_payload}")
+
+                                # 메시지/델타 스트림 처리(유연 파싱)
+                                text_chunks: list[str] = []
+
+                                # 1) 기존 가정 형식
+                                if data.get("type") == "message" and (
+                                    data.get("role") in ("assistant", "bot", None)
+                                ):
+                                    if isinstance(data.get("text"), str):
+                                        text_chunks.append(remove_ansi_escape(data.get("text")))
+                                    if isinstance(data.get("content"), str):
+                                        text_chunks.append(remove_ansi_escape(data.get("content")))
+
+                                # 2) Claude 유사 형식
+                                if data.get("type") == "assistant":
+                                    message_obj = data.get("message") or {}
+                                    content_items = message_obj.get("content", [])
+                                    for item in content_items:
+                                        if (
+                                            isinstance(item, dict)
+                                            and item.get("type") == "text"
+                                            and isinstance(item.get("text"), str)
+                                        ):
+                                            text_chunks.append(remove_ansi_escape(item.get("text")))
+
+                                # 3) 일반적인 델타 키들
+                                if isinstance(data.get("delta"), str):
+                                    text_chunks.append(remove_ansi_escape(data.get("delta")))
+                                if isinstance(data.get("token"), str):
+                                    text_chunks.append(remove_ansi_escape(data.get("token")))
+
+                                if text_chunks:
+                                    for chunk in text_chunks:
+                                        if chunk and not is_noise_text(chunk):
+                                            await on_token()
+                                            if emit:
+                                                await emit(
+                                                    {
+                                                        "type": "content_block_delta",
+                                                        "delta": {"text": chunk},
+                                                    }
+                                                )
+                                            assistant_message += chunk
+
+                                # 응답 완료 감지 - droid doesn't send explicit completion messages
+                                # if data.get('type') in ('response_complete', 'result'):
+                                #     logger.info("Droid response complete")
+                                #     break
+
+                                # tool_result 에러는 무시하고 계속 진행
+                                if (
+                                    data.get("type") == "tool_result"
+                                    and data.get("isError") == True
+                                ):
+                                    logger.warning(
+                                        f"Droid tool error (ignoring): {data.get('value')}"
+                                    )
+                                    continue
+
+                                # 첫 토큰 타임아웃 체크 (토큰 아닌 출력만 계속 오는 경우)
+                                if not timing.streaming and timing.next_timeout() <= 0.001:
+                                    timing.timed_out()
+                                    logger.error("Droid first token timeout")
+                                    return (
+                                        False,
+                                        assistant_message,
                                         {
-                                            "type": "system",
-                                            "subtype": "droid_init",
-                                            "session_id": new_session,
-                                        }
+                                            "type": "timeout",
+                                            "stage": "first_token",
+                                            "stderr": stderr_buffer[-20:],
+                                        },
                                     )
 
-                            # 오류 이벤트 캐치 (가능 시)
-                            if data.get("type") == "error":
-                                error_payload = {
-                                    "type": "error",
-                                    "code": data.get("code"),
-                                    "message": data.get("message") or data.get("error"),
-                                }
-                                logger.warning(f"Droid error event: {error_payload}")
-
-                            # 메시지/델타 스트림 처리(유연 파싱)
-                            text_chunks: list[str] = []
-
-                            # 1) 기존 가정 형식
-                            if data.get("type") == "message" and (
-                                data.get("role") in ("assistant", "bot", None)
-                            ):
-                                if isinstance(data.get("text"), str):
-                                    text_chunks.append(remove_ansi_escape(data.get("text")))
-                                if isinstance(data.get("content"), str):
-                                    text_chunks.append(remove_ansi_escape(data.get("content")))
-
-                            # 2) Claude 유사 형식
-                            if data.get("type") == "assistant":
-                                message_obj = data.get("message") or {}
-                                content_items = message_obj.get("content", [])
-                                for item in content_items:
-                                    if (
-                                        isinstance(item, dict)
-                                        and item.get("type") == "text"
-                                        and isinstance(item.get("text"), str)
-                                    ):
-                                        text_chunks.append(remove_ansi_escape(item.get("text")))
-
-                            # 3) 일반적인 델타 키들
-                            if isinstance(data.get("delta"), str):
-                                text_chunks.append(remove_ansi_escape(data.get("delta")))
-                            if isinstance(data.get("token"), str):
-                                text_chunks.append(remove_ansi_escape(data.get("token")))
-
-                            if text_chunks:
-                                response_started = True
-                                for chunk in text_chunks:
-                                    if chunk and not is_noise_text(chunk):
-                                        if callback:
-                                            await callback(
-                                                {
-                                                    "type": "content_block_delta",
-                                                    "delta": {"text": chunk},
-                                                }
-                                            )
-                                        assistant_message += chunk
-
-                            # 응답 완료 감지 - droid doesn't send explicit completion messages
-                            # if data.get('type') in ('response_complete', 'result'):
-                            #     logger.info("Droid response complete")
-                            #     break
-
-                            # tool_result 에러는 무시하고 계속 진행
-                            if data.get("type") == "tool_result" and data.get("isError") == True:
-                                logger.warning(f"Droid tool error (ignoring): {data.get('value')}")
-                                continue
-
-                            # 첫 토큰 타임아웃 체크
-                            if (
-                                not response_started
-                                and asyncio.get_event_loop().time() > first_token_deadline
-                            ):
-                                logger.error("Droid first token timeout")
+                            except TimeoutError:
+                                stage = timing.timed_out()
+                                logger.error(f"Timeout waiting for Droid response ({stage})")
                                 return (
                                     False,
                                     assistant_message,
                                     {
                                         "type": "timeout",
-                                        "stage": "first_token",
+                                        "stage": (
+                                            "first_token" if stage == "first_token" else "read"
+                                        ),
                                         "stderr": stderr_buffer[-20:],
                                     },
                                 )
 
+                    except asyncio.CancelledError:
+                        # 취소/헤징 패배: 종료 대기 없이 즉시 정리
+                        await terminate_process(process, timeout=1.0)
+                        raise
+                    finally:
+                        stderr_task.cancel()
+
+                        # 프로세스 종료 대기 및 정리
+                        try:
+                            await asyncio.wait_for(process.wait(), timeout=5.0)
                         except TimeoutError:
-                            logger.error("Timeout waiting for Droid response (read)")
-                            return (
-                                False,
-                                assistant_message,
-                                {"type": "timeout", "stage": "read", "stderr": stderr_buffer[-20:]},
-                            )
+                            process.kill()
+                            await process.wait()
+                        finally:
+                            streams.detach_process(process)
+                            self._processes.discard(process)
+
+                    # 메시지가 비어있고 오류가 있다면 실패로 간주
+                    if not assistant_message and error_payload:
+                        return False, assistant_message, error_payload
+
+                    # 메시지가 비어있으면 실패 처리 (상위 폴백용)
+                    if not assistant_message:
+                        logger.warning(
+                            f"Droid produced empty response (style={style}); trying next style if available"
+                        )
+                        continue
+
+                    # 후처리: 멀티 캐릭터 태그([이름]:) 앞에 줄바꿈 보정
+                    def _format_speaker_lines(text: str) -> str:
+                        try:
+                            import re
 
-                finally:
-                    stderr_task.cancel()
+                            # [이름]: 패턴 앞에 줄바꿈 삽입(문서 시작 제외)
+                            text = re.sub(r"(?<!^)\s*(\[[^\[\]]{1,20}\]:)", r"\n\1", text)
+                            # 중복 개행 축소
+                            text = re.sub(r"\n{3,}", "\n\n", text)
+                            return text.lstrip("\n")
+                        except Exception:
+                            return text
 
-                    # 프로세스 종료 대기 및 정리
-                    try:
-                        await asyncio.wait_for(self.process.wait(), timeout=5.0)
-                    except TimeoutError:
-                        self.process.kill()
-                        await self.process.wait()
-                    self.process = None
-
-                # 메시지가 비어있고 오류가 있다면 실패로 간주
-                if not assistant_message and error_payload:
-                    return False, assistant_message, error_payload
-
-                # 메시지가 비어있으면 실패 처리 (상위 폴백용)
-                if not assistant_message:
-                    logger.warning(
-                        f"Droid produced empty response (style={style}); trying next style if available"
-                    )
-                    continue
+                    assistant_message = _format_speaker_lines(assistant_message)
+                    return True, assistant_message, None
 
-                # 후처리: 멀티 캐릭터 태그([이름]:) 앞에 줄바꿈 보정
-                def _format_speaker_lines(text: str) -> str:
-                    try:
-                        import re
+            # 모든 스타일이 실패
+            return False, "", {"type": "empty_response", "stderr": stderr_buffer[-20:]}
 
-                        # [이름]: 패턴 앞에 줄바꿈 삽입(문서 시작 제외)
-                        text = re.sub(r"(?<!^)\s*(\[[^\[\]]{1,20}\]:)", r"\n\1", text)
-                        # 중복 개행 축소
-                        text = re.sub(r"\n{3,}", "\n\n", text)
-                        return text.lstrip("\n")
-                    except Exception:
-                        return text
+        async def _outcome(task: asyncio.Task):
+            try:
+                return task.result()
+            except Exception as e:
+                return False, "", {"type": "exception", "message": str(e)}
 
-                assistant_message = _format_speaker_lines(assistant_message)
-                return True, assistant_message, None
+        async def _hedged_invoke(primary_model: str, hedge_model: str):
+            """기본 모델이 기준 시간 안에 첫 토큰을 못 내면 hedge_model을 병렬 실행.
 
-            # 모든 스타일이 실패
-            return False, "", {"type": "empty_response", "stderr": stderr_buffer[-20:]}
+            헤지 시도는 새 세션으로 띄웁니다(프롬프트에 최근 히스토리가 항상 포함되므로
+            같은 세션을 두 프로세스가 동시에 이어 쓰지 않도록). 먼저 토큰을 낸 쪽만 스트리밍하고
+            나머지는 즉시 종료합니다.
+
+            Returns: (success, assistant_message, error, used_model, hedge_fired)
+            """
+            nonlocal latest_session_id
+            race: dict = {"winner": None, "decided": asyncio.Event()}
+            primary = _HedgeAttempt(primary_model, callback, race)
+            attempts = {
+                asyncio.create_task(_invoke_once(primary_model, latest_session_id, primary)): (
+                    primary
+                )
+            }
+            decided = asyncio.create_task(race["decided"].wait())
+            self.hedge_counters["eligible"] += 1
+            try:
+                done, _ = await asyncio.wait(
+                    set(attempts) | {decided},
+                    timeout=self.hedge_delay(primary_model),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done and not streams.is_cancelled():
+                    self.hedge_counters["fired"] += 1
+                    logger.warning(
+                        f"Droid primary {primary_model} slow to first token; hedging with {hedge_model}"
+                    )
+                    hedge = _HedgeAttempt(hedge_model, callback, race)
+                    attempts[asyncio.create_task(_invoke_once(hedge_model, None, hedge))] = hedge
+
+                # 승자가 정해지거나 모든 시도가 끝날 때까지 대기
+                pending = set(attempts)
+                while pending and race["winner"] is None:
+                    done, pending = await asyncio.wait(
+                        pending | {decided}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    pending.discard(decided)
+
+                winner = race["winner"]
+                if winner is None:
+                    # 둘 다 토큰 없이 실패: 기본 모델 결과를 대표로 반환
+                    if len(attempts) > 1:
+                        self.hedge_counters["both_failed"] += 1
+                    first_task = next(iter(attempts))
+                    return (*await _outcome(first_task), primary_model, len(attempts) > 1)
+
+                # 패자는 즉시 종료
+                for task, attempt in attempts.items():
+                    if attempt is not winner and not task.done():
+                        task.cancel()
+                if len(attempts) > 1:
+                    self.hedge_counters["won" if winner is not primary else "lost"] += 1
+                winner_task = next(t for t, a in attempts.items() if a is winner)
+                await asyncio.wait({winner_task})
+                if winner.session_id:
+                    latest_session_id = winner.session_id
+                return (*await _outcome(winner_task), winner.model, len(attempts) > 1)
+            finally:
+                decided.cancel()
+                leftovers = [t for t in attempts if not t.done()]
+                for task in leftovers:
+                    task.cancel()
+                if leftovers:
+                    await asyncio.gather(*leftovers, return_exceptions=True)
 
         try:
-            # 1) 기본 모델 시도
+            # 1) 기본 모델 시도 (헤징 활성 시 첫 폴백 모델과 경주)
             initial_model = model or self.primary_model
-            ok, msg, err = await _invoke_once(initial_model, latest_session_id)
+            hedge_model = next((m for m in self.fallback_models if m != initial_model), None)
+            tried = [initial_model]
+            if self.hedge_enabled and hedge_model:
+                ok, msg, err, used_model, hedge_fired = await _hedged_invoke(
+                    initial_model, hedge_model
+                )
+                if hedge_fired:
+                    # 헤지가 실제로 실행된 경우만 순차 폴백에서 제외 (기본 모델이 먼저 실패하면 그대로 시도)
+                    tried.append(hedge_model)
+            else:
+                ok, msg, err = await _invoke_once(initial_model, latest_session_id)
+                used_model = initial_model
             if ok and msg:
-                return {
+                result = {
                     "success": True,
                     "message": msg,
                     "token_info": None,
                     "session_id": latest_session_id,
                 }
-
-            # 2) 폴백 모델 순차 시도
-            for idx, fb_model in enumerate(self.fallback_models):
+                if used_model != initial_model:
+                    result["fallback_used"] = used_model
+                    result["hedged"] = True
+                return result
+
+            # 2) 폴백 모델 순차 시도 (헤징에 이미 쓴 모델 제외)
+            remaining = [m for m in self.fallback_models if m not in tried]
+            for idx, fb_model in enumerate(remaining):
+                # 사용자가 취소한 요청은 폴백으로 다시 띄우지 않음
+                if streams.is_cancelled():
+                    break
                 logger.warning(f"Retrying with fallback model {fb_model} (#{idx+1})")
                 ok, msg, err = await _invoke_once(fb_model, latest_session_id)
                 if ok and msg:
@@ -452,7 +655,6 @@ class DroidHandler:
 
         except Exception as e:
             logger.error(f"Error sending message: {e}")
-            await self.stop()
             fallback_session_id = None if latest_session_id == session_id else latest_session_id
             error_msg = str(e).lower()
             session_error = any(kw in error_msg for kw in ("session", "expired", "invalid"))
@@ -4,6 +4,12 @@ import logging
 import os
 from pathlib import Path
 
+from server.core import streams
+from server.core.latency import LatencyTracker
+from server.core.process_pool import ProcessPool, terminate_process
+from server.core.replay import recorder_from_env
+from server.core.warm_pool import warm_pool_from_env
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,22 +22,26 @@ class GeminiHandler:
     def __init__(self, gemini_path=None):
         # 환경 변수 또는 기본값 사용
         self.gemini_path = gemini_path or os.getenv("GEMINI_PATH", "gemini")
-        self.process = None
         self.default_model = os.getenv("GEMINI_MODEL", "")  # 예: gemini-2.5-flash
         # 챗봇 전용 작업 디렉토리
         self.chatbot_workspace = Path(__file__).parent.parent.parent / "chatbot_workspace"
         self.chatbot_workspace.mkdir(exist_ok=True)
-        # 동시 호출 방지용 락
-        self._lock = asyncio.Lock()
+        # 요청마다 독립 프로세스를 띄우고, 동시 실행 수는 슬롯 풀로 제한
+        self.max_concurrency = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+        self.pool = ProcessPool("gemini", self.max_concurrency)
+        # 실행 중인 프로세스 (stop()에서 일괄 종료)
+        self._processes: set = set()
+        # 예열 프로세스 풀 (CLI 부팅 지연 숨김, 기본 비활성)
+        self.warm_pool = warm_pool_from_env("gemini")
+        # 모델별 첫 토큰/토큰 간 지연 분포 → 적응형 readline 타임아웃
+        self.latency = LatencyTracker.from_env("gemini")
+        # stdout 녹화 (PROVIDER_RECORD_DIR 설정 시 재생용 transcript 저장)
+        self.recorder = recorder_from_env()
 
     async def start(
         self, system_prompt=None, model: str | None = None, resume_session_id: str | None = None
     ):
-        """Gemini 프로세스 시작"""
-        if self.process is not None:
-            logger.warning("Gemini process already running")
-            return
-
+        """Gemini 프로세스 시작 (요청 1건 전용 프로세스를 반환)"""
         try:
             args = [self.gemini_path, "--output-format", "stream-json"]
 
@@ -47,33 +57,32 @@ class GeminiHandler:
 
             # System prompt와 프롬프트를 stdin으로 전달
 
-            self.process = await asyncio.create_subprocess_exec(
-                *args,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=str(self.chatbot_workspace),  # 챗봇 전용 디렉토리에서 실행
+            # 챗봇 전용 디렉토리에서 실행 (새 세션이면 예열된 프로세스 사용)
+            process = await self.warm_pool.acquire(
+                args,
+                str(self.chatbot_workspace),
+                label=use_model or "default",
+                reusable=not resume_session_id,
             )
+            self._processes.add(process)
+            if self.recorder:
+                self.recorder.wrap(process, "gemini", args, label=use_model or "default")
             logger.info(f"Gemini process started (cwd: {self.chatbot_workspace})")
+            return process
         except Exception as e:
             logger.error(f"Failed to start Gemini: {e}")
             raise
 
     async def stop(self):
-        """Gemini 프로세스 종료"""
-        if self.process is None:
-            return
-
-        try:
-            self.process.terminate()
-            await asyncio.wait_for(self.process.wait(), timeout=5.0)
-            logger.info("Gemini process stopped")
-        except TimeoutError:
-            self.process.kill()
-            await self.process.wait()
-            logger.warning("Gemini process killed (timeout)")
-        finally:
-            self.process = None
+        """실행 중인 모든 Gemini 프로세스 종료"""
+        processes = list(self._processes)
+        self._processes.clear()
+        for process in processes:
+            await terminate_process(process)
+        if processes:
+            logger.info(f"Gemini processes stopped ({len(processes)})")
+        # 예열된 유휴 프로세스도 정리 (종료 시 고아 프로세스 방지)
+        await self.warm_pool.close()
 
     def _check_session_error(self, text: str) -> bool:
         """텍스트에서 세션 에러 키워드 감지"""
@@ -95,152 +104,184 @@ class GeminiHandler:
         Returns:
             최종 결과 딕셔너리
         """
-        async with self._lock:  # 동시 호출 방지
-            if self.process is None:
-                await self.start(model=model, resume_session_id=session_id)
+        # 슬롯이 빌 때까지 대기 후, 이 요청 전용 프로세스를 띄움
+        async with self.pool.slot() as slot:
+            process = await self.start(model=model, resume_session_id=session_id)
+            slot.process = process
+            streams.attach_process(process)
+            try:
+                return await self._communicate(
+                    process, prompt, system_prompt, callback, session_id, model
+                )
+            except asyncio.CancelledError:
+                # 호출이 취소되면(연결 종료 등) 프로세스도 함께 정리
+                await terminate_process(process)
+                raise
+            finally:
+                streams.detach_process(process)
+                self._processes.discard(process)
+
+    async def _communicate(self, process, prompt, system_prompt, callback, session_id, model=None):
+        """프로세스에 프롬프트를 보내고 stream-json 응답을 수집"""
+        stderr_lines = []  # stderr 수집용
 
-            stderr_lines = []  # stderr 수집용
+        try:
+            # System prompt를 프롬프트 앞에 추가
+            full_prompt = prompt
+            if system_prompt:
+                full_prompt = f"{system_prompt}\n\n=== 사용자 메시지 ===\n{prompt}"
+
+            # 프롬프트 전송
+            prompt_with_newline = full_prompt + "\n"
+            process.stdin.write(prompt_with_newline.encode("utf-8"))
+            await process.stdin.drain()
+            process.stdin.close()  # stdin 닫기 (중요!)
+
+            # 응답 수신 (스트리밍)
+            assistant_message = ""
+            current_session_id = session_id
+
+            # stderr를 비동기로 읽어서 버퍼 막힘 방지 + 수집
+            async def read_stderr():
+                while True:
+                    line = await process.stderr.readline()
+                    if not line:
+                        break
+                    line_text = line.decode("utf-8").strip()
+                    stderr_lines.append(line_text)
+                    logger.debug(f"Gemini stderr: {line_text}")
+
+            stderr_task = asyncio.create_task(read_stderr())
+            timing = self.latency.timing(model or self.default_model or None)
+            timeout_stage = None
 
             try:
-                # System prompt를 프롬프트 앞에 추가
-                full_prompt = prompt
-                if system_prompt:
-                    full_prompt = f"{system_prompt}\n\n=== 사용자 메시지 ===\n{prompt}"
-
-                # 프롬프트 전송
-                prompt_with_newline = full_prompt + "\n"
-                self.process.stdin.write(prompt_with_newline.encode("utf-8"))
-                await self.process.stdin.drain()
-                self.process.stdin.close()  # stdin 닫기 (중요!)
-
-                # 응답 수신 (스트리밍)
-                assistant_message = ""
-                current_session_id = session_id
-
-                # stderr를 비동기로 읽어서 버퍼 막힘 방지 + 수집
-                async def read_stderr():
-                    while True:
-                        line = await self.process.stderr.readline()
+                # stdout 읽기 (첫 토큰/유휴 타임아웃은 관측 지연에서 유도)
+                while True:
+                    try:
+                        line = await asyncio.wait_for(
+                            process.stdout.readline(), timeout=timing.next_timeout()
+                        )
+
                         if not line:
                             break
-                        line_text = line.decode("utf-8").strip()
-                        stderr_lines.append(line_text)
-                        logger.debug(f"Gemini stderr: {line_text}")
 
-                stderr_task = asyncio.create_task(read_stderr())
-
-                try:
-                    # stdout 읽기 (타임아웃 추가)
-                    while True:
                         try:
-                            line = await asyncio.wait_for(
-                                self.process.stdout.readline(), timeout=120.0  # 2분 타임아웃
-                            )
-
-                            if not line:
-                                break
+                            data = json.loads(line.decode("utf-8").strip())
 
-                            try:
-                                data = json.loads(line.decode("utf-8").strip())
-
-                                # 세션 ID 저장 (있는 경우)
-                                if "session_id" in data:
-                                    current_session_id = data.get("session_id")
-                                    logger.info(f"Gemini Session ID: {current_session_id}")
-                                    # 프론트엔드에 세션 시작 알림
+                            # 세션 ID 저장 (있는 경우)
+                            if "session_id" in data:
+                                current_session_id = data.get("session_id")
+                                logger.info(f"Gemini Session ID: {current_session_id}")
+                                # 프론트엔드에 세션 시작 알림
+                                if callback:
+                                    await callback(
+                                        {
+                                            "type": "system",
+                                            "subtype": "gemini_init",
+                                            "session_id": current_session_id,
+                                        }
+                                    )
+
+                            # Gemini 형식: {"type":"message","role":"assistant","content":"...","delta":true}
+                            # 지연 측정/응답 누적은 콜백 유무와 무관하게 수행
+                            if data.get("type") == "message" and data.get("role") == "assistant":
+                                content = data.get("content", "")
+                                if content and data.get("delta"):
+                                    timing.token()
+                                    assistant_message += content
                                     if callback:
+                                        # Claude 형식으로 변환: content_block_delta
                                         await callback(
                                             {
-                                                "type": "system",
-                                                "subtype": "gemini_init",
-                                                "session_id": current_session_id,
+                                                "type": "content_block_delta",
+                                                "delta": {"text": content},
                                             }
                                         )
 
-                                # 콜백 호출 (Claude 형식으로 변환)
+                        except json.JSONDecodeError:
+                            # JSON이 아닌 일반 텍스트일 수 있음
+                            line_text = line.decode("utf-8").strip()
+                            if line_text:
+                                timing.token()
+                                assistant_message += line_text
                                 if callback:
-                                    # Gemini 형식: {"type":"message","role":"assistant","content":"...","delta":true}
-                                    if (
-                                        data.get("type") == "message"
-                                        and data.get("role") == "assistant"
-                                    ):
-                                        content = data.get("content", "")
-                                        if content and data.get("delta"):
-                                            # Claude 형식으로 변환: content_block_delta
-                                            claude_format = {
-                                                "type": "content_block_delta",
-                                                "delta": {"text": content},
-                                            }
-                                            await callback(claude_format)
-                                            assistant_message += content
-
-                            except json.JSONDecodeError:
-                                # JSON이 아닌 일반 텍스트일 수 있음
-                                line_text = line.decode("utf-8").strip()
-                                if line_text and callback:
-                                    claude_format = {
-                                        "type": "content_block_delta",
-                                        "delta": {"text": line_text},
-                                    }
-                                    await callback(claude_format)
-                                    assistant_message += line_text
-                                logger.debug(f"Non-JSON output: {line_text}")
-                                continue
-
-                        except TimeoutError:
-                            logger.error("Timeout waiting for Gemini response")
-                            break
+                                    await callback(
+                                        {
+                                            "type": "content_block_delta",
+                                            "delta": {"text": line_text},
+                                        }
+                                    )
+                            logger.debug(f"Non-JSON output: {line_text}")
+                            continue
+
+                    except TimeoutError:
+                        timeout_stage = timing.timed_out()
+                        logger.error(f"Timeout waiting for Gemini response ({timeout_stage})")
+                        break
+
+            finally:
+                stderr_task.cancel()
+                try:
+                    await stderr_task
+                except asyncio.CancelledError:
+                    pass
 
-                finally:
-                    stderr_task.cancel()
-                    try:
-                        await stderr_task
-                    except asyncio.CancelledError:
-                        pass
-
-                # 프로세스 종료 대기 및 returncode 확인
-                returncode = await self.process.wait()
-                self.process = None
-
-                # stderr에서 세션 에러 감지
-                stderr_text = "\n".join(stderr_lines)
-                session_error_in_stderr = self._check_session_error(stderr_text)
-
-                # 비정상 종료 또는 stderr에 세션 에러 키워드가 있으면
-                if returncode != 0:
-                    logger.warning(f"Gemini exited with code {returncode}, stderr: {stderr_text}")
-                    return {
-                        "success": False,
-                        "error": f"Gemini exited with code {returncode}",
-                        "token_info": None,
-                        "session_id": current_session_id,
-                        "session_expired": session_error_in_stderr,
-                    }
-
-                # 정상 종료지만 stderr에 세션 에러 힌트가 있는 경우
-                if session_error_in_stderr:
-                    logger.warning(f"Gemini session error detected in stderr: {stderr_text}")
-
-                # Gemini는 토큰 정보를 제공하지 않으므로 None으로 반환
+            if timeout_stage:
+                # 멈춘 CLI가 슬롯을 계속 점유하지 않도록 즉시 종료
+                await terminate_process(process)
                 return {
-                    "success": True,
+                    "success": False,
+                    "error": f"Gemini 응답 시간 초과 ({timeout_stage})",
+                    "timeout": timeout_stage,
                     "message": assistant_message,
                     "token_info": None,
                     "session_id": current_session_id,
-                    "session_expired": session_error_in_stderr,
+                    "session_expired": False,
                 }
 
-            except Exception as e:
-                logger.error(f"Error sending message: {e}")
-                await self.stop()
-                error_msg = str(e).lower()
-                stderr_text = "\n".join(stderr_lines)
-                session_error = self._check_session_error(error_msg) or self._check_session_error(
-                    stderr_text
-                )
+            # 프로세스 종료 대기 및 returncode 확인
+            returncode = await process.wait()
+
+            # stderr에서 세션 에러 감지
+            stderr_text = "\n".join(stderr_lines)
+            session_error_in_stderr = self._check_session_error(stderr_text)
+
+            # 비정상 종료 또는 stderr에 세션 에러 키워드가 있으면
+            if returncode != 0:
+                logger.warning(f"Gemini exited with code {returncode}, stderr: {stderr_text}")
                 return {
                     "success": False,
-                    "error": str(e),
-                    "session_id": session_id,
-                    "session_expired": session_error,
+                    "error": f"Gemini exited with code {returncode}",
+                    "token_info": None,
+                    "session_id": current_session_id,
+                    "session_expired": session_error_in_stderr,
                 }
+
+            # 정상 종료지만 stderr에 세션 에러 힌트가 있는 경우
+            if session_error_in_stderr:
+                logger.warning(f"Gemini session error detected in stderr: {stderr_text}")
+
+            # Gemini는 토큰 정보를 제공하지 않으므로 None으로 반환
+            return {
+                "success": True,
+                "message": assistant_message,
+                "token_info": None,
+                "session_id": current_session_id,
+                "session_expired": session_error_in_stderr,
+            }
+
+        except Exception as e:
+            logger.error(f"Error sending message: {e}")
+            await terminate_process(process)
+            error_msg = str(e).lower()
+            stderr_text = "\n".join(stderr_lines)
+            session_error = self._check_session_error(error_msg) or self._check_session_error(
+                stderr_text
+            )
+            return {
+                "success": False,
+                "error": str(e),
+                "session_id": session_id,
+                "session_expired": session_error,
+            }
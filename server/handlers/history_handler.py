@@ -1,8 +1,80 @@
-from collections import deque
+import sys
+from array import array
+from collections.abc import Sequence
+
+from server.core.tokens import estimate_message_tokens, estimate_tokens
+
+# 역할 코드 (메시지마다 문자열/dict 대신 1바이트로 보관)
+ROLES = ("user", "assistant")
+_ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+_LINE_PREFIXES = ("사용자: ", "AI: ")
+
+
+class Message:
+    """메모리 히스토리의 메시지 1건 (읽기용, dict처럼 m["role"]/m.get("content") 지원)"""
+
+    __slots__ = ("role", "content")
+
+    def __init__(self, role: str, content: str):
+        self.role = role
+        self.content = content
+
+    def __getitem__(self, key: str):
+        if key == "role":
+            return self.role
+        if key == "content":
+            return self.content
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self) -> dict:
+        return {"role": self.role, "content": self.content}
+
+    def __eq__(self, other):
+        if isinstance(other, Message):
+            return self.role == other.role and self.content == other.content
+        if isinstance(other, dict):
+            return other == self.to_dict()
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Message(role={self.role!r}, content={self.content!r})"
+
+
+class MessageView(Sequence):
+    """HistoryHandler 저장소의 [start:] 구간 (전체 기록과 윈도우가 같은 저장소를 공유)"""
+
+    __slots__ = ("_owner", "_start")
+
+    def __init__(self, owner: "HistoryHandler", start: int):
+        self._owner = owner
+        self._start = start
+
+    def __len__(self):
+        return len(self._owner._contents) - self._start
+
+    def __getitem__(self, index):
+        owner = self._owner
+        if isinstance(index, slice):
+            return [owner._message(i) for i in range(self._start, len(owner._contents))[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return owner._message(self._start + index)
 
 
 class HistoryHandler:
-    """대화 히스토리 관리 (최근 N턴 + 전체 서사 유지)"""
+    """대화 히스토리 관리 (최근 N턴 또는 토큰 예산 윈도우 + 전체 서사 유지)
+
+    메시지는 역할 코드(bytearray)와 내용(list[str])의 병렬 배열에 한 번만 보관하고,
+    최근 N턴 윈도우와 전체 기록은 같은 저장소를 시작 인덱스로 나눠 보는 뷰입니다.
+    """
 
     def __init__(self, max_turns=15):
         """
@@ -10,76 +82,199 @@ class HistoryHandler:
             max_turns: 유지할 최대 턴 수 (기본 15턴, None이면 무제한)
         """
         self.max_turns = max_turns
-        self.full_history: list[dict] = []  # 서사/다운로드용 전체 기록
-        self.history = self._build_window_deque([])
+        # 사용자가 set_max_turns로 직접 정한 한도인지 (토큰 예산 모드에서도 상한으로 적용)
+        self.max_turns_explicit = False
+        # 메시지 저장소: 역할 코드와 내용
+        self._roles = bytearray()
+        self._contents: list[str] = []
+        # 메시지별 추정 토큰 수 (추가 시 1회 계산), 누적 토큰 수, 렌더링된 줄의 누적 글자 수
+        # (_line_offsets[i] = 앞 i개 "역할: 내용" 줄 길이 합)
+        self._token_counts = array("q")
+        self._token_prefix = array("q", [0])
+        self._line_offsets = array("q", [0])
+        # 마지막으로 만든 윈도우 본문 (시작, 끝, 텍스트)
+        self._window_cache: tuple[int, int, str] | None = None
+        # 서사 마크다운: 지금까지 이어 붙인 본문 (메시지 수, 텍스트)
+        self._narrative_cache: tuple[int, str] = (0, "")
+        self.last_window_tokens = 0
+        self.last_window_count = 0
+        # 메시지 저장소가 차지하는 대략적인 메모리 (추가 시 누적, 유휴 방 정리 기준)
+        self._resident_bytes = 0
+        # 윈도우 밖으로 밀려난 대화의 누적 요약 (Summarizer가 DB와 함께 갱신)
+        self.summary = ""
+        self.summary_tokens = 0
+
+    @property
+    def full_history(self) -> MessageView:
+        """서사/다운로드용 전체 기록"""
+        return MessageView(self, 0)
+
+    @property
+    def history(self) -> MessageView:
+        """최근 max_turns 윈도우"""
+        return MessageView(self, self._turn_window_start())
 
-    def _build_window_deque(self, snapshot):
-        """현재 설정에 맞는 window deque 생성"""
+    def _turn_window_start(self) -> int:
         if self.max_turns is None:
-            return deque(snapshot)
-        return deque(snapshot[-self.max_turns :], maxlen=self.max_turns)
+            return 0
+        return max(0, len(self._contents) - self.max_turns)
+
+    def _message(self, index: int) -> Message:
+        return Message(ROLES[self._roles[index]], self._contents[index])
+
+    def _line(self, index: int) -> str:
+        return f"{_LINE_PREFIXES[self._roles[index]]}{self._contents[index]}\n"
+
+    def _narrative_part(self, index: int) -> str:
+        content = self._contents[index]
+        if self._roles[index] == _ROLE_CODES["user"]:
+            return f"## {index + 1}. 사용자\n\n{content}\n\n"
+        return f"## {index + 1}. AI 응답\n\n{content}\n\n---\n\n"
 
     def set_max_turns(self, max_turns):
         """맥락 길이 설정 (None이면 무제한)"""
         if max_turns is not None and max_turns <= 0:
             raise ValueError("max_turns must be positive or None")
 
-        if max_turns == self.max_turns:
-            return
-
+        self.max_turns_explicit = True
         self.max_turns = max_turns
-        self.history = self._build_window_deque(self.full_history)
 
-    def _append_message(self, message):
-        """공통 메시지 추가 로직"""
-        self.full_history.append(message)
-        self.history.append(message)
+    def _append_message(self, role: str, content: str):
+        """공통 메시지 추가 로직 (토큰 수와 줄 길이는 추가 시 1회만 계산)"""
+        code = _ROLE_CODES[role]
+        self._roles.append(code)
+        self._contents.append(content)
+        tokens = estimate_message_tokens(content)
+        self._token_counts.append(tokens)
+        self._token_prefix.append(self._token_prefix[-1] + tokens)
+        line_len = len(_LINE_PREFIXES[code]) + len(content) + 1
+        self._line_offsets.append(self._line_offsets[-1] + line_len)
+        # 내용 문자열 + 리스트 슬롯 + 역할 1바이트 + 배열 3칸
+        self._resident_bytes += sys.getsizeof(content) + 8 + 1 + 3 * 8
 
     def add_user_message(self, content):
         """사용자 메시지 추가"""
-        self._append_message({"role": "user", "content": content})
+        self._append_message("user", content)
 
     def add_assistant_message(self, content):
         """AI 응답 추가"""
-        self._append_message({"role": "assistant", "content": content})
+        self._append_message("assistant", content)
+
+    def set_summary(self, summary: str | None):
+        """누적 요약 설정 (프롬프트의 최근 윈도우 앞에 포함됨)"""
+        self.summary = (summary or "").strip()
+        self.summary_tokens = estimate_tokens(self.summary)
+
+    def evicted_count(self) -> int:
+        """마지막 프롬프트 윈도우 밖에 있는 메모리상 메시지 수"""
+        window = self.last_window_count or len(self)
+        return max(0, len(self._contents) - window)
+
+    def memory_bytes(self) -> int:
+        """보관 중인 메시지/요약의 대략적인 메모리 사용량 (bytes)"""
+        return self._resident_bytes + sys.getsizeof(self.summary)
+
+    def _as_dicts(self, start: int) -> list[dict]:
+        roles, contents = self._roles, self._contents
+        return [
+            {"role": ROLES[roles[i]], "content": contents[i]} for i in range(start, len(contents))
+        ]
 
     def get_history(self):
-        """현재 윈도우 히스토리 반환"""
-        return list(self.history)
+        """현재 윈도우 히스토리 반환 ({"role", "content"} dict 목록)"""
+        return self._as_dicts(self._turn_window_start())
+
+    def get_token_window(self, token_budget: int) -> tuple[list[dict], int]:
+        """예산 안에 들어가는 최근 메시지들과 추정 토큰 합계
+
+        최신 메시지부터 거꾸로 담으며, 최신 1건은 예산을 넘어도 포함합니다.
+        사용자가 턴 수 한도를 직접 정했다면 그 한도도 함께 적용합니다.
+        """
+        start, total = self._token_window_start(token_budget)
+        return self._as_dicts(start), total
+
+    def _token_window_start(self, token_budget: int) -> tuple[int, int]:
+        """토큰 예산 윈도우의 시작 인덱스와 추정 토큰 합계"""
+        end = len(self._contents)
+        floor = 0
+        if self.max_turns_explicit and self.max_turns is not None:
+            floor = max(0, end - self.max_turns)
+        total = 0
+        start = end
+        while start > floor:
+            tokens = self._token_counts[start - 1]
+            if start < end and total + tokens > token_budget:
+                break
+            total += tokens
+            start -= 1
+        return start, total
+
+    def _window_body(self, start: int, end: int) -> str:
+        """메시지 [start:end]의 "역할: 내용" 줄들
+
+        직전 윈도우를 재사용해 앞쪽(밀려난 메시지)은 잘라내고 뒤쪽(새 메시지)만 이어 붙이므로,
+        매 턴 윈도우 전체를 다시 포맷하지 않습니다.
+        """
+        cached = self._window_cache
+        if cached is not None and cached[0] <= start <= cached[1] <= end:
+            cached_start, cached_end, body = cached
+            trim = self._line_offsets[start] - self._line_offsets[cached_start]
+            body = body[trim:] + "".join(self._line(i) for i in range(cached_end, end))
+        else:
+            body = "".join(self._line(i) for i in range(start, end))
+        self._window_cache = (start, end, body)
+        return body
 
-    def get_history_text(self):
-        """히스토리를 텍스트로 변환 (System Prompt에 포함용)"""
-        if not self.history:
+    def get_history_text(self, token_budget: int | None = None):
+        """히스토리를 텍스트로 변환 (System Prompt에 포함용)
+
+        Args:
+            token_budget: 주어지면 턴 수 대신 추정 토큰 예산으로 윈도우를 정함
+        """
+        end = len(self._contents)
+        if token_budget:
+            start, self.last_window_tokens = self._token_window_start(token_budget)
+        else:
+            start = self._turn_window_start()
+            self.last_window_tokens = self._token_prefix[end] - self._token_prefix[start]
+        self.last_window_count = end - start
+        if start == end and not self.summary:
             return ""
 
-        text = "=== 이전 대화 내역 ===\n"
-        for msg in self.history:
-            role = "사용자" if msg["role"] == "user" else "AI"
-            text += f"{role}: {msg['content']}\n"
-        text += "\n위 대화 내용을 참고하여 자연스럽게 대화를 이어가세요.\n\n"
-        return text
+        summary = f"=== 지난 이야기 요약 ===\n{self.summary}\n\n" if self.summary else ""
+        if start == end:
+            return summary
+        return (
+            f"{summary}=== 이전 대화 내역 ===\n{self._window_body(start, end)}"
+            "\n위 대화 내용을 참고하여 자연스럽게 대화를 이어가세요.\n\n"
+        )
 
     def clear(self):
         """히스토리 초기화"""
-        self.history.clear()
-        self.full_history.clear()
+        self._roles.clear()
+        self._contents.clear()
+        del self._token_counts[:]
+        del self._token_prefix[1:]
+        del self._line_offsets[1:]
+        self._window_cache = None
+        self._narrative_cache = (0, "")
+        self.last_window_tokens = 0
+        self.last_window_count = 0
+        self._resident_bytes = 0
+        self.set_summary("")
 
     def get_narrative_markdown(self):
         """서사 형식으로 마크다운 생성 (우측 패널 표시용)"""
-        if not self.full_history:
+        if not self._contents:
             return "# 서사 기록\n\n아직 대화가 없습니다.\n"
 
-        md = "# 서사 기록\n\n"
-
-        for i, msg in enumerate(self.full_history, 1):
-            if msg["role"] == "user":
-                md += f"## {i}. 사용자\n\n{msg['content']}\n\n"
-            else:
-                md += f"## {i}. AI 응답\n\n{msg['content']}\n\n"
-                md += "---\n\n"
-
-        return md
+        # 이전 호출 이후 추가된 메시지만 이어 붙임
+        count, body = self._narrative_cache
+        if count < len(self._contents):
+            body += "".join(self._narrative_part(i) for i in range(count, len(self._contents)))
+            self._narrative_cache = (len(self._contents), body)
+        return "# 서사 기록\n\n" + body
 
     def __len__(self):
         """현재 window 히스토리 길이"""
-        return len(self.history)
+        return len(self._contents) - self._turn_window_start()
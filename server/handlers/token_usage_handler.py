@@ -1,6 +1,8 @@
 """토큰 사용량 추적 핸들러
 
 모델별(Claude/Gemini/Droid) 토큰 사용량을 누적하고 관리합니다.
+프롬프트 캐시 적중률 = cache_read / (input + cache_read + cache_creation) 을 방/프로바이더별로
+함께 집계합니다 (캐시 내역이 없는 턴은 제외: token_info["cache_tracked"] == False).
 """
 
 import logging
@@ -57,6 +59,10 @@ class TokenUsageHandler:
                 "last_cache_read_tokens": 0,
                 "last_cache_creation_tokens": 0,
                 "last_total_tokens": 0,
+                # 캐시 적중률 분모 (캐시 내역을 보고한 턴의 전체 입력 토큰)
+                "total_cache_eligible_tokens": 0,
+                "total_cache_hit_tokens": 0,
+                "last_cache_hit_ratio": None,
             }
 
         usage = self.session_usage[session_key][room_id][provider]
@@ -85,6 +91,14 @@ class TokenUsageHandler:
         usage["last_cache_creation_tokens"] = cache_creation
         usage["last_total_tokens"] = total
 
+        # 프롬프트 캐시 적중률
+        if token_info.get("cache_tracked", True):
+            eligible = input_tokens + cache_read + cache_creation
+            if eligible > 0:
+                usage["total_cache_eligible_tokens"] += eligible
+                usage["total_cache_hit_tokens"] += cache_read
+                usage["last_cache_hit_ratio"] = round(cache_read / eligible, 4)
+
         logger.info(
             f"Token usage updated - session: {session_key[:8]}..., "
             f"room: {room_id}, provider: {provider}, "
@@ -146,6 +160,36 @@ class TokenUsageHandler:
             del self.session_usage[session_key]
             logger.info(f"Token usage cleared - session: {session_key[:8]}...")
 
+    @staticmethod
+    def cache_hit_ratio(usage: dict) -> float | None:
+        """누적 프롬프트 캐시 적중률 (캐시 내역을 보고한 턴이 없으면 None)"""
+        eligible = usage.get("total_cache_eligible_tokens", 0)
+        if not eligible:
+            return None
+        return round(usage.get("total_cache_hit_tokens", 0) / eligible, 4)
+
+    def cache_stats(self) -> dict:
+        """전체/방별 프롬프트 캐시 적중률 (관리자 런타임 지표용)"""
+        hit = eligible = 0
+        rooms: dict[str, dict] = {}
+        for session_key, room_usage in self.session_usage.items():
+            for room_id, providers in room_usage.items():
+                for provider, usage in providers.items():
+                    ratio = self.cache_hit_ratio(usage)
+                    if ratio is None:
+                        continue
+                    hit += usage["total_cache_hit_tokens"]
+                    eligible += usage["total_cache_eligible_tokens"]
+                    rooms[f"{session_key}:{room_id}:{provider}"] = {
+                        "cache_hit_ratio": ratio,
+                        "last_cache_hit_ratio": usage["last_cache_hit_ratio"],
+                        "message_count": usage["message_count"],
+                    }
+        return {
+            "cache_hit_ratio": round(hit / eligible, 4) if eligible else None,
+            "rooms": rooms,
+        }
+
     def get_formatted_summary(
         self,
         session_key: str,
@@ -194,6 +238,8 @@ class TokenUsageHandler:
                     "last_cache_read_tokens": provider_usage["last_cache_read_tokens"],
                     "last_cache_creation_tokens": provider_usage["last_cache_creation_tokens"],
                     "last_total_tokens": provider_usage["last_total_tokens"],
+                    "cache_hit_ratio": self.cache_hit_ratio(provider_usage),
+                    "last_cache_hit_ratio": provider_usage.get("last_cache_hit_ratio"),
                 }
 
         return result
@@ -39,6 +39,8 @@ def run_http_server(ctx: AppContext):
         "ws_port": int(os.getenv("WS_PORT", "8765")),
         "login_required": ctx.login_required,
         "show_token_usage": bool(int(os.getenv("SHOW_TOKEN_USAGE", "1"))),
+        # 서버 → 클라이언트 프레임 코덱 (json | msgpack, 서버에 msgpack이 없으면 json 유지)
+        "ws_codec": os.getenv("WS_CODEC", "json"),
     }
 
     class CustomHandler(SimpleHTTPRequestHandler):
@@ -80,6 +82,43 @@ def run_http_server(ctx: AppContext):
             self.end_headers()
             self.wfile.write(content_bytes)
 
+        def _send_json_error(self, status: int, error: str):
+            body = json.dumps({"success": False, "error": error}, ensure_ascii=False).encode(
+                "utf-8"
+            )
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _require_admin(self) -> int | None:
+            """Bearer 토큰 검증 + 관리자 권한 확인. 실패 시 오류 응답 후 None 반환."""
+            token = None
+            authz = self.headers.get("Authorization")
+            if authz and authz.lower().startswith("bearer "):
+                token = authz.split(" ", 1)[1].strip()
+
+            payload, err = auth_verify_token(ctx, token, expected_type="access")
+            if err:
+                self._send_json_error(401, f"인증 실패: {err}")
+                return None
+            user_id = payload.get("user_id") if payload else None
+            if not user_id:
+                self._send_json_error(401, "유효하지 않은 토큰")
+                return None
+            if not ctx.db_handler or not ctx.loop:
+                raise RuntimeError("DB handler or event loop not available")
+
+            future = asyncio.run_coroutine_threadsafe(
+                ctx.db_handler.get_user_by_id(user_id), ctx.loop
+            )
+            user = future.result(timeout=5)
+            if not user or user.get("role") != "admin":
+                self._send_json_error(403, "관리자 권한이 필요합니다")
+                return None
+            return user_id
+
         def _write_ndjson_line(self, obj: dict):
             try:
                 line = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
@@ -639,6 +678,20 @@ def run_http_server(ctx: AppContext):
                     self.wfile.write(body)
                 return
 
+            # Admin API: 런타임 지표 (프로바이더 풀 등)
+            if self.path == "/api/admin/runtime-stats":
+                try:
+                    if not self._require_admin():
+                        return
+                    from server.core.metrics import collect_runtime_stats
+
+                    future = asyncio.run_coroutine_threadsafe(collect_runtime_stats(ctx), ctx.loop)
+                    self._ok_json({"success": True, "stats": future.result(timeout=5)})
+                except Exception as e:
+                    logger.exception("Admin runtime-stats API error")
+                    self._send_json_error(500, str(e))
+                return
+
             # 정적 파일 시도 → 실패 시 SPA fallback
             # URL 경로를 파일 경로로 변환 (쿼리 파라미터 제거)
             path = self.path.split("?")[0]
@@ -9,10 +9,19 @@ from pathlib import Path
 import jwt
 import websockets
 
+from server.core import auth as auth_core
 from server.core import session_manager as sm
 from server.core.app_context import AppContext
 from server.core.auth import send_auth_required as auth_send_auth_required
 from server.core.auth import verify_token as auth_verify_token
+from server.core.health import health_from_env
+from server.core.idempotency import chat_dedup_from_env
+from server.core.room_contexts import room_contexts_from_env
+from server.core.room_eviction import room_evictor_from_env
+from server.core.scheduler import scheduler_from_env
+from server.core.summarizer import summarizer_from_env
+from server.core.token_cache import token_cache_from_env
+from server.core.wire import WireSocket, WireStats, available_codecs, dumps
 from server.handlers.claude_handler import ClaudeCodeHandler
 from server.handlers.context_handler import ContextHandler
 from server.handlers.db_handler import DBHandler
@@ -25,7 +34,10 @@ from server.handlers.mode_handler import ModeHandler
 from server.handlers.token_usage_handler import TokenUsageHandler
 from server.handlers.workspace_handler import WorkspaceHandler
 from server.http.server import run_http_server as run_http_server_external
+from server.ws.actions.cancel import cancel_all_streams
+from server.ws.dispatcher import ConnectionDispatcher
 from server.ws.router import dispatch as ws_dispatch
+from server.ws.stream_coalescer import StreamStats
 
 # 로깅 설정
 logging.basicConfig(
@@ -54,6 +66,24 @@ history_handler = HistoryHandler(max_turns=30)
 workspace_handler = WorkspaceHandler(str(project_root / "persona_data"))
 mode_handler = ModeHandler(project_root=str(project_root))
 token_usage_handler = TokenUsageHandler()
+# 사용자 간 공정 스케줄러 (프로바이더 호출 입장 제어)
+scheduler = scheduler_from_env()
+# 프로바이더 회로 차단기 (연속 실패 시 즉시 거절/대체 프로바이더 우회)
+health = health_from_env()
+# 오래된 대화 누적 요약 (윈도우 밖 메시지를 백그라운드에서 요약에 접어 넣음)
+summarizer = summarizer_from_env()
+# 방별 컨텍스트 LRU (방 전환/동시 사용 시 전역 컨텍스트를 덮어쓰지 않음)
+room_contexts = room_contexts_from_env()
+# 유휴/메모리 초과 방 히스토리 정리 (다음 접근 때 DB에서 복원)
+room_evictor = room_evictor_from_env()
+# chat 멱등성 키 표 (재연결 후 재전송된 chat 중복 제거)
+chat_dedup = chat_dedup_from_env()
+# 검증된 JWT LRU (HTTP 요청/토큰 있는 WS 메시지의 서명 재검증 생략)
+token_cache = token_cache_from_env()
+# 코덱별 송신 바이트 지표
+wire_stats = WireStats()
+# chat_stream 프레임 병합 지표
+stream_stats = StreamStats()
 DB_PATH = os.getenv("DB_PATH", str(project_root / "data" / "chatbot.db"))
 db_handler: DBHandler | None = None
 APP_CTX: AppContext | None = None
@@ -161,7 +191,7 @@ async def handle_login_action(websocket, data):
     WebSocket에서는 더 이상 로그인 처리를 하지 않습니다.
     """
     await websocket.send(
-        json.dumps(
+        dumps(
             {
                 "action": "login",
                 "data": {
@@ -174,13 +204,54 @@ async def handle_login_action(websocket, data):
     )
 
 
+async def handle_auth_action(websocket, data):
+    """연결 단위 인증 핸드셰이크
+
+    성공하면 토큰 만료 전까지 이 연결의 메시지는 token 필드 없이도 인증되며,
+    메시지마다 JWT를 다시 검증하지 않습니다.
+    """
+    auth, error = auth_core.bind_connection(APP_CTX, websocket, data.get("token"))
+    if error:
+        await websocket.send(dumps({"action": "auth", "data": {"success": False, "error": error}}))
+        return
+    await websocket.send(
+        dumps(
+            {
+                "action": "auth",
+                "data": {"success": True, "user_id": auth.user_id, "expires_at": int(auth.exp)},
+            }
+        )
+    )
+
+
+async def handle_set_codec_action(websocket, data):
+    """송신 코덱 협상 (응답은 현재 코덱으로 보낸 뒤 전환)"""
+    codec = data.get("codec") or "json"
+    if codec not in available_codecs() or not isinstance(websocket, WireSocket):
+        await websocket.send(
+            dumps(
+                {
+                    "action": "set_codec",
+                    "data": {
+                        "success": False,
+                        "error": f"unsupported codec: {codec}",
+                        "codecs": available_codecs(),
+                    },
+                }
+            )
+        )
+        return
+    await websocket.send(dumps({"action": "set_codec", "data": {"success": True, "codec": codec}}))
+    websocket.set_codec(codec)
+
+
 async def handle_token_refresh_action(websocket, data):
     """리프레시 토큰으로 액세스 토큰 갱신/회전"""
     refresh_token = data.get("refresh_token")
     payload, error = verify_token(refresh_token, expected_type="refresh")
     if error:
         await websocket.send(
-            json.dumps({"action": "token_refresh", "data": {"success": False, "error": error}})
+            dumps({"action": "token_refresh", "data": {"success": False, "error": error}})
         )
         return
 
@@ -208,7 +279,7 @@ async def handle_token_refresh_action(websocket, data):
     # user_id를 여전히 찾지 못하면 명확한 오류를 반환 (구버전 토큰 정리 유도)
     if token_user_id is None:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "token_refresh",
                     "data": {"success": False, "error": "user_id_missing_in_token"},
@@ -217,6 +288,9 @@ async def handle_token_refresh_action(websocket, data):
         )
         return
     new_access, access_exp = issue_access_token(token_session_key, token_user_id)
+    # 새 액세스 토큰으로 연결 인증 갱신 (다음 메시지부터 재검증 없이 사용)
+    if new_access and APP_CTX is not None:
+        auth_core.bind_connection(APP_CTX, websocket, new_access)
     # 선택: refresh 토큰도 회전(보안 강화)
     rotate = bool(int(os.getenv("APP_REFRESH_ROTATE", "1")))
     if rotate:
@@ -225,7 +299,7 @@ async def handle_token_refresh_action(websocket, data):
         new_refresh, refresh_exp = refresh_token, None
 
     await websocket.send(
-        json.dumps(
+        dumps(
             {
                 "action": "token_refresh",
                 "data": {
@@ -241,9 +315,9 @@ async def handle_token_refresh_action(websocket, data):
 
 
 async def handle_message(websocket, message):
-    """메시지 처리"""
+    """메시지 처리 (원문 JSON 문자열 또는 디스패처가 파싱한 dict)"""
     try:
-        data = json.loads(message)
+        data = message if isinstance(message, dict) else json.loads(message)
         action = data.get("action")
 
         logger.info(f"Received action: {action}")
@@ -254,6 +328,16 @@ async def handle_message(websocket, message):
         if action == "token_refresh":
             await handle_token_refresh_action(websocket, data)
             return
+        if action == "auth":
+            await handle_auth_action(websocket, data)
+            return
+        if action == "set_codec":
+            await handle_set_codec_action(websocket, data)
+            return
+
+        # 연결 인증이 있으면 이 액션(태스크)의 컨텍스트에 올려 둠 (get_user_id_from_token에서 사용)
+        if APP_CTX is not None:
+            auth_core.current_connection.set(APP_CTX.connection_auth.get(websocket))
 
         # HTTP JWT 인증만 사용 (WebSocket에서는 토큰 검증하지 않음)
         # login_required=False이므로 모든 액션 허용
@@ -281,7 +365,7 @@ async def handle_message(websocket, message):
         # 파일(레거시 STORIES) 관련 액션은 제거되었습니다.
         if action in {"list_files", "read_file", "write_file"}:
             await websocket.send(
-                json.dumps(
+                dumps(
                     {
                         "action": action,
                         "data": {"success": False, "error": "legacy API removed"},
@@ -306,7 +390,7 @@ async def handle_message(websocket, message):
         # 등록되지 않은 액션
         else:
             await websocket.send(
-                json.dumps(
+                dumps(
                     {
                         "action": "error",
                         "data": {"success": False, "error": f"Unknown action: {action}"},
@@ -317,46 +401,74 @@ async def handle_message(websocket, message):
     except json.JSONDecodeError:
         logger.exception("Invalid JSON received")
         await websocket.send(
-            json.dumps({"action": "error", "data": {"success": False, "error": "Invalid JSON"}})
+            dumps({"action": "error", "data": {"success": False, "error": "Invalid JSON"}})
         )
     except Exception as e:
         logger.exception("Error handling message")
         await websocket.send(
-            json.dumps({"action": "error", "data": {"success": False, "error": str(e)}})
+            dumps({"action": "error", "data": {"success": False, "error": str(e)}})
         )
 
 
-async def websocket_handler(websocket):
+async def websocket_handler(raw_websocket):
     """WebSocket 연결 핸들러"""
-    connected_clients.add(websocket)
+    connected_clients.add(raw_websocket)
+    # 송신 계층 (코덱 적용/바이트 집계/송신 큐). 세션·스트림·인증 표의 키도 이 객체
+    websocket = WireSocket(raw_websocket, wire_stats)
     initialize_client_state(websocket)
     client_ip = websocket.remote_address[0] if websocket.remote_address else "unknown"
     logger.info(f"Client connected: {client_ip} (Total: {len(connected_clients)})")
 
+    async def reject(action):
+        await websocket.send(
+            dumps(
+                {
+                    "action": action or "error",
+                    "data": {
+                        "success": False,
+                        "error": "처리 중인 요청이 너무 많습니다",
+                        "code": "too_many_in_flight",
+                    },
+                }
+            )
+        )
+
+    dispatcher = ConnectionDispatcher(
+        lambda message: handle_message(websocket, message), on_rejected=reject
+    )
+
     try:
         # 환영 메시지
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "connected",
                     "data": {
                         "success": True,
                         "message": "Connected to Persona Chat WebSocket Server",
                         "login_required": bool(APP_CTX and APP_CTX.login_required),
+                        "codecs": available_codecs(),
                     },
                 }
             )
         )
 
-        # 메시지 수신 루프
-        async for message in websocket:
-            await handle_message(websocket, message)
+        # 메시지 수신 루프 (액션은 연결 단위 디스패처가 태스크로 실행)
+        async for message in raw_websocket:
+            await dispatcher.submit(message)
 
     except websockets.exceptions.ConnectionClosed:
         logger.info(f"Client disconnected: {client_ip}")
     finally:
-        connected_clients.discard(websocket)
+        # 진행 중인 스트림의 프로세스를 먼저 종료한 뒤 남은 작업 취소
+        if APP_CTX is not None:
+            await cancel_all_streams(APP_CTX, websocket)
+        await dispatcher.close()
+        connected_clients.discard(raw_websocket)
         remove_client_sessions(websocket)
+        if APP_CTX is not None:
+            auth_core.unbind_connection(APP_CTX, websocket)
+        await websocket.aclose()
         logger.info(f"Total connected clients: {len(connected_clients)}")
 
 
@@ -411,6 +523,15 @@ async def main():
     APP_CTX.mode_handler = mode_handler
     APP_CTX.token_usage_handler = token_usage_handler
     APP_CTX.db_handler = db_handler
+    APP_CTX.scheduler = scheduler
+    APP_CTX.health = health
+    APP_CTX.summarizer = summarizer
+    APP_CTX.room_contexts = room_contexts
+    APP_CTX.room_evictor = room_evictor
+    APP_CTX.chat_dedup = chat_dedup
+    APP_CTX.token_cache = token_cache
+    APP_CTX.wire_stats = wire_stats
+    APP_CTX.stream_stats = stream_stats
 
     # HTTP 서버를 별도 스레드에서 실행 (외부 모듈)
     http_thread = threading.Thread(
@@ -423,10 +544,20 @@ async def main():
     # 현재 이벤트 루프를 AppContext에 보관(HTTP 스레드에서 DB 접근에 사용)
     if APP_CTX is not None:
         APP_CTX.loop = asyncio.get_running_loop()
-    async with websockets.serve(websocket_handler, BIND_HOST, ws_port):
-        logger.info(f"WebSocket server started on port {ws_port}")
-        logger.info("Server is ready!")
-        await asyncio.Future()  # 계속 실행
+    if room_evictor is not None:
+        room_evictor.start(APP_CTX)
+    try:
+        async with websockets.serve(websocket_handler, BIND_HOST, ws_port):
+            logger.info(f"WebSocket server started on port {ws_port}")
+            logger.info("Server is ready!")
+            await asyncio.Future()  # 계속 실행
+    finally:
+        # 실행 중/예열된 CLI 프로세스 정리
+        for handler in (claude_handler, droid_handler, gemini_handler):
+            try:
+                await handler.stop()
+            except Exception:
+                logger.exception("Provider handler stop failed")
 
 
 if __name__ == "__main__":
@@ -2,21 +2,53 @@
 
 from __future__ import annotations
 
-import json
 import logging
 from typing import Any
 
 from server.core.app_context import AppContext
+from server.core.wire import dumps
 
 logger = logging.getLogger(__name__)
 
 
+async def _cancel_handles(handles) -> int:
+    killed = 0
+    for handle in handles:
+        killed += await handle.cancel()
+    return killed
+
+
+async def cancel_all_streams(ctx: AppContext, websocket) -> int:
+    """연결의 모든 진행 중 스트림 취소 (연결 종료 시 정리용, 재연결 대기 스트림은 유지)"""
+    handles = [
+        h
+        for h in ctx.active_streams.get(websocket, {}).values()
+        if not getattr(h, "keep_on_disconnect", False)
+    ]
+    return await _cancel_handles(handles)
+
+
 async def cancel_stream(ctx: AppContext, websocket, data: dict[str, Any]):
     """스트리밍 응답 취소 요청
 
     클라이언트에서 중단 버튼을 누르면 호출됩니다.
-    cancel_flags에 플래그를 설정하여 진행 중인 스트리밍을 중단합니다.
+    진행 중인 프로바이더 프로세스를 즉시 종료하고 슬롯을 반환합니다.
+    room_id가 있으면 해당 방의 스트림만, 없으면 이 연결의 모든 스트림을 취소합니다.
     """
-    ctx.cancel_flags[websocket] = True
-    logger.info("Stream cancellation requested")
-    await websocket.send(json.dumps({"action": "cancel_stream", "data": {"success": True}}))
+    room_streams = ctx.active_streams.get(websocket, {})
+    room_id = data.get("room_id")
+    if room_id and room_id in room_streams:
+        handles = [room_streams[room_id]]
+    else:
+        handles = list(room_streams.values())
+
+    killed = await _cancel_handles(handles)
+    logger.info(f"Stream cancellation requested (streams={len(handles)}, killed={killed})")
+    await websocket.send(
+        dumps(
+            {
+                "action": "cancel_stream",
+                "data": {"success": True, "cancelled": len(handles), "killed": killed},
+            }
+        )
+    )
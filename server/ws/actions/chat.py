@@ -1,10 +1,124 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
+import time
 from typing import Any
 
 from server.core import session_manager as sm
 from server.core.app_context import AppContext
+from server.core.health import RouteSlot
+from server.core.room_contexts import context_for
+from server.core.streams import StreamHandle
+from server.core.tokens import estimate_tokens, history_token_budget
+from server.core.wire import dumps
+from server.ws.stream_coalescer import StreamCoalescer
+from server.ws.stream_protocol import DeltaNormalizer, resolve_stream_format
+
+logger = logging.getLogger(__name__)
+
+
+async def _record_token_usage(ctx: AppContext, user_id, rid: str, provider: str, token_info):
+    """토큰 사용량 집계 (메모리 + DB)"""
+    ctx.token_usage_handler.add_usage(
+        session_key=str(user_id),  # token_usage_handler는 레거시 호환용
+        room_id=rid,
+        provider=provider,
+        token_info=token_info,
+    )
+    # DB에도 저장 (export용)
+    if ctx.db_handler:
+        try:
+            await ctx.db_handler.save_token_usage(
+                user_id=user_id,
+                room_id=rid,
+                provider=provider,
+                token_info=token_info,
+            )
+        except Exception as e:
+            logger.error(f"Failed to save token usage to DB: {e}")
+
+
+def _record_health(health, provider: str, handle: StreamHandle, result, latency: float):
+    """프로바이더 호출 결과를 회로 차단기에 반영 (취소/세션 만료는 판정에서 제외)"""
+    if handle.cancelled or not isinstance(result, dict) or result.get("session_expired"):
+        health.record(provider, None)
+        return
+    ok = bool(result.get("success"))
+    health.record(provider, ok, latency, None if ok else result.get("error"))
+
+
+def speaker_guard(context: dict, sp: str) -> str:
+    """단일 화자 지시문 (화자 캐릭터 프로필 포함, 캐시 접두부 뒤에 덧붙임)"""
+    try:
+        char_profile = None
+        for ch in context.get("characters", []):
+            if isinstance(ch, dict) and ch.get("name") == sp:
+                char_profile = ch
+                break
+        profile_str = ""
+        if char_profile:
+            desc = char_profile.get("description") or ""
+            gender = char_profile.get("gender") or ""
+            age = char_profile.get("age") or ""
+            meta = ", ".join(filter(None, [gender, age]))
+            if meta:
+                profile_str += f"{meta}. "
+            if desc:
+                profile_str += desc
+
+        single_speaker_guard = (
+            f"[현재 화자: {sp}. 이번 턴에는 {sp}만 발화합니다. 다른 캐릭터나 내레이터는 말하지 않습니다. "
+            "반드시 한 캐릭터 한 줄만 말하세요. 다른 사람 이름이나 대사를 쓰지 말고, 대괄호/콜론 없이 순수 대사만 출력하세요."
+        )
+        if profile_str:
+            single_speaker_guard += f" {profile_str}"
+        return single_speaker_guard + "]\n"
+    except Exception:
+        return f"[현재 화자: {sp}. 이번 턴에는 {sp}만 발화합니다. 다른 캐릭터나 내레이터는 말하지 않습니다. 한 줄만, 다른 이름 없이 말하세요.]\n"
+
+
+async def send_to_provider(
+    ctx: AppContext, provider: str, prompt: str, system_prompt: str, callback, session_id, model
+):
+    """프로바이더 핸들러 호출 (droid는 서버 기본 모델 사용)"""
+    if provider == "droid":
+        return await ctx.droid_handler.send_message(
+            prompt,
+            system_prompt=system_prompt,
+            callback=callback,
+            session_id=session_id,
+            model=None,  # 서버 기본 사용
+        )
+    if provider == "gemini":
+        return await ctx.gemini_handler.send_message(
+            prompt,
+            system_prompt=system_prompt,
+            callback=callback,
+            session_id=session_id,
+            model=model,
+        )
+    handler = ctx.claude_handler
+    logger.info(f"[DEBUG] Claude handler 호출 전 - handler={handler}")
+    result = await handler.send_message(
+        prompt,
+        system_prompt=system_prompt,
+        callback=callback,
+        session_id=session_id,
+        model=model,
+    )
+    logger.info(
+        f"[DEBUG] Claude handler 호출 후 - result={result.get('success') if result else None}"
+    )
+    return result
+
+
+def adult_consent_missing(context: dict, sess: dict) -> bool:
+    """성인 전용 수위인데 동의하지 않은 세션인지"""
+    level = (context.get("adult_level") or "").lower()
+    consent = sess.get("settings", {}).get("adult_consent", False)
+    return level in {"enhanced", "extreme"} and not consent
 
 
 async def chat(ctx: AppContext, websocket, data: dict):
@@ -16,37 +130,157 @@ async def chat(ctx: AppContext, websocket, data: dict):
           prompt: '...',
           provider: 'claude' | 'droid' | 'gemini',
           model?: string,
-          room_id?: string
+          room_id?: string,
+          stream_format?: 'delta' | 'raw',  # 기본 delta (STREAM_PROTOCOL)
+          idempotency_key?: string          # 재전송 중복 제거 (core/idempotency.py)
         }
     """
-    import logging
-
-    logger = logging.getLogger(__name__)
     logger.info("[DEBUG] chat 핸들러 시작")
 
-    prompt = data.get("prompt", "")
-    provider = data.get("provider", ctx.context_handler.get_context().get("ai_provider", "claude"))
-    logger.info(f"[DEBUG] provider={provider}, prompt 길이={len(prompt)}")
-
     # JWT 토큰에서 user_id 추출
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps(
-                {"action": "chat_complete", "data": {"success": False, "error": "인증 필요"}}
+            dumps({"action": "chat_complete", "data": {"success": False, "error": "인증 필요"}})
+        )
+        return
+
+    # 멱등성 키: 재연결 후 재전송된 chat은 진행 중 스트림에 붙거나 저장된 결과를 재전송
+    dedup = getattr(ctx, "chat_dedup", None)
+    key = data.get("idempotency_key")
+    if dedup is None or not isinstance(key, str) or not key:
+        await _run_chat(ctx, websocket, data, user_id, websocket.send)
+        return
+    entry, fresh = dedup.begin(user_id, key, websocket)
+    if not fresh:
+        await dedup.attach(ctx, entry, websocket)
+        return
+
+    async def run_once():
+        try:
+            await _run_chat(ctx, websocket, data, user_id, entry.send, entry)
+        except Exception:
+            logger.exception("chat failed")
+        finally:
+            dedup.finish(ctx, user_id, entry)
+
+    # 연결 종료로 이 태스크가 취소돼도 생성은 끝까지 진행 (재연결한 연결이 이어 받음)
+    entry.task = asyncio.ensure_future(run_once())
+    await asyncio.shield(entry.task)
+
+
+async def resume_stream(ctx: AppContext, websocket, data: dict):
+    """재연결 후 스트림 이어 받기
+
+    입력 데이터 예:
+        { action: 'resume_stream', idempotency_key: string, last_seq: number }
+
+    last_seq 뒤의 chat_stream/chat_complete 프레임을 다시 보내고, 아직 진행 중이면 이 연결을
+    구독자로 붙여 이후 프레임을 이어서 보냅니다. 프로바이더 호출은 그대로 진행됩니다.
+    """
+    user_id = sm.get_user_id_from_token(ctx, data)
+    if not user_id:
+        await websocket.send(
+            dumps({"action": "resume_stream", "data": {"success": False, "error": "인증 필요"}})
+        )
+        return
+    dedup = getattr(ctx, "chat_dedup", None)
+    key = data.get("idempotency_key")
+    entry = dedup.lookup(user_id, key) if dedup is not None and isinstance(key, str) else None
+    if entry is None:
+        # 만료/모르는 스트림: 클라이언트는 방 히스토리를 다시 불러와야 함
+        await websocket.send(
+            dumps(
+                {
+                    "action": "resume_stream",
+                    "data": {"success": False, "error": "unknown stream", "idempotency_key": key},
+                }
             )
         )
         return
+    try:
+        last_seq = int(data.get("last_seq") or 0)
+    except (TypeError, ValueError):
+        last_seq = 0
+    await dedup.attach(ctx, entry, websocket, last_seq=last_seq)
+
+
+async def _run_chat(ctx: AppContext, websocket, data: dict, user_id, send, entry=None):
+    """인증 이후의 chat: 회로 차단기 라우팅 후 본문 실행 (send: 프레임 전송 함수, entry: 멱등성 항목)"""
+    prompt = data.get("prompt", "")
+
+    # 방별 컨텍스트 (캐시가 없거나 room_id가 없으면 전역 컨텍스트)
+    room_ctx = await context_for(ctx, user_id, data.get("room_id"))
+    provider = data.get("provider", room_ctx.get_context().get("ai_provider", "claude"))
+    logger.info(f"[DEBUG] provider={provider}, prompt 길이={len(prompt)}")
+
+    # 회로 차단기: 실패가 반복된 프로바이더는 대체 프로바이더로 우회하거나 즉시 거절
+    health = getattr(ctx, "health", None)
+    failover_from = None
+    slot = None
+    if health is not None:
+        routed, failover_from = health.route(
+            provider, available=lambda p: getattr(ctx, f"{p}_handler", None) is not None
+        )
+        if routed is None:
+            await send(
+                dumps(
+                    {
+                        "action": "chat_complete",
+                        "data": {
+                            "success": False,
+                            "error": f"{provider} 프로바이더가 일시적으로 응답하지 않습니다. "
+                            "잠시 후 다시 시도해 주세요.",
+                            "circuit_open": True,
+                            "retry_after_s": round(health.get(provider).retry_after(), 1),
+                            "provider_used": provider,
+                        },
+                    }
+                )
+            )
+            return
+        provider = routed
+        slot = RouteSlot(health, provider)
+
+    try:
+        await _chat_turn(
+            ctx, websocket, data, user_id, send, entry, room_ctx, provider, failover_from, slot
+        )
+    finally:
+        # 프로바이더 호출 전에 빠져나가면 점유한 (탐색) 슬롯 반환
+        if slot is not None:
+            slot.release()
+
+
+async def _chat_turn(
+    ctx: AppContext,
+    websocket,
+    data: dict,
+    user_id,
+    send,
+    entry,
+    room_ctx,
+    provider: str,
+    failover_from: str | None,
+    slot: RouteSlot | None,
+):
+    """라우팅 이후의 chat 본문 (slot: 회로 차단기 허용 슬롯)"""
+    prompt = data.get("prompt", "")
+    health = getattr(ctx, "health", None)
+    # 요청 모델은 원래 프로바이더용이므로 우회 시 대체 프로바이더 기본 모델 사용
+    model = None if failover_from else data.get("model")
 
     # 사용자 세션/채팅방
     user_id, sess = sm.get_or_create_session(ctx, websocket, user_id)
-    rid, room = sm.get_room(ctx, sess, data.get("room_id"))
+    rid, room = await sm.get_room_hydrated(ctx, sess, user_id, data.get("room_id"))
+    # await 이후 방이 정리(evict)되어도 이번 턴은 같은 히스토리 객체에 기록
+    history = room["history"]
     provider_sessions: dict[str, Any] = room.setdefault("provider_sessions", {})
 
     speaker = data.get("speaker")
 
     # 세션유지 설정 확인 (방 컨텍스트에서)
-    session_retention = ctx.context_handler.get_context().get("session_retention", False)
+    session_retention = room_ctx.get_context().get("session_retention", False)
     logger.debug(f"session_retention={session_retention}")
 
     def get_provider_session_id():
@@ -90,11 +324,9 @@ async def chat(ctx: AppContext, websocket, data: dict):
 
     # 성인 동의 확인
     try:
-        level = (ctx.context_handler.get_context().get("adult_level") or "").lower()
-        consent = sess.get("settings", {}).get("adult_consent", False)
-        if level in {"enhanced", "extreme"} and not consent:
-            await websocket.send(
-                json.dumps(
+        if adult_consent_missing(room_ctx.get_context(), sess):
+            await send(
+                dumps(
                     {
                         "action": "consent_required",
                         "data": {
@@ -109,7 +341,7 @@ async def chat(ctx: AppContext, websocket, data: dict):
         pass
 
     # 사용자 메시지 추가 + DB에 방/메시지 저장
-    room["history"].add_user_message(prompt)
+    history.add_user_message(prompt)
     try:
         if ctx.db_handler:
             # 방이 없으면 최소 정보로 생성, 이미 있으면 기존 컨텍스트/제목 유지
@@ -126,105 +358,131 @@ async def chat(ctx: AppContext, websocket, data: dict):
         history_text = ""
         logger.debug(f"세션 연동 중 - 히스토리 생략 (session_id={provider_session_id[:8]}...)")
     else:
-        # 새 세션 또는 세션 연동 OFF - 히스토리 포함
-        history_text = room["history"].get_history_text()
+        # 새 세션 또는 세션 연동 OFF - 히스토리 포함 (토큰 예산이 있으면 예산 기준 윈도우)
+        budget = history_token_budget(provider, model)
+        history_text = history.get_history_text(token_budget=budget)
 
-    # 시스템 프롬프트
-    system_prompt = ctx.context_handler.build_system_prompt(history_text)
+    # 시스템 프롬프트 (정적 접두부 + 히스토리, 화자 지시는 캐시 접두부를 깨지 않도록 맨 뒤에 추가)
+    system_prompt = room_ctx.build_system_prompt(history_text)
     if data.get("speaker"):
-        sp = data.get("speaker")
-        # 화자 캐릭터 프로필을 찾아 추가
-        try:
-            char_profile = None
-            ctx_chars = ctx.context_handler.get_context().get("characters", [])
-            for ch in ctx_chars:
-                if isinstance(ch, dict) and ch.get("name") == sp:
-                    char_profile = ch
-                    break
-            profile_str = ""
-            if char_profile:
-                desc = char_profile.get("description") or ""
-                gender = char_profile.get("gender") or ""
-                age = char_profile.get("age") or ""
-                meta = ", ".join(filter(None, [gender, age]))
-                if meta:
-                    profile_str += f"{meta}. "
-                if desc:
-                    profile_str += desc
-
-            single_speaker_guard = (
-                f"[현재 화자: {sp}. 이번 턴에는 {sp}만 발화합니다. 다른 캐릭터나 내레이터는 말하지 않습니다. "
-                "반드시 한 캐릭터 한 줄만 말하세요. 다른 사람 이름이나 대사를 쓰지 말고, 대괄호/콜론 없이 순수 대사만 출력하세요."
-            )
-            if profile_str:
-                single_speaker_guard += f" {profile_str}"
-            single_speaker_guard += "]\n"
-
-            system_prompt = single_speaker_guard + system_prompt
-        except Exception:
-            system_prompt = (
-                f"[현재 화자: {sp}. 이번 턴에는 {sp}만 발화합니다. 다른 캐릭터나 내레이터는 말하지 않습니다. 한 줄만, 다른 이름 없이 말하세요.]\n"
-                + system_prompt
-            )
-
-    # 스트리밍 시작 시 취소 플래그 초기화
-    ctx.cancel_flags[websocket] = False
-
-    class StreamCancelled(Exception):
-        """스트림 취소 예외"""
-
-        pass
+        system_prompt += "\n" + speaker_guard(room_ctx.get_context(), data.get("speaker"))
+
+    # 추정 프롬프트 크기 (지연/비용 상관 분석용으로 chat_complete에 포함)
+    prompt_tokens_est = estimate_tokens(system_prompt) + estimate_tokens(prompt)
+    history_tokens_est = history.last_window_tokens + history.summary_tokens if history_text else 0
+
+    # 스트림 핸들 등록 (cancel_stream에서 프로바이더 프로세스를 즉시 종료)
+    handle = StreamHandle(room_id=rid, user_id=user_id)
+    ctx.active_streams.setdefault(websocket, {})[rid] = handle
+    if entry is not None:
+        handle.keep_on_disconnect = True
+        entry.bind(handle, rid)
+
+    # 스트림 이벤트는 텍스트 델타로 정규화하고(raw 호환 모드 제외), 짧은 시간 창 단위로 병합해 전송
+    # 송신 큐가 밀린 연결이 있으면 flush를 미뤄 더 크게 병합 (느린 클라이언트가 읽기를 막지 않음)
+    stream_out = StreamCoalescer(
+        send,
+        stats=getattr(ctx, "stream_stats", None),
+        congested=(
+            (lambda: entry.congested)
+            if entry is not None
+            else (lambda: getattr(websocket, "congested", False))
+        ),
+    )
+    normalizer = DeltaNormalizer(provider) if resolve_stream_format(data) == "delta" else None
 
     async def stream_callback(json_data):
-        # 취소 플래그 확인
-        if ctx.cancel_flags.get(websocket, False):
-            raise StreamCancelled("Stream cancelled by user")
-        await websocket.send(json.dumps({"action": "chat_stream", "data": json_data}))
+        handle.observe(json_data)
+        if normalizer is None:
+            await stream_out.push(json_data)
+            return
+        for event in normalizer.normalize(json_data):
+            await stream_out.push(event)
 
     # 제공자별 처리
-    model = data.get("model")
+    async def call_provider():
+        return await send_to_provider(
+            ctx, provider, prompt, system_prompt, stream_callback, provider_session_id, model
+        )
+
+    # 스케줄러가 있으면 사용자별 공정 대기열을 거쳐 실행
+    scheduler = getattr(ctx, "scheduler", None)
+    queue_wait_ms = 0.0
+    call_latency = 0.0
+
+    async def timed_call():
+        nonlocal call_latency
+        started = time.monotonic()
+        try:
+            return await call_provider()
+        finally:
+            call_latency = time.monotonic() - started
+
+    async def admitted_call():
+        nonlocal queue_wait_ms
+        if scheduler is None:
+            return await timed_call()
+        async with scheduler.admit(user_id) as ticket:
+            queue_wait_ms = ticket.wait_ms
+            return await timed_call()
+
+    result = None
+    if slot is not None:
+        slot.start()  # 이후 결과는 _record_health가 기록
     try:
-        if provider == "droid":
-            handler = ctx.droid_handler
-            result = await handler.send_message(
-                prompt,
-                system_prompt=system_prompt,
-                callback=stream_callback,
-                session_id=provider_session_id,
-                model=None,  # 서버 기본 사용
-            )
-        elif provider == "gemini":
-            handler = ctx.gemini_handler
-            result = await handler.send_message(
-                prompt,
-                system_prompt=system_prompt,
-                callback=stream_callback,
-                session_id=provider_session_id,
-                model=model,
-            )
-        else:
-            handler = ctx.claude_handler
-            logger.info(f"[DEBUG] Claude handler 호출 전 - handler={handler}")
-            result = await handler.send_message(
-                prompt,
-                system_prompt=system_prompt,
-                callback=stream_callback,
-                session_id=provider_session_id,
-                model=model,
-            )
-            logger.info(
-                f"[DEBUG] Claude handler 호출 후 - result={result.get('success') if result else None}"
-            )
-    except StreamCancelled:
+        result = await handle.run(admitted_call())
+    finally:
+        if health is not None:
+            _record_health(health, provider, handle, result, call_latency)
+        # chat_complete 전에 남은 스트림 이벤트를 모두 내보냄
+        await stream_out.close()
+        room_streams = ctx.active_streams.get(websocket, {})
+        if room_streams.get(rid) is handle:
+            room_streams.pop(rid, None)
+        if not room_streams:
+            ctx.active_streams.pop(websocket, None)
+
+    if handle.cancelled:
+        # 취소 시점까지의 부분 응답/토큰 사용량 기록
         logger.info("Stream cancelled by user")
-        result = {"success": False, "error": "cancelled", "cancelled": True}
-        await websocket.send(json.dumps({"action": "chat_complete", "data": result}))
+        partial = handle.partial_text
+        if partial:
+            history.add_assistant_message(partial)
+            try:
+                if ctx.db_handler:
+                    await ctx.db_handler.save_message(rid, "assistant", partial, user_id)
+            except Exception:
+                pass
+        token_info = handle.partial_token_info()
+        if token_info is not None:
+            await _record_token_usage(ctx, user_id, rid, provider, token_info)
+        await send(
+            dumps(
+                {
+                    "action": "chat_complete",
+                    "data": {
+                        "success": False,
+                        "error": "cancelled",
+                        "cancelled": True,
+                        "partial_message": partial,
+                        "token_info": token_info,
+                        "provider_used": provider,
+                        "token_usage": ctx.token_usage_handler.get_formatted_summary(
+                            session_key=str(user_id), room_id=rid
+                        ),
+                        "queue_wait_ms": queue_wait_ms,
+                        "prompt_tokens_est": prompt_tokens_est,
+                        "history_tokens_est": history_tokens_est,
+                    },
+                }
+            )
+        )
         return
 
     # 응답 히스토리 반영
     if result.get("success") and result.get("message"):
         msg = result["message"]
-        room["history"].add_assistant_message(msg)
+        history.add_assistant_message(msg)
         try:
             if ctx.db_handler:
                 await ctx.db_handler.save_message(rid, "assistant", msg, user_id)
@@ -234,23 +492,7 @@ async def chat(ctx: AppContext, websocket, data: dict):
     # 토큰 사용량 집계
     token_info = result.get("token_info")
     if token_info is not None:
-        ctx.token_usage_handler.add_usage(
-            session_key=str(user_id),  # token_usage_handler는 레거시 호환용
-            room_id=rid,
-            provider=provider,
-            token_info=token_info,
-        )
-        # DB에도 저장 (export용)
-        if ctx.db_handler:
-            try:
-                await ctx.db_handler.save_token_usage(
-                    user_id=user_id,
-                    room_id=rid,
-                    provider=provider,
-                    token_info=token_info,
-                )
-            except Exception as e:
-                logger.error(f"Failed to save token usage to DB: {e}")
+        await _record_token_usage(ctx, user_id, rid, provider, token_info)
 
     token_summary = ctx.token_usage_handler.get_formatted_summary(
         session_key=str(user_id), room_id=rid  # 레거시 호환용
@@ -306,11 +548,24 @@ async def chat(ctx: AppContext, websocket, data: dict):
         except Exception as exc:
             logger.debug(f"chat - provider_sessions DB 저장 실패: {exc}")
 
-    await websocket.send(
-        json.dumps(
+    await send(
+        dumps(
             {
                 "action": "chat_complete",
-                "data": {**result, "provider_used": provider, "token_usage": token_summary},
+                "data": {
+                    **result,
+                    "provider_used": provider,
+                    "token_usage": token_summary,
+                    "queue_wait_ms": queue_wait_ms,
+                    "prompt_tokens_est": prompt_tokens_est,
+                    "history_tokens_est": history_tokens_est,
+                    **({"failover_from": failover_from} if failover_from else {}),
+                },
             }
         )
     )
+
+    # 윈도우 밖으로 밀려난 메시지를 누적 요약에 반영 (백그라운드, 다음 프롬프트부터 적용)
+    summarizer = getattr(ctx, "summarizer", None)
+    if summarizer is not None:
+        summarizer.schedule(ctx, user_id, rid, history)
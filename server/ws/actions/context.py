@@ -6,6 +6,8 @@ from typing import Any
 
 from server.core import session_manager as sm
 from server.core.app_context import AppContext
+from server.core.room_contexts import context_for
+from server.core.wire import dumps
 
 logger = logging.getLogger(__name__)
 
@@ -13,14 +15,15 @@ logger = logging.getLogger(__name__)
 async def set_context(ctx: AppContext, websocket, data: dict[str, Any]):
     """컨텍스트 설정 (History/API 라우팅 이후 공용 액션)
 
-    - room_id가 있으면 해당 채팅방의 context를 DB에 저장
+    - room_id가 있으면 해당 채팅방의 context에 적용하고 DB에 저장
+      (방별 컨텍스트 캐시가 있으면 내용이 바뀐 경우에만 기록)
     - room_id가 없으면 전역 context만 업데이트 (기존 동작)
     - 컨텍스트 변경 시 핵심 프롬프트 관련 키 변화가 있으면 프로바이더 세션을 리셋합니다.
     """
     ch = ctx.context_handler
     if ch is None:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "set_context",
                     "data": {"success": False, "error": "context handler missing"},
@@ -49,33 +52,37 @@ async def set_context(ctx: AppContext, websocket, data: dict[str, Any]):
     conversation_mode = data.get("conversation_mode")
     session_retention = data.get("session_retention")
 
-    prev_ctx = ch.get_context()
-    ch.set_world(world)
-    ch.set_situation(situation)
-    ch.set_user_character(user_character)
-    ch.set_narrator(narrator_enabled, narrator_mode, narrator_description, user_is_narrator)
-    ch.set_adult_level(adult_level)
-    ch.set_narrative_separation(narrative_separation)
-    ch.set_ai_provider(ai_provider)
-    ch.set_characters(characters)
+    # 방별 컨텍스트 캐시가 있으면 해당 방 컨텍스트에 적용 (다른 방/사용자와 분리)
+    user_id = sm.get_user_id_from_token(ctx, data) if room_id else None
+    rc = await context_for(ctx, user_id, room_id)
+
+    prev_ctx = rc.get_context()
+    rc.set_world(world)
+    rc.set_situation(situation)
+    rc.set_user_character(user_character)
+    rc.set_narrator(narrator_enabled, narrator_mode, narrator_description, user_is_narrator)
+    rc.set_adult_level(adult_level)
+    rc.set_narrative_separation(narrative_separation)
+    rc.set_ai_provider(ai_provider)
+    rc.set_characters(characters)
     if output_level is not None:
-        ch.set_output_level(output_level)
+        rc.set_output_level(output_level)
     if pace is not None:
-        ch.set_pace(pace)
+        rc.set_pace(pace)
     if narrator_drive is not None:
-        ch.set_narrator_drive(narrator_drive)
+        rc.set_narrator_drive(narrator_drive)
     if choice_policy is not None:
-        ch.set_choice_policy(choice_policy)
+        rc.set_choice_policy(choice_policy)
     if choice_count is not None:
-        ch.set_choice_count(choice_count)
+        rc.set_choice_count(choice_count)
     if conversation_mode is not None:
-        ch.set_conversation_mode(conversation_mode)
+        rc.set_conversation_mode(conversation_mode)
     if session_retention is not None:
-        ch.set_session_retention(session_retention)
+        rc.set_session_retention(session_retention)
         # session_retention이 False로 변경되면 즉시 provider_sessions 정리
         if not session_retention and prev_ctx.get("session_retention"):
             try:
-                user_id = sm.get_user_id_from_token(ctx, data)
+                user_id = user_id or sm.get_user_id_from_token(ctx, data)
                 if user_id:
                     _, sess = sm.get_or_create_session(ctx, websocket, user_id)
                     _, room = sm.get_room(ctx, sess, room_id)
@@ -84,34 +91,38 @@ async def set_context(ctx: AppContext, websocket, data: dict[str, Any]):
             except Exception:
                 pass
 
+    if rc is not ch:
+        # room_id 없는 레거시 요청(get_context 등)이 마지막 설정을 보도록 전역에도 반영
+        ch.load_from_dict(rc.get_context())
+
     # room_id가 있으면 DB에 저장 (user_id 기반)
     if room_id and ctx.db_handler:
         try:
-            # JWT 토큰에서 user_id 추출
-            user_id = sm.get_user_id_from_token(ctx, data)
             if not user_id:
                 logger.warning("No user_id found in token, skipping DB save")
+            elif rc is not ch:
+                # 버전이 바뀐 경우에만 rooms.context에 기록 (write-through)
+                if await ctx.room_contexts.save(ctx, user_id, room_id):
+                    logger.info(f"Room context saved to DB: room_id={room_id}, user_id={user_id}")
             else:
                 # 기존 room 정보 가져오기 (title 유지)
                 existing_room = await ctx.db_handler.get_room(room_id, user_id)
                 title = existing_room["title"] if existing_room else room_id
 
                 # context를 JSON으로 변환하여 저장
-                context_json = json.dumps(ch.get_context(), ensure_ascii=False)
+                context_json = json.dumps(rc.get_context(), ensure_ascii=False)
                 await ctx.db_handler.upsert_room(room_id, user_id, title, context_json)
                 logger.info(f"Room context saved to DB: room_id={room_id}, user_id={user_id}")
         except Exception as e:
             logger.error(f"Failed to save room context to DB: {e}")
 
     await websocket.send(
-        json.dumps(
-            {"action": "set_context", "data": {"success": True, "context": ch.get_context()}}
-        )
+        dumps({"action": "set_context", "data": {"success": True, "context": rc.get_context()}})
     )
 
     # 중요 키 변경 시 세션 리셋(프롬프트 재적용)
     try:
-        new_ctx = ch.get_context()
+        new_ctx = rc.get_context()
         keys = [
             "adult_level",
             "narrative_separation",
@@ -133,13 +144,14 @@ async def set_context(ctx: AppContext, websocket, data: dict[str, Any]):
 async def get_context(ctx: AppContext, websocket, data: dict[str, Any]):
     """컨텍스트 가져오기
 
-    - room_id가 있으면 DB에서 해당 채팅방의 context를 로드하여 ContextHandler에 적용
+    - room_id가 있으면 해당 채팅방의 context를 로드하여 ContextHandler에 적용
+      (방별 컨텍스트 캐시가 있으면 캐시에서, 없으면 DB에서)
     - room_id가 없으면 현재 ContextHandler의 context 반환 (기존 동작)
     """
     ch = ctx.context_handler
     if ch is None:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "get_context",
                     "data": {"success": False, "error": "context handler missing"},
@@ -157,6 +169,11 @@ async def get_context(ctx: AppContext, websocket, data: dict[str, Any]):
             user_id = sm.get_user_id_from_token(ctx, data)
             if not user_id:
                 logger.warning("No user_id found in token, skipping DB load")
+            elif getattr(ctx, "room_contexts", None) is not None:
+                # 방별 캐시: 적중 시 DB 조회/JSON 파싱 없이 반환
+                rc = await ctx.room_contexts.get(ctx, user_id, room_id)
+                ch.load_from_dict(rc.get_context())
+                ch = rc
             else:
                 # user_id로 방 조회
                 room = await ctx.db_handler.get_room(room_id, user_id)
@@ -172,7 +189,5 @@ async def get_context(ctx: AppContext, websocket, data: dict[str, Any]):
             logger.error(f"Failed to load room context from DB: {e}")
 
     await websocket.send(
-        json.dumps(
-            {"action": "get_context", "data": {"success": True, "context": ch.get_context()}}
-        )
+        dumps({"action": "get_context", "data": {"success": True, "context": ch.get_context()}})
     )
@@ -0,0 +1,301 @@
+"""여러 화자의 한 턴을 병렬로 생성하는 그룹 턴 액션
+
+단일 화자 chat을 화자 수만큼 순서대로 보내면 화자마다 프로세스 기동과 첫 토큰 지연을
+다시 치르므로 4인 파티 장면은 4배의 시간이 걸립니다. group_turn은 같은 히스토리/정적
+프롬프트 위에 화자별 지시문만 덧붙여 프로바이더 호출을 동시에(상한 있음) 실행합니다.
+
+- 스트림: group_stream 프레임에 speaker/index를 붙여 화자별로 전송
+- 화자별 완료: group_speaker_complete (끝나는 순서대로)
+- 저장: 모든 화자가 끝난 뒤 요청한 화자 순서대로 "[이름]: 대사" 형식으로 히스토리/DB에 기록
+- 전체 완료: group_turn_complete (화자 순서의 결과 목록 포함)
+
+화자별 호출은 새 세션으로 실행하며(세션 유지 설정과 무관) provider_sessions를 바꾸지 않습니다.
+스케줄러가 있으면 화자별 호출도 사용자별 공정 대기열을 거치므로, 실제 동시 실행 수는
+GROUP_TURN_CONCURRENCY와 SCHED_PER_USER_CONCURRENCY 중 작은 값입니다.
+
+환경변수:
+    GROUP_TURN_CONCURRENCY   그룹 턴 1건의 동시 프로바이더 호출 수 (기본 4)
+    GROUP_TURN_MAX_SPEAKERS  그룹 턴 1건의 최대 화자 수 (기본 8)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+import time
+
+from server.core import session_manager as sm
+from server.core.app_context import AppContext
+from server.core.health import RouteSlot
+from server.core.room_contexts import context_for
+from server.core.streams import StreamHandle
+from server.core.tokens import history_token_budget
+from server.core.wire import dumps
+from server.ws.stream_coalescer import StreamCoalescer
+from server.ws.stream_protocol import DeltaNormalizer, resolve_stream_format
+
+from .chat import (
+    _record_health,
+    _record_token_usage,
+    adult_consent_missing,
+    send_to_provider,
+    speaker_guard,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _speakers(data: dict) -> list[str]:
+    """요청의 화자 목록 (빈 값/중복 제거, 순서 유지)"""
+    raw = data.get("speakers")
+    if not isinstance(raw, list):
+        return []
+    seen: list[str] = []
+    for sp in raw:
+        name = sp.get("name") if isinstance(sp, dict) else sp
+        if isinstance(name, str) and name.strip() and name.strip() not in seen:
+            seen.append(name.strip())
+    return seen
+
+
+def _strip_speaker_prefix(text: str, sp: str) -> str:
+    """모델이 붙인 "[이름]:"/"이름:" 접두어 제거"""
+    return re.sub(rf"^\s*\[?\s*{re.escape(sp)}\s*\]?\s*[:：]\s*", "", text, count=1)
+
+
+async def _fail(websocket, error: str, **extra):
+    await websocket.send(
+        dumps(
+            {"action": "group_turn_complete", "data": {"success": False, "error": error, **extra}}
+        )
+    )
+
+
+async def group_turn(ctx: AppContext, websocket, data: dict):
+    """여러 화자 동시 생성
+
+    입력 데이터 예:
+        {
+          action: 'group_turn',
+          prompt: '...',               # 비우면 사용자 메시지 없이 화자들만 발화
+          speakers: ['민수', '지영'],   # 또는 [{name: '민수'}, ...]
+          provider?: 'claude' | 'droid' | 'gemini',
+          model?: string,
+          room_id?: string,
+          stream_format?: 'delta' | 'raw'
+        }
+    """
+    user_id = sm.get_user_id_from_token(ctx, data)
+    if not user_id:
+        await _fail(websocket, "인증 필요")
+        return
+
+    speakers = _speakers(data)
+    max_speakers = int(os.getenv("GROUP_TURN_MAX_SPEAKERS", "8"))
+    if not speakers:
+        await _fail(websocket, "speakers가 필요합니다")
+        return
+    if len(speakers) > max_speakers:
+        await _fail(websocket, f"화자는 최대 {max_speakers}명까지 가능합니다")
+        return
+
+    room_ctx = await context_for(ctx, user_id, data.get("room_id"))
+    context = room_ctx.get_context()
+    provider = data.get("provider", context.get("ai_provider", "claude"))
+
+    # 회로 차단기: chat과 같은 규칙으로 대체 프로바이더 선택
+    health = getattr(ctx, "health", None)
+    failover_from = None
+    slot = None
+    if health is not None:
+        routed, failover_from = health.route(
+            provider, available=lambda p: getattr(ctx, f"{p}_handler", None) is not None
+        )
+        if routed is None:
+            await _fail(
+                websocket,
+                f"{provider} 프로바이더가 일시적으로 응답하지 않습니다. 잠시 후 다시 시도해 주세요.",
+                circuit_open=True,
+                provider_used=provider,
+            )
+            return
+        provider = routed
+        slot = RouteSlot(health, provider)
+
+    try:
+        await _group_turn(
+            ctx, websocket, data, user_id, speakers, room_ctx, provider, failover_from, slot
+        )
+    finally:
+        # 프로바이더 호출 전에 빠져나가면 점유한 (탐색) 슬롯 반환
+        if slot is not None:
+            slot.release()
+
+
+async def _group_turn(
+    ctx: AppContext,
+    websocket,
+    data: dict,
+    user_id,
+    speakers: list[str],
+    room_ctx,
+    provider: str,
+    failover_from: str | None,
+    slot: RouteSlot | None,
+):
+    """라우팅 이후의 group_turn 본문 (slot: 회로 차단기 허용 슬롯)"""
+    prompt = data.get("prompt", "") or ""
+    context = room_ctx.get_context()
+    health = getattr(ctx, "health", None)
+    # 요청 모델은 원래 프로바이더용이므로 우회 시 대체 프로바이더 기본 모델 사용
+    model = None if failover_from else data.get("model")
+
+    user_id, sess = sm.get_or_create_session(ctx, websocket, user_id)
+    rid, room = await sm.get_room_hydrated(ctx, sess, user_id, data.get("room_id"))
+
+    if adult_consent_missing(context, sess):
+        await websocket.send(
+            dumps(
+                {
+                    "action": "consent_required",
+                    "data": {
+                        "required": True,
+                        "message": "성인 전용 기능입니다. 본인은 성인이며 이용에 따른 모든 책임은 사용자 본인에게 있음을 동의해야 합니다.",
+                    },
+                }
+            )
+        )
+        return
+
+    history = room["history"]
+    if prompt:
+        history.add_user_message(prompt)
+        try:
+            if ctx.db_handler:
+                if await ctx.db_handler.get_room(rid, user_id) is None:
+                    await ctx.db_handler.upsert_room(rid, user_id, rid, None)
+                await ctx.db_handler.save_message(rid, "user", prompt, user_id)
+        except Exception:
+            pass
+
+    # 모든 화자가 같은 접두부(정적 프롬프트 + 히스토리)를 공유하고 화자 지시만 다름
+    history_text = history.get_history_text(token_budget=history_token_budget(provider, model))
+    base_prompt = room_ctx.build_system_prompt(history_text)
+    speaker_prompt = prompt or "이전 대화를 이어 한 줄로 말하세요."
+
+    handle = StreamHandle(room_id=rid, user_id=user_id)
+    ctx.active_streams.setdefault(websocket, {})[rid] = handle
+    use_delta = resolve_stream_format(data) == "delta"
+    stream_stats = getattr(ctx, "stream_stats", None)
+    outputs = [
+        StreamCoalescer(
+            websocket.send,
+            stats=stream_stats,
+            action="group_stream",
+            congested=lambda: getattr(websocket, "congested", False),
+        )
+        for _ in speakers
+    ]
+    semaphore = asyncio.Semaphore(max(1, int(os.getenv("GROUP_TURN_CONCURRENCY", "4"))))
+    scheduler = getattr(ctx, "scheduler", None)
+    results: dict[int, dict] = {}
+    started = time.monotonic()
+
+    async def run_speaker(index: int, sp: str):
+        out = outputs[index]
+        normalizer = DeltaNormalizer(provider) if use_delta else None
+        tag = {"speaker": sp, "index": index}
+
+        async def callback(event):
+            events = [event] if normalizer is None else normalizer.normalize(event)
+            for e in events:
+                await out.push({**e, **tag})
+
+        system_prompt = base_prompt + "\n" + speaker_guard(context, sp)
+        result = None
+        call_started = time.monotonic()
+        try:
+            async with semaphore:
+                if scheduler is None:
+                    call_started = time.monotonic()
+                    result = await send_to_provider(
+                        ctx, provider, speaker_prompt, system_prompt, callback, None, model
+                    )
+                else:
+                    async with scheduler.admit(user_id):
+                        call_started = time.monotonic()
+                        result = await send_to_provider(
+                            ctx, provider, speaker_prompt, system_prompt, callback, None, model
+                        )
+        except Exception as exc:
+            result = {"success": False, "error": str(exc)}
+        finally:
+            latency = time.monotonic() - call_started
+            if health is not None:
+                _record_health(health, provider, handle, result, latency)
+            await out.close()
+        if not isinstance(result, dict):
+            result = {"success": False, "error": "empty result"}
+        message = result.get("message") or ""
+        entry = {
+            "speaker": sp,
+            "index": index,
+            "success": bool(result.get("success") and message),
+            "message": _strip_speaker_prefix(message, sp) if message else "",
+            "error": result.get("error"),
+            "latency_ms": round(latency * 1000, 1),
+            "token_info": result.get("token_info"),
+        }
+        results[index] = entry
+        await websocket.send(dumps({"action": "group_speaker_complete", "data": entry}))
+
+    if slot is not None:
+        slot.start()  # 이후 결과는 화자별 _record_health가 기록
+    try:
+        await handle.run(asyncio.gather(*(run_speaker(i, sp) for i, sp in enumerate(speakers))))
+    finally:
+        for out in outputs:
+            await out.close()
+        room_streams = ctx.active_streams.get(websocket, {})
+        if room_streams.get(rid) is handle:
+            room_streams.pop(rid, None)
+        if not room_streams:
+            ctx.active_streams.pop(websocket, None)
+
+    # 끝난 순서와 무관하게 요청한 화자 순서대로 기록 (취소 시에는 끝난 화자만)
+    ordered = [results[i] for i in range(len(speakers)) if i in results]
+    for entry in ordered:
+        if entry["success"]:
+            line = f"[{entry['speaker']}]: {entry['message']}"
+            history.add_assistant_message(line)
+            try:
+                if ctx.db_handler:
+                    await ctx.db_handler.save_message(rid, "assistant", line, user_id)
+            except Exception:
+                pass
+        if entry["token_info"] is not None:
+            await _record_token_usage(ctx, user_id, rid, provider, entry["token_info"])
+
+    summarizer = getattr(ctx, "summarizer", None)
+    if summarizer is not None:
+        summarizer.schedule(ctx, user_id, rid, history)
+
+    await websocket.send(
+        dumps(
+            {
+                "action": "group_turn_complete",
+                "data": {
+                    "success": any(e["success"] for e in ordered) and not handle.cancelled,
+                    "cancelled": handle.cancelled,
+                    "results": ordered,
+                    "provider_used": provider,
+                    "wall_ms": round((time.monotonic() - started) * 1000, 1),
+                    "token_usage": ctx.token_usage_handler.get_formatted_summary(
+                        session_key=str(user_id), room_id=rid
+                    ),
+                },
+            }
+        )
+    )
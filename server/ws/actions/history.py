@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import json
 import logging
 
 from server.core import session_manager as sm
 from server.core.app_context import AppContext
+from server.core.wire import dumps
 
 logger = logging.getLogger(__name__)
 
@@ -32,9 +32,7 @@ async def get_narrative(ctx: AppContext, websocket, data: dict):
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps(
-                {"action": "get_narrative", "data": {"success": False, "error": "인증 필요"}}
-            )
+            dumps({"action": "get_narrative", "data": {"success": False, "error": "인증 필요"}})
         )
         return
 
@@ -42,7 +40,7 @@ async def get_narrative(ctx: AppContext, websocket, data: dict):
 
     if not ctx.db_handler:
         await websocket.send(
-            json.dumps({"action": "get_narrative", "data": {"success": False, "error": "DB 없음"}})
+            dumps({"action": "get_narrative", "data": {"success": False, "error": "DB 없음"}})
         )
         return
 
@@ -51,7 +49,7 @@ async def get_narrative(ctx: AppContext, websocket, data: dict):
 
     if not messages:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "get_narrative",
                     "data": {
@@ -84,7 +82,7 @@ async def get_narrative(ctx: AppContext, websocket, data: dict):
     narrative_md += _messages_to_narrative_markdown(messages, start_index)
 
     await websocket.send(
-        json.dumps(
+        dumps(
             {
                 "action": "get_narrative",
                 "data": {
@@ -104,7 +102,7 @@ async def load_more_narrative(ctx: AppContext, websocket, data: dict):
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {"action": "load_more_narrative", "data": {"success": False, "error": "인증 필요"}}
             )
         )
@@ -115,7 +113,7 @@ async def load_more_narrative(ctx: AppContext, websocket, data: dict):
 
     if not before_id:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "load_more_narrative",
                     "data": {"success": False, "error": "before_id 필요"},
@@ -126,9 +124,7 @@ async def load_more_narrative(ctx: AppContext, websocket, data: dict):
 
     if not ctx.db_handler:
         await websocket.send(
-            json.dumps(
-                {"action": "load_more_narrative", "data": {"success": False, "error": "DB 없음"}}
-            )
+            dumps({"action": "load_more_narrative", "data": {"success": False, "error": "DB 없음"}})
         )
         return
 
@@ -139,7 +135,7 @@ async def load_more_narrative(ctx: AppContext, websocket, data: dict):
 
     if not messages:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "load_more_narrative",
                     "data": {"success": True, "markdown": "", "has_more": False, "oldest_id": None},
@@ -166,7 +162,7 @@ async def load_more_narrative(ctx: AppContext, websocket, data: dict):
     narrative_md = _messages_to_narrative_markdown(messages, start_index)
 
     await websocket.send(
-        json.dumps(
+        dumps(
             {
                 "action": "load_more_narrative",
                 "data": {
@@ -185,7 +181,7 @@ async def get_full_narrative(ctx: AppContext, websocket, data: dict):
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {"action": "get_full_narrative", "data": {"success": False, "error": "인증 필요"}}
             )
         )
@@ -195,9 +191,7 @@ async def get_full_narrative(ctx: AppContext, websocket, data: dict):
 
     if not ctx.db_handler:
         await websocket.send(
-            json.dumps(
-                {"action": "get_full_narrative", "data": {"success": False, "error": "DB 없음"}}
-            )
+            dumps({"action": "get_full_narrative", "data": {"success": False, "error": "DB 없음"}})
         )
         return
 
@@ -206,7 +200,7 @@ async def get_full_narrative(ctx: AppContext, websocket, data: dict):
 
     if not messages:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "get_full_narrative",
                     "data": {
@@ -223,9 +217,7 @@ async def get_full_narrative(ctx: AppContext, websocket, data: dict):
     narrative_md += _messages_to_narrative_markdown(messages, 1)
 
     await websocket.send(
-        json.dumps(
-            {"action": "get_full_narrative", "data": {"success": True, "markdown": narrative_md}}
-        )
+        dumps({"action": "get_full_narrative", "data": {"success": True, "markdown": narrative_md}})
     )
 
 
@@ -234,7 +226,7 @@ async def get_history_settings(ctx: AppContext, websocket, data: dict):
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {"action": "get_history_settings", "data": {"success": False, "error": "인증 필요"}}
             )
         )
@@ -242,9 +234,9 @@ async def get_history_settings(ctx: AppContext, websocket, data: dict):
 
     _, sess = sm.get_or_create_session(ctx, websocket, user_id)
     room_id = data.get("room_id")
-    _, room = sm.get_room(ctx, sess, room_id)
+    _, room = await sm.get_room_hydrated(ctx, sess, user_id, room_id)
     await websocket.send(
-        json.dumps(
+        dumps(
             {
                 "action": "get_history_settings",
                 "data": {"success": True, "max_turns": room["history"].max_turns},
@@ -259,7 +251,7 @@ async def set_history_limit(ctx: AppContext, websocket, data: dict):
         user_id = sm.get_user_id_from_token(ctx, data)
         if not user_id:
             await websocket.send(
-                json.dumps(
+                dumps(
                     {
                         "action": "set_history_limit",
                         "data": {"success": False, "error": "인증 필요"},
@@ -270,14 +262,14 @@ async def set_history_limit(ctx: AppContext, websocket, data: dict):
 
         _, sess = sm.get_or_create_session(ctx, websocket, user_id)
         room_id = data.get("room_id")
-        _, room = sm.get_room(ctx, sess, room_id)
+        _, room = await sm.get_room_hydrated(ctx, sess, user_id, room_id)
         max_turns = data.get("max_turns")
         if max_turns is None:
             room["history"].set_max_turns(None)
         else:
             room["history"].set_max_turns(int(max_turns))
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "set_history_limit",
                     "data": {"success": True, "max_turns": room["history"].max_turns},
@@ -286,9 +278,7 @@ async def set_history_limit(ctx: AppContext, websocket, data: dict):
         )
     except Exception as exc:
         await websocket.send(
-            json.dumps(
-                {"action": "set_history_limit", "data": {"success": False, "error": str(exc)}}
-            )
+            dumps({"action": "set_history_limit", "data": {"success": False, "error": str(exc)}})
         )
 
 
@@ -297,20 +287,18 @@ async def clear_history(ctx: AppContext, websocket, data: dict):
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps(
-                {"action": "clear_history", "data": {"success": False, "error": "인증 필요"}}
-            )
+            dumps({"action": "clear_history", "data": {"success": False, "error": "인증 필요"}})
         )
         return
 
     _, sess = sm.get_or_create_session(ctx, websocket, user_id)
     room_id = data.get("room_id")
-    _, room = sm.get_room(ctx, sess, room_id)
+    _, room = await sm.get_room_hydrated(ctx, sess, user_id, room_id)
     room["history"].clear()
     sm.clear_client_sessions(ctx, websocket, room_id=room_id)
     ctx.token_usage_handler.clear_usage(str(user_id), room_id)  # 레거시 호환용
     await websocket.send(
-        json.dumps(
+        dumps(
             {
                 "action": "clear_history",
                 "data": {"success": True, "message": "대화 히스토리가 초기화되었습니다"},
@@ -324,16 +312,14 @@ async def reset_sessions(ctx: AppContext, websocket, data: dict):
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps(
-                {"action": "reset_sessions", "data": {"success": False, "error": "인증 필요"}}
-            )
+            dumps({"action": "reset_sessions", "data": {"success": False, "error": "인증 필요"}})
         )
         return
 
     room_id = data.get("room_id")
     sm.clear_client_sessions(ctx, websocket, room_id=room_id)
     await websocket.send(
-        json.dumps(
+        dumps(
             {
                 "action": "reset_sessions",
                 "data": {"success": True, "message": "AI 세션이 초기화되었습니다."},
@@ -348,7 +334,7 @@ async def get_history_snapshot(ctx: AppContext, websocket, data: dict):
         user_id = sm.get_user_id_from_token(ctx, data)
         if not user_id:
             await websocket.send(
-                json.dumps(
+                dumps(
                     {
                         "action": "get_history_snapshot",
                         "data": {"success": False, "error": "인증 필요"},
@@ -359,16 +345,12 @@ async def get_history_snapshot(ctx: AppContext, websocket, data: dict):
 
         _, sess = sm.get_or_create_session(ctx, websocket, user_id)
         room_id = data.get("room_id")
-        _, room = sm.get_room(ctx, sess, room_id)
+        _, room = await sm.get_room_hydrated(ctx, sess, user_id, room_id)
         snap = room["history"].get_history()
         await websocket.send(
-            json.dumps(
-                {"action": "get_history_snapshot", "data": {"success": True, "history": snap}}
-            )
+            dumps({"action": "get_history_snapshot", "data": {"success": True, "history": snap}})
         )
     except Exception as exc:
         await websocket.send(
-            json.dumps(
-                {"action": "get_history_snapshot", "data": {"success": False, "error": str(exc)}}
-            )
+            dumps({"action": "get_history_snapshot", "data": {"success": False, "error": str(exc)}})
         )
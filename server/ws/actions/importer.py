@@ -7,6 +7,7 @@ from typing import Any
 
 from server.core import session_manager as sm
 from server.core.app_context import AppContext
+from server.core.wire import dumps
 
 
 def _gen_room_id(prefix: str = "imported") -> str:
@@ -35,10 +36,13 @@ async def _import_single_room(
             )
         except Exception:
             pass
+    # 방별 컨텍스트 캐시는 다음 조회 때 DB에서 다시 로드
+    if getattr(ctx, "room_contexts", None) is not None:
+        ctx.room_contexts.invalidate(user_id, rid)
 
     # 메모리 세션 방 핸들
     _, sess = sm.get_or_create_session(ctx, websocket, user_id)
-    _, room = sm.get_room(ctx, sess, rid)
+    _, room = await sm.get_room_hydrated(ctx, sess, user_id, rid)
 
     # 메시지 삽입(간단 정책)
     messages = room_obj.get("messages") or []
@@ -87,9 +91,7 @@ async def import_data(ctx: AppContext, websocket, data: dict[str, Any]):
         user_id = sm.get_user_id_from_token(ctx, data)
         if not user_id:
             await websocket.send(
-                json.dumps(
-                    {"action": "import_data", "data": {"success": False, "error": "인증 필요"}}
-                )
+                dumps({"action": "import_data", "data": {"success": False, "error": "인증 필요"}})
             )
             return
 
@@ -144,7 +146,7 @@ async def import_data(ctx: AppContext, websocket, data: dict[str, Any]):
             messages_imported += cnt
 
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "import_data",
                     "data": {
@@ -158,5 +160,5 @@ async def import_data(ctx: AppContext, websocket, data: dict[str, Any]):
         )
     except Exception as exc:
         await websocket.send(
-            json.dumps({"action": "import_data", "data": {"success": False, "error": str(exc)}})
+            dumps({"action": "import_data", "data": {"success": False, "error": str(exc)}})
         )
@@ -2,11 +2,11 @@
 
 from __future__ import annotations
 
-import json
 import logging
 
 from server.core import session_manager as sm
 from server.core.app_context import AppContext
+from server.core.wire import dumps
 
 logger = logging.getLogger(__name__)
 
@@ -17,9 +17,7 @@ async def get_preferences(ctx: AppContext, websocket, data: dict):
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps(
-                {"action": "get_preferences", "data": {"success": False, "error": "인증 필요"}}
-            )
+            dumps({"action": "get_preferences", "data": {"success": False, "error": "인증 필요"}})
         )
         return
 
@@ -31,9 +29,7 @@ async def get_preferences(ctx: AppContext, websocket, data: dict):
             logger.error(f"Failed to get preferences: {e}")
 
     await websocket.send(
-        json.dumps(
-            {"action": "get_preferences", "data": {"success": True, "preferences": preferences}}
-        )
+        dumps({"action": "get_preferences", "data": {"success": True, "preferences": preferences}})
     )
 
 
@@ -43,7 +39,7 @@ async def update_preferences(ctx: AppContext, websocket, data: dict):
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {"action": "update_preferences", "data": {"success": False, "error": "인증 필요"}}
             )
         )
@@ -52,7 +48,7 @@ async def update_preferences(ctx: AppContext, websocket, data: dict):
     preferences = data.get("preferences", {})
     if not isinstance(preferences, dict):
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "update_preferences",
                     "data": {"success": False, "error": "잘못된 설정 형식"},
@@ -68,7 +64,7 @@ async def update_preferences(ctx: AppContext, websocket, data: dict):
         except Exception as e:
             logger.error(f"Failed to update preferences: {e}")
             await websocket.send(
-                json.dumps(
+                dumps(
                     {
                         "action": "update_preferences",
                         "data": {"success": False, "error": str(e)},
@@ -77,4 +73,4 @@ async def update_preferences(ctx: AppContext, websocket, data: dict):
             )
             return
 
-    await websocket.send(json.dumps({"action": "update_preferences", "data": {"success": success}}))
+    await websocket.send(dumps({"action": "update_preferences", "data": {"success": success}}))
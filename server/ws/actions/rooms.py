@@ -7,6 +7,7 @@ from datetime import datetime
 
 from server.core import session_manager as sm
 from server.core.app_context import AppContext
+from server.core.wire import dumps
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +21,7 @@ async def room_list(ctx: AppContext, websocket, data: dict):
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps({"action": "room_list", "data": {"success": False, "error": "인증 필요"}})
+            dumps({"action": "room_list", "data": {"success": False, "error": "인증 필요"}})
         )
         return
 
@@ -39,9 +40,7 @@ async def room_list(ctx: AppContext, websocket, data: dict):
         return {"room_id": rid, "title": title, "modified": modified}
 
     items = [to_item(r) for r in rows]
-    await websocket.send(
-        json.dumps({"action": "room_list", "data": {"success": True, "rooms": items}})
-    )
+    await websocket.send(dumps({"action": "room_list", "data": {"success": True, "rooms": items}}))
 
 
 async def room_save(ctx: AppContext, websocket, data: dict):
@@ -52,7 +51,7 @@ async def room_save(ctx: AppContext, websocket, data: dict):
 
     if not ctx.db_handler:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "room_save",
                     "data": {"success": False, "error": "DB를 사용할 수 없습니다"},
@@ -65,7 +64,7 @@ async def room_save(ctx: AppContext, websocket, data: dict):
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps({"action": "room_save", "data": {"success": False, "error": "인증 필요"}})
+            dumps({"action": "room_save", "data": {"success": False, "error": "인증 필요"}})
         )
         return
 
@@ -97,11 +96,15 @@ async def room_save(ctx: AppContext, websocket, data: dict):
     logger.debug("upsert_room 호출 전")
     await ctx.db_handler.upsert_room(room_id, user_id, title, context_json, provider_sessions_json)
     logger.debug("upsert_room 완료")
+    # 방별 컨텍스트 캐시도 방금 저장한 내용으로 교체
+    room_contexts = getattr(ctx, "room_contexts", None)
+    if room_contexts is not None:
+        room_contexts.put(user_id, room_id, conf.get("context") or {})
     logger.debug(f"room_save - upserted room: user_id={user_id} room_id={room_id} title={title}")
     logger.debug(f"room_save - upsert_room completed for user_id={user_id} room_id={room_id}")
 
     await websocket.send(
-        json.dumps({"action": "room_save", "data": {"success": True, "room_id": room_id}})
+        dumps({"action": "room_save", "data": {"success": True, "room_id": room_id}})
     )
     logger.debug("room_save 응답 전송 완료")
 
@@ -114,7 +117,7 @@ async def room_load(ctx: AppContext, websocket, data: dict):
     """
     if not ctx.db_handler:
         await websocket.send(
-            json.dumps({"action": "room_load", "data": {"success": False, "error": "DB 없음"}})
+            dumps({"action": "room_load", "data": {"success": False, "error": "DB 없음"}})
         )
         return
 
@@ -122,7 +125,7 @@ async def room_load(ctx: AppContext, websocket, data: dict):
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps({"action": "room_load", "data": {"success": False, "error": "인증 필요"}})
+            dumps({"action": "room_load", "data": {"success": False, "error": "인증 필요"}})
         )
         return
 
@@ -136,18 +139,24 @@ async def room_load(ctx: AppContext, websocket, data: dict):
     logger.debug(f"room_load - db_row for user_id={user_id} room_id={room_id}: {db_row}")
     if not db_row:
         await websocket.send(
-            json.dumps(
-                {"action": "room_load", "data": {"success": False, "error": "room not found"}}
-            )
+            dumps({"action": "room_load", "data": {"success": False, "error": "room not found"}})
         )
         return
-    try:
-        ctx_obj = json.loads(db_row.get("context") or "{}")
-    except (json.JSONDecodeError, TypeError) as exc:
-        logger.debug("room_load - context JSON 파싱 실패, 빈 컨텍스트로 대체", exc_info=exc)
-        ctx_obj = {}
-
-    # ContextHandler에 자동 적용 (채팅방별 독립 설정)
+    # 방별 컨텍스트 캐시 적중 시 context JSON을 다시 파싱하지 않음
+    room_contexts = getattr(ctx, "room_contexts", None)
+    cached = room_contexts.peek(user_id, room_id) if room_contexts is not None else None
+    if cached is not None:
+        ctx_obj = cached.get_context()
+    else:
+        try:
+            ctx_obj = json.loads(db_row.get("context") or "{}")
+        except (json.JSONDecodeError, TypeError) as exc:
+            logger.debug("room_load - context JSON 파싱 실패, 빈 컨텍스트로 대체", exc_info=exc)
+            ctx_obj = {}
+        if ctx_obj and room_contexts is not None:
+            room_contexts.put(user_id, room_id, ctx_obj)
+
+    # ContextHandler에 자동 적용 (room_id 없는 레거시 요청용 전역 컨텍스트)
     if ctx_obj and ctx.context_handler:
         ctx.context_handler.load_from_dict(ctx_obj)
 
@@ -168,6 +177,8 @@ async def room_load(ctx: AppContext, websocket, data: dict):
     try:
         _, sess = sm.get_or_create_session(ctx, websocket, user_id)
         rid, room = sm.get_room(ctx, sess, room_id)
+        # 아래에서 DB 기준으로 히스토리를 다시 채우므로 유휴 정리 후 복원은 생략
+        room.pop("rehydrate", None)
 
         # provider_sessions 메모리에 복원
         if provider_sessions_restored:
@@ -194,6 +205,13 @@ async def room_load(ctx: AppContext, websocket, data: dict):
                         room["history"].add_assistant_message(content)
             except (KeyError, AttributeError, TypeError) as exc:
                 logger.debug("room_load - 히스토리 복원 중 문제 발생", exc_info=exc)
+
+            # 오래된 대화의 누적 요약 복원 (프롬프트에서 최근 윈도우 앞에 포함)
+            try:
+                summary_row = await ctx.db_handler.get_room_summary(room_id, user_id)
+                room["history"].set_summary((summary_row or {}).get("summary"))
+            except (sqlite3.Error, AttributeError) as exc:
+                logger.debug("room_load - 누적 요약 조회 실패", exc_info=exc)
     except (sqlite3.Error, RuntimeError) as exc:
         # 세션 생성 또는 DB 오류 시 복원 시도만 하고 계속 진행
         logger.debug("room_load - 세션 생성 또는 DB 접근 중 오류", exc_info=exc)
@@ -220,7 +238,7 @@ async def room_load(ctx: AppContext, websocket, data: dict):
         history_rows = []
 
     await websocket.send(
-        json.dumps(
+        dumps(
             {
                 "action": "room_load",
                 "data": {
@@ -247,16 +265,14 @@ async def load_more_messages(ctx: AppContext, websocket, data: dict):
     """
     if not ctx.db_handler:
         await websocket.send(
-            json.dumps(
-                {"action": "load_more_messages", "data": {"success": False, "error": "DB 없음"}}
-            )
+            dumps({"action": "load_more_messages", "data": {"success": False, "error": "DB 없음"}})
         )
         return
 
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {"action": "load_more_messages", "data": {"success": False, "error": "인증 필요"}}
             )
         )
@@ -267,7 +283,7 @@ async def load_more_messages(ctx: AppContext, websocket, data: dict):
 
     if not before_id:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "load_more_messages",
                     "data": {"success": False, "error": "before_id 필요"},
@@ -294,7 +310,7 @@ async def load_more_messages(ctx: AppContext, websocket, data: dict):
                 has_more = len(older) > 0
 
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "load_more_messages",
                     "data": {
@@ -309,9 +325,7 @@ async def load_more_messages(ctx: AppContext, websocket, data: dict):
     except sqlite3.Error as exc:
         logger.error(f"load_more_messages - DB 오류: {exc}")
         await websocket.send(
-            json.dumps(
-                {"action": "load_more_messages", "data": {"success": False, "error": "DB 오류"}}
-            )
+            dumps({"action": "load_more_messages", "data": {"success": False, "error": "DB 오류"}})
         )
 
 
@@ -319,7 +333,7 @@ async def room_delete(ctx: AppContext, websocket, data: dict):
     """채팅방 삭제 (user_id 기반)"""
     if not ctx.db_handler:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "room_delete",
                     "data": {"success": False, "error": "DB를 사용할 수 없습니다"},
@@ -332,7 +346,7 @@ async def room_delete(ctx: AppContext, websocket, data: dict):
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps({"action": "room_delete", "data": {"success": False, "error": "인증 필요"}})
+            dumps({"action": "room_delete", "data": {"success": False, "error": "인증 필요"}})
         )
         return
 
@@ -340,6 +354,8 @@ async def room_delete(ctx: AppContext, websocket, data: dict):
 
     # user_id로 방 삭제
     await ctx.db_handler.delete_room(room_id, user_id)
+    if getattr(ctx, "room_contexts", None) is not None:
+        ctx.room_contexts.invalidate(user_id, room_id)
     await websocket.send(
-        json.dumps({"action": "room_delete", "data": {"success": True, "room_id": room_id}})
+        dumps({"action": "room_delete", "data": {"success": True, "room_id": room_id}})
     )
@@ -1,9 +1,8 @@
 from __future__ import annotations
 
-import json
-
 from server.core import session_manager as sm
 from server.core.app_context import AppContext
+from server.core.wire import dumps
 
 
 async def get_session_settings(ctx: AppContext, websocket, data: dict):
@@ -11,7 +10,7 @@ async def get_session_settings(ctx: AppContext, websocket, data: dict):
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {"action": "get_session_settings", "data": {"success": False, "error": "인증 필요"}}
             )
         )
@@ -22,7 +21,7 @@ async def get_session_settings(ctx: AppContext, websocket, data: dict):
         "settings", {"retention_enabled": True}
     )  # user_id 기반에서는 항상 영구 저장
     await websocket.send(
-        json.dumps({"action": "get_session_settings", "data": {"success": True, **settings}})
+        dumps({"action": "get_session_settings", "data": {"success": True, **settings}})
     )
 
 
@@ -31,7 +30,7 @@ async def set_session_retention(ctx: AppContext, websocket, data: dict):
     user_id = sm.get_user_id_from_token(ctx, data)
     if not user_id:
         await websocket.send(
-            json.dumps(
+            dumps(
                 {
                     "action": "set_session_retention",
                     "data": {"success": False, "error": "인증 필요"},
@@ -42,7 +41,7 @@ async def set_session_retention(ctx: AppContext, websocket, data: dict):
 
     # user_id 기반에서는 retention이 항상 활성화되어 있으므로 무시
     await websocket.send(
-        json.dumps(
+        dumps(
             {
                 "action": "set_session_retention",
                 "data": {
@@ -1,20 +1,17 @@
 from __future__ import annotations
 
-import json
-
 from server.core.app_context import AppContext
+from server.core.wire import dumps
 
 
 async def list_stories(ctx: AppContext, websocket, data: dict):
     # stories 기능은 제거됨 — 호환을 위해 빈 목록 반환
-    await websocket.send(
-        json.dumps({"action": "list_stories", "data": {"success": True, "files": []}})
-    )
+    await websocket.send(dumps({"action": "list_stories", "data": {"success": True, "files": []}}))
 
 
 async def save_story(ctx: AppContext, websocket, data: dict):
     await websocket.send(
-        json.dumps(
+        dumps(
             {
                 "action": "save_story",
                 "data": {"success": False, "error": "stories 기능이 비활성화되었습니다"},
@@ -25,7 +22,7 @@ async def save_story(ctx: AppContext, websocket, data: dict):
 
 async def load_story(ctx: AppContext, websocket, data: dict):
     await websocket.send(
-        json.dumps(
+        dumps(
             {
                 "action": "load_story",
                 "data": {"success": False, "error": "stories 기능이 비활성화되었습니다"},
@@ -36,7 +33,7 @@ async def load_story(ctx: AppContext, websocket, data: dict):
 
 async def delete_story(ctx: AppContext, websocket, data: dict):
     await websocket.send(
-        json.dumps(
+        dumps(
             {
                 "action": "delete_story",
                 "data": {"success": False, "error": "stories 기능이 비활성화되었습니다"},
@@ -47,7 +44,7 @@ async def delete_story(ctx: AppContext, websocket, data: dict):
 
 async def resume_from_story(ctx: AppContext, websocket, data: dict):
     await websocket.send(
-        json.dumps(
+        dumps(
             {
                 "action": "resume_from_story",
                 "data": {
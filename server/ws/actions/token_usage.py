@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import json
 from typing import Any
 
 from server.core import session_manager as sm
 from server.core.app_context import AppContext
+from server.core.wire import dumps
 
 
 async def get_token_usage(ctx: AppContext, websocket, data: dict[str, Any]):
@@ -14,7 +14,7 @@ async def get_token_usage(ctx: AppContext, websocket, data: dict[str, Any]):
         user_id = sm.get_user_id_from_token(ctx, data)
         if not user_id:
             await websocket.send(
-                json.dumps(
+                dumps(
                     {"action": "get_token_usage", "data": {"success": False, "error": "인증 필요"}}
                 )
             )
@@ -25,11 +25,9 @@ async def get_token_usage(ctx: AppContext, websocket, data: dict[str, Any]):
             session_key=str(user_id), room_id=room_id  # 레거시 호환용
         )
         await websocket.send(
-            json.dumps(
-                {"action": "get_token_usage", "data": {"success": True, "token_usage": summary}}
-            )
+            dumps({"action": "get_token_usage", "data": {"success": True, "token_usage": summary}})
         )
     except Exception as exc:
         await websocket.send(
-            json.dumps({"action": "get_token_usage", "data": {"success": False, "error": str(exc)}})
+            dumps({"action": "get_token_usage", "data": {"success": False, "error": str(exc)}})
         )
@@ -0,0 +1,137 @@
+"""연결 단위 WebSocket 액션 디스패처
+
+수신 루프가 액션을 직접 await하면 채팅 스트리밍 중에는 같은 소켓의 다른 메시지
+(cancel_stream, get_token_usage, room_list 등)를 처리하지 못합니다.
+디스패처는 액션을 태스크로 실행하되, 순서가 중요한 경우만 줄(lane)을 세워 지킵니다.
+
+- 일반 액션: 메인 줄에서 도착 순서대로 하나씩 실행 (기존과 같은 순차 의미)
+- 스트림 액션(chat, group_turn): 메인 줄의 앞선 작업이 끝난 뒤 방(room) 줄에서 실행.
+  실행 중에도 메인 줄은 막히지 않음
+- 방 변경 액션(clear_history 등): 메인 줄과 방 줄 모두의 앞선 작업을 기다리고,
+  뒤따르는 작업도 이 작업을 기다림 (같은 방의 채팅과 섞이지 않음)
+- 즉시 액션(cancel_stream): 줄을 서지 않고 수신 루프에서 바로 실행
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# 줄을 서지 않고 바로 처리하는 제어 액션
+INLINE_ACTIONS = frozenset({"cancel_stream"})
+# 방 줄에서 실행되며 메인 줄을 막지 않는 장시간 액션
+STREAM_ACTIONS = frozenset({"chat", "group_turn"})
+# 같은 방의 채팅과 순서를 지켜야 하는 방 변경 액션
+ROOM_BARRIER_ACTIONS = frozenset(
+    {"clear_history", "reset_sessions", "set_history_limit", "room_load", "room_delete"}
+)
+
+
+class ConnectionDispatcher:
+    """WebSocket 연결 1개의 액션 실행기 (줄 단위 순서 보장 + 동시 실행 한도)"""
+
+    def __init__(
+        self,
+        handler: Callable[[object], Awaitable[None]],
+        max_in_flight: int | None = None,
+        on_rejected: Callable[[str | None], Awaitable[None]] | None = None,
+    ):
+        self.handler = handler
+        if max_in_flight is None:
+            max_in_flight = int(os.getenv("WS_MAX_IN_FLIGHT", "16"))
+        self.max_in_flight = max(1, max_in_flight)
+        self.on_rejected = on_rejected
+        self._tasks: set[asyncio.Task] = set()
+        self._main_tail: asyncio.Task | None = None
+        self._room_tails: dict[str, asyncio.Task] = {}
+        self.rejected = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    @staticmethod
+    def _parse(message):
+        if isinstance(message, dict):
+            return message
+        try:
+            data = json.loads(message)
+        except (TypeError, ValueError):
+            return None
+        return data if isinstance(data, dict) else None
+
+    async def submit(self, message):
+        """수신 메시지 1건 처리 예약 (즉시 액션은 바로 실행)"""
+        data = self._parse(message)
+        if data is None:
+            # 잘못된 JSON 등은 핸들러가 오류 응답을 보내도록 원문 그대로 전달
+            await self.handler(message)
+            return
+
+        action = data.get("action")
+        if action in INLINE_ACTIONS:
+            await self.handler(data)
+            return
+
+        if self.in_flight >= self.max_in_flight:
+            self.rejected += 1
+            logger.warning(f"Too many in-flight actions; rejected {action}")
+            if self.on_rejected is not None:
+                await self.on_rejected(action)
+            return
+
+        room = str(data.get("room_id") or "default")
+        room_tail = self._room_tails.get(room)
+        if action in STREAM_ACTIONS:
+            deps = (self._main_tail, room_tail)
+            task = self._spawn(deps, data)
+            self._room_tails[room] = task
+        elif action in ROOM_BARRIER_ACTIONS:
+            deps = (self._main_tail, room_tail)
+            task = self._spawn(deps, data)
+            self._room_tails[room] = task
+            self._main_tail = task
+        else:
+            task = self._spawn((self._main_tail,), data)
+            self._main_tail = task
+        task.add_done_callback(lambda t, room=room: self._on_done(t, room))
+
+    def _spawn(self, deps, data) -> asyncio.Task:
+        task = asyncio.create_task(self._run([d for d in deps if d is not None], data))
+        self._tasks.add(task)
+        return task
+
+    async def _run(self, deps: list[asyncio.Task], data: dict):
+        pending = [d for d in deps if not d.done()]
+        if pending:
+            # 앞선 작업의 성공/실패와 무관하게 끝나기만 기다림
+            await asyncio.wait(pending)
+        try:
+            await self.handler(data)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"Action task failed: {data.get('action')}")
+
+    def _on_done(self, task: asyncio.Task, room: str):
+        self._tasks.discard(task)
+        if self._room_tails.get(room) is task:
+            del self._room_tails[room]
+        if self._main_tail is task:
+            self._main_tail = None
+
+    async def close(self):
+        """연결 종료 시 남은 작업 취소 및 정리"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._room_tails.clear()
+        self._main_tail = None
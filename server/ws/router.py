@@ -16,6 +16,7 @@ from .actions import config as config_actions
 from .actions import context as context_actions
 from .actions import files as files_actions
 from .actions import git as git_actions
+from .actions import group as group_actions
 from .actions import history as history_actions
 from .actions import importer as import_actions
 from .actions import mode as mode_actions
@@ -79,6 +80,8 @@ ACTION_TABLE: dict[str, Handler] = {
     "resume_from_story": stories_actions.resume_from_story,
     # chat
     "chat": chat_actions.chat,
+    "resume_stream": chat_actions.resume_stream,
+    "group_turn": group_actions.group_turn,
     "cancel_stream": cancel_actions.cancel_stream,
     # git
     "git_status": git_actions.git_status,
@@ -0,0 +1,228 @@
+"""chat_stream 프레임 병합(coalescing) 출력 단계
+
+CLI가 JSON 한 줄을 낼 때마다 프레임을 보내면 한 턴에 수백 개의 작은 프레임이 생깁니다.
+StreamCoalescer는 스트림 이벤트를 잠깐 모았다가 시간 창(flush window) 또는 크기 한도에
+도달하면 한 번에 내보냅니다.
+
+- 연속된 content_block_delta/text_delta는 텍스트를 이어 붙여 하나의 이벤트로 병합
+- 연속된 assistant 이벤트(Claude는 매번 누적 전체 텍스트)는 마지막 것만 유지
+- 그 외 이벤트(system/result 등)는 순서를 지키며 그대로 전달
+- 스트림 종료 시 close()로 남은 이벤트를 모두 내보냄 (chat_complete 이전)
+- 송신 큐가 밀린(congested) 동안은 flush를 미루고 계속 병합 (최대 STREAM_CONGESTED_MAX_MS)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+
+from server.core.wire import dumps
+
+logger = logging.getLogger(__name__)
+
+# 병합으로 사라진 프레임 1개당 절약되는 봉투(action/data/type/delta) 크기 추정치
+_DELTA_ENVELOPE_BYTES = len(
+    dumps({"action": "chat_stream", "data": {"type": "content_block_delta", "delta": {"text": ""}}})
+)
+_TEXT_DELTA_ENVELOPE_BYTES = len(
+    dumps({"action": "chat_stream", "data": {"type": "text_delta", "text": ""}})
+)
+_ASSISTANT_ENVELOPE_BYTES = len(
+    dumps(
+        {
+            "action": "chat_stream",
+            "data": {"type": "assistant", "message": {"content": [{"type": "text", "text": ""}]}},
+        }
+    )
+)
+
+
+class StreamStats:
+    """스트림 출력 지표 (병합 효과 튜닝용, 서버 전체 누적)"""
+
+    def __init__(self):
+        self.events_in = 0
+        self.frames_out = 0
+        self.bytes_out = 0
+        self.bytes_saved_est = 0
+        self.flushes = {"window": 0, "size": 0, "final": 0}
+        self.max_flush_delay_ms = 0.0
+        self.deferred = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "events_in": self.events_in,
+            "frames_out": self.frames_out,
+            "frames_saved": self.events_in - self.frames_out,
+            "bytes_out": self.bytes_out,
+            "bytes_saved_est": self.bytes_saved_est,
+            "flushes": dict(self.flushes),
+            "max_flush_delay_ms": round(self.max_flush_delay_ms, 2),
+            "deferred": self.deferred,
+        }
+
+
+class StreamCoalescer:
+    """스트림 1건의 chat_stream 이벤트 버퍼 (시간 창/크기 기준 flush)"""
+
+    def __init__(
+        self,
+        send: Callable[[str], Awaitable[None]],
+        stats: StreamStats | None = None,
+        window_ms: float | None = None,
+        max_bytes: int | None = None,
+        action: str = "chat_stream",
+        congested: Callable[[], bool] | None = None,
+        congested_max_ms: float | None = None,
+    ):
+        self.send = send
+        self.stats = stats
+        if window_ms is None:
+            window_ms = float(os.getenv("STREAM_FLUSH_MS", "30"))
+        if max_bytes is None:
+            max_bytes = int(os.getenv("STREAM_FLUSH_BYTES", "2048"))
+        self.window = max(0.0, window_ms) / 1000
+        self.max_bytes = max(0, max_bytes)
+        self.action = action
+        # 송신 큐 혼잡 여부 (True면 flush를 미뤄 더 크게 병합)
+        self.congested = congested
+        if congested_max_ms is None:
+            congested_max_ms = float(os.getenv("STREAM_CONGESTED_MAX_MS", "1000"))
+        self.congested_max = max(0.0, congested_max_ms) / 1000
+        self._buffer: list[dict] = []
+        self._buffered_text = 0
+        self._first_at = 0.0
+        self._timer: asyncio.Task | None = None
+        self._timer_sleeping = False
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def _record_in(self):
+        if self.stats is not None:
+            self.stats.events_in += 1
+
+    def _should_defer(self) -> bool:
+        """혼잡하면 flush 보류 (첫 이벤트 이후 congested_max를 넘기면 그대로 보냄)"""
+        if self.congested is None or not self.congested():
+            return False
+        if time.monotonic() - self._first_at >= self.congested_max:
+            return False
+        if self.stats is not None:
+            self.stats.deferred += 1
+        return True
+
+    def _merge(self, event: dict) -> bool:
+        """버퍼 마지막 이벤트와 병합 (병합했으면 True)"""
+        if not self._buffer:
+            return False
+        last = self._buffer[-1]
+        etype = event.get("type")
+        if etype == "text_delta" and last.get("type") == "text_delta":
+            # 정규화 델타: 교체(replace) 이벤트는 앞선 델타를 덮어씀
+            if event.get("replace"):
+                self._buffer[-1] = event
+                self._buffered_text = len(event.get("text", ""))
+            else:
+                self._buffer[-1] = {**last, "text": last.get("text", "") + event.get("text", "")}
+                self._buffered_text += len(event.get("text", ""))
+            if self.stats is not None:
+                self.stats.bytes_saved_est += _TEXT_DELTA_ENVELOPE_BYTES
+            return True
+        if etype != last.get("type") or set(event) != set(last):
+            return False
+        if etype == "content_block_delta":
+            text = (event.get("delta") or {}).get("text")
+            prev = (last.get("delta") or {}).get("text")
+            if not isinstance(text, str) or not isinstance(prev, str) or len(last["delta"]) != 1:
+                return False
+            self._buffer[-1] = {**last, "delta": {"text": prev + text}}
+            self._buffered_text += len(text)
+            if self.stats is not None:
+                self.stats.bytes_saved_est += _DELTA_ENVELOPE_BYTES
+            return True
+        if etype == "assistant":
+            # 누적 전체 텍스트이므로 이전 것을 버리고 최신 것만 유지
+            dropped = sum(
+                len(item.get("text", ""))
+                for item in (last.get("message") or {}).get("content", [])
+                if isinstance(item, dict)
+            )
+            self._buffer[-1] = event
+            if self.stats is not None:
+                self.stats.bytes_saved_est += _ASSISTANT_ENVELOPE_BYTES + dropped
+            return True
+        return False
+
+    async def push(self, event: dict):
+        """이벤트 1건 추가 (필요하면 즉시 flush)"""
+        self._record_in()
+        if not self.enabled:
+            await self._send_events([event])
+            return
+
+        if not self._merge(event):
+            if not self._buffer:
+                self._first_at = time.monotonic()
+            self._buffer.append(event)
+            if event.get("type") == "content_block_delta":
+                self._buffered_text += len(str((event.get("delta") or {}).get("text", "")))
+            elif event.get("type") == "text_delta":
+                self._buffered_text += len(str(event.get("text", "")))
+        if self.max_bytes and self._buffered_text >= self.max_bytes and not self._should_defer():
+            await self.flush("size")
+            return
+        if self._timer is None or self._timer.done():
+            self._timer_sleeping = True
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.window)
+            while self._buffer and self._should_defer():
+                await asyncio.sleep(self.window)
+        finally:
+            self._timer_sleeping = False
+        try:
+            await self.flush("window")
+        except Exception as e:
+            logger.debug(f"stream flush failed: {e}")
+
+    async def flush(self, reason: str = "final"):
+        """버퍼 비우기 (순서 보장을 위해 전송 구간은 직렬화)"""
+        async with self._lock:
+            if not self._buffer:
+                return
+            events, self._buffer = self._buffer, []
+            self._buffered_text = 0
+            if self.stats is not None:
+                self.stats.flushes[reason] = self.stats.flushes.get(reason, 0) + 1
+                delay_ms = (time.monotonic() - self._first_at) * 1000
+                self.stats.max_flush_delay_ms = max(self.stats.max_flush_delay_ms, delay_ms)
+            await self._send_events(events)
+
+    async def _send_events(self, events: list[dict]):
+        for event in events:
+            frame = dumps({"action": self.action, "data": event})
+            await self.send(frame)
+            if self.stats is not None:
+                self.stats.frames_out += 1
+                self.stats.bytes_out += len(frame)
+
+    async def close(self):
+        """타이머 중단 후 남은 이벤트 전송"""
+        timer, self._timer = self._timer, None
+        if timer is not None and not timer.done():
+            # 대기 중인 타이머만 취소하고, 이미 전송 중이면 끝날 때까지 기다림
+            if self._timer_sleeping:
+                timer.cancel()
+            try:
+                await timer
+            except asyncio.CancelledError:
+                pass
+        await self.flush("final")
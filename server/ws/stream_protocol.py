@@ -0,0 +1,93 @@
+"""chat_stream 정규화 프로토콜 (텍스트 델타 + 타입별 제어 이벤트)
+
+프로바이더 CLI 이벤트를 그대로 전달하면 Claude stream-json은 assistant 이벤트마다
+누적 전체 텍스트를 반복해 보내므로, 긴 응답일수록 전송량과 클라이언트 파싱 비용이
+커집니다. DeltaNormalizer는 프로바이더 이벤트를 아래 이벤트로만 바꿔 내보냅니다.
+
+- {"type": "text_delta", "text": "..."}                 새로 생긴 텍스트만
+- {"type": "text_delta", "text": "...", "replace": true} 앞부분이 바뀐 경우 전체 교체
+- {"type": "session", "provider": "...", "session_id": "..."}
+- {"type": "usage", "usage": {...}, "final"?: true}
+- {"type": "error", "message": "..."}
+
+호환 모드(raw)는 기존처럼 CLI 이벤트를 그대로 전달합니다.
+STREAM_PROTOCOL 환경변수(기본 delta) 또는 chat 요청의 stream_format으로 고릅니다.
+"""
+
+from __future__ import annotations
+
+import os
+
+STREAM_FORMATS = ("delta", "raw")
+
+
+def resolve_stream_format(data: dict | None = None) -> str:
+    """요청(stream_format) > 환경변수(STREAM_PROTOCOL) > 기본값(delta)"""
+    requested = str((data or {}).get("stream_format") or "").lower()
+    if requested in STREAM_FORMATS:
+        return requested
+    configured = os.getenv("STREAM_PROTOCOL", "delta").lower()
+    return configured if configured in STREAM_FORMATS else "delta"
+
+
+class DeltaNormalizer:
+    """프로바이더 스트림 이벤트 → 정규화 이벤트 변환기 (스트림 1건용)"""
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.text = ""
+        self._session_id = None
+        self._usage = None
+
+    def _text_events(self, full_text: str) -> list[dict]:
+        """누적 전체 텍스트에서 새로 생긴 부분만 델타로 변환"""
+        if full_text.startswith(self.text):
+            delta = full_text[len(self.text) :]
+            self.text = full_text
+            return [{"type": "text_delta", "text": delta}] if delta else []
+        self.text = full_text
+        return [{"type": "text_delta", "text": full_text, "replace": True}]
+
+    def _usage_event(self, usage, final: bool = False) -> list[dict]:
+        if not isinstance(usage, dict) or (usage == self._usage and not final):
+            return []
+        self._usage = usage
+        event = {"type": "usage", "usage": usage}
+        if final:
+            event["final"] = True
+        return [event]
+
+    def normalize(self, event: dict) -> list[dict]:
+        if not isinstance(event, dict):
+            return []
+        out: list[dict] = []
+        etype = event.get("type")
+
+        session_id = event.get("session_id")
+        if session_id and session_id != self._session_id:
+            self._session_id = session_id
+            out.append({"type": "session", "provider": self.provider, "session_id": session_id})
+
+        if etype == "content_block_delta":
+            text = (event.get("delta") or {}).get("text")
+            if isinstance(text, str) and text:
+                self.text += text
+                out.append({"type": "text_delta", "text": text})
+        elif etype == "assistant":
+            message = event.get("message") or {}
+            texts = [
+                item.get("text", "")
+                for item in message.get("content", [])
+                if isinstance(item, dict) and item.get("type") == "text"
+            ]
+            if texts:
+                out.extend(self._text_events("".join(texts)))
+            out.extend(self._usage_event(message.get("usage")))
+        elif etype == "result":
+            out.extend(self._usage_event(event.get("usage"), final=True))
+            if event.get("is_error"):
+                out.append({"type": "error", "message": str(event.get("result") or "error")})
+        elif etype == "error":
+            message = event.get("message") or event.get("error") or "error"
+            out.append({"type": "error", "message": str(message)})
+        return out
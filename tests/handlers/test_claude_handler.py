@@ -161,3 +161,81 @@ def test_claude_handler_start_args_and_stop(monkeypatch):
     assert "--setting-sources" in args and "user,local" in args
     # stop 경로 실행
     asyncio.run(h.stop())
+
+
+def test_claude_handler_concurrent_requests_use_separate_processes(monkeypatch):
+    # 동시에 들어온 두 요청이 각자 프로세스를 갖고 서로의 stdin을 건드리지 않아야 함
+    spawned: list[_FakeProcess] = []
+
+    def _lines(text: str) -> list[str]:
+        return [
+            json.dumps(
+                {"type": "assistant", "message": {"content": [{"type": "text", "text": text}]}}
+            ),
+            json.dumps({"type": "result"}),
+        ]
+
+    class _SlowReader(_FakeReader):
+        async def readline(self) -> bytes:
+            await asyncio.sleep(0.01)
+            return await super().readline()
+
+    async def fake_exec(*args, **kwargs):
+        idx = len(spawned)
+        p = _FakeProcess([])
+        p.stdout = _SlowReader(_lines(f"R{idx}"))
+        spawned.append(p)
+        return p
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+    monkeypatch.setenv("CLAUDE_MAX_CONCURRENCY", "2")
+    handler = ClaudeCodeHandler(claude_path="claude")
+
+    async def both():
+        return await asyncio.gather(
+            handler.send_message("a", system_prompt="s"),
+            handler.send_message("b", system_prompt="s"),
+        )
+
+    r1, r2 = asyncio.run(both())
+    assert {r1["message"], r2["message"]} == {"R0", "R1"}
+    assert len(spawned) == 2
+    assert bytes(spawned[0].stdin.buffer) != bytes(spawned[1].stdin.buffer)
+    stats = handler.pool.stats()
+    assert stats["max_concurrency"] == 2
+    assert stats["acquired_total"] == 2 and stats["in_use"] == 0
+
+
+def test_claude_handler_does_not_prewarm(monkeypatch):
+    # system prompt가 argv에 들어가 매 턴 달라지므로 Claude는 예열 풀을 쓰지 않음
+    monkeypatch.setenv("CLI_WARM_POOL_SIZE", "1")
+    spawned = []
+
+    class _P:
+        def __init__(self):
+            self.stdin = _FakeWriter()
+            self.stdout = _FakeReader([])
+            self.stderr = _FakeReader([])
+            self.returncode = None
+
+        def terminate(self):
+            self.returncode = 0
+
+        async def wait(self):
+            return self.returncode
+
+    async def fake_exec(*args, **kwargs):
+        spawned.append(_P())
+        return spawned[-1]
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+
+    async def scenario():
+        h = ClaudeCodeHandler(claude_path="claude")
+        assert not hasattr(h, "warm_pool")
+        await h.start(system_prompt="SYS + 히스토리")
+        await asyncio.sleep(0.01)
+        assert len(spawned) == 1
+        await h.stop()
+
+    asyncio.run(scenario())
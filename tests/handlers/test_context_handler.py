@@ -191,3 +191,44 @@ def test_load_from_dict():
     # 유효하지 않은 입력 처리
     ctx.load_from_dict("not a dict")  # 아무 일도 일어나지 않아야 함
     ctx.load_from_dict(None)  # 아무 일도 일어나지 않아야 함
+
+
+def test_history_is_appended_after_static_prefix():
+    ctx = ContextHandler()
+    ctx.set_world("판타지 왕국")
+    ctx.set_characters([{"name": "민수", "description": "기사"}])
+    static = ctx.build_static_prompt()
+    assert ctx.build_system_prompt() == static
+
+    p1 = ctx.build_system_prompt("=== 이전 대화 내역 ===\n사용자: 안녕\n")
+    p2 = ctx.build_system_prompt("=== 이전 대화 내역 ===\n사용자: 반가워\n")
+    # 턴마다 바뀌는 히스토리는 맨 뒤에만 붙어 정적 접두부가 바이트 단위로 동일
+    assert p1.startswith(static) and p2.startswith(static)
+    assert p1.endswith("사용자: 안녕\n")
+    assert static.index("=== Characters ===") < static.index("=== Dialogue Rules ===")
+
+
+def test_static_prompt_cache_hits_invalidates_and_evicts():
+    ctx = ContextHandler(prompt_cache_size=2)
+    ctx.set_world("A")
+    p1 = ctx.build_static_prompt()
+    assert ctx.build_static_prompt() is p1
+    ctx.set_ai_provider("gemini")  # 프롬프트와 무관한 필드는 키에 영향 없음
+    ctx.set_world("A")  # 같은 값 재설정도 무효화하지 않음
+    assert ctx.build_static_prompt() is p1
+    assert ctx.prompt_cache_stats()["hits"] == 2
+
+    ctx.set_world("B")
+    assert "=== World Setting ===\nB" in ctx.build_static_prompt()
+    ctx.set_world("A")  # 다른 방 컨텍스트로 돌아오면 캐시 재사용
+    assert ctx.build_static_prompt() is p1
+    ctx.set_world("C")
+    ctx.build_static_prompt()
+    ctx.set_world("B")  # LRU: 가장 오래 안 쓴 B가 밀려나 다시 컴파일
+    ctx.build_static_prompt()
+    stats = ctx.prompt_cache_stats()
+    assert stats["misses"] == 4 and stats["evictions"] == 2 and stats["size"] == 2
+
+    uncached = ContextHandler(prompt_cache_size=0)
+    assert uncached.build_static_prompt() == ContextHandler().build_static_prompt()
+    assert uncached.prompt_cache_stats()["misses"] == 0
@@ -143,3 +143,113 @@ def test_droid_handler_start_args_variants(monkeypatch):
     # skip-permissions 옵션 포함 및 모델 인자 확인
     assert "--skip-permissions-unsafe" in args
     assert "--model" in args and "glm-x" in args
+
+
+class _SlowReader(_FakeReader):
+    """첫 줄(init) 뒤로 응답이 멈춘 stdout"""
+
+    async def readline(self) -> bytes:
+        if self._lines:
+            return self._lines.pop(0)
+        await asyncio.sleep(30)
+        return b""
+
+
+def _hedge_env(monkeypatch):
+    monkeypatch.setenv("DROID_HEDGE", "1")
+    monkeypatch.setenv("DROID_FALLBACK_MODELS", "fast-model")
+    monkeypatch.setenv("DROID_HEDGE_DEFAULT_SECONDS", "0.05")
+    monkeypatch.setenv("DROID_HEDGE_MIN_SECONDS", "0")
+
+
+def test_droid_hedge_fires_and_fast_model_wins(monkeypatch):
+    _hedge_env(monkeypatch)
+    procs = {}
+
+    async def fake_exec(*args, **kwargs):
+        if "fast-model" in args:
+            proc = _FakeProcess(
+                [
+                    json.dumps({"type": "system", "subtype": "init", "session_id": "F1"}),
+                    json.dumps({"delta": "빠른 응답"}),
+                ]
+            )
+        else:
+            proc = _FakeProcess([])
+            proc.stdout = _SlowReader(
+                [json.dumps({"type": "system", "subtype": "init", "session_id": "S1"})]
+            )
+        procs["fast" if "fast-model" in args else "slow"] = proc
+        return proc
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+
+    handler = DroidHandler(droid_path="droid")
+    res, out = asyncio.run(asyncio.wait_for(_run(handler), timeout=5))
+
+    assert res["success"] is True and res["message"] == "빠른 응답"
+    assert res["fallback_used"] == "fast-model" and res["hedged"] is True
+    assert res["session_id"] == "F1"
+    # 패자(느린 기본 모델)의 이벤트는 전달되지 않고 프로세스는 종료됨
+    assert all(e.get("session_id") != "S1" for e in out)
+    assert procs["slow"].returncode is not None
+    stats = handler.hedge_stats()
+    assert stats["fired"] == 1 and stats["won"] == 1 and stats["lost"] == 0
+    assert stats["models"]["fast-model"]["samples"] == 1
+
+
+def test_droid_hedge_not_fired_when_primary_is_fast(monkeypatch):
+    _hedge_env(monkeypatch)
+    monkeypatch.setenv("DROID_HEDGE_DEFAULT_SECONDS", "5")
+    spawned = []
+
+    async def fake_exec(*args, **kwargs):
+        spawned.append(args)
+        return _FakeProcess([json.dumps({"delta": "ok"})])
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+
+    handler = DroidHandler(droid_path="droid")
+    res, _ = asyncio.run(_run(handler))
+
+    assert res["success"] is True and "fallback_used" not in res
+    assert len(spawned) == 1
+    assert handler.hedge_stats()["eligible"] == 1 and handler.hedge_stats()["fired"] == 0
+
+
+def test_droid_hedge_delay_tracks_ttft_p95(monkeypatch):
+    _hedge_env(monkeypatch)
+    monkeypatch.setenv("DROID_HEDGE_MIN_SECONDS", "0.5")
+    monkeypatch.setenv("DROID_FIRST_TOKEN_TIMEOUT", "3")
+    handler = DroidHandler(droid_path="droid")
+    assert handler.hedge_delay("m") == 0.5  # 표본 부족 → 기본값(0.05)을 최소값으로 올림
+    for i in range(20):
+        handler.latency.record_ttft("m", 1.0 + i * 0.1)
+    assert handler.hedge_delay("m") == 2.8  # p95
+    for _ in range(20):
+        handler.latency.record_ttft("m", 10.0)
+    assert handler.hedge_delay("m") == 3.0  # 첫 토큰 타임아웃으로 상한
+
+
+def test_droid_hedge_not_fired_keeps_first_fallback(monkeypatch):
+    # 기본 모델이 헤지 기준 시간 전에 실패하면 첫 폴백 모델도 순차 폴백으로 시도
+    _hedge_env(monkeypatch)
+    monkeypatch.setenv("DROID_FALLBACK_MODELS", "A,B")
+    monkeypatch.setenv("DROID_HEDGE_DEFAULT_SECONDS", "5")
+    spawned = []
+
+    async def fake_exec(*args, **kwargs):
+        model = "A" if "A" in args else "B" if "B" in args else "primary"
+        spawned.append(model)
+        if model == "primary":
+            return _FakeProcess([])
+        return _FakeProcess([json.dumps({"delta": f"{model} 응답"})])
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+
+    handler = DroidHandler(droid_path="droid")
+    res, _ = asyncio.run(asyncio.wait_for(_run(handler), timeout=5))
+
+    assert spawned[:2] == ["primary", "A"]
+    assert res["success"] is True and res["fallback_used"] == "A"
+    assert handler.hedge_stats()["fired"] == 0
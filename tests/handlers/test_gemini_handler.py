@@ -95,3 +95,88 @@ def test_gemini_handler_timeout(monkeypatch):
     handler = GeminiHandler(gemini_path="gemini")
     res, _ = asyncio.run(_run(handler))
     assert res.get("success") in (True, False)
+
+
+def test_gemini_handler_concurrent_requests_run_in_parallel(monkeypatch):
+    # 락 대신 슬롯 풀: 두 요청이 각자 프로세스로 동시에 실행되어야 함
+    spawned: list[_FakeProcess] = []
+    active = {"now": 0, "peak": 0}
+
+    class _SlowReader(_FakeReader):
+        async def readline(self) -> bytes:
+            await asyncio.sleep(0.01)
+            return await super().readline()
+
+    async def fake_exec(*args, **kwargs):
+        idx = len(spawned)
+        line = json.dumps(
+            {"type": "message", "role": "assistant", "content": f"R{idx}", "delta": True}
+        )
+        p = _FakeProcess([])
+        p.stdout = _SlowReader([line])
+        spawned.append(p)
+        return p
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+    monkeypatch.setenv("GEMINI_MAX_CONCURRENCY", "2")
+    handler = GeminiHandler(gemini_path="gemini")
+
+    async def cb(_):
+        active["now"] = handler.pool.in_use
+        active["peak"] = max(active["peak"], active["now"])
+
+    async def both():
+        return await asyncio.gather(
+            handler.send_message("a", callback=cb),
+            handler.send_message("b", callback=cb),
+        )
+
+    r1, r2 = asyncio.run(both())
+    assert {r1["message"], r2["message"]} == {"R0", "R1"}
+    assert len(spawned) == 2
+    assert active["peak"] == 2
+    assert handler.pool.stats()["in_use"] == 0
+
+
+def test_gemini_handler_records_latency_without_callback(monkeypatch):
+    lines = [
+        json.dumps({"session_id": "G1"}),
+        json.dumps({"type": "message", "role": "assistant", "content": "A", "delta": True}),
+        json.dumps({"type": "message", "role": "assistant", "content": "B", "delta": True}),
+        "non-json-line",
+    ]
+
+    async def fake_exec(*args, **kwargs):
+        return _FakeProcess(lines, [])
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+    handler = GeminiHandler(gemini_path="gemini")
+    res = asyncio.run(handler.send_message("hi", system_prompt="sys", callback=None))
+
+    # 콜백이 없어도 첫 토큰/토큰 간격을 기록하고 응답을 누적
+    assert res["message"] == "AB" + "non-json-line"
+    stats = handler.latency.stats()["models"]["default"]
+    assert stats["ttft"]["samples"] == 1 and stats["inter_token"]["samples"] == 2
+
+
+def test_gemini_handler_stop_closes_warm_pool(monkeypatch):
+    monkeypatch.setenv("GEMINI_WARM_POOL_SIZE", "1")
+    spawned = []
+
+    async def fake_exec(*args, **kwargs):
+        spawned.append(_FakeProcess([]))
+        return spawned[-1]
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+
+    async def scenario():
+        h = GeminiHandler(gemini_path="gemini")
+        await h.start()
+        await asyncio.sleep(0.01)
+        # 요청용 1개 + 다음 턴용 예열본 1개
+        assert len(spawned) == 2 and h.warm_pool.stats()["misses"] == 1
+        spare = spawned[-1]
+        await h.stop()
+        assert spare.returncode == -9
+
+    asyncio.run(scenario())
@@ -108,3 +108,82 @@ def test_narrative_markdown_format():
     assert re.search(r"##\s+2\.\s*AI 응답", md)
     assert "첫 메시지" in md and "첫 응답" in md
     assert "---\n\n" in md
+
+
+def test_token_budget_window_keeps_recent_messages_that_fit():
+    h = HistoryHandler(max_turns=3)
+    h.add_user_message("짧은 말")  # 3 + 3
+    h.add_assistant_message("가" * 100)  # 90 + 3
+    for text in ("응", "좋아", "그래"):
+        h.add_user_message(text)
+
+    # 턴 기준 윈도우는 최근 3건, 예산 모드는 기본 턴 한도와 무관하게 예산만큼
+    window, total = h.get_token_window(200)
+    assert len(window) == 5 and total == sum(h._token_counts)
+    window, total = h.get_token_window(20)
+    assert [m["content"] for m in window] == ["응", "좋아", "그래"]
+    text = h.get_history_text(token_budget=20)
+    assert "가가" not in text and h.last_window_tokens == total
+
+    # 최신 메시지는 예산을 넘어도 포함
+    h.add_assistant_message("나" * 100)
+    assert len(h.get_token_window(10)[0]) == 1
+
+    # 사용자가 직접 정한 턴 한도는 예산 모드에서도 상한
+    h.set_max_turns(2)
+    assert len(h.get_token_window(10_000)[0]) == 2
+    h.clear()
+    assert h.get_token_window(100) == ([], 0) and h.get_history_text(token_budget=100) == ""
+
+
+def _naive_history_text(window):
+    text = "=== 이전 대화 내역 ===\n"
+    for msg in window:
+        role = "사용자" if msg["role"] == "user" else "AI"
+        text += f"{role}: {msg['content']}\n"
+    return text + "\n위 대화 내용을 참고하여 자연스럽게 대화를 이어가세요.\n\n"
+
+
+def test_incremental_rendering_matches_full_rebuild():
+    h = HistoryHandler(max_turns=3)
+    for i in range(12):
+        if i % 2 == 0:
+            h.add_user_message(f"질문 {i}")
+        else:
+            h.add_assistant_message(f"답 {i}")
+        assert h.get_history_text() == _naive_history_text(h.get_history())
+        if i == 5:
+            h.set_max_turns(5)  # 윈도우 확장 → 캐시 재구성
+        if i == 8:
+            h.set_max_turns(2)  # 윈도우 축소 → 앞쪽만 잘라냄
+        window, _ = h.get_token_window(12)
+        assert h.get_history_text(token_budget=12) == _naive_history_text(window)
+
+    md = h.get_narrative_markdown()
+    assert md.count("## ") == 12 and md.endswith("## 12. AI 응답\n\n답 11\n\n---\n\n")
+    h.add_user_message("마지막")
+    assert h.get_narrative_markdown() == md + "## 13. 사용자\n\n마지막\n\n"
+
+    h.clear()
+    h.add_user_message("새 시작")
+    assert h.get_history_text() == _naive_history_text(h.get_history())
+    assert "## 1. 사용자\n\n새 시작" in h.get_narrative_markdown()
+
+
+def test_window_and_full_history_share_compact_storage():
+    h = HistoryHandler(max_turns=2)
+    h.add_user_message("a")
+    h.add_assistant_message("b")
+    h.add_user_message("c")
+
+    window = h.history
+    assert [m["content"] for m in window] == ["b", "c"]
+    assert window[-1].role == "user" and window[0].get("role") == "assistant"
+    assert h.full_history[0] == {"role": "user", "content": "a"}
+    # 메시지 내용은 한 번만 보관 (윈도우/전체 기록은 같은 문자열을 가리킴)
+    assert h.full_history[2].content is h.history[1].content
+    assert h.get_history() == [
+        {"role": "assistant", "content": "b"},
+        {"role": "user", "content": "c"},
+    ]
+    assert h.memory_bytes() > 0
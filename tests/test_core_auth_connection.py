@@ -0,0 +1,90 @@
+import json
+import time
+from pathlib import Path
+
+import jwt
+import pytest
+
+import server.core.session_manager as sm
+import server.websocket_server as ws_srv
+from server.core.app_context import AppContext
+from server.core.auth import current_connection, verify_token
+from server.core.token_cache import TokenCache
+
+SECRET = "unit-test-secret"  # pragma: allowlist secret
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+def make_ctx():
+    return AppContext(
+        project_root=Path("."),
+        bind_host="127.0.0.1",
+        login_required=True,
+        jwt_secret=SECRET,
+        jwt_algorithm="HS256",
+        access_ttl_seconds=60,
+        refresh_ttl_seconds=120,
+        login_username="",
+        login_rate_limit_max_attempts=5,
+        login_rate_limit_window_seconds=900,
+        token_expired_grace_seconds=60,
+    )
+
+
+def make_token(user_id=7, ttl=60, typ="access"):
+    payload = {"user_id": user_id, "typ": typ, "exp": int(time.time()) + ttl}
+    return jwt.encode(payload, SECRET, algorithm="HS256")
+
+
+def test_token_cache_skips_decode_until_expiry(monkeypatch):
+    ctx = make_ctx()
+    ctx.token_cache = TokenCache(max_size=2)
+    token = make_token()
+
+    assert verify_token(ctx, token)[0]["user_id"] == 7
+    calls = []
+    monkeypatch.setattr(jwt, "decode", lambda *a, **k: calls.append(a) or {})
+    assert verify_token(ctx, token)[0]["user_id"] == 7
+    assert verify_token(ctx, token, expected_type="refresh") == (None, "invalid_token_type")
+    assert calls == [] and ctx.token_cache.stats()["hits"] == 2
+
+    # 만료된 항목은 캐시에서 빠지고 다시 검증
+    assert ctx.token_cache.get(token, now=time.time() + 120) is None
+    assert ctx.token_cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_auth_handshake_binds_connection():
+    ws_srv.APP_CTX = ctx = make_ctx()
+    ws = FakeWebSocket()
+    token = make_token()
+
+    await ws_srv.handle_auth_action(ws, {"token": token})
+    reply = json.loads(ws.sent[-1])
+    assert reply["action"] == "auth" and reply["data"]["success"] is True
+
+    # handle_message와 같이 연결 인증을 올려 두면 token 없이도 인증
+    current_connection.set(ctx.connection_auth[ws])
+    assert sm.get_user_id_from_token(ctx, {"action": "room_list"}) == 7
+
+    # 다른 토큰은 검증 후 연결 인증을 갱신
+    other = make_token(user_id=9, ttl=90)
+    assert sm.get_user_id_from_token(ctx, {"token": other}) == 9
+    assert sm.get_user_id_from_token(ctx, {}) == 9
+    assert sm.get_user_id_from_token(ctx, {"token": "garbage"}) is None
+
+    # 만료되면 토큰 없는 메시지는 거절
+    ctx.connection_auth[ws].exp = time.time() - 1
+    assert sm.get_user_id_from_token(ctx, {}) is None
+
+    # 잘못된 토큰으로 다시 핸드셰이크하면 연결 인증 해제
+    await ws_srv.handle_auth_action(ws, {"token": make_token(typ="refresh")})
+    assert json.loads(ws.sent[-1])["data"]["error"] == "invalid_token_type"
+    assert ws not in ctx.connection_auth
@@ -0,0 +1,206 @@
+import json
+
+import pytest
+
+from server.core import session_manager as sm
+from server.core.app_context import AppContext
+from server.core.health import CLOSED, HALF_OPEN, OPEN, HealthRegistry, _parse_failover
+from server.core.metrics import collect_runtime_stats
+from server.ws.actions import chat as chat_actions
+
+
+class FakeWS:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, msg):
+        self.sent.append(msg)
+
+
+def make_ctx(tmp_path):
+    ctx = AppContext(
+        project_root=tmp_path,
+        bind_host="127.0.0.1",
+        login_required=False,
+        jwt_secret="s",
+        jwt_algorithm="HS256",
+        access_ttl_seconds=60,
+        refresh_ttl_seconds=120,
+        login_username="",
+        login_rate_limit_max_attempts=5,
+        login_rate_limit_window_seconds=900,
+        token_expired_grace_seconds=60,
+    )
+
+    class CH:
+        def get_context(self):
+            return {}
+
+        def build_system_prompt(self, history_text):
+            return f"SP:{history_text}"
+
+    ctx.context_handler = CH()
+    ctx.token_usage_handler = type(
+        "T", (), {"add_usage": lambda *a, **k: None, "get_formatted_summary": lambda *a, **k: {}}
+    )()
+    return ctx
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _registry(clock, **kwargs):
+    opts = dict(failure_threshold=3, open_seconds=10, max_open_seconds=40, clock=clock)
+    opts.update(kwargs)
+    return HealthRegistry(**opts)
+
+
+def test_circuit_opens_half_opens_and_closes():
+    clock = _Clock()
+    reg = _registry(clock)
+    for _ in range(3):
+        assert reg.get("droid").allow()
+        reg.record("droid", False, error="429 rate limit")
+    h = reg.get("droid")
+    assert h.state == OPEN and not h.allow()
+    assert h.stats()["health_score"] == 0.0 and h.stats()["rejected_total"] == 1
+
+    clock.now += 10
+    assert h.allow() and h.state == HALF_OPEN
+    assert not h.allow()  # 탐색은 1건만
+    reg.record("droid", True, latency=0.5)
+    assert h.state == CLOSED and h.allow()
+
+
+def test_failed_probe_backs_off_and_cancel_releases_probe():
+    clock = _Clock()
+    reg = _registry(clock)
+    for _ in range(3):
+        reg.record("gemini", False)
+    h = reg.get("gemini")
+    clock.now += 10
+    assert h.allow()
+    reg.record("gemini", None)  # 취소: 판정 없이 탐색 슬롯만 반환
+    assert h.state == HALF_OPEN and h.allow()
+    reg.record("gemini", False)
+    assert h.state == OPEN and h.open_seconds == 20
+    clock.now += 19
+    assert not h.allow()
+    clock.now += 1
+    assert h.allow()
+
+
+def test_error_rate_trips_without_consecutive_failures():
+    reg = _registry(_Clock(), failure_threshold=100, min_calls=4, error_rate_threshold=0.5)
+    for ok in (True, False, True, False):
+        reg.record("claude", ok)
+    assert reg.get("claude").state == OPEN
+
+
+def test_route_fails_over_to_alternate():
+    reg = _registry(_Clock(), failover=_parse_failover("droid:claude, gemini : claude"))
+    assert reg.failover == {"droid": "claude", "gemini": "claude"}
+    for _ in range(3):
+        reg.record("droid", False)
+    assert reg.route("droid") == ("claude", "droid")
+    assert reg.route("droid", available=lambda p: False) == (None, None)
+    assert reg.route("claude") == ("claude", None)
+    assert reg.stats()["failovers_total"] == 1
+
+
+def _claude_handler(calls):
+    async def send_message(prompt, system_prompt, callback, session_id, model=None):
+        calls.append("claude")
+        return {"success": True, "message": "claude 응답", "token_info": None}
+
+    return type("CH", (), {"send_message": staticmethod(send_message)})()
+
+
+@pytest.mark.asyncio
+async def test_chat_fails_over_and_rejects_fast(tmp_path, monkeypatch):
+    ctx = make_ctx(tmp_path)
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: 7)
+    calls = []
+    ctx.claude_handler = _claude_handler(calls)
+    ctx.droid_handler = object()  # 회로가 열려 있으면 호출되지 않음
+    ctx.health = _registry(_Clock(), failover={"droid": "claude"})
+    for _ in range(3):
+        ctx.health.record("droid", False)
+
+    ws = FakeWS()
+    await chat_actions.chat(ctx, ws, {"prompt": "p", "provider": "droid"})
+    done = json.loads(ws.sent[-1])["data"]
+    assert calls == ["claude"]
+    assert done["success"] is True
+    assert done["provider_used"] == "claude" and done["failover_from"] == "droid"
+    assert ctx.health.get("claude").stats()["recent_calls"] == 1
+
+    # 대체 프로바이더가 없으면 프로세스를 띄우지 않고 즉시 거절
+    ctx.health.failover = {}
+    ws = FakeWS()
+    await chat_actions.chat(ctx, ws, {"prompt": "p", "provider": "droid"})
+    done = json.loads(ws.sent[-1])["data"]
+    assert done["success"] is False and done["circuit_open"] is True
+    assert done["retry_after_s"] > 0 and calls == ["claude"]
+
+    stats = await collect_runtime_stats(ctx)
+    assert stats["health"]["providers"]["droid"]["state"] == OPEN
+
+
+@pytest.mark.asyncio
+async def test_failover_drops_provider_specific_model(tmp_path, monkeypatch):
+    ctx = make_ctx(tmp_path)
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: 7)
+    models = []
+
+    async def send_message(prompt, system_prompt, callback, session_id, model=None):
+        models.append(model)
+        return {"success": True, "message": "claude 응답", "token_info": None}
+
+    ctx.claude_handler = type("CH", (), {"send_message": staticmethod(send_message)})()
+    ctx.gemini_handler = object()
+    ctx.health = _registry(_Clock(), failover={"gemini": "claude"})
+    for _ in range(3):
+        ctx.health.record("gemini", False)
+
+    ws = FakeWS()
+    await chat_actions.chat(
+        ctx, ws, {"prompt": "p", "provider": "gemini", "model": "gemini-2.5-flash"}
+    )
+    # 대체 프로바이더에는 원래 프로바이더용 모델을 넘기지 않음 (기본 모델 사용)
+    assert models == [None]
+    assert json.loads(ws.sent[-1])["data"]["failover_from"] == "gemini"
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_released_when_chat_fails_before_call(tmp_path, monkeypatch):
+    ctx = make_ctx(tmp_path)
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: 7)
+    calls = []
+    ctx.claude_handler = _claude_handler(calls)
+    clock = _Clock()
+    ctx.health = _registry(clock)
+    for _ in range(3):
+        ctx.health.record("claude", False)
+    clock.now += 10
+
+    async def broken_room(*args, **kwargs):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(sm, "get_room_hydrated", broken_room)
+    with pytest.raises(RuntimeError):
+        await chat_actions.chat(ctx, FakeWS(), {"prompt": "p", "provider": "claude"})
+
+    # 호출 전에 실패한 탐색 슬롯은 반환되어 다음 요청이 탐색을 이어감
+    h = ctx.health.get("claude")
+    assert h.state == HALF_OPEN and h.probes_in_flight == 0
+    monkeypatch.undo()
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: 7)
+    ws = FakeWS()
+    await chat_actions.chat(ctx, ws, {"prompt": "p", "provider": "claude"})
+    assert calls == ["claude"] and h.state == CLOSED
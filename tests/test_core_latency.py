@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from server.core.latency import LatencyTracker, RollingPercentile
+from server.handlers.claude_handler import ClaudeCodeHandler
+
+
+def test_rolling_percentile_and_histogram():
+    samples = RollingPercentile(window=4)
+    assert samples.percentile(95) is None
+    for value in (0.05, 0.2, 0.3, 1.5, 70.0):  # 첫 표본은 윈도우 밖으로 밀려남
+        samples.add(value)
+    assert len(samples) == 4
+    assert samples.percentile(50) == 0.3 and samples.percentile(100) == 70.0
+    hist = samples.histogram()
+    assert hist["le_250"] == 1 and hist["le_500"] == 1 and hist["le_2000"] == 1
+    assert hist["inf"] == 1 and hist["le_100"] == 0
+
+
+def test_timeouts_adapt_within_floor_and_ceiling():
+    tracker = LatencyTracker(
+        "claude",
+        first_token_floor=5,
+        first_token_ceiling=60,
+        idle_floor=2,
+        idle_ceiling=30,
+        percentile=99,
+        multiplier=3,
+        min_samples=10,
+    )
+    # 표본 부족 → 상한 그대로
+    assert tracker.first_token_timeout("sonnet") == 60
+    for _ in range(10):
+        tracker.record_ttft("sonnet", 4.0)
+        tracker.record_gap("sonnet", 0.1)
+    assert tracker.first_token_timeout("sonnet") == 12.0  # p99 4s × 3
+    assert tracker.idle_timeout("sonnet") == 2  # 0.3s → 하한
+    for _ in range(10):
+        tracker.record_ttft("sonnet", 50.0)
+    assert tracker.first_token_timeout("sonnet") == 60  # 상한
+    # 다른 모델은 독립적으로 집계
+    assert tracker.first_token_timeout("haiku") == 60
+
+
+def test_stream_timing_records_samples_and_timeouts():
+    tracker = LatencyTracker("gemini", min_samples=1)
+    timing = tracker.timing("flash")
+    assert timing.next_timeout() <= tracker.first_token_ceiling
+    assert timing.timed_out() == "first_token"
+    assert timing.token() is True and timing.token() is False
+    assert timing.next_timeout() == timing.idle_timeout
+    assert timing.timed_out() == "idle"
+
+    stats = tracker.stats()["models"]["flash"]
+    assert stats["ttft"]["samples"] == 1 and stats["inter_token"]["samples"] == 1
+    assert stats["timeouts"] == {"first_token": 1, "idle": 1}
+
+
+def test_from_env_uses_provider_overrides(monkeypatch):
+    monkeypatch.setenv("LATENCY_FIRST_TOKEN_FLOOR", "7")
+    monkeypatch.setenv("DROID_LATENCY_FIRST_TOKEN_FLOOR", "3")
+    assert LatencyTracker.from_env("droid").first_token_floor == 3
+    assert LatencyTracker.from_env("claude").first_token_floor == 7
+    tracker = LatencyTracker.from_env("droid", first_token_ceiling=60, idle_ceiling=90)
+    assert (tracker.first_token_ceiling, tracker.idle_ceiling) == (60, 90)
+
+
+class _Writer:
+    def write(self, b):
+        pass
+
+    async def drain(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class _Empty:
+    async def readline(self):
+        return b""
+
+
+class _Hung:
+    async def readline(self):
+        await asyncio.sleep(30)
+        return b""
+
+
+class _HungProcess:
+    def __init__(self):
+        self.stdin = _Writer()
+        self.stdout = _Hung()
+        self.stderr = _Empty()
+        self.returncode = None
+
+    def terminate(self):
+        self.returncode = -15
+
+    def kill(self):
+        self.returncode = -9
+
+    async def wait(self):
+        return self.returncode
+
+
+@pytest.mark.asyncio
+async def test_hung_cli_is_killed_at_first_token_ceiling(monkeypatch):
+    monkeypatch.setenv("CLAUDE_LATENCY_FIRST_TOKEN_CEILING", "0.05")
+    proc = _HungProcess()
+
+    async def fake_exec(*args, **kwargs):
+        return proc
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+    handler = ClaudeCodeHandler(claude_path="claude")
+
+    res = await asyncio.wait_for(handler.send_message("hi"), timeout=5)
+    assert res["success"] is False and res["timeout"] == "first_token"
+    assert proc.returncode == -15
+    assert handler.latency.stats()["models"]["default"]["timeouts"]["first_token"] == 1
+    assert handler.pool.stats()["in_use"] == 0
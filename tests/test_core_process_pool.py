@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from server.core.metrics import collect_runtime_stats
+from server.core.process_pool import ProcessPool, terminate_process
+
+
+@pytest.mark.asyncio
+async def test_pool_limits_concurrency_and_queues_fifo():
+    pool = ProcessPool("t", 2)
+    order: list[int] = []
+    release = asyncio.Event()
+
+    async def worker(i: int):
+        async with pool.slot():
+            order.append(i)
+            await release.wait()
+
+    tasks = [asyncio.create_task(worker(i)) for i in range(5)]
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert pool.in_use == 2
+    assert pool.waiting == 3
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert order == [0, 1, 2, 3, 4]
+    stats = pool.stats()
+    assert stats["in_use"] == 0 and stats["waiting"] == 0
+    assert stats["peak_in_use"] == 2
+    assert stats["peak_waiting"] == 3
+    assert stats["acquired_total"] == 5
+    assert stats["queued_total"] == 3
+
+
+@pytest.mark.asyncio
+async def test_pool_cancelled_waiter_does_not_leak_slot():
+    pool = ProcessPool("t", 1)
+    first = await pool.acquire()
+    waiter = asyncio.create_task(pool.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    pool.release(first)
+    # 취소된 대기자가 슬롯을 잡고 있지 않아야 함
+    slot = await asyncio.wait_for(pool.acquire(), timeout=1)
+    assert pool.in_use == 1
+    pool.release(slot)
+    assert pool.in_use == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_rejects_invalid_size_and_tracks_processes():
+    with pytest.raises(ValueError):
+        ProcessPool("t", 0)
+
+    pool = ProcessPool("t", 1)
+    async with pool.slot() as slot:
+        slot.process = object()
+        assert pool.active_processes() == [slot.process]
+    assert pool.active_processes() == []
+
+
+@pytest.mark.asyncio
+async def test_terminate_process_escalates_to_kill():
+    class _Stubborn:
+        returncode = None
+
+        def __init__(self):
+            self.killed = False
+
+        def terminate(self):
+            pass
+
+        def kill(self):
+            self.killed = True
+            self.returncode = -9
+
+        async def wait(self):
+            if not self.killed:
+                await asyncio.sleep(10)
+            return self.returncode
+
+    p = _Stubborn()
+    await terminate_process(p, timeout=0.01)
+    assert p.killed is True
+    # None/이미 종료된 프로세스는 무시
+    await terminate_process(None)
+
+
+@pytest.mark.asyncio
+async def test_collect_runtime_stats_reports_pools():
+    class _H:
+        pool = ProcessPool("claude", 3)
+
+    class _Ctx:
+        claude_handler = _H()
+        gemini_handler = None
+        droid_handler = None
+
+    stats = await collect_runtime_stats(_Ctx())
+    assert stats["providers"]["claude"]["pool"]["max_concurrency"] == 3
+    assert stats["providers"]["gemini"] == {}
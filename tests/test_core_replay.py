@@ -0,0 +1,110 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from server.core import replay
+from server.handlers.claude_handler import ClaudeCodeHandler
+from server.handlers.gemini_handler import GeminiHandler
+
+REPLAY_CLI = str(Path(__file__).resolve().parent.parent / "scripts" / "replay_cli.py")
+
+
+@pytest.fixture
+def fast_replay(monkeypatch):
+    for name in ("REPLAY_TRANSCRIPTS", "REPLAY_PROVIDER", "REPLAY_FAIL_RATE", "REPLAY_SPEED"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.delenv("PROVIDER_RECORD_DIR", raising=False)
+    monkeypatch.setenv("REPLAY_FIRST_TOKEN_MS", "0")
+    monkeypatch.setenv("REPLAY_TOKEN_MS", "0")
+    return monkeypatch
+
+
+class _Lines:
+    def __init__(self, lines):
+        self._lines = list(lines)
+
+    async def readline(self):
+        return self._lines.pop(0) if self._lines else b""
+
+
+class _Proc:
+    def __init__(self, lines):
+        self.stdout = _Lines(lines)
+
+
+@pytest.mark.asyncio
+async def test_recorder_writes_transcript_and_plan_uses_timing(tmp_path, monkeypatch):
+    recorder = replay.TranscriptRecorder(tmp_path)
+    proc = recorder.wrap(_Proc([b'{"type": "init"}\n', b"plain\n"]), "gemini", ["gemini"])
+    while await proc.stdout.readline():
+        pass
+
+    [path] = list(tmp_path.glob("gemini-*.jsonl"))
+    header, lines = replay.load_transcript(path)
+    assert header["provider"] == "gemini" and header["args"] == ["gemini"]
+    assert [line for _, line in lines] == ['{"type": "init"}', "plain"]
+
+    # 녹화 타이밍 배속 / 고정 지연 덮어쓰기
+    path.write_text(
+        "\n".join(
+            [
+                json.dumps(header),
+                json.dumps({"t": 100, "line": "a"}),
+                json.dumps({"t": 300, "line": "b"}),
+            ]
+        )
+    )
+    monkeypatch.setenv("REPLAY_TRANSCRIPTS", str(tmp_path))
+    monkeypatch.setenv("REPLAY_SPEED", "2")
+    assert replay.plan_replay("gemini", "p") == [(0.05, "a"), (0.1, "b")]
+    monkeypatch.setenv("REPLAY_TOKEN_MS", "10")
+    assert replay.plan_replay("gemini", "p") == [(0.05, "a"), (0.01, "b")]
+
+
+def test_detect_provider_from_argv(monkeypatch):
+    monkeypatch.delenv("REPLAY_PROVIDER", raising=False)
+    assert replay.detect_provider(["--print", "--verbose"]) == "claude"
+    assert replay.detect_provider(["exec", "--model", "m"]) == "droid"
+    assert replay.detect_provider(["--output-format", "stream-json"]) == "gemini"
+    monkeypatch.setenv("REPLAY_PROVIDER", "droid")
+    assert replay.detect_provider(["--print"]) == "droid"
+
+
+@pytest.mark.asyncio
+async def test_handler_runs_against_replay_cli(fast_replay):
+    handler = GeminiHandler(gemini_path=REPLAY_CLI)
+    events = []
+
+    async def cb(event):
+        events.append(event)
+
+    result = await asyncio.wait_for(handler.send_message("안녕", callback=cb), timeout=30)
+    assert result["success"] is True
+    assert result["message"].strip() == replay.SYNTHETIC_REPLY
+    assert result["session_id"].startswith("replay-")
+    assert any(e.get("type") == "content_block_delta" for e in events)
+
+
+@pytest.mark.asyncio
+async def test_failure_injection_surfaces_as_provider_error(fast_replay):
+    fast_replay.setenv("REPLAY_FAIL_RATE", "1")
+    fast_replay.setenv("REPLAY_FAIL_MODE", "exit")
+    handler = GeminiHandler(gemini_path=REPLAY_CLI)
+    result = await asyncio.wait_for(handler.send_message("안녕"), timeout=30)
+    assert result["success"] is False
+
+
+@pytest.mark.asyncio
+async def test_recorded_claude_transcript_replays_identically(fast_replay, tmp_path):
+    fast_replay.setenv("PROVIDER_RECORD_DIR", str(tmp_path))
+    recorded = await ClaudeCodeHandler(claude_path=REPLAY_CLI).send_message("녹화")
+    assert recorded["success"] is True
+    assert len(list(tmp_path.glob("claude-*.jsonl"))) == 1
+
+    fast_replay.delenv("PROVIDER_RECORD_DIR")
+    fast_replay.setenv("REPLAY_TRANSCRIPTS", str(tmp_path))
+    replayed = await ClaudeCodeHandler(claude_path=REPLAY_CLI).send_message("다른 프롬프트")
+    assert replayed["message"] == recorded["message"]
+    assert replayed["session_id"] == recorded["session_id"]
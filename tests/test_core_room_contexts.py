@@ -0,0 +1,137 @@
+import json
+
+import pytest
+
+from server.core import session_manager as sm
+from server.core.app_context import AppContext
+from server.core.metrics import collect_runtime_stats
+from server.core.room_contexts import RoomContextCache, context_for, room_contexts_from_env
+from server.handlers.context_handler import ContextHandler
+from server.handlers.db_handler import DBHandler
+from server.ws.actions import context as context_actions
+from server.ws.actions import rooms as rooms_actions
+
+
+class FakeWS:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, msg):
+        self.sent.append(msg)
+
+
+async def make_ctx(tmp_path, max_rooms=8):
+    ctx = AppContext(
+        project_root=tmp_path,
+        bind_host="127.0.0.1",
+        login_required=False,
+        jwt_secret="s",
+        jwt_algorithm="HS256",
+        access_ttl_seconds=60,
+        refresh_ttl_seconds=120,
+        login_username="",
+        login_rate_limit_max_attempts=5,
+        login_rate_limit_window_seconds=900,
+        token_expired_grace_seconds=60,
+    )
+    ctx.context_handler = ContextHandler()
+    ctx.db_handler = DBHandler(str(tmp_path / "chat.db"))
+    await ctx.db_handler.initialize()
+    ctx.room_contexts = RoomContextCache(max_rooms=max_rooms)
+    return ctx
+
+
+async def _set_world(ctx, monkeypatch, user_id, room_id, world):
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: user_id)
+    ws = FakeWS()
+    await context_actions.set_context(ctx, ws, {"room_id": room_id, "world": world})
+    return json.loads(ws.sent[-1])["data"]
+
+
+@pytest.mark.asyncio
+async def test_rooms_of_different_users_do_not_interfere(tmp_path, monkeypatch):
+    ctx = await make_ctx(tmp_path)
+    try:
+        alice = await ctx.db_handler.create_user("alice", "a@example.com", "h")
+        bob = await ctx.db_handler.create_user("bob", "b@example.com", "h")
+        await _set_world(ctx, monkeypatch, alice, "r1", "사막 왕국")
+        await _set_world(ctx, monkeypatch, bob, "r1", "해저 도시")
+
+        a_ctx = await context_for(ctx, alice, "r1")
+        b_ctx = await context_for(ctx, bob, "r1")
+        assert a_ctx is not b_ctx
+        assert "사막 왕국" in a_ctx.build_system_prompt()
+        assert "해저 도시" in b_ctx.build_system_prompt()
+
+        # write-through: rooms.context에 각자 저장됨
+        row = await ctx.db_handler.get_room("r1", alice)
+        assert json.loads(row["context"])["world"] == "사막 왕국"
+        # room_id 없는 요청은 전역 컨텍스트 사용 (마지막 설정이 반영됨)
+        assert await context_for(ctx, alice, None) is ctx.context_handler
+        assert ctx.context_handler.get_context()["world"] == "해저 도시"
+    finally:
+        await ctx.db_handler.close()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_context_skips_db_write(tmp_path, monkeypatch):
+    ctx = await make_ctx(tmp_path)
+    try:
+        user_id = await ctx.db_handler.create_user("u1", "u1@example.com", "h")
+        await _set_world(ctx, monkeypatch, user_id, "r1", "숲")
+        await _set_world(ctx, monkeypatch, user_id, "r1", "숲")
+        stats = ctx.room_contexts.stats()
+        assert stats["writes"] == 1 and stats["skipped_writes"] == 1
+        await _set_world(ctx, monkeypatch, user_id, "r1", "설원")
+        assert ctx.room_contexts.stats()["writes"] == 2
+    finally:
+        await ctx.db_handler.close()
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_reloads_from_db(tmp_path, monkeypatch):
+    ctx = await make_ctx(tmp_path, max_rooms=2)
+    try:
+        user_id = await ctx.db_handler.create_user("u1", "u1@example.com", "h")
+        for i in range(3):
+            await _set_world(ctx, monkeypatch, user_id, f"r{i}", f"세계{i}")
+        stats = ctx.room_contexts.stats()
+        assert stats["rooms"] == 2 and stats["evictions"] == 1
+        assert ctx.room_contexts.peek(user_id, "r0") is None
+
+        reloaded = await context_for(ctx, user_id, "r0")
+        assert reloaded.get_context()["world"] == "세계0"
+        # 다시 조회하면 캐시 적중 (같은 인스턴스)
+        assert await context_for(ctx, user_id, "r0") is reloaded
+        assert (await collect_runtime_stats(ctx))["room_contexts"]["hits"] >= 1
+    finally:
+        await ctx.db_handler.close()
+
+
+@pytest.mark.asyncio
+async def test_room_delete_and_save_update_cache(tmp_path, monkeypatch):
+    ctx = await make_ctx(tmp_path)
+    try:
+        user_id = await ctx.db_handler.create_user("u1", "u1@example.com", "h")
+        monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: user_id)
+        await rooms_actions.room_save(
+            ctx, FakeWS(), {"room_id": "r1", "config": {"context": {"world": "저장된 세계"}}}
+        )
+        cached = ctx.room_contexts.peek(user_id, "r1")
+        assert cached.get_context()["world"] == "저장된 세계"
+
+        ws = FakeWS()
+        await rooms_actions.room_load(ctx, ws, {"room_id": "r1"})
+        assert json.loads(ws.sent[-1])["data"]["room"]["context"]["world"] == "저장된 세계"
+
+        await rooms_actions.room_delete(ctx, FakeWS(), {"room_id": "r1"})
+        assert ctx.room_contexts.peek(user_id, "r1") is None
+    finally:
+        await ctx.db_handler.close()
+
+
+def test_room_contexts_from_env(monkeypatch):
+    monkeypatch.setenv("ROOM_CONTEXT_CACHE_SIZE", "0")
+    assert room_contexts_from_env() is None
+    monkeypatch.setenv("ROOM_CONTEXT_CACHE_SIZE", "3")
+    assert room_contexts_from_env().max_rooms == 3
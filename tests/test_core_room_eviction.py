@@ -0,0 +1,183 @@
+import asyncio
+
+import pytest
+
+from server.core import session_manager as sm
+from server.core.app_context import AppContext
+from server.core.idempotency import ChatDedup
+from server.core.metrics import collect_runtime_stats
+from server.core.room_eviction import RoomEvictor, room_evictor_from_env
+from server.handlers.db_handler import DBHandler
+from server.ws.actions import chat as chat_actions
+from server.ws.actions.cancel import cancel_all_streams
+
+
+def make_ctx(tmp_path):
+    return AppContext(
+        project_root=tmp_path,
+        bind_host="127.0.0.1",
+        login_required=False,
+        jwt_secret="s",
+        jwt_algorithm="HS256",
+        access_ttl_seconds=60,
+        refresh_ttl_seconds=120,
+        login_username="",
+        login_rate_limit_max_attempts=5,
+        login_rate_limit_window_seconds=900,
+        token_expired_grace_seconds=60,
+    )
+
+
+async def _ctx_with_room(tmp_path, messages=6):
+    ctx = make_ctx(tmp_path)
+    ctx.db_handler = DBHandler(str(tmp_path / "chat.db"))
+    await ctx.db_handler.initialize()
+    user_id = await ctx.db_handler.create_user("u1", "u1@example.com", "h")
+    await ctx.db_handler.upsert_room("r1", user_id, "r1", None)
+    _, sess = sm.get_or_create_session(ctx, object(), user_id)
+    _, room = sm.get_room(ctx, sess, "r1")
+    for i in range(messages):
+        role = "user" if i % 2 == 0 else "assistant"
+        await ctx.db_handler.save_message("r1", role, f"메시지 {i}", user_id)
+        if role == "user":
+            room["history"].add_user_message(f"메시지 {i}")
+        else:
+            room["history"].add_assistant_message(f"메시지 {i}")
+    return ctx, user_id, sess, room
+
+
+@pytest.mark.asyncio
+async def test_idle_room_is_evicted_and_rehydrated_from_db(tmp_path):
+    ctx, user_id, sess, room = await _ctx_with_room(tmp_path)
+    try:
+        room["history"].set_max_turns(4)
+        room["provider_sessions"] = {"claude": "sess-1"}
+        ctx.room_evictor = RoomEvictor(idle_ttl_seconds=10, max_bytes=0)
+
+        assert ctx.room_evictor.sweep(ctx, now=room["last_access"] + 5) == 0
+        assert ctx.room_evictor.stats()["resident_bytes"] > 0
+        assert ctx.room_evictor.sweep(ctx, now=room["last_access"] + 11) == 1
+        assert "history" not in room
+        assert ctx.room_evictor.stats()["resident_rooms"] == 0
+
+        _, again = await sm.get_room_hydrated(ctx, sess, user_id, "r1")
+        assert again is room
+        history = again["history"]
+        # 설정은 유지되고, 최근 윈도우(max_turns)만 DB에서 복원
+        assert history.max_turns == 4 and history.max_turns_explicit
+        assert [m["content"] for m in history.get_history()] == [f"메시지 {i}" for i in range(2, 6)]
+        assert again["provider_sessions"] == {"claude": "sess-1"}
+        assert (await collect_runtime_stats(ctx))["rooms"]["rehydrated_total"] == 1
+    finally:
+        await ctx.db_handler.close()
+
+
+@pytest.mark.asyncio
+async def test_memory_cap_evicts_least_recently_used_and_skips_streaming(tmp_path):
+    ctx, user_id, sess, room = await _ctx_with_room(tmp_path)
+    try:
+        _, other = sm.get_room(ctx, sess, "r2")
+        other["history"].add_user_message("새 방")
+        ws = object()
+        ctx.websocket_to_session[ws] = user_id
+        evictor = RoomEvictor(idle_ttl_seconds=0, max_bytes=1)
+
+        ctx.active_streams[ws] = {"r1": object()}
+        evictor.sweep(ctx)
+        assert "history" in room and "history" not in other  # 스트리밍 중인 방은 제외
+
+        ctx.active_streams.clear()
+        evictor.sweep(ctx)
+        assert "history" not in room
+        assert evictor.stats()["evicted_total"] == 2
+    finally:
+        await ctx.db_handler.close()
+
+
+@pytest.mark.asyncio
+async def test_disconnect_mid_stream_keeps_room_pinned(tmp_path, monkeypatch):
+    ctx, user_id, sess, room = await _ctx_with_room(tmp_path, messages=0)
+    try:
+        gate = asyncio.Event()
+        calls = []
+
+        async def send_message(prompt, system_prompt, callback, session_id, model=None):
+            calls.append(prompt)
+            await callback({"type": "content_block_delta", "delta": {"text": "안녕"}})
+            await gate.wait()
+            return {"success": True, "message": "안녕하세요"}
+
+        class CH:
+            def get_context(self):
+                return {}
+
+            def build_system_prompt(self, history_text):
+                return "SP"
+
+        ctx.context_handler = CH()
+        ctx.claude_handler = type("H", (), {"send_message": staticmethod(send_message)})()
+        ctx.token_usage_handler = type(
+            "T",
+            (),
+            {"add_usage": lambda *a, **k: None, "get_formatted_summary": lambda *a, **k: {}},
+        )()
+        ctx.chat_dedup = ChatDedup(ttl_seconds=60)
+        monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: user_id)
+
+        class WS:
+            async def send(self, msg):
+                pass
+
+        ws = WS()
+        data = {"prompt": "hi", "room_id": "r1", "idempotency_key": "k1"}
+        task = asyncio.create_task(chat_actions.chat(ctx, ws, data))
+        for _ in range(100):
+            if calls:
+                break
+            await asyncio.sleep(0.01)
+
+        # 연결 종료 정리: 매핑은 사라지지만 키가 붙은 스트림은 계속 진행
+        assert await cancel_all_streams(ctx, ws) == 0
+        sm.remove_client_sessions(ctx, ws)
+        task.cancel()
+        evictor = RoomEvictor(idle_ttl_seconds=0, max_bytes=1)
+        assert evictor.sweep(ctx) == 0 and "history" in room
+
+        gate.set()
+        entry = ctx.chat_dedup.lookup(user_id, "k1")
+        await asyncio.wait_for(entry.task, timeout=2)
+        assert [m["role"] for m in room["history"].get_history()] == ["user", "assistant"]
+        assert evictor.sweep(ctx) == 1
+    finally:
+        await ctx.db_handler.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_access_waits_for_single_rehydration(tmp_path):
+    ctx, user_id, sess, room = await _ctx_with_room(tmp_path, messages=4)
+    try:
+        RoomEvictor.evict(room)
+        results = await asyncio.gather(
+            sm.get_room_hydrated(ctx, sess, user_id, "r1"),
+            sm.get_room_hydrated(ctx, sess, user_id, "r1"),
+        )
+        assert results[0][1]["history"] is results[1][1]["history"]
+        assert len(room["history"].get_history()) == 4
+    finally:
+        await ctx.db_handler.close()
+
+
+def test_no_eviction_without_db(tmp_path):
+    ctx = make_ctx(tmp_path)
+    _, sess = sm.get_or_create_session(ctx, object(), 1)
+    _, room = sm.get_room(ctx, sess, "r1")
+    assert RoomEvictor(idle_ttl_seconds=1).sweep(ctx, now=room["last_access"] + 5) == 0
+    assert "history" in room
+
+
+def test_room_evictor_from_env(monkeypatch):
+    monkeypatch.setenv("ROOM_IDLE_TTL_SECONDS", "0")
+    monkeypatch.setenv("ROOM_MEMORY_CAP_MB", "0")
+    assert room_evictor_from_env() is None
+    monkeypatch.setenv("ROOM_MEMORY_CAP_MB", "1")
+    assert room_evictor_from_env().max_bytes == 1024 * 1024
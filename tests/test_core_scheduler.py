@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from server.core.scheduler import FairScheduler, scheduler_from_env
+
+
+@pytest.mark.asyncio
+async def test_heavy_user_does_not_starve_light_user():
+    sched = FairScheduler(global_limit=1, per_user_limit=1)
+    admitted: list[tuple[str, asyncio.Event]] = []
+
+    async def job(user_id):
+        async with sched.admit(user_id):
+            gate = asyncio.Event()
+            admitted.append((user_id, gate))
+            await gate.wait()
+
+    tasks = [asyncio.create_task(job("heavy")) for _ in range(4)]
+    await asyncio.sleep(0)
+    tasks += [asyncio.create_task(job("light")) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert sched.running == 1 and sched.queued == 5
+
+    # 실행 중인 요청을 하나씩 끝내며 입장 순서 관찰
+    while len(admitted) < 6 or not admitted[-1][1].is_set():
+        admitted[-1][1].set()
+        await asyncio.sleep(0.01)
+    await asyncio.gather(*tasks)
+
+    # 무거운 사용자의 대기열이 길어도 가벼운 사용자가 번갈아 입장
+    order = [u for u, _ in admitted]
+    assert order == ["heavy", "light", "heavy", "light", "heavy", "heavy"]
+    stats = sched.stats()
+    assert stats["admitted_total"] == 6 and stats["running"] == 0 and stats["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_weights_and_per_user_cap():
+    sched = FairScheduler(global_limit=3, per_user_limit=2, weights={"vip": 2.0})
+    gate = asyncio.Event()
+    order: list = []
+
+    async def job(user_id):
+        async with sched.admit(user_id):
+            order.append(user_id)
+            await gate.wait()
+
+    tasks = [asyncio.create_task(job("a")) for _ in range(3)]
+    await asyncio.sleep(0)
+    # 사용자 한도(2) 때문에 전역 여유가 있어도 a의 세 번째 요청은 대기
+    assert sched.running == 2 and sched.queued == 1
+    tasks.append(asyncio.create_task(job("vip")))
+    await asyncio.sleep(0)
+    assert sched.running == 3
+    assert sched.weight_for("vip") == 2.0 and sched.weight_for("a") == 1.0
+
+    gate.set()
+    await asyncio.gather(*tasks)
+    assert order.count("a") == 3 and order.count("vip") == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_is_removed():
+    sched = FairScheduler(global_limit=1, per_user_limit=1)
+    first = await sched.acquire("u1")
+    waiter = asyncio.create_task(sched.acquire("u2"))
+    await asyncio.sleep(0)
+    assert sched.queued == 1
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert sched.queued == 0
+
+    sched.release(first)
+    ticket = await asyncio.wait_for(sched.acquire("u3"), timeout=1)
+    assert ticket.wait_ms == 0.0
+    sched.release(ticket)
+    assert sched.running == 0
+
+
+@pytest.mark.asyncio
+async def test_wait_time_is_reported():
+    sched = FairScheduler(global_limit=1, per_user_limit=1)
+    first = await sched.acquire("u1")
+    waiter = asyncio.create_task(sched.acquire("u2"))
+    await asyncio.sleep(0.02)
+    sched.release(first)
+    ticket = await waiter
+    assert ticket.wait_ms >= 10
+    assert sched.stats()["max_wait_ms"] >= 10
+    sched.release(ticket)
+
+
+def test_scheduler_from_env(monkeypatch):
+    monkeypatch.setenv("SCHED_GLOBAL_CONCURRENCY", "4")
+    monkeypatch.setenv("SCHED_PER_USER_CONCURRENCY", "1")
+    monkeypatch.setenv("SCHED_USER_WEIGHTS", "7:3, bad, 9:x")
+    sched = scheduler_from_env()
+    assert sched.global_limit == 4 and sched.per_user_limit == 1
+    assert sched.weight_for(7) == 3.0 and sched.weight_for(9) == 1.0
+
+    monkeypatch.setenv("SCHED_GLOBAL_CONCURRENCY", "0")
+    assert scheduler_from_env() is None
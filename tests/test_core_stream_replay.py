@@ -0,0 +1,18 @@
+import json
+
+from server.core.stream_replay import ReplayBuffer
+
+
+def test_replay_buffer_tags_frames_and_detects_gaps():
+    buf = ReplayBuffer(max_frames=2)
+    frames = [buf.append(json.dumps({"action": "chat_stream", "data": {"i": i}})) for i in range(3)]
+    assert [json.loads(f)["seq"] for f in frames] == [1, 2, 3]
+    assert json.loads(frames[0])["data"] == {"i": 0}
+
+    assert [seq for seq, _ in buf.since(1)] == [2, 3]
+    assert buf.since(3) == []
+    assert buf.since(0) is None  # seq 1은 밀려나 이어 줄 수 없음
+
+    buf.release(keep_last=1)
+    assert len(buf) == 1 and buf.first_seq == 3
+    assert buf.since(1) is None and [s for s, _ in buf.since(2)] == [3]
@@ -0,0 +1,197 @@
+import asyncio
+import json
+
+import pytest
+
+from server.core import session_manager as sm
+from server.core.app_context import AppContext
+from server.core.streams import StreamHandle, attach_process
+from server.handlers.droid_handler import DroidHandler
+from server.ws.actions import cancel as cancel_actions
+from server.ws.actions import chat as chat_actions
+
+
+class _BlockingProcess:
+    """종료될 때까지 stdout이 아무것도 내보내지 않는 프로세스 (첫 토큰 대기 흉내)"""
+
+    def __init__(self):
+        self.returncode = None
+        self.signals: list[str] = []
+        self._exited = asyncio.Event()
+        proc = self
+
+        class _Stdin:
+            def write(self, b):
+                pass
+
+            async def drain(self):
+                return None
+
+            def close(self):
+                pass
+
+        class _Reader:
+            async def readline(self):
+                await proc._exited.wait()
+                return b""
+
+        self.stdin = _Stdin()
+        self.stdout = _Reader()
+        self.stderr = _Reader()
+
+    def terminate(self):
+        self.signals.append("TERM")
+        self.returncode = -15
+        self._exited.set()
+
+    def kill(self):
+        self.signals.append("KILL")
+        self.returncode = -9
+        self._exited.set()
+
+    async def wait(self):
+        await self._exited.wait()
+        return self.returncode
+
+
+@pytest.mark.asyncio
+async def test_cancel_kills_process_during_droid_first_token_wait(monkeypatch):
+    spawned: list[_BlockingProcess] = []
+
+    async def fake_exec(*args, **kwargs):
+        p = _BlockingProcess()
+        spawned.append(p)
+        return p
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+    monkeypatch.setenv("DROID_FALLBACK_MODELS", "fb-1,fb-2")
+    handler = DroidHandler(droid_path="droid")
+    handle = StreamHandle(room_id="r1")
+
+    task = asyncio.create_task(handle.run(handler.send_message("hi")))
+    await asyncio.sleep(0.01)
+    assert handler.pool.in_use == 1 and len(handle.processes) == 1
+
+    killed = await handle.cancel()
+    result = await asyncio.wait_for(task, timeout=1)
+
+    assert killed == 1
+    assert result is None
+    assert spawned[0].signals == ["TERM"]
+    # 슬롯 반환, 폴백 모델로 다시 띄우지 않음
+    assert handler.pool.in_use == 0
+    assert len(spawned) == 1
+
+
+@pytest.mark.asyncio
+async def test_attach_after_cancel_terminates_immediately():
+    handle = StreamHandle(kill_grace_seconds=0.01)
+    await handle.cancel()
+    proc = _BlockingProcess()
+
+    async def late_spawn():
+        attach_process(proc)
+
+    await handle.run(late_spawn())
+    await asyncio.sleep(0)
+    assert proc.signals == ["TERM"]
+
+
+def test_observe_tracks_partial_text_and_usage():
+    handle = StreamHandle()
+    handle.observe({"type": "content_block_delta", "delta": {"text": "안녕"}})
+    handle.observe({"type": "content_block_delta", "delta": {"text": "하세요"}})
+    assert handle.partial_text == "안녕하세요"
+
+    handle.observe(
+        {
+            "type": "assistant",
+            "message": {
+                "content": [{"type": "text", "text": "전체 텍스트"}],
+                "usage": {"input_tokens": 10, "cache_read_input_tokens": 5, "output_tokens": 3},
+            },
+        }
+    )
+    assert handle.partial_text == "전체 텍스트"
+    info = handle.partial_token_info()
+    assert info["total_tokens"] == 18 and info["partial"] is True
+    assert StreamHandle().partial_token_info() is None
+
+
+@pytest.mark.asyncio
+async def test_cancel_stream_action_records_partial_output(tmp_path, monkeypatch):
+    ctx = AppContext(
+        project_root=tmp_path,
+        bind_host="127.0.0.1",
+        login_required=False,
+        jwt_secret="s",
+        jwt_algorithm="HS256",
+        access_ttl_seconds=60,
+        refresh_ttl_seconds=120,
+        login_username="",
+        login_rate_limit_max_attempts=5,
+        login_rate_limit_window_seconds=900,
+        token_expired_grace_seconds=60,
+    )
+
+    class CH:
+        def get_context(self):
+            return {}
+
+        def build_system_prompt(self, history_text):
+            return "SP"
+
+    usage_calls = []
+    ctx.context_handler = CH()
+    ctx.token_usage_handler = type(
+        "T",
+        (),
+        {
+            "add_usage": lambda *a, **k: usage_calls.append(k),
+            "get_formatted_summary": lambda *a, **k: {},
+        },
+    )()
+    proc = _BlockingProcess()
+
+    async def fake_send_message(prompt, system_prompt, callback, session_id, model=None):
+        attach_process(proc)
+        await callback(
+            {
+                "type": "assistant",
+                "message": {
+                    "content": [{"type": "text", "text": "부분"}],
+                    "usage": {"input_tokens": 7, "output_tokens": 1},
+                },
+            }
+        )
+        await proc.wait()
+        return {"success": True, "message": "부분", "token_info": None}
+
+    ctx.claude_handler = type("CL", (), {"send_message": staticmethod(fake_send_message)})()
+
+    class FakeWS:
+        def __init__(self):
+            self.sent = []
+
+        async def send(self, msg):
+            self.sent.append(json.loads(msg))
+
+    ws = FakeWS()
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: 1)
+
+    chat_task = asyncio.create_task(chat_actions.chat(ctx, ws, {"prompt": "p"}))
+    await asyncio.sleep(0.01)
+    await cancel_actions.cancel_stream(ctx, ws, {})
+    await asyncio.wait_for(chat_task, timeout=1)
+
+    ack = [m for m in ws.sent if m["action"] == "cancel_stream"][0]["data"]
+    assert ack["cancelled"] == 1 and ack["killed"] == 1
+    done = [m for m in ws.sent if m["action"] == "chat_complete"][-1]["data"]
+    assert done["cancelled"] is True and done["partial_message"] == "부분"
+    assert done["token_info"]["total_tokens"] == 8
+    assert usage_calls and usage_calls[0]["token_info"]["partial"] is True
+    assert ctx.active_streams == {}
+    # 부분 응답이 히스토리에 남음
+    _, sess = sm.get_or_create_session(ctx, ws, 1)
+    _, room = sm.get_room(ctx, sess, None)
+    assert "부분" in room["history"].get_history_text()
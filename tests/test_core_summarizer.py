@@ -0,0 +1,173 @@
+import json
+
+import pytest
+
+from server.core import session_manager as sm
+from server.core.app_context import AppContext
+from server.core.metrics import collect_runtime_stats
+from server.core.summarizer import Summarizer, summarizer_from_env
+from server.handlers.db_handler import DBHandler
+from server.handlers.history_handler import HistoryHandler
+from server.ws.actions import chat as chat_actions
+
+
+class FakeWS:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, msg):
+        self.sent.append(msg)
+
+
+def make_ctx(tmp_path):
+    ctx = AppContext(
+        project_root=tmp_path,
+        bind_host="127.0.0.1",
+        login_required=False,
+        jwt_secret="s",
+        jwt_algorithm="HS256",
+        access_ttl_seconds=60,
+        refresh_ttl_seconds=120,
+        login_username="",
+        login_rate_limit_max_attempts=5,
+        login_rate_limit_window_seconds=900,
+        token_expired_grace_seconds=60,
+    )
+
+    class CH:
+        def get_context(self):
+            return {}
+
+        def build_system_prompt(self, history_text):
+            return f"SP:{history_text}"
+
+    ctx.context_handler = CH()
+    ctx.token_usage_handler = type(
+        "T", (), {"add_usage": lambda *a, **k: None, "get_formatted_summary": lambda *a, **k: {}}
+    )()
+    return ctx
+
+
+async def _db_with_room(tmp_path, messages):
+    db = DBHandler(str(tmp_path / "chat.db"))
+    await db.initialize()
+    user_id = await db.create_user("u1", "u1@example.com", "h")
+    await db.upsert_room("r1", user_id, "r1", None)
+    history = HistoryHandler(max_turns=4)
+    for i in range(messages):
+        role = "user" if i % 2 == 0 else "assistant"
+        content = f"메시지 {i}번. 덧붙인 문장"
+        await db.save_message("r1", role, content, user_id)
+        if role == "user":
+            history.add_user_message(content)
+        else:
+            history.add_assistant_message(content)
+    history.get_history_text()
+    return db, user_id, history
+
+
+def test_extractive_fold_keeps_first_sentence_and_clips_oldest():
+    s = Summarizer(max_tokens=22, line_chars=20)
+    summary = s.fold_extractive("", [{"role": "user", "content": "용을 만났다. 그리고 도망쳤다."}])
+    assert summary == "- 사용자: 용을 만났다."
+    long = [{"role": "assistant", "content": "가" * 50}]
+    summary = s.fold_extractive(summary, long)
+    assert summary.endswith("…") and "용을" not in summary  # 예산 초과 → 오래된 줄 제거
+
+
+@pytest.mark.asyncio
+async def test_update_room_folds_only_new_evicted_messages(tmp_path):
+    db, user_id, history = await _db_with_room(tmp_path, 10)
+    ctx = make_ctx(tmp_path)
+    ctx.db_handler = db
+    s = Summarizer(min_batch=4)
+
+    assert await s.update_room(ctx, user_id, "r1", history) == 6
+    row = await db.get_room_summary("r1", user_id)
+    assert row["summarized_upto_id"] == 6 and row["summary"].count("\n") == 5
+    text = history.get_history_text()
+    assert text.startswith("=== 지난 이야기 요약 ===\n- 사용자: 메시지 0번.")
+    assert "AI: 메시지 9번. 덧붙인 문장" in text
+
+    # 새로 밀려난 메시지가 min_batch 미만이면 다음 턴으로 미룸
+    for i in (10, 11):
+        await db.save_message("r1", "user", f"메시지 {i}번.", user_id)
+    assert await s.update_room(ctx, user_id, "r1", history) == 0
+    for i in (12, 13):
+        await db.save_message("r1", "user", f"메시지 {i}번.", user_id)
+    assert await s.update_room(ctx, user_id, "r1", history) == 4
+    row = await db.get_room_summary("r1", user_id)
+    assert row["summarized_upto_id"] == 10 and "메시지 9번." in row["summary"]
+    assert s.stats()["folds_total"] == 2
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_provider_fold_is_incremental_and_falls_back(tmp_path):
+    db, user_id, history = await _db_with_room(tmp_path, 8)
+    ctx = make_ctx(tmp_path)
+    ctx.db_handler = db
+    prompts = []
+
+    async def send_message(prompt, system_prompt, callback, session_id, model=None):
+        prompts.append(prompt)
+        if len(prompts) > 1:
+            return {"success": False, "error": "429"}
+        return {"success": True, "message": "- 용과의 약속"}
+
+    ctx.claude_handler = type("CH", (), {"send_message": staticmethod(send_message)})()
+    s = Summarizer(mode="claude", min_batch=2)
+
+    await s.update_room(ctx, user_id, "r1", history)
+    assert history.summary == "- 용과의 약속"
+    assert "메시지 3번" in prompts[0] and "메시지 4번" not in prompts[0]
+
+    for i in (8, 9):
+        await db.save_message("r1", "user", f"메시지 {i}번.", user_id)
+    await s.update_room(ctx, user_id, "r1", history)
+    assert "[기존 요약]\n- 용과의 약속" in prompts[1] and "메시지 3번" not in prompts[1]
+    assert history.summary == "- 용과의 약속\n- 사용자: 메시지 4번.\n- AI: 메시지 5번."
+    assert s.provider_fallbacks_total == 1
+    await db.close()
+
+
+@pytest.mark.asyncio
+async def test_chat_schedules_summary_and_next_prompt_includes_it(tmp_path, monkeypatch):
+    ctx = make_ctx(tmp_path)
+    db = DBHandler(str(tmp_path / "chat.db"))
+    await db.initialize()
+    user_id = await db.create_user("u1", "u1@example.com", "h")
+    ctx.db_handler = db
+    ctx.summarizer = Summarizer(min_batch=2)
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: user_id)
+    system_prompts = []
+
+    async def send_message(prompt, system_prompt, callback, session_id, model=None):
+        system_prompts.append(system_prompt)
+        return {"success": True, "message": f"답변: {prompt}", "token_info": None}
+
+    ctx.claude_handler = type("CH", (), {"send_message": staticmethod(send_message)})()
+    ws = FakeWS()
+    _, sess = sm.get_or_create_session(ctx, ws, user_id)
+    _, room = sm.get_room(ctx, sess, "r1")
+    room["history"].set_max_turns(2)
+
+    for i in range(4):
+        await chat_actions.chat(ctx, ws, {"prompt": f"질문{i}", "room_id": "r1"})
+        await ctx.summarizer.drain()
+
+    assert "=== 지난 이야기 요약 ===\n- 사용자: 질문0" in system_prompts[-1]
+    done = json.loads(ws.sent[-1])["data"]
+    assert done["history_tokens_est"] > room["history"].last_window_tokens
+    stats = await collect_runtime_stats(ctx)
+    assert stats["summary"]["messages_folded_total"] >= 4
+    await db.close()
+
+
+def test_summarizer_from_env(monkeypatch):
+    monkeypatch.setenv("SUMMARY_MODE", "off")
+    assert summarizer_from_env() is None
+    monkeypatch.setenv("SUMMARY_MODE", "gemini")
+    monkeypatch.setenv("SUMMARY_MIN_BATCH", "6")
+    s = summarizer_from_env()
+    assert s.mode == "gemini" and s.min_batch == 6
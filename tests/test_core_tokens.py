@@ -0,0 +1,24 @@
+from server.core.tokens import estimate_message_tokens, estimate_tokens, history_token_budget
+
+
+def test_estimate_tokens_korean_latin_and_symbols():
+    assert estimate_tokens("") == 0 and estimate_tokens(None) == 0
+    assert estimate_tokens("안녕하세요") == 5  # 5음절 × 0.9 → 올림
+    assert estimate_tokens("hello world") == 4  # 5자/4 → 2, 두 단어
+    assert estimate_tokens("[하나]: 응!") == 5  # 한글 3 × 0.9 + 기호 4 × 0.5 → 4.7 올림
+    # 긴 한국어 서사는 글자 수보다 약간 적게 추정
+    narration = "비가 그친 골목에 가로등이 하나둘 켜진다. " * 50
+    assert 0.6 * len(narration) < estimate_tokens(narration) < len(narration)
+    assert estimate_message_tokens("안녕") == estimate_tokens("안녕") + 3
+
+
+def test_history_token_budget_resolution(monkeypatch):
+    monkeypatch.delenv("HISTORY_TOKEN_BUDGET", raising=False)
+    monkeypatch.delenv("HISTORY_TOKEN_BUDGETS", raising=False)
+    assert history_token_budget("claude") is None
+    monkeypatch.setenv("HISTORY_TOKEN_BUDGET", "8000")
+    monkeypatch.setenv("HISTORY_TOKEN_BUDGETS", "droid=3000, gemini:gemini-2.5-pro=30000,bad")
+    assert history_token_budget("claude", "sonnet") == 8000
+    assert history_token_budget("droid") == 3000
+    assert history_token_budget("gemini", "gemini-2.5-pro") == 30000
+    assert history_token_budget("gemini", "flash") == 8000
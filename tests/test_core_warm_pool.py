@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from server.core.warm_pool import WarmProcessPool, warm_pool_from_env
+
+
+class _P:
+    def __init__(self, args):
+        self.args = args
+        self.returncode = None
+
+    def kill(self):
+        self.returncode = -9
+
+    async def wait(self):
+        return self.returncode
+
+
+@pytest.fixture
+def spawned(monkeypatch):
+    created: list[_P] = []
+
+    async def fake_exec(*args, **kwargs):
+        p = _P(list(args))
+        created.append(p)
+        return p
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+    return created
+
+
+@pytest.mark.asyncio
+async def test_disabled_pool_spawns_directly(spawned):
+    pool = WarmProcessPool("t", size=0)
+    p = await pool.acquire(["cli", "--model", "m"], "/tmp")
+    assert p is spawned[0]
+    await asyncio.sleep(0)
+    assert len(spawned) == 1
+    assert pool.stats()["hits"] == 0 and pool.stats()["misses"] == 0
+
+
+@pytest.mark.asyncio
+async def test_miss_then_hit_after_refill(spawned):
+    pool = WarmProcessPool("t", size=1)
+    args = ["cli", "--model", "m"]
+    first = await pool.acquire(args, "/tmp", label="m")
+    await asyncio.sleep(0.01)  # 백그라운드 예열
+    assert pool.stats()["idle"] == 1
+
+    second = await pool.acquire(args, "/tmp", label="m")
+    assert second is not first
+    assert second is spawned[1]  # 예열해 둔 프로세스를 넘겨받음
+    stats = pool.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["keys"][0]["label"] == "m"
+    await pool.close()
+    assert pool.stats()["idle"] == 0
+
+
+@pytest.mark.asyncio
+async def test_non_reusable_requests_bypass_pool(spawned):
+    pool = WarmProcessPool("t", size=2)
+    await pool.acquire(["cli", "--resume", "S1"], "/tmp", reusable=False)
+    await asyncio.sleep(0.01)
+    assert len(spawned) == 1
+    assert pool.stats()["bypassed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_and_dead_spares_are_discarded(spawned):
+    pool = WarmProcessPool("t", size=1, max_idle_seconds=0.0)
+    args = ["cli"]
+    await pool.acquire(args, "/tmp")
+    await asyncio.sleep(0.01)
+    spare = spawned[1]
+    await asyncio.sleep(0.01)
+    got = await pool.acquire(args, "/tmp")
+    assert got is not spare
+    assert spare.returncode == -9
+    assert pool.stats()["expired"] == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_key_lru_bound(spawned):
+    pool = WarmProcessPool("t", size=1, max_keys=1)
+    await pool.acquire(["cli", "a"], "/tmp")
+    await asyncio.sleep(0.01)
+    await pool.acquire(["cli", "b"], "/tmp")
+    await asyncio.sleep(0.01)
+    assert len(pool.stats()["keys"]) == 1
+    # 밀려난 키의 예열본은 정리됨
+    assert spawned[1].returncode == -9
+    await pool.close()
+
+
+def test_warm_pool_from_env(monkeypatch):
+    monkeypatch.setenv("CLI_WARM_POOL_SIZE", "2")
+    monkeypatch.setenv("DROID_WARM_POOL_SIZE", "3")
+    assert warm_pool_from_env("gemini").size == 2
+    assert warm_pool_from_env("droid").size == 3
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from server.core import wire
+from server.core.stream_replay import ReplayBuffer
+
+
+class FakeWS:
+    def __init__(self):
+        self.sent = []
+        self.remote_address = ("127.0.0.1", 1)
+
+    async def send(self, msg):
+        self.sent.append(msg)
+
+
+def test_dumps_is_compact_utf8():
+    obj = {"action": "chat_stream", "data": {"text": "안녕하세요"}}
+    frame = wire.dumps(obj)
+    assert frame == '{"action":"chat_stream","data":{"text":"안녕하세요"}}'
+    assert len(frame.encode()) < len(json.dumps(obj).encode())
+    assert json.loads(frame) == obj
+    assert frame.startswith(wire.frame_prefix("chat_stream"))
+
+
+@pytest.mark.asyncio
+async def test_wire_socket_counts_bytes_and_rejects_unknown_codec():
+    stats = wire.WireStats()
+    raw = FakeWS()
+    ws = wire.WireSocket(raw, stats)
+    assert ws.remote_address == ("127.0.0.1", 1)  # 나머지 속성은 원래 소켓에 위임
+
+    frame = wire.dumps({"action": "x", "data": {"text": "가"}})
+    await ws.send(frame)
+    await ws.drain()
+    assert raw.sent == [frame]
+    size = len(frame.encode())
+    assert stats.snapshot()["codecs"]["json"] == {
+        "frames": 1,
+        "bytes": size,
+        "bytes_per_frame": size,
+    }
+    assert ws.set_codec("bogus") is False and ws.codec == "json"
+
+
+@pytest.mark.asyncio
+async def test_wire_socket_transcodes_to_msgpack():
+    msgpack = pytest.importorskip("msgpack")
+    raw = FakeWS()
+    ws = wire.WireSocket(raw, wire.WireStats())
+    assert ws.set_codec("msgpack")
+    obj = {"seq": 3, "action": "chat_stream", "data": {"text": "안녕"}}
+    await ws.send(wire.dumps(obj))
+    await ws.drain()
+    assert msgpack.unpackb(raw.sent[-1], raw=False) == obj
+
+
+@pytest.mark.asyncio
+async def test_msgpack_encodes_source_object_without_json_round_trip(monkeypatch):
+    packed = []
+
+    class FakeMsgpack:
+        @staticmethod
+        def packb(obj, use_bin_type=True):
+            packed.append(obj)
+            return b"packed"
+
+    def no_loads(*args, **kwargs):
+        raise AssertionError("json.loads should not run for dumps() frames")
+
+    monkeypatch.setattr(wire, "msgpack", FakeMsgpack)
+    raw = FakeWS()
+    ws = wire.WireSocket(raw, wire.WireStats())
+    assert ws.set_codec("msgpack")
+
+    obj = {"action": "chat_stream", "data": {"text": "안녕"}}
+    tagged = ReplayBuffer().append(wire.dumps(obj))
+    monkeypatch.setattr(wire.json, "loads", no_loads)
+    await ws.send(tagged)
+    await ws.drain()
+    assert packed == [{"seq": 1, **obj}] and raw.sent == [b"packed"]
@@ -0,0 +1,115 @@
+import asyncio
+import json
+
+import pytest
+
+from server.core import wire
+from server.ws.stream_coalescer import StreamCoalescer, StreamStats
+
+
+class SlowWS:
+    """gate가 열릴 때까지 send가 막히는 소켓 (느린 모바일 클라이언트 흉내)"""
+
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+        self.closed = None
+
+    async def send(self, msg):
+        await self.gate.wait()
+        self.sent.append(msg)
+
+    async def close(self, code=1000, reason=""):
+        self.closed = (code, reason)
+
+
+def frame(text):
+    return wire.dumps({"action": "chat_stream", "data": {"type": "text_delta", "text": text}})
+
+
+@pytest.mark.asyncio
+async def test_send_does_not_block_on_slow_client():
+    stats = wire.WireStats()
+    raw = SlowWS()
+    ws = wire.WireSocket(raw, stats, budget_bytes=100, max_bytes=0, slow_seconds=0)
+
+    # 소켓이 막혀 있어도 send는 바로 반환 (큐에 쌓임)
+    for i in range(10):
+        await asyncio.wait_for(ws.send(frame(f"청크{i}")), timeout=0.5)
+    assert raw.sent == [] and len(ws) == 10
+    assert ws.congested
+    queues = stats.snapshot()["queues"]
+    assert queues["connections"] == 1 and queues["congested"] == 1
+    assert queues["queued_bytes_total"] == ws.queued_bytes > 100
+
+    raw.gate.set()
+    await ws.drain()
+    assert [json.loads(f)["data"]["text"] for f in raw.sent] == [f"청크{i}" for i in range(10)]
+    assert not ws.congested and ws.queued_bytes == 0
+
+    await ws.aclose()
+    assert stats.snapshot()["queues"]["connections"] == 0
+    with pytest.raises(ConnectionError):
+        await ws.send(frame("x"))
+
+
+@pytest.mark.asyncio
+async def test_hopeless_client_is_disconnected():
+    stats = wire.WireStats()
+    raw = SlowWS()
+    ws = wire.WireSocket(raw, stats, budget_bytes=50, max_bytes=200, slow_seconds=0)
+
+    with pytest.raises(wire.SlowClientError):
+        for _ in range(50):
+            await ws.send(frame("가" * 10))
+    await asyncio.sleep(0)  # 닫기는 백그라운드로 진행
+    assert raw.closed == (1013, "slow client")
+    assert stats.snapshot()["slow_disconnects"] == 1
+    assert ws.queued_bytes == 0
+    with pytest.raises(wire.SlowClientError):
+        await ws.send(frame("after"))
+
+
+@pytest.mark.asyncio
+async def test_stalled_client_is_disconnected_without_further_sends():
+    stats = wire.WireStats()
+    raw = SlowWS()
+    ws = wire.WireSocket(raw, stats, budget_bytes=1000, max_bytes=0, slow_seconds=0.05)
+
+    await ws.send(frame("마지막"))
+    # 이후 송신이 없어도 writer가 대기 한도에서 끊음
+    await asyncio.wait_for(ws.drain(), timeout=1)
+    await asyncio.sleep(0)
+    assert raw.closed == (1013, "slow client") and raw.sent == []
+    assert stats.snapshot()["slow_disconnects"] == 1
+    with pytest.raises(wire.SlowClientError):
+        await ws.send(frame("x"))
+
+
+@pytest.mark.asyncio
+async def test_coalescer_defers_flush_while_congested():
+    congested = True
+    sent = []
+
+    async def send(f):
+        sent.append(json.loads(f)["data"]["text"])
+
+    stats = StreamStats()
+    out = StreamCoalescer(
+        send,
+        stats=stats,
+        window_ms=5,
+        max_bytes=4,
+        congested=lambda: congested,
+        congested_max_ms=10_000,
+    )
+    for text in ["ab", "cd", "ef", "gh"]:
+        await out.push({"type": "text_delta", "text": text})
+    await asyncio.sleep(0.03)
+    # 혼잡 중에는 크기/시간 창 flush를 모두 미루고 계속 병합
+    assert sent == [] and stats.deferred > 0
+
+    congested = False
+    await asyncio.sleep(0.03)
+    assert sent == ["abcdefgh"]
+    await out.close()
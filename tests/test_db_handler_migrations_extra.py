@@ -77,3 +77,25 @@ async def test_maybe_backup_legacy_db_creates_backup(tmp_path):
     # find backup files
     backups = list(tmp_path.glob("*.legacy-*.bak"))
     assert backups, "expected a legacy backup file to be created"
+
+
+@pytest.mark.asyncio
+async def test_migrate_v6_to_v7_adds_room_summaries(tmp_path):
+    db_path = str(tmp_path / "migrate_v7.db")
+    db = DBHandler(db_path)
+    await db.initialize()
+    await db._conn.execute("DROP TABLE room_summaries")
+    await db._conn.execute("PRAGMA user_version = 6")
+    await db._conn.commit()
+    await db.close()
+
+    db = DBHandler(db_path)
+    await db.initialize()
+    cur = await db._conn.execute("PRAGMA user_version")
+    assert (await cur.fetchone())[0] == 7
+    user_id = await db.create_user("u", "u@example.com", "h")
+    await db.upsert_room("r", user_id, "r", None)
+    await db.save_room_summary("r", user_id, "- 요약", 3)
+    row = await db.get_room_summary("r", user_id)
+    assert row["summary"] == "- 요약" and row["summarized_upto_id"] == 3
+    await db.close()
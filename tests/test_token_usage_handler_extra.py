@@ -34,3 +34,21 @@ def test_add_and_get_and_clear_usage():
     tuh.add_usage("s1", "r2", "droid", make_token_info(1, 1))
     tuh.clear_usage("s1")
     assert tuh.get_usage("s1", "r2") == {}
+
+
+def test_cache_hit_ratio_per_room_skips_untracked_turns():
+    tuh = TokenUsageHandler()
+    tuh.add_usage("s1", "r1", "claude", make_token_info(10, 5, cr=0, cc=90))
+    tuh.add_usage("s1", "r1", "claude", make_token_info(10, 5, cr=90, cc=0))
+    # 세션 모드 델타: 캐시 내역을 모르므로 적중률 계산에서 제외
+    tuh.add_usage("s1", "r1", "claude", {**make_token_info(500, 0), "cache_tracked": False})
+
+    claude = tuh.get_formatted_summary("s1", "r1")["providers"]["claude"]
+    assert claude["cache_hit_ratio"] == 0.45
+    assert claude["last_cache_hit_ratio"] == 0.9
+
+    tuh.add_usage("s1", "r2", "claude", make_token_info(100, 1))
+    stats = tuh.cache_stats()
+    assert stats["rooms"]["s1:r1:claude"]["cache_hit_ratio"] == 0.45
+    assert stats["rooms"]["s1:r2:claude"]["cache_hit_ratio"] == 0.0
+    assert stats["cache_hit_ratio"] == round(90 / 300, 4)
@@ -0,0 +1,193 @@
+import asyncio
+import json
+
+import pytest
+
+from server.core import session_manager as sm
+from server.core.app_context import AppContext
+from server.core.idempotency import ChatDedup
+from server.ws.actions import chat as chat_actions
+from server.ws.actions.cancel import cancel_all_streams
+
+
+class FakeWS:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, msg):
+        self.sent.append(msg)
+
+    def frames(self, action):
+        return [json.loads(m)["data"] for m in self.sent if json.loads(m)["action"] == action]
+
+
+class GatedHandler:
+    """gate가 열릴 때까지 응답을 미루는 가짜 프로바이더 (호출 수 기록)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.gate = asyncio.Event()
+
+    async def send_message(self, prompt, system_prompt, callback, session_id, model=None):
+        self.calls += 1
+        await callback({"type": "content_block_delta", "delta": {"text": "안녕"}})
+        await self.gate.wait()
+        return {"success": True, "message": "안녕하세요"}
+
+
+def make_ctx(tmp_path, handler):
+    ctx = AppContext(
+        project_root=tmp_path,
+        bind_host="127.0.0.1",
+        login_required=False,
+        jwt_secret="s",
+        jwt_algorithm="HS256",
+        access_ttl_seconds=60,
+        refresh_ttl_seconds=120,
+        login_username="",
+        login_rate_limit_max_attempts=5,
+        login_rate_limit_window_seconds=900,
+        token_expired_grace_seconds=60,
+    )
+
+    class CH:
+        def get_context(self):
+            return {}
+
+        def build_system_prompt(self, history_text):
+            return "SP"
+
+    ctx.context_handler = CH()
+    ctx.claude_handler = handler
+    ctx.token_usage_handler = type(
+        "T", (), {"add_usage": lambda *a, **k: None, "get_formatted_summary": lambda *a, **k: {}}
+    )()
+    ctx.chat_dedup = ChatDedup(ttl_seconds=60)
+    return ctx
+
+
+async def _wait_for(pred):
+    for _ in range(100):
+        if pred():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("timeout")
+
+
+@pytest.mark.asyncio
+async def test_duplicate_key_attaches_to_running_stream(tmp_path, monkeypatch):
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: 7)
+    handler = GatedHandler()
+    ctx = make_ctx(tmp_path, handler)
+    data = {"prompt": "hi", "room_id": "r1", "idempotency_key": "k1"}
+    first, second = FakeWS(), FakeWS()
+
+    task = asyncio.create_task(chat_actions.chat(ctx, first, data))
+    await _wait_for(lambda: handler.calls == 1)
+    # 연결 종료 정리에서도 키가 붙은 스트림은 취소하지 않음
+    assert await cancel_all_streams(ctx, first) == 0
+    task.cancel()
+
+    await chat_actions.chat(ctx, second, data)
+    resume = second.frames("chat_resume")[-1]
+    assert resume["partial_message"] == "안녕" and resume["room_id"] == "r1"
+
+    handler.gate.set()
+    await _wait_for(lambda: second.frames("chat_complete"))
+    assert second.frames("chat_complete")[-1]["message"] == "안녕하세요"
+    assert handler.calls == 1
+
+    _, sess = sm.get_or_create_session(ctx, second, 7)
+    _, room = sm.get_room(ctx, sess, "r1")
+    assert [m["role"] for m in room["history"].get_history()] == ["user", "assistant"]
+    assert ctx.active_streams == {}
+    assert ctx.chat_dedup.stats()["dedup_attached_total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_duplicate_key_after_completion_replays_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: 7)
+    handler = GatedHandler()
+    handler.gate.set()
+    ctx = make_ctx(tmp_path, handler)
+    data = {"prompt": "hi", "room_id": "r1", "idempotency_key": "k2"}
+
+    ws = FakeWS()
+    await chat_actions.chat(ctx, ws, data)
+    await chat_actions.chat(ctx, ws, data)
+    done = ws.frames("chat_complete")
+    assert len(done) == 2 and done[1]["deduplicated"] is True
+    assert done[1]["message"] == done[0]["message"]
+    assert handler.calls == 1
+
+    # 다른 키는 새로 실행
+    await chat_actions.chat(ctx, ws, {**data, "idempotency_key": "k3"})
+    assert handler.calls == 2
+    assert ctx.chat_dedup.stats()["dedup_replayed_total"] == 1
+
+
+class DroppingWS(FakeWS):
+    """closed가 되면 전송이 실패하는 연결 (모바일 끊김 흉내)"""
+
+    def __init__(self):
+        super().__init__()
+        self.closed = False
+
+    async def send(self, msg):
+        if self.closed:
+            raise ConnectionError("closed")
+        await super().send(msg)
+
+
+class TwoChunkHandler:
+    def __init__(self):
+        self.calls = 0
+        self.gates = [asyncio.Event(), asyncio.Event()]
+
+    async def send_message(self, prompt, system_prompt, callback, session_id, model=None):
+        self.calls += 1
+        await callback({"type": "content_block_delta", "delta": {"text": "하나 "}})
+        await self.gates[0].wait()
+        await callback({"type": "content_block_delta", "delta": {"text": "둘"}})
+        await self.gates[1].wait()
+        return {"success": True, "message": "하나 둘"}
+
+
+@pytest.mark.asyncio
+async def test_resume_stream_replays_missed_frames_then_live_tail(tmp_path, monkeypatch):
+    monkeypatch.setenv("STREAM_FLUSH_MS", "0")
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: 7)
+    handler = TwoChunkHandler()
+    ctx = make_ctx(tmp_path, handler)
+    first, second = DroppingWS(), DroppingWS()
+
+    data = {"prompt": "hi", "room_id": "r1", "idempotency_key": "k4"}
+    task = asyncio.create_task(chat_actions.chat(ctx, first, data))
+    await _wait_for(lambda: first.frames("chat_stream"))
+    last_seq = json.loads(first.sent[-1])["seq"]
+
+    # 끊긴 동안 생성된 프레임은 버퍼에만 쌓임
+    first.closed = True
+    task.cancel()
+    handler.gates[0].set()
+    await _wait_for(lambda: ctx.chat_dedup.lookup(7, "k4").replay.last_seq > last_seq)
+
+    await chat_actions.resume_stream(ctx, second, {"idempotency_key": "k4", "last_seq": last_seq})
+    replayed = [json.loads(m) for m in second.sent]
+    assert [f["data"]["text"] for f in replayed] == ["둘"]
+    assert replayed[0]["seq"] == last_seq + 1
+
+    handler.gates[1].set()
+    await _wait_for(lambda: second.frames("chat_complete"))
+    assert second.frames("chat_complete")[-1]["message"] == "하나 둘"
+    assert handler.calls == 1
+    assert ctx.chat_dedup.stats()["replayed_frames_total"] == 1
+
+    # 완료 후 처음부터 이어 받으면 스냅샷 + 완료 프레임
+    third = FakeWS()
+    await chat_actions.resume_stream(ctx, third, {"idempotency_key": "k4", "last_seq": 0})
+    assert third.frames("chat_resume")[-1]["partial_message"] == "하나 둘"
+    assert third.frames("chat_complete")[-1]["message"] == "하나 둘"
+
+    await chat_actions.resume_stream(ctx, third, {"idempotency_key": "nope", "last_seq": 0})
+    assert third.frames("resume_stream")[-1]["success"] is False
@@ -111,3 +111,81 @@ async def test_gemini_receives_history_text_when_no_provider_session(tmp_path, m
     last = json.loads(ws.sent[-1])
     assert last["action"] == "chat_complete"
     assert last["data"]["provider_used"] == "gemini"
+
+
+@pytest.mark.asyncio
+async def test_chat_reports_scheduler_queue_wait(tmp_path, monkeypatch):
+    """스케줄러를 거친 요청은 chat_complete에 queue_wait_ms를 포함"""
+    import asyncio
+
+    from server.core.scheduler import FairScheduler
+
+    ctx = make_ctx(tmp_path)
+    ctx.scheduler = FairScheduler(global_limit=1, per_user_limit=1)
+    ws = FakeWS()
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: 5)
+
+    async def fake_send_message(prompt, system_prompt, callback, session_id, model=None):
+        return {"success": True, "message": "ok", "token_info": None, "session_id": None}
+
+    class CL:
+        send_message = staticmethod(fake_send_message)
+
+    ctx.claude_handler = CL()
+
+    # 다른 사용자가 자리를 점유 중이면 대기 후 입장
+    holder = await ctx.scheduler.acquire(99)
+    task = asyncio.create_task(chat_actions.chat(ctx, ws, {"prompt": "p", "provider": "claude"}))
+    await asyncio.sleep(0.02)
+    assert ctx.scheduler.queued == 1
+    ctx.scheduler.release(holder)
+    await task
+
+    done = [json.loads(m) for m in ws.sent if json.loads(m)["action"] == "chat_complete"]
+    assert done and done[-1]["data"]["success"] is True
+    assert done[-1]["data"]["queue_wait_ms"] >= 10
+    assert ctx.scheduler.running == 0
+
+
+@pytest.mark.asyncio
+async def test_chat_complete_reports_prompt_size_with_token_budget(tmp_path, monkeypatch):
+    """토큰 예산 모드: 예산 기준 히스토리 윈도우 + chat_complete에 추정 프롬프트 크기"""
+    ctx = make_ctx(tmp_path)
+    ws = FakeWS()
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: 303)
+    monkeypatch.setenv("HISTORY_TOKEN_BUDGETS", "claude=30")
+    _, sess = sm.get_or_create_session(ctx, ws, 303)
+    _, room = sm.get_room(ctx, sess, None)
+    room["history"].add_user_message("아주 오래된 긴 이야기 " * 20)
+
+    captured = []
+
+    async def fake_send_message(prompt, system_prompt, callback, session_id, model=None):
+        captured.append(system_prompt)
+        return {"success": True, "message": "ok", "token_info": None}
+
+    ctx.claude_handler = type("CH", (), {"send_message": staticmethod(fake_send_message)})()
+    await chat_actions.chat(ctx, ws, {"prompt": "새 질문", "provider": "claude"})
+
+    assert "오래된" not in captured[0] and "새 질문" in captured[0]
+    done = json.loads(ws.sent[-1])["data"]
+    assert done["history_tokens_est"] == room["history"].last_window_tokens > 0
+    assert done["prompt_tokens_est"] > done["history_tokens_est"]
+
+
+@pytest.mark.asyncio
+async def test_speaker_guard_is_appended_after_prompt_prefix(tmp_path, monkeypatch):
+    ctx = make_ctx(tmp_path)
+    ws = FakeWS()
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: 108)
+    captured = []
+
+    async def send_message(prompt, system_prompt, callback, session_id, model=None):
+        captured.append(system_prompt)
+        return {"success": True, "message": "ok", "token_info": None}
+
+    ctx.claude_handler = type("CH", (), {"send_message": staticmethod(send_message)})()
+    await chat_actions.chat(ctx, ws, {"prompt": "p", "provider": "claude", "speaker": "민수"})
+
+    assert captured[0].startswith("SP:")
+    assert captured[0].rstrip().endswith("순수 대사만 출력하세요.]")
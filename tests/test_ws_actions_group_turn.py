@@ -0,0 +1,154 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from server.core import session_manager as sm
+from server.core.app_context import AppContext
+from server.core.scheduler import FairScheduler
+from server.ws.actions import group as group_actions
+
+
+class FakeWS:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, msg):
+        self.sent.append(msg)
+
+    def frames(self, action):
+        return [json.loads(m)["data"] for m in self.sent if json.loads(m)["action"] == action]
+
+
+class SlowSpeakers:
+    """화자별로 지연이 다른 가짜 프로바이더 (지시문에서 화자 이름을 읽음)"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.prompts = []
+
+    async def send_message(self, prompt, system_prompt, callback, session_id, model=None):
+        speaker = next(sp for sp in self.delays if f"[현재 화자: {sp}." in system_prompt)
+        self.prompts.append(system_prompt)
+        await callback({"type": "content_block_delta", "delta": {"text": f"{speaker} 말"}})
+        await asyncio.sleep(self.delays[speaker])
+        return {"success": True, "message": f"[{speaker}]: {speaker}의 대사"}
+
+
+def make_ctx(tmp_path, handler):
+    ctx = AppContext(
+        project_root=tmp_path,
+        bind_host="127.0.0.1",
+        login_required=False,
+        jwt_secret="s",
+        jwt_algorithm="HS256",
+        access_ttl_seconds=60,
+        refresh_ttl_seconds=120,
+        login_username="",
+        login_rate_limit_max_attempts=5,
+        login_rate_limit_window_seconds=900,
+        token_expired_grace_seconds=60,
+    )
+
+    class CH:
+        def get_context(self):
+            return {"characters": [{"name": "민수", "description": "검사"}]}
+
+        def build_system_prompt(self, history_text):
+            return f"SP:{history_text}"
+
+    ctx.context_handler = CH()
+    ctx.claude_handler = handler
+    ctx.token_usage_handler = type(
+        "T", (), {"add_usage": lambda *a, **k: None, "get_formatted_summary": lambda *a, **k: {}}
+    )()
+    return ctx
+
+
+@pytest.mark.asyncio
+async def test_group_turn_runs_speakers_concurrently_and_persists_in_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: 7)
+    handler = SlowSpeakers({"민수": 0.3, "지영": 0.1, "철수": 0.2})
+    ctx = make_ctx(tmp_path, handler)
+    ctx.scheduler = FairScheduler(global_limit=8, per_user_limit=4)
+    ws = FakeWS()
+
+    started = time.monotonic()
+    await group_actions.group_turn(
+        ctx,
+        ws,
+        {"prompt": "다들 어떻게 생각해?", "speakers": ["민수", "지영", "철수"], "room_id": "r1"},
+    )
+    elapsed = time.monotonic() - started
+    assert elapsed < 0.5  # 순차 실행(0.6초)보다 가장 느린 화자(0.3초)에 가까움
+
+    # 화자 지시문만 다르고 접두부는 공유, 프로필은 해당 화자에만 포함
+    assert all(p.startswith("SP:") for p in handler.prompts)
+    assert sum("검사" in p for p in handler.prompts) == 1
+
+    streams = ws.frames("group_stream")
+    assert {f["speaker"] for f in streams} == {"민수", "지영", "철수"}
+    finished = [f["speaker"] for f in ws.frames("group_speaker_complete")]
+    assert finished == ["지영", "철수", "민수"]  # 끝나는 순서대로 알림
+
+    done = ws.frames("group_turn_complete")[-1]
+    assert done["success"] and [r["speaker"] for r in done["results"]] == ["민수", "지영", "철수"]
+    assert done["results"][0]["message"] == "민수의 대사"  # 모델이 붙인 접두어 제거
+
+    _, sess = sm.get_or_create_session(ctx, ws, 7)
+    _, room = sm.get_room(ctx, sess, "r1")
+    assert [m["content"] for m in room["history"].get_history()] == [
+        "다들 어떻게 생각해?",
+        "[민수]: 민수의 대사",
+        "[지영]: 지영의 대사",
+        "[철수]: 철수의 대사",
+    ]
+    assert ctx.active_streams == {}
+
+
+@pytest.mark.asyncio
+async def test_group_turn_requires_speakers_and_auth(tmp_path, monkeypatch):
+    ctx = make_ctx(tmp_path, SlowSpeakers({}))
+    ws = FakeWS()
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: None)
+    await group_actions.group_turn(ctx, ws, {"speakers": ["민수"]})
+    assert ws.frames("group_turn_complete")[-1]["error"] == "인증 필요"
+
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: 7)
+    await group_actions.group_turn(ctx, ws, {"speakers": ["", None]})
+    assert ws.frames("group_turn_complete")[-1]["success"] is False
+
+
+@pytest.mark.asyncio
+async def test_group_turn_failover_releases_probe_and_drops_model(tmp_path, monkeypatch):
+    from server.core.health import HALF_OPEN, HealthRegistry
+
+    models = []
+
+    class Recorder:
+        async def send_message(self, prompt, system_prompt, callback, session_id, model=None):
+            models.append(model)
+            return {"success": True, "message": "대사"}
+
+    ctx = make_ctx(tmp_path, Recorder())
+    ctx.gemini_handler = object()
+    monkeypatch.setattr(sm, "get_user_id_from_token", lambda c, d: 7)
+    now = [1000.0]
+    ctx.health = HealthRegistry(
+        failure_threshold=1, open_seconds=10, failover={"gemini": "claude"}, clock=lambda: now[0]
+    )
+    ctx.health.record("gemini", False)
+
+    ws = FakeWS()
+    data = {"speakers": ["민수"], "provider": "gemini", "model": "gemini-2.5-flash"}
+    await group_actions.group_turn(ctx, ws, data)
+    assert models == [None]
+    assert ws.frames("group_turn_complete")[-1]["provider_used"] == "claude"
+
+    # half-open 탐색 중 동의 누락으로 조기 반환해도 슬롯은 반환
+    now[0] += 10
+    monkeypatch.setattr(group_actions, "adult_consent_missing", lambda *a: True)
+    await group_actions.group_turn(ctx, FakeWS(), {"speakers": ["민수"], "provider": "gemini"})
+    h = ctx.health.get("gemini")
+    assert h.state == HALF_OPEN and h.probes_in_flight == 0 and models == [None]
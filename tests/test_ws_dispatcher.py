@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import pytest
+
+from server.ws.dispatcher import ConnectionDispatcher
+
+
+class _Recorder:
+    """액션별로 시작/종료를 기록하고, gate가 열릴 때까지 붙잡아 두는 핸들러"""
+
+    def __init__(self):
+        self.events: list[str] = []
+        self.gates: dict[str, asyncio.Event] = {}
+
+    def gate(self, key: str) -> asyncio.Event:
+        return self.gates.setdefault(key, asyncio.Event())
+
+    async def __call__(self, data):
+        if not isinstance(data, dict):
+            self.events.append(f"raw:{data}")
+            return
+        key = data.get("id") or data.get("action")
+        self.events.append(f"start:{key}")
+        if key in self.gates:
+            await self.gates[key].wait()
+        self.events.append(f"end:{key}")
+
+
+def _msg(action, **kw):
+    return json.dumps({"action": action, **kw})
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_chat_does_not_block_other_actions():
+    rec = _Recorder()
+    rec.gate("chat1")
+    d = ConnectionDispatcher(rec)
+
+    await d.submit(_msg("chat", id="chat1", room_id="r1"))
+    await d.submit(_msg("room_list"))
+    await d.submit(_msg("get_token_usage"))
+    await _settle()
+    # 채팅이 스트리밍 중이어도 다른 액션은 순서대로 처리됨
+    assert "end:room_list" in rec.events and "end:get_token_usage" in rec.events
+    assert rec.events.index("end:room_list") < rec.events.index("start:get_token_usage")
+    assert "end:chat1" not in rec.events
+
+    rec.gates["chat1"].set()
+    await _settle()
+    assert "end:chat1" in rec.events and d.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_room_barrier_waits_for_chat_in_same_room_only():
+    rec = _Recorder()
+    rec.gate("chat1")
+    rec.gate("chat2")
+    d = ConnectionDispatcher(rec)
+
+    await d.submit(_msg("chat", id="chat1", room_id="r1"))
+    await d.submit(_msg("chat", id="chat2", room_id="r2"))
+    await d.submit(_msg("clear_history", room_id="r1"))
+    await d.submit(_msg("get_narrative", room_id="r1"))
+    await _settle()
+    # 두 방의 채팅은 동시에 진행, 같은 방의 clear_history는 채팅 종료까지 대기
+    assert "start:chat1" in rec.events and "start:chat2" in rec.events
+    assert "start:clear_history" not in rec.events
+    assert "start:get_narrative" not in rec.events
+
+    rec.gates["chat1"].set()
+    await _settle()
+    assert rec.events.index("end:chat1") < rec.events.index("start:clear_history")
+    assert rec.events.index("end:clear_history") < rec.events.index("start:get_narrative")
+    assert "end:chat2" not in rec.events
+    rec.gates["chat2"].set()
+    await _settle()
+
+
+@pytest.mark.asyncio
+async def test_chat_waits_for_preceding_main_lane_actions():
+    rec = _Recorder()
+    rec.gate("set_context")
+    d = ConnectionDispatcher(rec)
+
+    await d.submit(_msg("set_context"))
+    await d.submit(_msg("chat", id="chat1"))
+    await _settle()
+    assert "start:chat1" not in rec.events
+    rec.gates["set_context"].set()
+    await _settle()
+    assert rec.events.index("end:set_context") < rec.events.index("start:chat1")
+
+
+@pytest.mark.asyncio
+async def test_cancel_runs_inline_and_in_flight_cap_rejects():
+    rec = _Recorder()
+    rec.gate("chat1")
+    rejected = []
+
+    async def on_rejected(action):
+        rejected.append(action)
+
+    d = ConnectionDispatcher(rec, max_in_flight=1, on_rejected=on_rejected)
+    await d.submit(_msg("chat", id="chat1"))
+    await d.submit(_msg("room_list"))
+    await d.submit(_msg("cancel_stream"))
+    # cancel_stream은 줄을 서지 않고 즉시 실행
+    assert "end:cancel_stream" in rec.events
+    assert rejected == ["room_list"] and d.rejected == 1
+    rec.gates["chat1"].set()
+    await _settle()
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_pending_tasks_and_raw_messages_pass_through():
+    rec = _Recorder()
+    rec.gate("chat1")
+    d = ConnectionDispatcher(rec)
+    await d.submit("notjson")
+    assert rec.events == ["raw:notjson"]
+
+    await d.submit(_msg("chat", id="chat1"))
+    await _settle()
+    await d.close()
+    assert d.in_flight == 0
+    assert "end:chat1" not in rec.events
@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+import pytest
+
+from server.ws.stream_coalescer import StreamCoalescer, StreamStats
+
+
+class _Sink:
+    def __init__(self):
+        self.frames: list[dict] = []
+
+    async def __call__(self, frame: str):
+        self.frames.append(json.loads(frame))
+
+    @property
+    def events(self) -> list[dict]:
+        return [f["data"] for f in self.frames]
+
+
+def _delta(text):
+    return {"type": "content_block_delta", "delta": {"text": text}}
+
+
+@pytest.mark.asyncio
+async def test_consecutive_deltas_merge_into_one_frame():
+    sink, stats = _Sink(), StreamStats()
+    out = StreamCoalescer(sink, stats=stats, window_ms=1000, max_bytes=0)
+    await out.push({"type": "system", "subtype": "gemini_init", "session_id": "G1"})
+    for tok in ["안", "녕", "하", "세요"]:
+        await out.push(_delta(tok))
+    assert sink.frames == []  # 시간 창 동안 버퍼링
+    await out.close()
+
+    assert sink.events == [
+        {"type": "system", "subtype": "gemini_init", "session_id": "G1"},
+        _delta("안녕하세요"),
+    ]
+    snap = stats.snapshot()
+    assert snap["events_in"] == 5 and snap["frames_out"] == 2
+    assert snap["frames_saved"] == 3 and snap["bytes_saved_est"] > 0
+    assert snap["flushes"]["final"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cumulative_assistant_events_keep_latest_only():
+    sink = _Sink()
+    out = StreamCoalescer(sink, window_ms=1000)
+
+    def assistant(text):
+        return {"type": "assistant", "message": {"content": [{"type": "text", "text": text}]}}
+
+    await out.push(assistant("A"))
+    await out.push(assistant("AB"))
+    await out.push({"type": "result", "usage": {}})
+    await out.push(assistant("ABC"))
+    await out.close()
+    assert sink.events == [assistant("AB"), {"type": "result", "usage": {}}, assistant("ABC")]
+
+
+@pytest.mark.asyncio
+async def test_flushes_on_window_and_size():
+    sink, stats = _Sink(), StreamStats()
+    out = StreamCoalescer(sink, stats=stats, window_ms=10, max_bytes=8)
+    await out.push(_delta("ab"))
+    await asyncio.sleep(0.03)
+    assert sink.events == [_delta("ab")]
+    assert stats.flushes["window"] == 1
+
+    await out.push(_delta("cdef"))
+    await out.push(_delta("ghij"))  # 버퍼 텍스트 8자 → 즉시 flush
+    assert sink.events[-1] == _delta("cdefghij")
+    assert stats.flushes["size"] == 1
+    await out.close()
+    assert len(sink.frames) == 2
+
+
+@pytest.mark.asyncio
+async def test_zero_window_passes_through():
+    sink = _Sink()
+    out = StreamCoalescer(sink, window_ms=0)
+    await out.push(_delta("a"))
+    await out.push(_delta("b"))
+    assert sink.events == [_delta("a"), _delta("b")]
+    await out.close()
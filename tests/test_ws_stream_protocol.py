@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from server.ws.stream_coalescer import StreamCoalescer
+from server.ws.stream_protocol import DeltaNormalizer, resolve_stream_format
+
+
+def _assistant(text, usage=None):
+    message = {"content": [{"type": "text", "text": text}]}
+    if usage is not None:
+        message["usage"] = usage
+    return {"type": "assistant", "message": message, "session_id": "S1"}
+
+
+def test_claude_cumulative_text_becomes_suffix_deltas():
+    n = DeltaNormalizer("claude")
+    out = []
+    out += n.normalize({"type": "system", "subtype": "init", "session_id": "S1"})
+    out += n.normalize(_assistant("[A]: 안녕"))
+    out += n.normalize(_assistant("[A]: 안녕하세요", usage={"output_tokens": 5}))
+    out += n.normalize(_assistant("[A]: 안녕하세요", usage={"output_tokens": 5}))  # 변화 없음
+    out += n.normalize({"type": "result", "usage": {"output_tokens": 6}, "session_id": "S1"})
+
+    assert out == [
+        {"type": "session", "provider": "claude", "session_id": "S1"},
+        {"type": "text_delta", "text": "[A]: 안녕"},
+        {"type": "text_delta", "text": "하세요"},
+        {"type": "usage", "usage": {"output_tokens": 5}},
+        {"type": "usage", "usage": {"output_tokens": 6}, "final": True},
+    ]
+    assert n.text == "[A]: 안녕하세요"
+
+
+def test_rewritten_text_is_sent_as_replace():
+    n = DeltaNormalizer("claude")
+    n.normalize(_assistant("첫 메시지"))
+    assert n.normalize(_assistant("두 번째")) == [
+        {"type": "text_delta", "text": "두 번째", "replace": True}
+    ]
+
+
+def test_provider_deltas_sessions_and_errors():
+    n = DeltaNormalizer("gemini")
+    init = {"type": "system", "subtype": "gemini_init", "session_id": "G1"}
+    assert n.normalize(init) == [{"type": "session", "provider": "gemini", "session_id": "G1"}]
+    assert n.normalize(init) == []  # 같은 세션은 한 번만
+    delta = {"type": "content_block_delta", "delta": {"text": "hi"}}
+    assert n.normalize(delta) == [{"type": "text_delta", "text": "hi"}]
+    assert n.normalize({"type": "error", "message": "boom"}) == [
+        {"type": "error", "message": "boom"}
+    ]
+    assert n.normalize({"type": "tool_use", "name": "x"}) == []
+
+
+def test_long_response_bytes_drop_substantially():
+    # output_level=more 수준의 긴 응답(약 900토큰)을 누적 assistant 이벤트로 흘려보냄
+    tokens = [f"토큰{i} " for i in range(900)]
+    raw_bytes = delta_bytes = 0
+    n = DeltaNormalizer("claude")
+    text = ""
+    for tok in tokens:
+        text += tok
+        event = _assistant(text)
+        raw_bytes += len(json.dumps({"action": "chat_stream", "data": event}))
+        for out in n.normalize(event):
+            delta_bytes += len(json.dumps({"action": "chat_stream", "data": out}))
+    assert delta_bytes * 20 < raw_bytes
+
+
+def test_resolve_stream_format(monkeypatch):
+    monkeypatch.delenv("STREAM_PROTOCOL", raising=False)
+    assert resolve_stream_format({}) == "delta"
+    assert resolve_stream_format({"stream_format": "raw"}) == "raw"
+    monkeypatch.setenv("STREAM_PROTOCOL", "raw")
+    assert resolve_stream_format({}) == "raw"
+    assert resolve_stream_format({"stream_format": "delta"}) == "delta"
+    monkeypatch.setenv("STREAM_PROTOCOL", "bogus")
+    assert resolve_stream_format(None) == "delta"
+
+
+@pytest.mark.asyncio
+async def test_coalescer_merges_text_deltas_and_honours_replace():
+    frames = []
+
+    async def send(frame):
+        frames.append(json.loads(frame)["data"])
+
+    out = StreamCoalescer(send, window_ms=1000)
+    await out.push({"type": "text_delta", "text": "a"})
+    await out.push({"type": "text_delta", "text": "b"})
+    await out.push({"type": "text_delta", "text": "새로", "replace": True})
+    await out.push({"type": "text_delta", "text": "운"})
+    await out.close()
+    assert frames == [{"type": "text_delta", "text": "새로운", "replace": True}]
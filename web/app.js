@@ -18,7 +18,10 @@ import { setLastSettingsTrigger, focusLastSettingsTrigger } from './modules/ui/l
 import { setLastEditorTrigger, focusLastEditorTrigger } from './modules/ui/last_focus.js';
 import { initExportModule, openBackupModal, renderBackupScreenView, downloadRoomMd } from './modules/export/export.js';
 import { initAdminPanel, openAdminModal, closeAdminModal } from './modules/admin/admin.js';
-import { connect, sendMessage, loadAppConfig } from './modules/websocket/connection.js';
+import {
+    connect, sendMessage, loadAppConfig,
+    authenticateConnection, handleConnectionAuth, setConnectionAuthToken, negotiateCodec
+} from './modules/websocket/connection.js';
 import {
     ws, appConfig, setAppConfig,
     authRequired, setAuthRequired, isAuthenticated, setIsAuthenticated,
@@ -66,6 +69,7 @@ import {
     refreshChatRefs, addChatMessage, addCharacterMessage,
     createChatMessageElement, createCharacterMessageElement,
     sendChatMessage, handleChatStream, handleChatComplete,
+    acceptStreamSeq, resumeActiveStream, handleChatResume, handleResumeStreamFailed,
     bindChatEvents, updateChatInputState,
     updateTokenDisplay, requestStopAll
 } from './modules/chat/chat.js';
@@ -1156,9 +1160,15 @@ if (loginPasswordInput) {
 function handleMessage(msg) {
     const { action, data } = msg;
 
+    // 재연결 재전송으로 이미 받은 스트림 프레임은 건너뜀
+    if ((action === 'chat_stream' || action === 'chat_complete') && !acceptStreamSeq(msg.seq)) {
+        return;
+    }
+
     switch (action) {
         case 'connected': {
             log('서버 연결 완료', 'success');
+            negotiateCodec(data && data.codecs);
             const requiresLogin = Boolean(data && data.login_required);
             appConfig.login_required = requiresLogin;
             if (requiresLogin) {
@@ -1166,8 +1176,10 @@ function handleMessage(msg) {
                 if (authToken) {
                     setIsAuthenticated(true);
                     hideLoginModal();
+                    authenticateConnection();
                     resumePendingRoute();
                     initializeAppData();
+                    resumeActiveStream();
                 } else {
                     setIsAuthenticated(false);
                     showLoginModal();
@@ -1176,8 +1188,10 @@ function handleMessage(msg) {
                 setAuthRequired(false);
                 setIsAuthenticated(true);
                 hideLoginModal();
+                authenticateConnection();
                 resumePendingRoute();
                 initializeAppData();
+                resumeActiveStream();
             }
             break;
         }
@@ -1259,10 +1273,23 @@ function handleMessage(msg) {
             }
             break;
 
+        case 'set_codec':
+            if (data.success) log(`송신 코덱: ${data.codec}`, 'info');
+            break;
+
+        case 'auth':
+            // 연결 단위 인증 결과 (실패하면 메시지마다 토큰을 싣는 방식으로 계속 동작)
+            handleConnectionAuth(data);
+            break;
+
         case 'token_refresh':
             setRefreshInProgress(false);
             if (data.success) {
-                if (data.token) setAuthToken(data.token, data.expires_at);
+                if (data.token) {
+                    setAuthToken(data.token, data.expires_at);
+                    // 서버가 이 연결의 인증을 새 토큰으로 갱신함
+                    setConnectionAuthToken(data.token);
+                }
                 if (data.refresh_token) setRefreshToken(data.refresh_token, data.refresh_expires_at);
                 log('토큰 갱신 완료', 'success');
                 if (lastRequest) {
@@ -1407,6 +1434,15 @@ function handleMessage(msg) {
             handleChatComplete(data);
             break;
 
+        case 'chat_resume':
+            // 재전송한 chat/resume_stream이 진행 중인 스트림에 다시 연결됨 (이후 프레임 이어 받기)
+            handleChatResume(data);
+            break;
+
+        case 'resume_stream':
+            if (!data.success) handleResumeStreamFailed(data);
+            break;
+
         case 'list_workspace_files':
             if (data.success) {
                 handleFileList(data);
@@ -18,6 +18,7 @@ import {
     setUserRole,
     setIsAuthenticated
 } from '../core/state.js';
+import { clearConnectionAuth } from '../websocket/connection.js';
 
 /**
  * 인증 토큰 설정
@@ -145,6 +146,7 @@ export async function register(username, email, password) {
  * 로그아웃 처리
  */
 export function logout() {
+    clearConnectionAuth();
     clearAuthToken();
     setRefreshToken('', '');
     setIsAuthenticated(false);
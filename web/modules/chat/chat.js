@@ -34,6 +34,8 @@ let streamRenderedDuringTurn = false;
 let lastAssistantSpeaker = null;
 let lastAssistantText = '';
 let stopRequested = false;
+// 진행 중인 chat 스트림 (재연결 후 resume_stream으로 놓친 프레임부터 이어 받기)
+let activeStream = null; // { key, lastSeq }
 
 export function refreshChatRefs() {
     chatMessages = document.getElementById('chatMessages');
@@ -50,6 +52,63 @@ export function refreshChatRefs() {
     autoTurnMaxEl = document.getElementById('autoTurnMax');
 }
 
+// chat 멱등성 키 (재연결 후 재전송돼도 서버가 같은 요청으로 처리) + 이어 받기 상태 초기화
+function newIdempotencyKey() {
+    const key = (window.crypto && typeof window.crypto.randomUUID === 'function')
+        ? window.crypto.randomUUID()
+        : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    activeStream = { key, lastSeq: 0 };
+    return key;
+}
+
+/**
+ * 스트림 프레임 순번 확인 (재전송으로 이미 받은 프레임이면 false)
+ * @param {number|undefined} seq
+ * @returns {boolean}
+ */
+export function acceptStreamSeq(seq) {
+    if (!activeStream || typeof seq !== 'number') return true;
+    if (seq <= activeStream.lastSeq) return false;
+    activeStream.lastSeq = seq;
+    return true;
+}
+
+/**
+ * 재연결 후 진행 중이던 스트림 이어 받기 요청
+ */
+export function resumeActiveStream() {
+    if (!activeStream) return;
+    sendMessage({
+        action: 'resume_stream',
+        idempotency_key: activeStream.key,
+        last_seq: activeStream.lastSeq
+    }, { skipRetry: true });
+}
+
+/**
+ * chat_resume: 서버가 보낸 스냅샷으로 누적 텍스트 교체
+ * @param {object} data
+ */
+export function handleChatResume(data) {
+    if (!activeStream || data.idempotency_key !== activeStream.key) return;
+    if (typeof data.seq === 'number') activeStream.lastSeq = data.seq;
+    const singleSpeaker = isSingleSpeakerModeEnabled() && currentTurnSpeaker;
+    appendStreamText(data.partial_message || '', singleSpeaker, true);
+    log('진행 중인 응답에 다시 연결되었습니다.', 'info');
+}
+
+/**
+ * resume_stream 실패 (만료/모르는 스트림): 입력을 다시 열고 이어 받기 중단
+ * @param {object} data
+ */
+export function handleResumeStreamFailed(data) {
+    if (!activeStream || (data.idempotency_key && data.idempotency_key !== activeStream.key)) return;
+    activeStream = null;
+    removeTypingIndicator();
+    if (sendChatBtn) sendChatBtn.disabled = false;
+    log('이전 응답을 이어 받지 못했습니다. 대화 기록을 다시 불러오세요.', 'warning');
+}
+
 function isSingleSpeakerModeEnabled() {
     const el = document.getElementById('singleSpeakerMode');
     return !!(el && el.checked);
@@ -223,7 +282,8 @@ export function sendChatMessage() {
         prompt: prompt,
         provider: provider,
         model: (modelSelect && modelSelect.value) ? modelSelect.value : '',
-        speaker: payloadSpeaker || undefined
+        speaker: payloadSpeaker || undefined,
+        idempotency_key: newIdempotencyKey()
     });
 
     if (success) {
@@ -238,10 +298,57 @@ export function sendChatMessage() {
     }
 }
 
+function providerDisplayName(provider) {
+    return provider === 'gemini' ? 'Gemini' : (provider === 'droid' ? 'Droid' : 'Claude');
+}
+
+// 스트리밍 텍스트 누적 (replace면 지금까지의 텍스트를 교체)
+function appendStreamText(text, singleSpeaker, replace = false) {
+    removeTypingIndicator();
+    if (stopRequested) return;
+    let deltaText = text || '';
+    if (!deltaText && !replace) return;
+    if (singleSpeaker && currentTurnSpeaker) {
+        deltaText = stripSpeakerPrefix(deltaText, currentTurnSpeaker);
+    }
+    streamingText = replace ? deltaText : streamingText + deltaText;
+    if (singleSpeaker) {
+        if (!currentAssistantMessage) {
+            currentAssistantMessage = addCharacterMessage(currentTurnSpeaker, streamingText);
+            streamRenderedDuringTurn = true;
+        } else {
+            const contentDiv = currentAssistantMessage.querySelector('.message-content');
+            if (contentDiv) {
+                if (replace) contentDiv.textContent = streamingText;
+                else contentDiv.textContent += deltaText;
+            }
+        }
+    }
+}
+
 export function handleChatStream(data) {
     const jsonData = data;
     const singleSpeaker = isSingleSpeakerModeEnabled() && currentTurnSpeaker;
 
+    // 정규화 프로토콜 (server/ws/stream_protocol.py): text_delta/session/usage/error
+    if (jsonData.type === 'text_delta') {
+        appendStreamText(jsonData.text, singleSpeaker, Boolean(jsonData.replace));
+        return;
+    }
+    if (jsonData.type === 'session') {
+        log(`${providerDisplayName(jsonData.provider || currentProvider)} 세션 시작`, 'success');
+        return;
+    }
+    if (jsonData.type === 'usage') {
+        // 최종 사용량은 chat_complete의 token_usage로 표시
+        return;
+    }
+    if (jsonData.type === 'error') {
+        log('스트림 에러: ' + (jsonData.message || ''), 'error');
+        return;
+    }
+
+    // ===== 이하 raw 호환 모드 (CLI 이벤트 그대로) =====
     if (jsonData.type === 'system' && jsonData.subtype === 'init') {
         log('Claude Code 세션 시작', 'success');
         return;
@@ -261,26 +368,7 @@ export function handleChatStream(data) {
 
     // Droid/Gemini content_block_delta 처리
     if (jsonData.type === 'content_block_delta') {
-        removeTypingIndicator();
-
-        let deltaText = jsonData.delta?.text || '';
-        if (stopRequested) return;
-        if (deltaText) {
-            if (singleSpeaker && currentTurnSpeaker) {
-                deltaText = stripSpeakerPrefix(deltaText, currentTurnSpeaker);
-            }
-            // 스트리밍 텍스트 누적
-            streamingText += deltaText;
-            if (singleSpeaker) {
-                if (!currentAssistantMessage) {
-                    currentAssistantMessage = addCharacterMessage(currentTurnSpeaker, deltaText);
-                    streamRenderedDuringTurn = true;
-                } else {
-                    const contentDiv = currentAssistantMessage.querySelector('.message-content');
-                    if (contentDiv) contentDiv.textContent += deltaText;
-                }
-            }
-        }
+        appendStreamText(jsonData.delta?.text, singleSpeaker);
         return;
     }
 
@@ -370,6 +458,7 @@ export function handleChatStream(data) {
 export function handleChatComplete(response) {
     removeTypingIndicator();
     currentAssistantMessage = null;
+    activeStream = null;
 
     if (!chatInput) refreshChatRefs();
 
@@ -387,6 +476,9 @@ export function handleChatComplete(response) {
         const used = data.provider_used || currentProvider || 'claude';
         const label = used === 'gemini' ? 'Gemini' : (used === 'droid' ? 'Droid' : 'Claude');
         log(`${label} 응답 완료`, 'success');
+        if (data.failover_from) {
+            log(`${providerDisplayName(data.failover_from)} 장애로 ${label}(으)로 우회했습니다`, 'warning');
+        }
 
         const singleSpeaker = isSingleSpeakerModeEnabled() && currentTurnSpeaker;
         let finalAssistantText = '';
@@ -398,9 +490,9 @@ export function handleChatComplete(response) {
             return;
         }
 
-        // Droid/Gemini: 누적된 스트리밍 텍스트 처리
+        // 누적된 스트리밍 텍스트 처리 (정규화 델타 또는 Droid/Gemini raw 델타)
         if (streamingText) {
-            console.log('=== Droid/Gemini 응답 원본 ===');
+            console.log('=== 스트리밍 응답 원본 ===');
             console.log(streamingText);
 
             // 자동턴 화자 결정용 원본 텍스트 보관
@@ -465,6 +557,16 @@ export function handleChatComplete(response) {
         if (canAutoTurn()) {
             scheduleNextAutoTurn();
         }
+    } else if (data.cancelled) {
+        // 사용자 중단: 서버가 프로세스를 종료하고 부분 응답을 기록함
+        stopRequested = false;
+        streamingText = '';
+        currentTurnSpeaker = null;
+        streamRenderedDuringTurn = false;
+        if (data.token_usage) {
+            updateTokenDisplay(data.token_usage, data.provider_used || currentProvider || 'claude');
+        }
+        log('응답이 중단되었습니다.', 'info');
     } else {
         log('채팅 에러: ' + data.error, 'error');
         // 인증 에러인 경우 토큰 갱신 시도 이벤트 발행
@@ -738,7 +840,8 @@ function sendAutoTurn() {
         provider,
         model: (modelSelect && modelSelect.value) ? modelSelect.value : '',
         speaker: payloadSpeaker,
-        auto_turn: true
+        auto_turn: true,
+        idempotency_key: newIdempotencyKey()
     });
 
     if (success) {
@@ -23,6 +23,11 @@ import {
     tokenRefreshTimeout
 } from '../core/state.js';
 import { SESSION_KEY_KEY, ROOMS_KEY, CURRENT_ROOM_KEY, RETRY_ACTIONS } from '../core/constants.js';
+import { decodeMsgpack } from './msgpack.js';
+
+// 연결 단위 인증: auth 핸드셰이크에 성공한 토큰 (같은 토큰이면 메시지마다 싣지 않음)
+let connectionAuthToken = '';
+let pendingAuthToken = '';
 
 /**
  * WebSocket URL 생성
@@ -72,6 +77,8 @@ export function connect(callbacks = {}) {
     log(`연결 시도: ${wsUrl}`);
 
     const newWs = new WebSocket(wsUrl);
+    // set_codec으로 바이너리 코덱을 협상하면 서버 프레임이 ArrayBuffer로 도착
+    newWs.binaryType = 'arraybuffer';
     setWs(newWs);
 
     newWs.onopen = () => {
@@ -99,7 +106,9 @@ export function connect(callbacks = {}) {
     };
 
     newWs.onmessage = (event) => {
-        const message = JSON.parse(event.data);
+        const message = typeof event.data === 'string'
+            ? JSON.parse(event.data)
+            : decodeMsgpack(event.data);
         if (onMessage) onMessage(message);
     };
 
@@ -110,6 +119,8 @@ export function connect(callbacks = {}) {
 
     newWs.onclose = () => {
         updateStatus('disconnected', '연결 끊김');
+        connectionAuthToken = '';
+        pendingAuthToken = '';
         log('연결이 끊어졌습니다. 5초 후 재연결...', 'error');
 
         // 인증 및 재연결 상태 리셋
@@ -137,6 +148,51 @@ export function connect(callbacks = {}) {
     };
 }
 
+/**
+ * 송신 코덱 협상 (app-config의 ws_codec을 서버가 지원할 때만)
+ * @param {string[]} serverCodecs - connected 응답의 codecs
+ */
+export function negotiateCodec(serverCodecs) {
+    const codec = appConfig.ws_codec || 'json';
+    if (codec === 'json' || !Array.isArray(serverCodecs) || !serverCodecs.includes(codec)) return;
+    sendMessage({ action: 'set_codec', codec }, { skipToken: true, skipRetry: true });
+}
+
+/**
+ * 연결 인증 핸드셰이크 (성공하면 이후 메시지에서 토큰 생략)
+ */
+export function authenticateConnection() {
+    if (!authToken) return;
+    pendingAuthToken = authToken;
+    sendMessage({ action: 'auth' }, { skipRetry: true });
+}
+
+/**
+ * auth 응답 처리
+ * @param {object} data
+ */
+export function handleConnectionAuth(data) {
+    connectionAuthToken = (data && data.success) ? pendingAuthToken : '';
+    pendingAuthToken = '';
+}
+
+/**
+ * 서버가 연결 인증을 갱신한 토큰 기록 (token_refresh 성공 시)
+ * @param {string} token
+ */
+export function setConnectionAuthToken(token) {
+    connectionAuthToken = token || '';
+}
+
+/**
+ * 로그아웃 시 연결 인증 해제 (토큰 없는 auth는 서버에서 인증을 풂)
+ */
+export function clearConnectionAuth() {
+    if (!connectionAuthToken) return;
+    connectionAuthToken = '';
+    sendMessage({ action: 'auth' }, { skipToken: true, skipRetry: true });
+}
+
 /**
  * 메시지 전송
  * @param {object} payload
@@ -155,8 +211,8 @@ export function sendMessage(payload, options = {}) {
 
     const message = { ...payload };
 
-    // 인증 토큰 주입 (options.skipToken이 true가 아닌 경우)
-    if (!options.skipToken && authToken) {
+    // 인증 토큰 주입 (options.skipToken이 true가 아닌 경우, 연결이 같은 토큰으로 인증됐으면 생략)
+    if (!options.skipToken && authToken && authToken !== connectionAuthToken) {
         message.token = authToken;
     }
 
@@ -167,7 +223,7 @@ export function sendMessage(payload, options = {}) {
 
     // 방 ID가 필요한 액션들
     const ACTIONS_WITH_ROOM = new Set([
-        'chat', 'get_history_snapshot', 'clear_history',
+        'chat', 'group_turn', 'get_history_snapshot', 'clear_history',
         'get_history_settings', 'set_history_limit', 'get_narrative'
     ]);
 
@@ -0,0 +1,78 @@
+/**
+ * MessagePack 디코더 (서버 → 클라이언트 바이너리 프레임용, 인코딩은 하지 않음)
+ * 서버가 보내는 JSON 호환 타입(nil/bool/int/float/str/bin/array/map)만 지원합니다.
+ * @module websocket/msgpack
+ */
+
+const textDecoder = new TextDecoder('utf-8');
+
+/**
+ * ArrayBuffer → 값
+ * @param {ArrayBuffer} buffer
+ * @returns {any}
+ */
+export function decodeMsgpack(buffer) {
+    const view = new DataView(buffer);
+    const bytes = new Uint8Array(buffer);
+    let pos = 0;
+
+    function str(length) {
+        const value = textDecoder.decode(bytes.subarray(pos, pos + length));
+        pos += length;
+        return value;
+    }
+
+    function array(length) {
+        const out = new Array(length);
+        for (let i = 0; i < length; i++) out[i] = read();
+        return out;
+    }
+
+    function map(length) {
+        const out = {};
+        for (let i = 0; i < length; i++) {
+            const key = read();
+            out[key] = read();
+        }
+        return out;
+    }
+
+    function read() {
+        const byte = bytes[pos++];
+        if (byte <= 0x7f) return byte;
+        if (byte >= 0xe0) return byte - 0x100;
+        if ((byte & 0xf0) === 0x80) return map(byte & 0x0f);
+        if ((byte & 0xf0) === 0x90) return array(byte & 0x0f);
+        if ((byte & 0xe0) === 0xa0) return str(byte & 0x1f);
+        let value;
+        switch (byte) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: { const n = bytes[pos++]; value = bytes.slice(pos, pos + n); pos += n; return value; }
+            case 0xc5: { const n = view.getUint16(pos); pos += 2; value = bytes.slice(pos, pos + n); pos += n; return value; }
+            case 0xc6: { const n = view.getUint32(pos); pos += 4; value = bytes.slice(pos, pos + n); pos += n; return value; }
+            case 0xca: value = view.getFloat32(pos); pos += 4; return value;
+            case 0xcb: value = view.getFloat64(pos); pos += 8; return value;
+            case 0xcc: return bytes[pos++];
+            case 0xcd: value = view.getUint16(pos); pos += 2; return value;
+            case 0xce: value = view.getUint32(pos); pos += 4; return value;
+            case 0xcf: value = Number(view.getBigUint64(pos)); pos += 8; return value;
+            case 0xd0: value = view.getInt8(pos); pos += 1; return value;
+            case 0xd1: value = view.getInt16(pos); pos += 2; return value;
+            case 0xd2: value = view.getInt32(pos); pos += 4; return value;
+            case 0xd3: value = Number(view.getBigInt64(pos)); pos += 8; return value;
+            case 0xd9: { const n = bytes[pos++]; return str(n); }
+            case 0xda: { const n = view.getUint16(pos); pos += 2; return str(n); }
+            case 0xdb: { const n = view.getUint32(pos); pos += 4; return str(n); }
+            case 0xdc: { const n = view.getUint16(pos); pos += 2; return array(n); }
+            case 0xdd: { const n = view.getUint32(pos); pos += 4; return array(n); }
+            case 0xde: { const n = view.getUint16(pos); pos += 2; return map(n); }
+            case 0xdf: { const n = view.getUint32(pos); pos += 4; return map(n); }
+            default:
+                throw new Error(`msgpack: 지원하지 않는 타입 0x${byte.toString(16)}`);
+        }
+    }
+
+    return read();
+}